@@ -0,0 +1,234 @@
+/*
+* Copyright(c) 2026 Unvertical
+* SPDX-License-Identifier: BSD-3-Clause
+*/
+
+#define _GNU_SOURCE
+#include <stdbool.h>
+#include <stdlib.h>
+#include <string.h>
+#include <ctype.h>
+#include <errno.h>
+#include <fcntl.h>
+#include <unistd.h>
+#include <sys/mman.h>
+#include <sys/types.h>
+#include <sys/wait.h>
+#include "batch.h"
+
+#define BATCH_COPY_BUF_SIZE 4096
+
+static bool batch_is_space(char c)
+{
+	return isspace((unsigned char)c);
+}
+
+int batch_split_args(char *line, const char **argv, int max_args)
+{
+	char *src = line, *dst = line;
+	bool end = false;
+	int argc = 0;
+
+	while (!end) {
+		while (batch_is_space(*src))
+			src++;
+
+		if (!*src)
+			break;
+
+		if (argc == max_args)
+			return -1;
+
+		argv[argc++] = dst;
+
+		while (*src && !batch_is_space(*src)) {
+			if (*src == '\'') {
+				src++;
+				while (*src && *src != '\'')
+					*dst++ = *src++;
+				if (!*src)
+					return -1;
+				src++;
+			} else if (*src == '"') {
+				src++;
+				while (*src && *src != '"') {
+					if (*src == '\\' && src[1] &&
+							strchr("\"\\$`", src[1])) {
+						src++;
+					}
+					*dst++ = *src++;
+				}
+				if (!*src)
+					return -1;
+				src++;
+			} else if (*src == '\\' && src[1]) {
+				src++;
+				*dst++ = *src++;
+			} else {
+				*dst++ = *src++;
+			}
+		}
+
+		/* src points to separator or to end of line, so it has to be
+		 * consumed before argument terminator overwrites it */
+		end = !*src;
+		if (!end)
+			src++;
+		*dst++ = '\0';
+	}
+
+	return argc;
+}
+
+/**
+ * run single command in child process with stdout and stderr redirected
+ * to capture files, so that exit paths and global state of command
+ * handlers don't affect batch process.
+ *
+ * @return exit code of command, 128 + signal number if it was killed
+ *	or -1 on failure
+ */
+static int batch_exec(app *app_values, cli_command *commands, int argc,
+		const char **argv, int out_fd, int err_fd)
+{
+	int status, null_fd;
+	pid_t pid;
+
+	fflush(stdout);
+	fflush(stderr);
+
+	pid = fork();
+	if (pid < 0)
+		return -1;
+
+	if (pid == 0) {
+		null_fd = open("/dev/null", O_RDONLY);
+		if (null_fd < 0 || dup2(null_fd, STDIN_FILENO) < 0 ||
+				dup2(out_fd, STDOUT_FILENO) < 0 ||
+				dup2(err_fd, STDERR_FILENO) < 0) {
+			_exit(FAILURE);
+		}
+
+		status = args_parse(app_values, commands, argc, argv);
+
+		fflush(stdout);
+		fflush(stderr);
+		_exit(status);
+	}
+
+	while (waitpid(pid, &status, 0) < 0) {
+		if (errno != EINTR)
+			return -1;
+	}
+
+	if (WIFEXITED(status))
+		return WEXITSTATUS(status);
+
+	return 128 + WTERMSIG(status);
+}
+
+static off_t batch_captured_size(int fd)
+{
+	return lseek(fd, 0, SEEK_END);
+}
+
+/**
+ * copy whole capture file to output and truncate it for next command
+ */
+static int batch_flush_capture(int fd, FILE *out)
+{
+	char buf[BATCH_COPY_BUF_SIZE];
+	ssize_t len;
+
+	if (lseek(fd, 0, SEEK_SET) < 0)
+		return FAILURE;
+
+	while ((len = read(fd, buf, sizeof(buf))) != 0) {
+		if (len < 0) {
+			if (errno == EINTR)
+				continue;
+			return FAILURE;
+		}
+		if (fwrite(buf, 1, len, out) != (size_t)len)
+			return FAILURE;
+	}
+
+	if (ftruncate(fd, 0) || lseek(fd, 0, SEEK_SET) < 0)
+		return FAILURE;
+
+	return SUCCESS;
+}
+
+static int batch_put_result(FILE *out, int status, int out_fd, int err_fd)
+{
+	off_t out_len = batch_captured_size(out_fd);
+	off_t err_len = batch_captured_size(err_fd);
+
+	if (out_len < 0 || err_len < 0)
+		return FAILURE;
+
+	if (fprintf(out, "result %d %lld %lld\n", status,
+			(long long)out_len, (long long)err_len) < 0) {
+		return FAILURE;
+	}
+
+	if (batch_flush_capture(out_fd, out) || batch_flush_capture(err_fd, out))
+		return FAILURE;
+
+	return fflush(out) ? FAILURE : SUCCESS;
+}
+
+int batch_run(app *app_values, cli_command *commands, FILE *in, FILE *out)
+{
+	const char *argv[BATCH_MAX_ARGS + 2];
+	int argc, status, result = SUCCESS;
+	int out_fd = -1, err_fd = -1;
+	size_t size = 0;
+	char *line = NULL;
+
+	out_fd = memfd_create("casadm-batch-stdout", MFD_CLOEXEC);
+	err_fd = memfd_create("casadm-batch-stderr", MFD_CLOEXEC);
+	if (out_fd < 0 || err_fd < 0) {
+		result = FAILURE;
+		goto out;
+	}
+
+	if (fputs("ready\n", out) < 0 || fflush(out)) {
+		result = FAILURE;
+		goto out;
+	}
+
+	while (getline(&line, &size, in) >= 0) {
+		argv[0] = app_values->name;
+		argc = batch_split_args(line, argv + 1, BATCH_MAX_ARGS);
+		if (argc == 0)
+			continue;
+
+		if (argc < 0) {
+			dprintf(err_fd, "Invalid command line.\n");
+			status = FAILURE;
+		} else {
+			argv[argc + 1] = NULL;
+			status = batch_exec(app_values, commands, argc + 1, argv,
+					out_fd, err_fd);
+			if (status < 0) {
+				result = FAILURE;
+				break;
+			}
+		}
+
+		if (batch_put_result(out, status, out_fd, err_fd)) {
+			result = FAILURE;
+			break;
+		}
+	}
+
+out:
+	free(line);
+	if (out_fd >= 0)
+		close(out_fd);
+	if (err_fd >= 0)
+		close(err_fd);
+
+	return result;
+}
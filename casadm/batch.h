@@ -0,0 +1,49 @@
+/*
+* Copyright(c) 2026 Unvertical
+* SPDX-License-Identifier: BSD-3-Clause
+*/
+
+#ifndef __BATCH_H__
+#define __BATCH_H__
+
+#include <stdio.h>
+#include "argp.h"
+
+/** maximum number of arguments in single batch command line */
+#define BATCH_MAX_ARGS 256
+
+/**
+ * @brief split batch command line into arguments in place
+ *
+ * Arguments are separated by whitespace and may be quoted the same way
+ * as in POSIX shell: with single quotes, double quotes (where backslash
+ * escapes '"', '\\', '$' and '`') or by escaping single character
+ * with backslash.
+ *
+ * @param line command line, modified in place
+ * @param argv array of at least max_args pointers to fill with arguments
+ * @param max_args size of argv array
+ * @return number of arguments or -1 on unterminated quote or too many arguments
+ */
+int batch_split_args(char *line, const char **argv, int max_args);
+
+/**
+ * @brief execute commands read line by line from input
+ *
+ * Each command is run in a child process forked from this one, with its
+ * standard output and error captured. Command handlers call exit() on
+ * errors and keep parsed options in global state, so they can't run in
+ * batch process itself; fork still saves exec, dynamic linking and startup
+ * of new casadm process. Control device held by caller with
+ * hold_ctrl_device() is shared by all commands. Line "ready" is written
+ * to output before the first command is read, then for each non-empty
+ * input line single result is written:
+ *
+ *     result <exit code> <stdout length> <stderr length>\n
+ *     <stdout><stderr>
+ *
+ * @return SUCCESS after end of input, FAILURE on internal error
+ */
+int batch_run(app *app_values, cli_command *commands, FILE *in, FILE *out);
+
+#endif
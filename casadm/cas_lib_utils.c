@@ -143,10 +143,38 @@ void set_safe_lib_constraint_handler()
 	set_str_constraint_handler_s(safe_lib_constraint_handler);
 }
 
+/*!< control device kept open by hold_ctrl_device(), -1 if none */
+static int held_ctrl_fd = -1;
+
+/**
+ * keeps control device open, so that open_ctrl_device() only duplicates
+ * descriptor (also in forked processes) until release_ctrl_device()
+ */
+int hold_ctrl_device()
+{
+	if (held_ctrl_fd < 0)
+		held_ctrl_fd = open(CTRL_DEV_PATH, O_CLOEXEC);
+
+	return held_ctrl_fd < 0 ? FAILURE : SUCCESS;
+}
+
+void release_ctrl_device()
+{
+	if (held_ctrl_fd >= 0)
+		close(held_ctrl_fd);
+	held_ctrl_fd = -1;
+}
+
 int _open_ctrl_device(int quiet)
 {
-	int fd;
-	fd = open(CTRL_DEV_PATH, 0);
+	int fd = -1;
+
+	/* control device keeps no per-open state, so duplicate of held
+	 * descriptor serves as well as newly opened one */
+	if (held_ctrl_fd >= 0)
+		fd = dup(held_ctrl_fd);
+	if (fd < 0)
+		fd = open(CTRL_DEV_PATH, 0);
 
 	if (fd < 0) {
 		if (!quiet) {
@@ -34,6 +34,8 @@ int run_ioctl_interruptible(int fd, int command, void *cmd,
 int run_ioctl_interruptible_retry(int fd, int command, void *cmd,
 		char *friendly_name, int cache_id, int core_id);
 int open_ctrl_device();
+int hold_ctrl_device();
+void release_ctrl_device();
 int was_ioctl_interrupted();
 void set_default_sig_handler();
 void set_safe_lib_constraint_handler();
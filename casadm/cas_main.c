@@ -25,6 +25,7 @@
 #include "safeclib/safe_str_lib.h"
 #include <cas_ioctl_codes.h>
 #include "statistics_view.h"
+#include "batch.h"
 
 #define DIV_ROUND_UP(n, d) (((n) + (d) - 1) / (d))
 
@@ -2139,6 +2140,7 @@ static int handle_version(void)
 }
 
 static int handle_help();
+static int handle_batch();
 
 /*******************************************************************************
  * Standby commands
@@ -2669,6 +2671,21 @@ static cli_command cas_commands[] = {
 			.handle = handle_help,
 			.help = NULL
 		},
+		{
+			.name = "batch",
+			.desc = "Execute commands read from standard input",
+			.long_desc = "Execute commands read line by line from standard input. "
+				"Line 'ready' is printed before the first command is read. "
+				"For each command its exit code and lengths of its standard "
+				"output and error are printed in a line "
+				"'result <exit code> <stdout length> <stderr length>', "
+				"followed by the output itself.",
+			.options = NULL,
+			.command_handle_opts = NULL,
+			.flags = 0,
+			.handle = handle_batch,
+			.help = NULL
+		},
 		{
 			.name = "standby",
 			.desc = "Manage failover standby",
@@ -2716,6 +2733,26 @@ static int handle_help()
 	return 0;
 }
 
+static int handle_batch()
+{
+	app app_values;
+	int result;
+	app_values.name = MAN_PAGE;
+	app_values.info = "<command> [option...]";
+	app_values.title = HELP_HEADER;
+	app_values.doc = HELP_FOOTER;
+	app_values.man = MAN_PAGE;
+	app_values.block = 0;
+
+	/* commands are run in forked processes, which then duplicate
+	 * control device descriptor held here instead of opening it again */
+	hold_ctrl_device();
+	result = batch_run(&app_values, cas_commands, stdin, stdout);
+	release_ctrl_device();
+
+	return result;
+}
+
 int main(int argc, const char *argv[])
 {
 	int blocked = 0;
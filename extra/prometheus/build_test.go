@@ -0,0 +1,43 @@
+/*
+ * Copyright(c) 2026 Unvertical
+ * SPDX-License-Identifier: BSD-3-Clause
+ */
+
+package main
+
+import (
+	"debug/elf"
+	"os/exec"
+	"path/filepath"
+	"strings"
+	"testing"
+)
+
+// The exporter is installed to /usr/bin and libopencas.so to /usr/lib/opencas,
+// which is off the loader path, so the exporter has to start without it.
+func TestExporterBuild(t *testing.T) {
+	path := filepath.Join(t.TempDir(), "opencas_exporter")
+	if out, err := exec.Command("go", "build", "-o", path, ".").CombinedOutput(); err != nil {
+		t.Fatalf("go build failed: %v\n%s", err, out)
+	}
+
+	binary, err := elf.Open(path)
+	if err != nil {
+		t.Fatal(err)
+	}
+	defer binary.Close()
+
+	libs, err := binary.ImportedLibraries()
+	if err != nil {
+		t.Fatal(err)
+	}
+	for _, lib := range libs {
+		if strings.HasPrefix(lib, "libopencas") {
+			t.Errorf("exporter depends on %s", lib)
+		}
+	}
+
+	if out, err := exec.Command(path, "-h").CombinedOutput(); err != nil {
+		t.Fatalf("exporter doesn't start: %v\n%s", err, out)
+	}
+}
@@ -12,6 +12,7 @@ import "C"
 import (
 	"fmt"
 	"log"
+	"sync"
 	"time"
 
 	"github.com/prometheus/client_golang/prometheus"
@@ -19,6 +20,10 @@ import (
 
 // Collector implements prometheus.Collector and fetches CAS state on each scrape.
 type Collector struct {
+	// Scrapes may run concurrently, dumper serves one at a time
+	mu     sync.Mutex
+	dumper *Dumper
+
 	up             *prometheus.Desc
 	scrapeDuration *prometheus.Desc
 
@@ -255,6 +260,8 @@ var (
 
 func NewCollector() *Collector {
 	return &Collector{
+		dumper: NewDumper(),
+
 		up:             prometheus.NewDesc("opencas_up", "Whether the Open CAS netlink interface is reachable", nil, nil),
 		scrapeDuration: prometheus.NewDesc("opencas_scrape_duration_seconds", "Time spent collecting metrics from the kernel", nil, nil),
 
@@ -330,8 +337,11 @@ func (c *Collector) Describe(ch chan<- *prometheus.Desc) {
 }
 
 func (c *Collector) Collect(ch chan<- prometheus.Metric) {
+	c.mu.Lock()
+	defer c.mu.Unlock()
+
 	t0 := time.Now()
-	result, err := Dump()
+	result, err := c.dumper.Dump()
 	duration := time.Since(t0).Seconds()
 
 	ch <- prometheus.MustNewConstMetric(c.scrapeDuration, prometheus.GaugeValue, duration)
@@ -341,14 +351,13 @@ func (c *Collector) Collect(ch chan<- prometheus.Metric) {
 		ch <- prometheus.MustNewConstMetric(c.up, prometheus.GaugeValue, 0)
 		return
 	}
-	defer result.Free()
 
 	ch <- prometheus.MustNewConstMetric(c.up, prometheus.GaugeValue, 1)
 
 	for i := range result.Caches {
 		ca := &result.Caches[i]
 		cid := fmt.Sprintf("%d", ca.id)
-		path := cStr(ca.path[:])
+		path := result.Str(ca.path)
 		shortPath := resolveDevPath(path)
 		labels := []string{cid, shortPath, path}
 
@@ -380,7 +389,7 @@ func (c *Collector) Collect(ch chan<- prometheus.Metric) {
 		co := &result.Cores[i]
 		cid := fmt.Sprintf("%d", co.cache_id)
 		oid := fmt.Sprintf("%d", co.id)
-		path := cStr(co.path[:])
+		path := result.Str(co.path)
 		shortPath := resolveDevPath(path)
 		labels := []string{cid, oid, shortPath, path}
 
@@ -402,7 +411,7 @@ func (c *Collector) Collect(ch chan<- prometheus.Metric) {
 		io := &result.IOClasses[i]
 		cid := fmt.Sprintf("%d", io.cache_id)
 		oid := fmt.Sprintf("%d", io.id)
-		name := cStr(io.name[:])
+		name := result.Str(io.name)
 		labels := []string{cid, oid, name}
 
 		ch <- prometheus.MustNewConstMetric(c.ioclassInfo, prometheus.GaugeValue, 1,
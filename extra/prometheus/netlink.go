@@ -7,7 +7,10 @@ package main
 
 /*
 #cgo CFLAGS: -I../../libopencas -I../../modules/include
-#cgo LDFLAGS: -L../../libopencas -lopencas
+// libopencas.so is installed to /usr/lib/opencas, off the loader path, so
+// the exporter embeds the static archive instead
+#cgo LDFLAGS: -L../../libopencas -l:libopencas.a
+#include <stdlib.h>
 #include <string.h>
 #include "libopencas.h"
 */
@@ -30,21 +33,40 @@ func resolveDevPath(path string) string {
 	return resolved
 }
 
+// DumpResult holds compact records of one dump. Paths and names are offsets
+// resolved with Str. It's valid until the next Dump of its Dumper.
 type DumpResult struct {
-	Caches    []C.struct_cas_nl_cache
-	Cores     []C.struct_cas_nl_core
-	IOClasses []C.struct_cas_nl_ioclass
+	Caches    []C.struct_cas_nl_compact_cache
+	Cores     []C.struct_cas_nl_compact_core
+	IOClasses []C.struct_cas_nl_compact_ioclass
+	CorePool  []C.struct_cas_nl_compact_pool_core
+	dump      *C.struct_cas_nl_compact_dump
 }
 
-func Dump() (*DumpResult, error) {
-	var cr C.struct_cas_nl_dump_result
+// Dumper keeps libopencas dump storage and netlink socket between dumps, so
+// that periodic scrapes don't allocate. It's not safe for concurrent use.
+type Dumper struct {
+	dump *C.struct_cas_nl_compact_dump
+}
+
+func NewDumper() *Dumper {
+	return &Dumper{
+		dump: (*C.struct_cas_nl_compact_dump)(C.calloc(1, C.sizeof_struct_cas_nl_compact_dump)),
+	}
+}
 
-	ret := C.cas_nl_dump(&cr)
+func (d *Dumper) Dump() (*DumpResult, error) {
+	if d.dump == nil {
+		return nil, fmt.Errorf("cas_nl_compact_dump: out of memory")
+	}
+
+	ret := C.cas_nl_compact_dump(nil, d.dump)
 	if ret != 0 {
-		return nil, fmt.Errorf("cas_nl_dump: %s", C.GoString(C.strerror(-ret)))
+		return nil, fmt.Errorf("cas_nl_compact_dump: %s", C.GoString(C.strerror(-ret)))
 	}
 
-	result := &DumpResult{}
+	cr := d.dump
+	result := &DumpResult{dump: cr}
 
 	if cr.num_caches > 0 {
 		result.Caches = unsafe.Slice(cr.caches, cr.num_caches)
@@ -55,28 +77,16 @@ func Dump() (*DumpResult, error) {
 	if cr.num_ioclasses > 0 {
 		result.IOClasses = unsafe.Slice(cr.ioclasses, cr.num_ioclasses)
 	}
+	if cr.num_core_pool > 0 {
+		result.CorePool = unsafe.Slice(cr.core_pool, cr.num_core_pool)
+	}
 
 	return result, nil
 }
 
-func (r *DumpResult) Free() {
-	if r == nil {
-		return
-	}
-	var cr C.struct_cas_nl_dump_result
-	if len(r.Caches) > 0 {
-		cr.caches = &r.Caches[0]
-	}
-	if len(r.Cores) > 0 {
-		cr.cores = &r.Cores[0]
-	}
-	if len(r.IOClasses) > 0 {
-		cr.ioclasses = &r.IOClasses[0]
-	}
-	C.cas_nl_dump_free(&cr)
-	r.Caches = nil
-	r.Cores = nil
-	r.IOClasses = nil
+// Str returns string of the dump string table at offset
+func (r *DumpResult) Str(offset C.uint32_t) string {
+	return C.GoString(C.cas_nl_compact_str(r.dump, offset))
 }
 
 // String helpers for labels
@@ -119,14 +129,3 @@ func SeqCutoffPolicyStr(p uint8) string {
 	if int(p) < len(names) { return names[p] }
 	return "unknown"
 }
-
-// C string helper
-func cStr(arr []C.char) string {
-	// Find NUL terminator
-	for i, c := range arr {
-		if c == 0 {
-			return C.GoStringN((*C.char)(unsafe.Pointer(&arr[0])), C.int(i))
-		}
-	}
-	return C.GoStringN((*C.char)(unsafe.Pointer(&arr[0])), C.int(len(arr)))
-}
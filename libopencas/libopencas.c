@@ -69,20 +69,6 @@ static uint64_t nla_get_u64(struct nlattr *nla)
 	return val;
 }
 
-static void nla_get_str(struct nlattr *nla, char *dst, size_t dst_size)
-{
-	int len = nla_len(nla);
-
-	if (len <= 0) {
-		dst[0] = '\0';
-		return;
-	}
-	if ((size_t)len >= dst_size)
-		len = dst_size - 1;
-	memcpy(dst, nla_data(nla), len);
-	dst[len] = '\0';
-}
-
 #define nla_for_each(pos, remaining) \
 	for (; nla_ok(pos, remaining); pos = nla_next(pos, &(remaining)))
 
@@ -200,11 +186,27 @@ static int nl_resolve_family(struct nl_ctx *ctx, const char *name)
 	return -ENOENT;
 }
 
-static int nl_send_dump_request(struct nl_ctx *ctx)
+/* Caller makes sure that the attribute fits in the message buffer */
+static void nl_put_attr(struct nlmsghdr *nlh, uint16_t type,
+			const void *data, int len)
+{
+	struct nlattr *nla;
+
+	nla = (struct nlattr *)((char *)nlh + NLMSG_ALIGN(nlh->nlmsg_len));
+	nla->nla_type = type;
+	nla->nla_len = NLA_HDRLEN + len;
+	memcpy(nla_data(nla), data, len);
+	nlh->nlmsg_len = NLMSG_ALIGN(nlh->nlmsg_len) + NLA_ALIGN(nla->nla_len);
+}
+
+static int nl_send_dump_request(struct nl_ctx *ctx,
+				const struct cas_nl_dump_filter *filter)
 {
 	char buf[256];
 	struct nlmsghdr *nlh;
 	struct genlmsghdr *genl;
+	uint16_t id16;
+	uint32_t id32;
 
 	memset(buf, 0, sizeof(buf));
 	nlh = (struct nlmsghdr *)buf;
@@ -216,9 +218,168 @@ static int nl_send_dump_request(struct nl_ctx *ctx)
 	genl->cmd = CAS_NL_CMD_DUMP;
 	genl->version = CAS_NL_FAMILY_VERSION;
 
+	if (!filter)
+		return nl_send(ctx, nlh);
+
+	/* Defaults are not sent, so that unfiltered dump works with any module */
+	if (filter->cache_id != CAS_NL_DUMP_ANY) {
+		id16 = filter->cache_id;
+		nl_put_attr(nlh, CAS_NL_A_FILTER_CACHE_ID, &id16, sizeof(id16));
+	}
+	if (filter->core_id != CAS_NL_DUMP_ANY) {
+		id16 = filter->core_id;
+		nl_put_attr(nlh, CAS_NL_A_FILTER_CORE_ID, &id16, sizeof(id16));
+	}
+	if (filter->ioclass_id != CAS_NL_DUMP_ANY) {
+		id32 = filter->ioclass_id;
+		nl_put_attr(nlh, CAS_NL_A_FILTER_IO_CLASS_ID, &id32,
+			    sizeof(id32));
+	}
+	if (filter->records != CAS_NL_RECORD_ALL) {
+		nl_put_attr(nlh, CAS_NL_A_FILTER_RECORDS, &filter->records,
+			    sizeof(filter->records));
+	}
+	if (filter->sections != CAS_NL_SECTION_ALL) {
+		nl_put_attr(nlh, CAS_NL_A_FILTER_SECTIONS, &filter->sections,
+			    sizeof(filter->sections));
+	}
+
 	return nl_send(ctx, nlh);
 }
 
+/* String table */
+
+#define STRING_TABLE_MIN_SIZE	4096
+#define STRING_TABLE_MIN_SLOTS	64
+
+/*
+ * Strings are interned - each distinct string is stored once. Slots hash
+ * offsets of stored strings, 0 (offset of the empty string) marks a free
+ * slot.
+ */
+struct string_table {
+	char *data;
+	uint32_t size;
+	uint32_t capacity;
+	uint32_t *slots;
+	uint32_t num_slots;
+	uint32_t used;
+};
+
+static uint32_t string_hash(const char *str, size_t len)
+{
+	uint32_t hash = 2166136261u;
+	size_t i;
+
+	for (i = 0; i < len; i++) {
+		hash ^= (uint8_t)str[i];
+		hash *= 16777619u;
+	}
+	return hash;
+}
+
+static uint32_t *string_table_find(struct string_table *t,
+				   const char *str, size_t len)
+{
+	uint32_t mask = t->num_slots - 1;
+	uint32_t i = string_hash(str, len) & mask;
+
+	while (t->slots[i]) {
+		const char *s = t->data + t->slots[i];
+
+		if (strncmp(s, str, len) == 0 && s[len] == '\0')
+			break;
+		i = (i + 1) & mask;
+	}
+	return &t->slots[i];
+}
+
+static int string_table_rehash(struct string_table *t)
+{
+	uint32_t *old_slots = t->slots;
+	uint32_t old_num_slots = t->num_slots;
+	uint32_t i, num_slots;
+
+	num_slots = old_num_slots ? old_num_slots * 2 : STRING_TABLE_MIN_SLOTS;
+	t->slots = calloc(num_slots, sizeof(*t->slots));
+	if (!t->slots) {
+		t->slots = old_slots;
+		return -ENOMEM;
+	}
+	t->num_slots = num_slots;
+
+	for (i = 0; i < old_num_slots; i++) {
+		const char *s = t->data + old_slots[i];
+
+		if (old_slots[i])
+			*string_table_find(t, s, strlen(s)) = old_slots[i];
+	}
+
+	free(old_slots);
+	return 0;
+}
+
+static int string_table_reset(struct string_table *t)
+{
+	if (!t->data) {
+		t->data = malloc(STRING_TABLE_MIN_SIZE);
+		if (!t->data)
+			return -ENOMEM;
+		t->capacity = STRING_TABLE_MIN_SIZE;
+	}
+	if (!t->slots && string_table_rehash(t))
+		return -ENOMEM;
+
+	t->data[0] = '\0';
+	t->size = 1;
+	memset(t->slots, 0, t->num_slots * sizeof(*t->slots));
+	t->used = 0;
+	return 0;
+}
+
+static int string_table_add(struct string_table *t, struct nlattr *nla,
+			    uint32_t *offset)
+{
+	const char *str = nla_data(nla);
+	size_t len = nla_len(nla) > 0 ? strnlen(str, nla_len(nla)) : 0;
+	uint32_t *slot;
+
+	if (len == 0) {
+		*offset = 0;
+		return 0;
+	}
+
+	if ((t->used + 1) * 2 > t->num_slots && string_table_rehash(t))
+		return -ENOMEM;
+
+	slot = string_table_find(t, str, len);
+	if (*slot) {
+		*offset = *slot;
+		return 0;
+	}
+
+	if (t->size + len + 1 > t->capacity) {
+		uint32_t capacity = t->capacity * 2;
+		char *data;
+
+		while (t->size + len + 1 > capacity)
+			capacity *= 2;
+		data = realloc(t->data, capacity);
+		if (!data)
+			return -ENOMEM;
+		t->data = data;
+		t->capacity = capacity;
+	}
+
+	memcpy(t->data + t->size, str, len);
+	t->data[t->size + len] = '\0';
+	*slot = t->size;
+	*offset = t->size;
+	t->size += len + 1;
+	t->used++;
+	return 0;
+}
+
 /* Record parsers */
 
 static void parse_stats(struct nlattr *nest, struct cas_nl_stats *s)
@@ -429,11 +590,13 @@ static void parse_promotion_params(struct nlattr *nest,
 	}
 }
 
-static void parse_cache_record(struct nlattr *nest,
-			       struct cas_nl_cache *c)
+static int parse_cache_record(struct nlattr *nest,
+			       struct cas_nl_compact_cache *c,
+			       struct string_table *strings)
 {
 	struct nlattr *nla = nla_data(nest);
 	int remaining = nla_len(nest);
+	int ret;
 
 	memset(c, 0, sizeof(*c));
 
@@ -445,7 +608,9 @@ static void parse_cache_record(struct nlattr *nest,
 			c->id = nla_get_u16(nla);
 			break;
 		case CAS_NL_CACHE_A_PATH:
-			nla_get_str(nla, c->path, sizeof(c->path));
+			ret = string_table_add(strings, nla, &c->path);
+			if (ret)
+				return ret;
 			break;
 		case CAS_NL_CACHE_A_STATE:
 			c->state = nla_get_u8(nla);
@@ -515,13 +680,17 @@ static void parse_cache_record(struct nlattr *nest,
 			break;
 		}
 	}
+
+	return 0;
 }
 
-static void parse_core_record(struct nlattr *nest,
-			      struct cas_nl_core *c)
+static int parse_core_record(struct nlattr *nest,
+			      struct cas_nl_compact_core *c,
+			      struct string_table *strings)
 {
 	struct nlattr *nla = nla_data(nest);
 	int remaining = nla_len(nest);
+	int ret;
 
 	memset(c, 0, sizeof(*c));
 
@@ -536,7 +705,9 @@ static void parse_core_record(struct nlattr *nest,
 			c->id = nla_get_u16(nla);
 			break;
 		case CAS_NL_CORE_A_PATH:
-			nla_get_str(nla, c->path, sizeof(c->path));
+			ret = string_table_add(strings, nla, &c->path);
+			if (ret)
+				return ret;
 			break;
 		case CAS_NL_CORE_A_STATE:
 			c->state = nla_get_u8(nla);
@@ -573,13 +744,17 @@ static void parse_core_record(struct nlattr *nest,
 			break;
 		}
 	}
+
+	return 0;
 }
 
-static void parse_ioclass_record(struct nlattr *nest,
-				 struct cas_nl_ioclass *c)
+static int parse_ioclass_record(struct nlattr *nest,
+				 struct cas_nl_compact_ioclass *c,
+				 struct string_table *strings)
 {
 	struct nlattr *nla = nla_data(nest);
 	int remaining = nla_len(nest);
+	int ret;
 
 	memset(c, 0, sizeof(*c));
 
@@ -594,7 +769,9 @@ static void parse_ioclass_record(struct nlattr *nest,
 			c->id = nla_get_u32(nla);
 			break;
 		case CAS_NL_IOCLASS_A_NAME:
-			nla_get_str(nla, c->name, sizeof(c->name));
+			ret = string_table_add(strings, nla, &c->name);
+			if (ret)
+				return ret;
 			break;
 		case CAS_NL_IOCLASS_A_CACHE_MODE:
 			c->cache_mode = nla_get_u8(nla);
@@ -619,6 +796,33 @@ static void parse_ioclass_record(struct nlattr *nest,
 			break;
 		}
 	}
+
+	return 0;
+}
+
+static int parse_pool_core_record(struct nlattr *nest,
+				   struct cas_nl_compact_pool_core *c,
+				   struct string_table *strings)
+{
+	struct nlattr *nla = nla_data(nest);
+	int remaining = nla_len(nest);
+	int ret;
+
+	memset(c, 0, sizeof(*c));
+
+	nla_for_each(nla, remaining) {
+		int type = nla->nla_type & NLA_TYPE_MASK;
+
+		switch (type) {
+		case CAS_NL_CORE_POOL_A_PATH:
+			ret = string_table_add(strings, nla, &c->path);
+			if (ret)
+				return ret;
+			break;
+		}
+	}
+
+	return 0;
 }
 
 /* Dynamic array helper */
@@ -630,7 +834,7 @@ struct record_list {
 	size_t elem_size;
 };
 
-static int record_list_append(struct record_list *l, void *elem)
+static void *record_list_add(struct record_list *l)
 {
 	if (l->count >= l->capacity) {
 		int newcap = l->capacity ? l->capacity * 2 : 8;
@@ -638,22 +842,92 @@ static int record_list_append(struct record_list *l, void *elem)
 
 		newdata = realloc(l->data, newcap * l->elem_size);
 		if (!newdata)
-			return -ENOMEM;
+			return NULL;
 		l->data = newdata;
 		l->capacity = newcap;
 	}
-	memcpy((char *)l->data + l->count * l->elem_size,
-	       elem, l->elem_size);
-	l->count++;
+	return (char *)l->data + l->count++ * l->elem_size;
+}
+
+/* Compact dump storage, kept between calls */
+
+struct compact_storage {
+	struct nl_ctx nl;
+	bool connected;
+	char *buf;
+	struct record_list caches;
+	struct record_list cores;
+	struct record_list ioclasses;
+	struct record_list core_pool;
+	struct string_table strings;
+};
+
+static struct compact_storage *compact_storage_alloc(void)
+{
+	struct compact_storage *st;
+
+	st = calloc(1, sizeof(*st));
+	if (!st)
+		return NULL;
+
+	st->buf = malloc(NL_BUF_SIZE);
+	if (!st->buf) {
+		free(st);
+		return NULL;
+	}
+
+	st->caches.elem_size = sizeof(struct cas_nl_compact_cache);
+	st->cores.elem_size = sizeof(struct cas_nl_compact_core);
+	st->ioclasses.elem_size = sizeof(struct cas_nl_compact_ioclass);
+	st->core_pool.elem_size = sizeof(struct cas_nl_compact_pool_core);
+	return st;
+}
+
+static int compact_storage_connect(struct compact_storage *st)
+{
+	int ret;
+
+	if (st->connected)
+		return 0;
+
+	ret = nl_open(&st->nl);
+	if (ret)
+		return ret;
+
+	ret = nl_resolve_family(&st->nl, CAS_NL_FAMILY_NAME);
+	if (ret) {
+		nl_close(&st->nl);
+		return ret;
+	}
+
+	st->connected = true;
 	return 0;
 }
 
+/* Unread part of a failed dump must not be taken for the next one */
+static void compact_storage_disconnect(struct compact_storage *st)
+{
+	if (st->connected)
+		nl_close(&st->nl);
+	st->connected = false;
+}
+
+static void compact_storage_free(struct compact_storage *st)
+{
+	compact_storage_disconnect(st);
+	free(st->buf);
+	free(st->caches.data);
+	free(st->cores.data);
+	free(st->ioclasses.data);
+	free(st->core_pool.data);
+	free(st->strings.data);
+	free(st->strings.slots);
+	free(st);
+}
+
 /* Message handler */
 
-static int handle_message(struct nlmsghdr *nlh,
-			  struct record_list *caches,
-			  struct record_list *cores,
-			  struct record_list *ioclasses)
+static int handle_message(struct nlmsghdr *nlh, struct compact_storage *st)
 {
 	struct genlmsghdr *genl;
 	struct nlattr *nla;
@@ -665,143 +939,301 @@ static int handle_message(struct nlmsghdr *nlh,
 
 	nla_for_each(nla, remaining) {
 		int type = nla->nla_type & NLA_TYPE_MASK;
+		struct record_list *list;
+		void *c;
 		int ret;
 
 		switch (type) {
-		case CAS_NL_A_CACHE: {
-			struct cas_nl_cache c;
-
-			parse_cache_record(nla, &c);
-			ret = record_list_append(caches, &c);
-			if (ret)
-				return ret;
+		case CAS_NL_A_CACHE:
+			list = &st->caches;
 			break;
-		}
-		case CAS_NL_A_CORE: {
-			struct cas_nl_core c;
-
-			parse_core_record(nla, &c);
-			ret = record_list_append(cores, &c);
-			if (ret)
-				return ret;
+		case CAS_NL_A_CORE:
+			list = &st->cores;
+			break;
+		case CAS_NL_A_IO_CLASS:
+			list = &st->ioclasses;
+			break;
+		case CAS_NL_A_CORE_POOL:
+			list = &st->core_pool;
 			break;
+		default:
+			continue;
 		}
-		case CAS_NL_A_IO_CLASS: {
-			struct cas_nl_ioclass c;
 
-			parse_ioclass_record(nla, &c);
-			ret = record_list_append(ioclasses, &c);
-			if (ret)
-				return ret;
+		c = record_list_add(list);
+		if (!c)
+			return -ENOMEM;
+
+		switch (type) {
+		case CAS_NL_A_CACHE:
+			ret = parse_cache_record(nla, c, &st->strings);
+			break;
+		case CAS_NL_A_CORE:
+			ret = parse_core_record(nla, c, &st->strings);
+			break;
+		case CAS_NL_A_IO_CLASS:
+			ret = parse_ioclass_record(nla, c, &st->strings);
+			break;
+		default:
+			ret = parse_pool_core_record(nla, c, &st->strings);
 			break;
 		}
-		}
+		if (ret)
+			return ret;
 	}
 
 	return 0;
 }
 
-/* Public API */
-
-int cas_nl_dump(struct cas_nl_dump_result *result)
+static int recv_dump(struct compact_storage *st)
 {
-	struct nl_ctx ctx = { 0 };
-	char *buf = NULL;
-	int ret;
-	struct record_list caches = {
-		.elem_size = sizeof(struct cas_nl_cache),
-	};
-	struct record_list cores = {
-		.elem_size = sizeof(struct cas_nl_core),
-	};
-	struct record_list ioclasses = {
-		.elem_size = sizeof(struct cas_nl_ioclass),
-	};
-
-	memset(result, 0, sizeof(*result));
-
-	buf = malloc(NL_BUF_SIZE);
-	if (!buf)
-		return -ENOMEM;
-
-	ret = nl_open(&ctx);
-	if (ret)
-		goto out_buf;
-
-	ret = nl_resolve_family(&ctx, CAS_NL_FAMILY_NAME);
-	if (ret)
-		goto out_close;
-
-	ret = nl_send_dump_request(&ctx);
-	if (ret)
-		goto out_close;
+	int ret = 0;
 
 	while (1) {
 		struct nlmsghdr *nlh;
 		int len, remaining;
-		bool done = false;
 
-		len = recv(ctx.fd, buf, NL_BUF_SIZE, 0);
-		if (len < 0) {
-			ret = -errno;
-			break;
-		}
+		len = recv(st->nl.fd, st->buf, NL_BUF_SIZE, 0);
+		if (len < 0)
+			return -errno;
 
-		nlh = (struct nlmsghdr *)buf;
+		nlh = (struct nlmsghdr *)st->buf;
 		remaining = len;
 
 		while (NLMSG_OK(nlh, remaining)) {
-			if (nlh->nlmsg_type == NLMSG_DONE) {
-				done = true;
-				break;
-			}
+			if (nlh->nlmsg_type == NLMSG_DONE)
+				return 0;
 			if (nlh->nlmsg_type == NLMSG_ERROR) {
 				struct nlmsgerr *err;
 
 				err = NLMSG_DATA(nlh);
-				ret = err->error;
-				done = true;
-				break;
+				return err->error;
 			}
 
-			ret = handle_message(nlh, &caches,
-					     &cores, &ioclasses);
-			if (ret) {
-				done = true;
-				break;
-			}
+			ret = handle_message(nlh, st);
+			if (ret)
+				return ret;
 			nlh = NLMSG_NEXT(nlh, remaining);
 		}
+	}
+}
 
-		if (done)
-			break;
+/* Expansion of compact records to the fixed-size ones */
+
+static void copy_str(char *dst, size_t dst_size, const char *src)
+{
+	size_t len = strnlen(src, dst_size - 1);
+
+	memcpy(dst, src, len);
+	dst[len] = '\0';
+}
+
+static void expand_cache(const struct cas_nl_compact_dump *dump,
+			 const struct cas_nl_compact_cache *src,
+			 struct cas_nl_cache *dst)
+{
+	dst->id = src->id;
+	copy_str(dst->path, sizeof(dst->path),
+		 cas_nl_compact_str(dump, src->path));
+	dst->state = src->state;
+	dst->mode = src->mode;
+	dst->line_size = src->line_size;
+	dst->attached = src->attached;
+	dst->standby_detached = src->standby_detached;
+	dst->size = src->size;
+	dst->occupancy = src->occupancy;
+	dst->dirty = src->dirty;
+	dst->dirty_for = src->dirty_for;
+	dst->dirty_initial = src->dirty_initial;
+	dst->flushed = src->flushed;
+	dst->core_count = src->core_count;
+	dst->metadata_footprint = src->metadata_footprint;
+	dst->metadata_end_offset = src->metadata_end_offset;
+	dst->fallback_pt_errors = src->fallback_pt_errors;
+	dst->fallback_pt_status = src->fallback_pt_status;
+	dst->inactive_occupancy = src->inactive_occupancy;
+	dst->inactive_clean = src->inactive_clean;
+	dst->inactive_dirty = src->inactive_dirty;
+	dst->cleaning = src->cleaning;
+	dst->promotion = src->promotion;
+	dst->stats = src->stats;
+}
+
+static void expand_core(const struct cas_nl_compact_dump *dump,
+			const struct cas_nl_compact_core *src,
+			struct cas_nl_core *dst)
+{
+	dst->cache_id = src->cache_id;
+	dst->id = src->id;
+	copy_str(dst->path, sizeof(dst->path),
+		 cas_nl_compact_str(dump, src->path));
+	dst->state = src->state;
+	dst->exp_obj_exists = src->exp_obj_exists;
+	dst->size = src->size;
+	dst->size_bytes = src->size_bytes;
+	dst->dirty = src->dirty;
+	dst->dirty_for = src->dirty_for;
+	dst->flushed = src->flushed;
+	dst->seq_cutoff_threshold = src->seq_cutoff_threshold;
+	dst->seq_cutoff_policy = src->seq_cutoff_policy;
+	dst->seq_cutoff_promo_count = src->seq_cutoff_promo_count;
+	dst->stats = src->stats;
+}
+
+static void expand_ioclass(const struct cas_nl_compact_dump *dump,
+			   const struct cas_nl_compact_ioclass *src,
+			   struct cas_nl_ioclass *dst)
+{
+	dst->cache_id = src->cache_id;
+	dst->id = src->id;
+	copy_str(dst->name, sizeof(dst->name),
+		 cas_nl_compact_str(dump, src->name));
+	dst->cache_mode = src->cache_mode;
+	dst->priority = src->priority;
+	dst->curr_size = src->curr_size;
+	dst->min_size = src->min_size;
+	dst->max_size = src->max_size;
+	dst->cleaning_policy = src->cleaning_policy;
+	dst->stats = src->stats;
+}
+
+static int expand_dump(const struct cas_nl_compact_dump *dump,
+		       struct cas_nl_dump_result *result)
+{
+	int i;
+
+	if (dump->num_caches) {
+		result->caches = calloc(dump->num_caches,
+					sizeof(*result->caches));
+		if (!result->caches)
+			return -ENOMEM;
+	}
+	if (dump->num_cores) {
+		result->cores = calloc(dump->num_cores,
+				       sizeof(*result->cores));
+		if (!result->cores)
+			return -ENOMEM;
+	}
+	if (dump->num_ioclasses) {
+		result->ioclasses = calloc(dump->num_ioclasses,
+					   sizeof(*result->ioclasses));
+		if (!result->ioclasses)
+			return -ENOMEM;
+	}
+	if (dump->num_core_pool) {
+		result->core_pool = calloc(dump->num_core_pool,
+					   sizeof(*result->core_pool));
+		if (!result->core_pool)
+			return -ENOMEM;
 	}
 
-out_close:
-	nl_close(&ctx);
-out_buf:
-	free(buf);
+	for (i = 0; i < dump->num_caches; i++)
+		expand_cache(dump, &dump->caches[i], &result->caches[i]);
+	for (i = 0; i < dump->num_cores; i++)
+		expand_core(dump, &dump->cores[i], &result->cores[i]);
+	for (i = 0; i < dump->num_ioclasses; i++) {
+		expand_ioclass(dump, &dump->ioclasses[i],
+			       &result->ioclasses[i]);
+	}
+	for (i = 0; i < dump->num_core_pool; i++) {
+		copy_str(result->core_pool[i].path,
+			 sizeof(result->core_pool[i].path),
+			 cas_nl_compact_str(dump, dump->core_pool[i].path));
+	}
+
+	result->num_caches = dump->num_caches;
+	result->num_cores = dump->num_cores;
+	result->num_ioclasses = dump->num_ioclasses;
+	result->num_core_pool = dump->num_core_pool;
+	return 0;
+}
 
+/* Public API */
+
+int cas_nl_compact_dump(const struct cas_nl_dump_filter *filter,
+			struct cas_nl_compact_dump *dump)
+{
+	struct compact_storage *st = dump->priv;
+	int ret;
+
+	if (!st) {
+		st = compact_storage_alloc();
+		if (!st)
+			return -ENOMEM;
+	}
+
+	memset(dump, 0, sizeof(*dump));
+	dump->priv = st;
+
+	st->caches.count = 0;
+	st->cores.count = 0;
+	st->ioclasses.count = 0;
+	st->core_pool.count = 0;
+
+	ret = string_table_reset(&st->strings);
+	if (ret)
+		return ret;
+
+	ret = compact_storage_connect(st);
+	if (ret)
+		return ret;
+
+	ret = nl_send_dump_request(&st->nl, filter);
+	if (!ret)
+		ret = recv_dump(st);
 	if (ret) {
-		free(caches.data);
-		free(cores.data);
-		free(ioclasses.data);
+		compact_storage_disconnect(st);
 		return ret;
 	}
 
-	result->caches = caches.data;
-	result->num_caches = caches.count;
-	result->cores = cores.data;
-	result->num_cores = cores.count;
-	result->ioclasses = ioclasses.data;
-	result->num_ioclasses = ioclasses.count;
+	dump->caches = st->caches.data;
+	dump->num_caches = st->caches.count;
+	dump->cores = st->cores.data;
+	dump->num_cores = st->cores.count;
+	dump->ioclasses = st->ioclasses.data;
+	dump->num_ioclasses = st->ioclasses.count;
+	dump->core_pool = st->core_pool.data;
+	dump->num_core_pool = st->core_pool.count;
+	dump->strings = st->strings.data;
+	dump->strings_size = st->strings.size;
 	return 0;
 }
 
+void cas_nl_compact_dump_free(struct cas_nl_compact_dump *dump)
+{
+	if (dump->priv)
+		compact_storage_free(dump->priv);
+	memset(dump, 0, sizeof(*dump));
+}
+
+int cas_nl_dump_filtered(const struct cas_nl_dump_filter *filter,
+			 struct cas_nl_dump_result *result)
+{
+	struct cas_nl_compact_dump dump = { 0 };
+	int ret;
+
+	memset(result, 0, sizeof(*result));
+
+	ret = cas_nl_compact_dump(filter, &dump);
+	if (!ret)
+		ret = expand_dump(&dump, result);
+
+	cas_nl_compact_dump_free(&dump);
+	if (ret)
+		cas_nl_dump_free(result);
+	return ret;
+}
+
+int cas_nl_dump(struct cas_nl_dump_result *result)
+{
+	return cas_nl_dump_filtered(NULL, result);
+}
+
 void cas_nl_dump_free(struct cas_nl_dump_result *result)
 {
 	free(result->caches);
 	free(result->cores);
 	free(result->ioclasses);
+	free(result->core_pool);
 	memset(result, 0, sizeof(*result));
 }
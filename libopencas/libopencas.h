@@ -15,6 +15,8 @@
 #include <stdint.h>
 #include <stdbool.h>
 
+#include <cas_netlink.h>
+
 #define CAS_NL_PATH_MAX			4096
 #define CAS_NL_IOCLASS_NAME_MAX		1024
 
@@ -159,6 +161,10 @@ struct cas_nl_ioclass {
 	struct cas_nl_stats stats;
 };
 
+struct cas_nl_pool_core {
+	char path[CAS_NL_PATH_MAX];
+};
+
 struct cas_nl_dump_result {
 	struct cas_nl_cache *caches;
 	int num_caches;
@@ -166,8 +172,39 @@ struct cas_nl_dump_result {
 	int num_cores;
 	struct cas_nl_ioclass *ioclasses;
 	int num_ioclasses;
+	struct cas_nl_pool_core *core_pool;
+	int num_core_pool;
+};
+
+#define CAS_NL_DUMP_ANY		(-1)
+
+/**
+ * struct cas_nl_dump_filter - selection of dumped records
+ * @cache_id: dump records of this cache only, or CAS_NL_DUMP_ANY
+ * @core_id: dump core records of this core only, or CAS_NL_DUMP_ANY
+ * @ioclass_id: dump IO class records of this class only, or CAS_NL_DUMP_ANY
+ * @records: mask of enum cas_nl_record
+ * @sections: mask of enum cas_nl_section; fields of other sections are
+ *	left zeroed
+ *
+ * Initialize with CAS_NL_DUMP_FILTER_INIT, which selects everything.
+ */
+struct cas_nl_dump_filter {
+	int cache_id;
+	int core_id;
+	int ioclass_id;
+	uint32_t records;
+	uint32_t sections;
 };
 
+#define CAS_NL_DUMP_FILTER_INIT {		\
+	.cache_id = CAS_NL_DUMP_ANY,		\
+	.core_id = CAS_NL_DUMP_ANY,		\
+	.ioclass_id = CAS_NL_DUMP_ANY,		\
+	.records = CAS_NL_RECORD_ALL,		\
+	.sections = CAS_NL_SECTION_ALL,		\
+}
+
 /**
  * cas_nl_dump() - dump all CAS state via Generic Netlink
  * @result: output structure filled with parsed records
@@ -179,9 +216,156 @@ struct cas_nl_dump_result {
 int cas_nl_dump(struct cas_nl_dump_result *result);
 
 /**
- * cas_nl_dump_free() - free memory allocated by cas_nl_dump()
+ * cas_nl_dump_filtered() - dump selected part of CAS state
+ * @filter: records and sections to dump, NULL for all
+ * @result: output structure filled with parsed records
+ *
+ * Filtering is done by the kernel, so records which are not selected are
+ * neither collected nor sent. Nonexistent cache, core or IO class gives
+ * an empty result.
+ *
+ * The caller must free the result with cas_nl_dump_free() when done.
+ *
+ * Return: 0 on success, negative errno on failure.
+ */
+int cas_nl_dump_filtered(const struct cas_nl_dump_filter *filter,
+			 struct cas_nl_dump_result *result);
+
+/**
+ * cas_nl_dump_free() - free memory allocated by cas_nl_dump() and
+ * cas_nl_dump_filtered()
  * @result: structure to free
  */
 void cas_nl_dump_free(struct cas_nl_dump_result *result);
 
+/*
+ * Compact dump
+ *
+ * Records below are the same as the ones above, except that paths and names
+ * are offsets into the string table of the dump. Each distinct string is
+ * stored there once, offset 0 is an empty string.
+ */
+
+struct cas_nl_compact_cache {
+	uint16_t id;
+	uint32_t path;
+
+	uint8_t state;
+	uint8_t mode;
+	uint32_t line_size;
+	bool attached;
+	bool standby_detached;
+
+	uint32_t size;
+	uint32_t occupancy;
+	uint32_t dirty;
+	uint64_t dirty_for;
+	uint32_t dirty_initial;
+	uint32_t flushed;
+	uint32_t core_count;
+
+	uint64_t metadata_footprint;
+	uint32_t metadata_end_offset;
+
+	uint32_t fallback_pt_errors;
+	uint8_t fallback_pt_status;
+
+	uint64_t inactive_occupancy;
+	uint64_t inactive_clean;
+	uint64_t inactive_dirty;
+
+	struct cas_nl_cleaning_params cleaning;
+	struct cas_nl_promotion_params promotion;
+	struct cas_nl_stats stats;
+};
+
+struct cas_nl_compact_core {
+	uint16_t cache_id;
+	uint16_t id;
+	uint32_t path;
+
+	uint8_t state;
+	bool exp_obj_exists;
+
+	uint64_t size;
+	uint64_t size_bytes;
+
+	uint32_t dirty;
+	uint64_t dirty_for;
+	uint32_t flushed;
+
+	uint32_t seq_cutoff_threshold;
+	uint8_t seq_cutoff_policy;
+	uint32_t seq_cutoff_promo_count;
+
+	struct cas_nl_stats stats;
+};
+
+struct cas_nl_compact_ioclass {
+	uint16_t cache_id;
+	uint32_t id;
+	uint32_t name;
+
+	uint8_t cache_mode;
+	int16_t priority;
+	uint32_t curr_size;
+	uint32_t min_size;
+	uint32_t max_size;
+	uint8_t cleaning_policy;
+
+	struct cas_nl_stats stats;
+};
+
+struct cas_nl_compact_pool_core {
+	uint32_t path;
+};
+
+/**
+ * struct cas_nl_compact_dump - result of cas_nl_compact_dump()
+ * @strings: string table, @strings_size bytes of NUL-terminated strings
+ * @priv: storage kept between calls, owned by the library
+ *
+ * Zero-initialize before the first call. Record arrays, string table,
+ * receive buffer and netlink socket are kept between calls and grow only
+ * when needed, so a poller reusing one structure doesn't allocate once
+ * the set of devices is stable. Records are valid until the next call.
+ */
+struct cas_nl_compact_dump {
+	struct cas_nl_compact_cache *caches;
+	int num_caches;
+	struct cas_nl_compact_core *cores;
+	int num_cores;
+	struct cas_nl_compact_ioclass *ioclasses;
+	int num_ioclasses;
+	struct cas_nl_compact_pool_core *core_pool;
+	int num_core_pool;
+	const char *strings;
+	uint32_t strings_size;
+	void *priv;
+};
+
+static inline const char *cas_nl_compact_str(
+		const struct cas_nl_compact_dump *dump, uint32_t offset)
+{
+	return offset < dump->strings_size ? dump->strings + offset : "";
+}
+
+/**
+ * cas_nl_compact_dump() - dump selected part of CAS state in compact form
+ * @filter: records and sections to dump, NULL for all
+ * @dump: result, reused between calls
+ *
+ * On failure @dump contains no records, but its storage is kept.
+ *
+ * Return: 0 on success, negative errno on failure.
+ */
+int cas_nl_compact_dump(const struct cas_nl_dump_filter *filter,
+			struct cas_nl_compact_dump *dump);
+
+/**
+ * cas_nl_compact_dump_free() - release storage of compact dump
+ * @dump: structure to free, zeroed afterwards
+ */
+void cas_nl_compact_dump_free(struct cas_nl_compact_dump *dump);
+
 #endif /* LIBOPENCAS_H */
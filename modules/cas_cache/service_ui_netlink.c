@@ -78,15 +78,27 @@ struct cas_nl_cache_dump {
 	struct cas_nl_ioclass_dump *io_classes;
 };
 
+struct cas_nl_dump_filter {
+	int cache_id;		/* -1 for all caches */
+	int core_id;		/* -1 for all cores */
+	int io_class_id;	/* -1 for all IO classes */
+	uint32_t records;	/* mask of enum cas_nl_record */
+	uint32_t sections;	/* mask of enum cas_nl_section */
+};
+
 struct cas_nl_dump_ctx {
+	struct cas_nl_dump_filter filter;
 	int num_caches;
 	struct cas_nl_cache_dump *caches;
+	int num_core_pool;
+	char **core_pool;
 };
 
 /* ---- Data collection (called under read lock) ---- */
 
 static void cas_nl_collect_core(ocf_cache_t cache, uint16_t core_id,
-		ocf_core_t core, struct cas_nl_core_dump *dst)
+		ocf_core_t core, struct cas_nl_core_dump *dst,
+		const struct cas_nl_dump_filter *filter)
 {
 	const struct ocf_volume_uuid *uuid;
 	struct cas_priv_top *priv_top;
@@ -97,15 +109,20 @@ static void cas_nl_collect_core(ocf_cache_t cache, uint16_t core_id,
 	uuid = ocf_core_get_uuid(core);
 	dst->path = uuid->data ? kstrdup(uuid->data, GFP_KERNEL) : NULL;
 
+	if (filter->sections & CAS_NL_SECTION_STATS) {
+		ocf_stats_collect_core(core, &dst->usage, &dst->req,
+				&dst->blocks, &dst->errors);
+	}
+
+	if (!(filter->sections & CAS_NL_SECTION_CONFIG))
+		return;
+
 	ocf_core_get_info(core, &dst->info);
 	dst->state = ocf_core_get_state(core);
 
 	priv_top = cas_get_priv_top(core);
 	dst->exp_obj_exists = priv_top->expobj_valid;
 
-	ocf_stats_collect_core(core, &dst->usage, &dst->req,
-			&dst->blocks, &dst->errors);
-
 	ocf_mngt_core_get_seq_cutoff_threshold(core,
 			&dst->seq_cutoff_threshold);
 	if (ocf_mngt_core_get_seq_cutoff_policy(core, &policy) == 0)
@@ -115,26 +132,40 @@ static void cas_nl_collect_core(ocf_cache_t cache, uint16_t core_id,
 }
 
 static int cas_nl_collect_cores(ocf_cache_t cache,
-		struct cas_nl_cache_dump *dst)
+		struct cas_nl_cache_dump *dst,
+		const struct cas_nl_dump_filter *filter)
 {
-	uint32_t i, j;
+	uint32_t i, j, first, last, count;
 	ocf_core_t core;
 
-	if (dst->info.core_count == 0) {
-		dst->num_cores = 0;
-		dst->cores = NULL;
+	dst->num_cores = 0;
+	dst->cores = NULL;
+
+	if (!(filter->records & CAS_NL_RECORD_CORE))
 		return 0;
+
+	if (filter->core_id < 0) {
+		first = 0;
+		last = OCF_CORE_NUM;
+		count = dst->info.core_count;
+	} else {
+		first = filter->core_id;
+		last = first + 1;
+		count = 1;
 	}
 
-	dst->cores = cas_nl_vcalloc(dst->info.core_count, sizeof(*dst->cores));
+	if (count == 0)
+		return 0;
+
+	dst->cores = cas_nl_vcalloc(count, sizeof(*dst->cores));
 	if (!dst->cores)
 		return -ENOMEM;
 
-	for (i = 0, j = 0; j < dst->info.core_count && i < OCF_CORE_NUM; i++) {
+	for (i = first, j = 0; j < count && i < last; i++) {
 		if (get_core_by_id(cache, i, &core))
 			continue;
 
-		cas_nl_collect_core(cache, i, core, &dst->cores[j]);
+		cas_nl_collect_core(cache, i, core, &dst->cores[j], filter);
 		j++;
 	}
 
@@ -143,17 +174,33 @@ static int cas_nl_collect_cores(ocf_cache_t cache,
 }
 
 static int cas_nl_collect_io_classes(ocf_cache_t cache,
-		struct cas_nl_cache_dump *dst)
+		struct cas_nl_cache_dump *dst,
+		const struct cas_nl_dump_filter *filter)
 {
-	uint32_t i, j;
+	uint32_t i, j, first, last;
 	int result;
 
-	dst->io_classes = cas_nl_vcalloc(OCF_USER_IO_CLASS_MAX,
+	dst->num_io_classes = 0;
+	dst->io_classes = NULL;
+
+	if (!(filter->records & CAS_NL_RECORD_IO_CLASS))
+		return 0;
+
+	if (filter->io_class_id < 0) {
+		first = 0;
+		last = OCF_USER_IO_CLASS_MAX;
+	} else {
+		first = filter->io_class_id;
+		last = first + 1;
+	}
+
+	dst->io_classes = cas_nl_vcalloc(last - first,
 			sizeof(*dst->io_classes));
 	if (!dst->io_classes)
 		return -ENOMEM;
 
-	for (i = 0, j = 0; i < OCF_USER_IO_CLASS_MAX; i++) {
+	for (i = first, j = 0; i < last; i++) {
+		/* Info is needed anyway to tell if IO class is configured */
 		result = ocf_cache_io_class_get_info(cache, i,
 				&dst->io_classes[j].info);
 		if (result)
@@ -161,10 +208,12 @@ static int cas_nl_collect_io_classes(ocf_cache_t cache,
 
 		dst->io_classes[j].id = i;
 
-		ocf_stats_collect_part_cache(cache, i,
-				&dst->io_classes[j].usage,
-				&dst->io_classes[j].req,
-				&dst->io_classes[j].blocks);
+		if (filter->sections & CAS_NL_SECTION_STATS) {
+			ocf_stats_collect_part_cache(cache, i,
+					&dst->io_classes[j].usage,
+					&dst->io_classes[j].req,
+					&dst->io_classes[j].blocks);
+		}
 		j++;
 	}
 
@@ -221,7 +270,8 @@ static void cas_nl_collect_promotion_params(ocf_cache_t cache,
 }
 
 static int cas_nl_collect_cache(uint16_t cache_id,
-		struct cas_nl_cache_dump *dst)
+		struct cas_nl_cache_dump *dst,
+		const struct cas_nl_dump_filter *filter)
 {
 	ocf_cache_t cache;
 	const struct ocf_volume_uuid *uuid;
@@ -247,17 +297,22 @@ static int cas_nl_collect_cache(uint16_t cache_id,
 				kstrdup(uuid->data, GFP_KERNEL) : NULL;
 	}
 
-	ocf_stats_collect_cache(cache, &dst->usage, &dst->req,
-			&dst->blocks, &dst->errors);
-
-	cas_nl_collect_cleaning_params(cache, dst);
-	cas_nl_collect_promotion_params(cache, dst);
+	if (filter->records & CAS_NL_RECORD_CACHE) {
+		if (filter->sections & CAS_NL_SECTION_STATS) {
+			ocf_stats_collect_cache(cache, &dst->usage, &dst->req,
+					&dst->blocks, &dst->errors);
+		}
+		if (filter->sections & CAS_NL_SECTION_CONFIG) {
+			cas_nl_collect_cleaning_params(cache, dst);
+			cas_nl_collect_promotion_params(cache, dst);
+		}
+	}
 
-	result = cas_nl_collect_cores(cache, dst);
+	result = cas_nl_collect_cores(cache, dst, filter);
 	if (result)
 		goto unlock;
 
-	result = cas_nl_collect_io_classes(cache, dst);
+	result = cas_nl_collect_io_classes(cache, dst, filter);
 
 unlock:
 	ocf_mngt_cache_read_unlock(cache);
@@ -289,6 +344,54 @@ static int cas_nl_list_visitor(ocf_cache_t cache, void *cntx)
 	return 0;
 }
 
+/* ---- Core pool ---- */
+
+struct cas_nl_core_pool_ctx {
+	char **paths;
+	int count;
+	int capacity;
+};
+
+static int cas_nl_core_pool_visitor(ocf_uuid_t uuid, void *cntx)
+{
+	struct cas_nl_core_pool_ctx *ctx = cntx;
+
+	if (ctx->count >= ctx->capacity)
+		return 0;
+
+	ctx->paths[ctx->count] = kstrndup(uuid->data, uuid->size, GFP_KERNEL);
+	if (!ctx->paths[ctx->count])
+		return -ENOMEM;
+
+	ctx->count++;
+	return 0;
+}
+
+static int cas_nl_collect_core_pool(struct cas_nl_dump_ctx *ctx)
+{
+	struct cas_nl_core_pool_ctx pool_ctx;
+	int count, result;
+
+	count = ocf_mngt_core_pool_get_count(cas_ctx);
+	if (count <= 0)
+		return 0;
+
+	pool_ctx.paths = kcalloc(count, sizeof(*pool_ctx.paths), GFP_KERNEL);
+	if (!pool_ctx.paths)
+		return -ENOMEM;
+	pool_ctx.count = 0;
+	pool_ctx.capacity = count;
+
+	result = ocf_mngt_core_pool_visit(cas_ctx, cas_nl_core_pool_visitor,
+			&pool_ctx);
+
+	/* Paths collected so far are released with the dump context */
+	ctx->core_pool = pool_ctx.paths;
+	ctx->num_core_pool = pool_ctx.count;
+
+	return result;
+}
+
 /* ---- Free pre-collected data ---- */
 
 static void cas_nl_free_cache_dump(struct cas_nl_cache_dump *d)
@@ -316,12 +419,18 @@ static void cas_nl_free_dump_ctx(struct cas_nl_dump_ctx *ctx)
 			cas_nl_free_cache_dump(&ctx->caches[i]);
 		vfree(ctx->caches);
 	}
+	if (ctx->core_pool) {
+		for (i = 0; i < ctx->num_core_pool; i++)
+			kfree(ctx->core_pool[i]);
+		kfree(ctx->core_pool);
+	}
 	kfree(ctx);
 }
 
 /* ---- Netlink message builders ---- */
 
 static int cas_nl_put_stats(struct sk_buff *skb, int attr_id,
+		uint32_t sections,
 		const struct ocf_stats_usage *usage,
 		const struct ocf_stats_requests *req,
 		const struct ocf_stats_blocks *blocks,
@@ -329,102 +438,110 @@ static int cas_nl_put_stats(struct sk_buff *skb, int attr_id,
 {
 	struct nlattr *nest;
 
+	if (!errors)
+		sections &= ~CAS_NL_SECTION_ERR;
+	if (!(sections & CAS_NL_SECTION_STATS))
+		return 0;
+
 	nest = nla_nest_start(skb, attr_id);
 	if (!nest)
 		return -EMSGSIZE;
 
 	/* Usage */
-	if (nla_put_u64_64bit(skb, CAS_NL_STATS_A_USAGE_OCCUPANCY,
+	if ((sections & CAS_NL_SECTION_USAGE) &&
+	    (nla_put_u64_64bit(skb, CAS_NL_STATS_A_USAGE_OCCUPANCY,
 			usage->occupancy.value, CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_USAGE_FREE,
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_USAGE_FREE,
 			usage->free.value, CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_USAGE_CLEAN,
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_USAGE_CLEAN,
 			usage->clean.value, CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_USAGE_DIRTY,
-			usage->dirty.value, CAS_NL_STATS_A_UNSPEC))
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_USAGE_DIRTY,
+			usage->dirty.value, CAS_NL_STATS_A_UNSPEC)))
 		goto nla_failure;
 
 	/* Requests */
-	if (nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_RD_HITS,
+	if ((sections & CAS_NL_SECTION_REQ) &&
+	    (nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_RD_HITS,
 			req->rd_hits.value, CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_RD_DEFERRED,
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_RD_DEFERRED,
 			req->rd_deferred.value, CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_RD_PARTIAL_MISSES,
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_RD_PARTIAL_MISSES,
 			req->rd_partial_misses.value, CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_RD_FULL_MISSES,
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_RD_FULL_MISSES,
 			req->rd_full_misses.value, CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_RD_TOTAL,
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_RD_TOTAL,
 			req->rd_total.value, CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_WR_HITS,
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_WR_HITS,
 			req->wr_hits.value, CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_WR_DEFERRED,
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_WR_DEFERRED,
 			req->wr_deferred.value, CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_WR_PARTIAL_MISSES,
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_WR_PARTIAL_MISSES,
 			req->wr_partial_misses.value, CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_WR_FULL_MISSES,
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_WR_FULL_MISSES,
 			req->wr_full_misses.value, CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_WR_TOTAL,
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_WR_TOTAL,
 			req->wr_total.value, CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_RD_PT,
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_RD_PT,
 			req->rd_pt.value, CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_WR_PT,
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_WR_PT,
 			req->wr_pt.value, CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_SERVICED,
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_SERVICED,
 			req->serviced.value, CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_PREFETCH_READAHEAD,
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_PREFETCH_READAHEAD,
 			req->prefetch[ocf_pf_readahead].value,
 			CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_CLEANER,
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_CLEANER,
 			req->cleaner.value, CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_TOTAL,
-			req->total.value, CAS_NL_STATS_A_UNSPEC))
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_REQ_TOTAL,
+			req->total.value, CAS_NL_STATS_A_UNSPEC)))
 		goto nla_failure;
 
 	/* Blocks */
-	if (nla_put_u64_64bit(skb, CAS_NL_STATS_A_BLOCKS_CORE_VOLUME_RD,
+	if ((sections & CAS_NL_SECTION_BLK) &&
+	    (nla_put_u64_64bit(skb, CAS_NL_STATS_A_BLOCKS_CORE_VOLUME_RD,
 			blocks->core_volume_rd.value, CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_BLOCKS_CORE_VOLUME_WR,
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_BLOCKS_CORE_VOLUME_WR,
 			blocks->core_volume_wr.value, CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_BLOCKS_CORE_VOLUME_TOTAL,
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_BLOCKS_CORE_VOLUME_TOTAL,
 			blocks->core_volume_total.value,
 			CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_BLOCKS_CACHE_VOLUME_RD,
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_BLOCKS_CACHE_VOLUME_RD,
 			blocks->cache_volume_rd.value, CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_BLOCKS_CACHE_VOLUME_WR,
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_BLOCKS_CACHE_VOLUME_WR,
 			blocks->cache_volume_wr.value, CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_BLOCKS_CACHE_VOLUME_TOTAL,
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_BLOCKS_CACHE_VOLUME_TOTAL,
 			blocks->cache_volume_total.value,
 			CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_BLOCKS_VOLUME_RD,
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_BLOCKS_VOLUME_RD,
 			blocks->volume_rd.value, CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_BLOCKS_VOLUME_WR,
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_BLOCKS_VOLUME_WR,
 			blocks->volume_wr.value, CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_BLOCKS_VOLUME_TOTAL,
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_BLOCKS_VOLUME_TOTAL,
 			blocks->volume_total.value, CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_BLOCKS_PT_RD,
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_BLOCKS_PT_RD,
 			blocks->pass_through_rd.value, CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_BLOCKS_PT_WR,
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_BLOCKS_PT_WR,
 			blocks->pass_through_wr.value, CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_BLOCKS_PT_TOTAL,
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_BLOCKS_PT_TOTAL,
 			blocks->pass_through_total.value,
 			CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb,
+	     nla_put_u64_64bit(skb,
 			CAS_NL_STATS_A_BLOCKS_PREFETCH_CORE_RD_READAHEAD,
 			blocks->prefetch_core_rd[ocf_pf_readahead].value,
 			CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb,
+	     nla_put_u64_64bit(skb,
 			CAS_NL_STATS_A_BLOCKS_PREFETCH_CACHE_WR_READAHEAD,
 			blocks->prefetch_cache_wr[ocf_pf_readahead].value,
 			CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_BLOCKS_CLEANER_CACHE_RD,
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_BLOCKS_CLEANER_CACHE_RD,
 			blocks->cleaner_cache_rd.value,
 			CAS_NL_STATS_A_UNSPEC) ||
-	    nla_put_u64_64bit(skb, CAS_NL_STATS_A_BLOCKS_CLEANER_CORE_WR,
-			blocks->cleaner_core_wr.value, CAS_NL_STATS_A_UNSPEC))
+	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_BLOCKS_CLEANER_CORE_WR,
+			blocks->cleaner_core_wr.value, CAS_NL_STATS_A_UNSPEC)))
 		goto nla_failure;
 
 	/* Errors (optional - NULL for IO class stats) */
-	if (errors &&
+	if ((sections & CAS_NL_SECTION_ERR) &&
 	    (nla_put_u64_64bit(skb, CAS_NL_STATS_A_ERRORS_CORE_VOLUME_RD,
 			errors->core_volume_rd.value, CAS_NL_STATS_A_UNSPEC) ||
 	     nla_put_u64_64bit(skb, CAS_NL_STATS_A_ERRORS_CORE_VOLUME_WR,
@@ -451,39 +568,23 @@ nla_failure:
 	return -EMSGSIZE;
 }
 
-static int cas_nl_put_cache_msg(struct sk_buff *skb, u32 portid, u32 seq,
+static int cas_nl_put_cache_config(struct sk_buff *skb,
 		const struct cas_nl_cache_dump *c)
 {
-	void *hdr;
-	struct nlattr *cache_nest, *nest;
-
-	hdr = genlmsg_put(skb, portid, seq, &cas_nl_family, NLM_F_MULTI,
-			CAS_NL_CMD_DUMP);
-	if (!hdr)
-		return -EMSGSIZE;
-
-	cache_nest = nla_nest_start(skb, CAS_NL_A_CACHE);
-	if (!cache_nest)
-		goto nla_failure;
-
-	/* Identification */
-	if (nla_put_u16(skb, CAS_NL_CACHE_A_ID, c->id))
-		goto nla_failure;
-	if (c->path && nla_put_string(skb, CAS_NL_CACHE_A_PATH, c->path))
-		goto nla_failure;
+	struct nlattr *nest;
 
-	/* Configuration */
+	/* State and mode */
 	if (nla_put_u8(skb, CAS_NL_CACHE_A_STATE, c->info.state) ||
 	    nla_put_u8(skb, CAS_NL_CACHE_A_MODE, c->info.cache_mode) ||
 	    nla_put_u32(skb, CAS_NL_CACHE_A_LINE_SIZE, c->info.cache_line_size))
-		goto nla_failure;
+		return -EMSGSIZE;
 
 	if (c->info.attached &&
 	    nla_put_flag(skb, CAS_NL_CACHE_A_ATTACHED))
-		goto nla_failure;
+		return -EMSGSIZE;
 	if (c->info.standby_detached &&
 	    nla_put_flag(skb, CAS_NL_CACHE_A_STANDBY_DETACHED))
-		goto nla_failure;
+		return -EMSGSIZE;
 
 	/* Size and occupancy */
 	if (nla_put_u32(skb, CAS_NL_CACHE_A_SIZE, c->info.size) ||
@@ -495,21 +596,21 @@ static int cas_nl_put_cache_msg(struct sk_buff *skb, u32 portid, u32 seq,
 			c->info.dirty_initial) ||
 	    nla_put_u32(skb, CAS_NL_CACHE_A_FLUSHED, c->info.flushed) ||
 	    nla_put_u32(skb, CAS_NL_CACHE_A_CORE_COUNT, c->info.core_count))
-		goto nla_failure;
+		return -EMSGSIZE;
 
 	/* Metadata */
 	if (nla_put_u64_64bit(skb, CAS_NL_CACHE_A_METADATA_FOOTPRINT,
 			c->info.metadata_footprint, CAS_NL_CACHE_A_UNSPEC) ||
 	    nla_put_u32(skb, CAS_NL_CACHE_A_METADATA_END_OFFSET,
 			c->info.metadata_end_offset))
-		goto nla_failure;
+		return -EMSGSIZE;
 
 	/* Fallback pass-through */
 	if (nla_put_u32(skb, CAS_NL_CACHE_A_FALLBACK_PT_ERRORS,
 			c->info.fallback_pt.error_counter) ||
 	    nla_put_u8(skb, CAS_NL_CACHE_A_FALLBACK_PT_STATUS,
 			c->info.fallback_pt.status))
-		goto nla_failure;
+		return -EMSGSIZE;
 
 	/* Inactive core stats */
 	if (nla_put_u64_64bit(skb, CAS_NL_CACHE_A_INACTIVE_OCCUPANCY,
@@ -519,12 +620,12 @@ static int cas_nl_put_cache_msg(struct sk_buff *skb, u32 portid, u32 seq,
 			c->info.inactive.clean.value, CAS_NL_CACHE_A_UNSPEC) ||
 	    nla_put_u64_64bit(skb, CAS_NL_CACHE_A_INACTIVE_DIRTY,
 			c->info.inactive.dirty.value, CAS_NL_CACHE_A_UNSPEC))
-		goto nla_failure;
+		return -EMSGSIZE;
 
 	/* Cleaning parameters */
 	nest = nla_nest_start(skb, CAS_NL_CACHE_A_CLEANING_PARAMS);
 	if (!nest)
-		goto nla_failure;
+		return -EMSGSIZE;
 	if (nla_put_u32(skb, CAS_NL_CLEANING_A_POLICY, c->cleaning_policy) ||
 	    nla_put_u32(skb, CAS_NL_CLEANING_A_ALRU_WAKE_UP,
 			c->cleaning_alru_wake_up) ||
@@ -543,14 +644,14 @@ static int cas_nl_put_cache_msg(struct sk_buff *skb, u32 portid, u32 seq,
 	    nla_put_u32(skb, CAS_NL_CLEANING_A_ACP_FLUSH_MAX_BUFFERS,
 			c->cleaning_acp_flush_max_buffers)) {
 		nla_nest_cancel(skb, nest);
-		goto nla_failure;
+		return -EMSGSIZE;
 	}
 	nla_nest_end(skb, nest);
 
 	/* Promotion parameters */
 	nest = nla_nest_start(skb, CAS_NL_CACHE_A_PROMOTION_PARAMS);
 	if (!nest)
-		goto nla_failure;
+		return -EMSGSIZE;
 	if (nla_put_u32(skb, CAS_NL_PROMOTION_A_POLICY,
 			c->promotion_policy) ||
 	    nla_put_u32(skb, CAS_NL_PROMOTION_A_NHIT_INSERTION_THRESHOLD,
@@ -558,66 +659,76 @@ static int cas_nl_put_cache_msg(struct sk_buff *skb, u32 portid, u32 seq,
 	    nla_put_u32(skb, CAS_NL_PROMOTION_A_NHIT_TRIGGER_THRESHOLD,
 			c->promotion_nhit_trigger_threshold)) {
 		nla_nest_cancel(skb, nest);
-		goto nla_failure;
+		return -EMSGSIZE;
 	}
 	nla_nest_end(skb, nest);
 
-	/* Statistics */
-	if (cas_nl_put_stats(skb, CAS_NL_CACHE_A_STATS,
-			&c->usage, &c->req, &c->blocks, &c->errors))
-		goto nla_failure;
-
-	nla_nest_end(skb, cache_nest);
-	genlmsg_end(skb, hdr);
 	return 0;
-
-nla_failure:
-	genlmsg_cancel(skb, hdr);
-	return -EMSGSIZE;
 }
 
-static int cas_nl_put_core_msg(struct sk_buff *skb, u32 portid, u32 seq,
-		uint16_t cache_id, const struct cas_nl_core_dump *c)
+static int cas_nl_put_cache_msg(struct sk_buff *skb, u32 portid, u32 seq,
+		uint32_t sections, const struct cas_nl_cache_dump *c)
 {
 	void *hdr;
-	struct nlattr *core_nest;
+	struct nlattr *cache_nest;
 
 	hdr = genlmsg_put(skb, portid, seq, &cas_nl_family, NLM_F_MULTI,
 			CAS_NL_CMD_DUMP);
 	if (!hdr)
 		return -EMSGSIZE;
 
-	core_nest = nla_nest_start(skb, CAS_NL_A_CORE);
-	if (!core_nest)
+	cache_nest = nla_nest_start(skb, CAS_NL_A_CACHE);
+	if (!cache_nest)
 		goto nla_failure;
 
 	/* Identification */
-	if (nla_put_u16(skb, CAS_NL_CORE_A_CACHE_ID, cache_id) ||
-	    nla_put_u16(skb, CAS_NL_CORE_A_ID, c->id))
+	if (nla_put_u16(skb, CAS_NL_CACHE_A_ID, c->id))
 		goto nla_failure;
-	if (c->path && nla_put_string(skb, CAS_NL_CORE_A_PATH, c->path))
+	if (c->path && nla_put_string(skb, CAS_NL_CACHE_A_PATH, c->path))
 		goto nla_failure;
 
+	/* Configuration */
+	if ((sections & CAS_NL_SECTION_CONFIG) &&
+	    cas_nl_put_cache_config(skb, c))
+		goto nla_failure;
+
+	/* Statistics */
+	if (cas_nl_put_stats(skb, CAS_NL_CACHE_A_STATS, sections,
+			&c->usage, &c->req, &c->blocks, &c->errors))
+		goto nla_failure;
+
+	nla_nest_end(skb, cache_nest);
+	genlmsg_end(skb, hdr);
+	return 0;
+
+nla_failure:
+	genlmsg_cancel(skb, hdr);
+	return -EMSGSIZE;
+}
+
+static int cas_nl_put_core_config(struct sk_buff *skb,
+		const struct cas_nl_core_dump *c)
+{
 	/* State */
 	if (nla_put_u8(skb, CAS_NL_CORE_A_STATE, c->state))
-		goto nla_failure;
+		return -EMSGSIZE;
 	if (c->exp_obj_exists &&
 	    nla_put_flag(skb, CAS_NL_CORE_A_EXP_OBJ_EXISTS))
-		goto nla_failure;
+		return -EMSGSIZE;
 
 	/* Size */
 	if (nla_put_u64_64bit(skb, CAS_NL_CORE_A_SIZE,
 			c->info.core_size, CAS_NL_CORE_A_UNSPEC) ||
 	    nla_put_u64_64bit(skb, CAS_NL_CORE_A_SIZE_BYTES,
 			c->info.core_size_bytes, CAS_NL_CORE_A_UNSPEC))
-		goto nla_failure;
+		return -EMSGSIZE;
 
 	/* Dirty data */
 	if (nla_put_u32(skb, CAS_NL_CORE_A_DIRTY, c->info.dirty) ||
 	    nla_put_u64_64bit(skb, CAS_NL_CORE_A_DIRTY_FOR,
 			c->info.dirty_for, CAS_NL_CORE_A_UNSPEC) ||
 	    nla_put_u32(skb, CAS_NL_CORE_A_FLUSHED, c->info.flushed))
-		goto nla_failure;
+		return -EMSGSIZE;
 
 	/* Sequential cutoff */
 	if (nla_put_u32(skb, CAS_NL_CORE_A_SEQ_CUTOFF_THRESHOLD,
@@ -626,10 +737,41 @@ static int cas_nl_put_core_msg(struct sk_buff *skb, u32 portid, u32 seq,
 			c->seq_cutoff_policy) ||
 	    nla_put_u32(skb, CAS_NL_CORE_A_SEQ_CUTOFF_PROMO_COUNT,
 			c->seq_detect_promotion_count))
+		return -EMSGSIZE;
+
+	return 0;
+}
+
+static int cas_nl_put_core_msg(struct sk_buff *skb, u32 portid, u32 seq,
+		uint32_t sections, uint16_t cache_id,
+		const struct cas_nl_core_dump *c)
+{
+	void *hdr;
+	struct nlattr *core_nest;
+
+	hdr = genlmsg_put(skb, portid, seq, &cas_nl_family, NLM_F_MULTI,
+			CAS_NL_CMD_DUMP);
+	if (!hdr)
+		return -EMSGSIZE;
+
+	core_nest = nla_nest_start(skb, CAS_NL_A_CORE);
+	if (!core_nest)
+		goto nla_failure;
+
+	/* Identification */
+	if (nla_put_u16(skb, CAS_NL_CORE_A_CACHE_ID, cache_id) ||
+	    nla_put_u16(skb, CAS_NL_CORE_A_ID, c->id))
+		goto nla_failure;
+	if (c->path && nla_put_string(skb, CAS_NL_CORE_A_PATH, c->path))
+		goto nla_failure;
+
+	/* Configuration */
+	if ((sections & CAS_NL_SECTION_CONFIG) &&
+	    cas_nl_put_core_config(skb, c))
 		goto nla_failure;
 
 	/* Statistics */
-	if (cas_nl_put_stats(skb, CAS_NL_CORE_A_STATS,
+	if (cas_nl_put_stats(skb, CAS_NL_CORE_A_STATS, sections,
 			&c->usage, &c->req, &c->blocks, &c->errors))
 		goto nla_failure;
 
@@ -643,7 +785,8 @@ nla_failure:
 }
 
 static int cas_nl_put_ioclass_msg(struct sk_buff *skb, u32 portid, u32 seq,
-		uint16_t cache_id, const struct cas_nl_ioclass_dump *c)
+		uint32_t sections, uint16_t cache_id,
+		const struct cas_nl_ioclass_dump *c)
 {
 	void *hdr;
 	struct nlattr *ioc_nest;
@@ -666,18 +809,20 @@ static int cas_nl_put_ioclass_msg(struct sk_buff *skb, u32 portid, u32 seq,
 		goto nla_failure;
 
 	/* Configuration */
-	if (nla_put_u8(skb, CAS_NL_IOCLASS_A_CACHE_MODE, c->info.cache_mode) ||
-	    nla_put_u16(skb, CAS_NL_IOCLASS_A_PRIORITY,
+	if ((sections & CAS_NL_SECTION_CONFIG) &&
+	    (nla_put_u8(skb, CAS_NL_IOCLASS_A_CACHE_MODE,
+			c->info.cache_mode) ||
+	     nla_put_u16(skb, CAS_NL_IOCLASS_A_PRIORITY,
 			(uint16_t)c->info.priority) ||
-	    nla_put_u32(skb, CAS_NL_IOCLASS_A_CURR_SIZE, c->info.curr_size) ||
-	    nla_put_u32(skb, CAS_NL_IOCLASS_A_MIN_SIZE, c->info.min_size) ||
-	    nla_put_u32(skb, CAS_NL_IOCLASS_A_MAX_SIZE, c->info.max_size) ||
-	    nla_put_u8(skb, CAS_NL_IOCLASS_A_CLEANING_POLICY,
-			c->info.cleaning_policy_type))
+	     nla_put_u32(skb, CAS_NL_IOCLASS_A_CURR_SIZE, c->info.curr_size) ||
+	     nla_put_u32(skb, CAS_NL_IOCLASS_A_MIN_SIZE, c->info.min_size) ||
+	     nla_put_u32(skb, CAS_NL_IOCLASS_A_MAX_SIZE, c->info.max_size) ||
+	     nla_put_u8(skb, CAS_NL_IOCLASS_A_CLEANING_POLICY,
+			c->info.cleaning_policy_type)))
 		goto nla_failure;
 
 	/* Statistics (no errors for IO class) */
-	if (cas_nl_put_stats(skb, CAS_NL_IOCLASS_A_STATS,
+	if (cas_nl_put_stats(skb, CAS_NL_IOCLASS_A_STATS, sections,
 			&c->usage, &c->req, &c->blocks, NULL))
 		goto nla_failure;
 
@@ -690,8 +835,61 @@ nla_failure:
 	return -EMSGSIZE;
 }
 
+static int cas_nl_put_core_pool_msg(struct sk_buff *skb, u32 portid,
+		u32 seq, const char *path)
+{
+	void *hdr;
+	struct nlattr *pool_nest;
+
+	hdr = genlmsg_put(skb, portid, seq, &cas_nl_family, NLM_F_MULTI,
+			CAS_NL_CMD_DUMP);
+	if (!hdr)
+		return -EMSGSIZE;
+
+	pool_nest = nla_nest_start(skb, CAS_NL_A_CORE_POOL);
+	if (!pool_nest)
+		goto nla_failure;
+
+	if (nla_put_string(skb, CAS_NL_CORE_POOL_A_PATH, path))
+		goto nla_failure;
+
+	nla_nest_end(skb, pool_nest);
+	genlmsg_end(skb, hdr);
+	return 0;
+
+nla_failure:
+	genlmsg_cancel(skb, hdr);
+	return -EMSGSIZE;
+}
+
 /* ---- GENL dump callbacks ---- */
 
+static void cas_nl_get_filter(struct nlattr **attrs,
+		struct cas_nl_dump_filter *filter)
+{
+	filter->cache_id = -1;
+	filter->core_id = -1;
+	filter->io_class_id = -1;
+	filter->records = CAS_NL_RECORD_ALL;
+	filter->sections = CAS_NL_SECTION_ALL;
+
+	if (!attrs)
+		return;
+
+	if (attrs[CAS_NL_A_FILTER_CACHE_ID])
+		filter->cache_id = nla_get_u16(attrs[CAS_NL_A_FILTER_CACHE_ID]);
+	if (attrs[CAS_NL_A_FILTER_CORE_ID])
+		filter->core_id = nla_get_u16(attrs[CAS_NL_A_FILTER_CORE_ID]);
+	if (attrs[CAS_NL_A_FILTER_IO_CLASS_ID]) {
+		filter->io_class_id =
+			nla_get_u32(attrs[CAS_NL_A_FILTER_IO_CLASS_ID]);
+	}
+	if (attrs[CAS_NL_A_FILTER_RECORDS])
+		filter->records = nla_get_u32(attrs[CAS_NL_A_FILTER_RECORDS]);
+	if (attrs[CAS_NL_A_FILTER_SECTIONS])
+		filter->sections = nla_get_u32(attrs[CAS_NL_A_FILTER_SECTIONS]);
+}
+
 static int cas_nl_dump_start(struct netlink_callback *cb)
 {
 	struct cas_nl_dump_ctx *ctx;
@@ -702,19 +900,35 @@ static int cas_nl_dump_start(struct netlink_callback *cb)
 	if (!ctx)
 		return -ENOMEM;
 
+	cas_nl_get_filter(genl_dumpit_info(cb)->info.attrs, &ctx->filter);
+
+	if ((ctx->filter.records & CAS_NL_RECORD_CORE_POOL) &&
+			ctx->filter.cache_id < 0) {
+		result = cas_nl_collect_core_pool(ctx);
+		if (result) {
+			cas_nl_free_dump_ctx(ctx);
+			return result;
+		}
+	}
+
 	/* Collect cache IDs — allocate for the max possible to avoid a race
 	 * between a separate get_count call and the visit call.
 	 */
 	list_ctx.ids = kmalloc_array(OCF_CACHE_ID_MAX, sizeof(uint16_t),
 			GFP_KERNEL);
 	if (!list_ctx.ids) {
-		kfree(ctx);
+		cas_nl_free_dump_ctx(ctx);
 		return -ENOMEM;
 	}
 	list_ctx.count = 0;
 	list_ctx.capacity = OCF_CACHE_ID_MAX;
 
-	ocf_mngt_cache_visit(cas_ctx, cas_nl_list_visitor, &list_ctx);
+	if (ctx->filter.cache_id < 0) {
+		ocf_mngt_cache_visit(cas_ctx, cas_nl_list_visitor, &list_ctx);
+	} else {
+		/* Nonexistent cache is skipped below, like a stopped one */
+		list_ctx.ids[list_ctx.count++] = ctx->filter.cache_id;
+	}
 
 	if (list_ctx.count == 0) {
 		kfree(list_ctx.ids);
@@ -726,13 +940,13 @@ static int cas_nl_dump_start(struct netlink_callback *cb)
 	ctx->caches = cas_nl_vcalloc(list_ctx.count, sizeof(*ctx->caches));
 	if (!ctx->caches) {
 		kfree(list_ctx.ids);
-		kfree(ctx);
+		cas_nl_free_dump_ctx(ctx);
 		return -ENOMEM;
 	}
 
 	for (i = 0, j = 0; i < list_ctx.count; i++) {
 		result = cas_nl_collect_cache(list_ctx.ids[i],
-				&ctx->caches[j]);
+				&ctx->caches[j], &ctx->filter);
 		if (result == 0)
 			j++;
 		/* Skip caches that disappeared between list and collect */
@@ -750,25 +964,39 @@ static int cas_nl_dump_start(struct netlink_callback *cb)
  *   args[0] = cache index
  *   args[1] = phase: 0=cache record, 1=core records, 2=ioclass records
  *   args[2] = index within current phase
+ *   args[4] = core pool index (core pool records precede all caches)
  */
 static int cas_nl_dump(struct sk_buff *skb, struct netlink_callback *cb)
 {
 	struct cas_nl_dump_ctx *ctx = (void *)cb->args[3];
+	uint32_t sections = ctx->filter.sections;
 	int cache_idx = cb->args[0];
 	int phase = cb->args[1];
 	int sub_idx = cb->args[2];
+	int pool_idx = cb->args[4];
 	u32 portid = NETLINK_CB(cb->skb).portid;
 	u32 seq = cb->nlh->nlmsg_seq;
 	struct cas_nl_cache_dump *cache;
 	int result;
 
+	while (pool_idx < ctx->num_core_pool) {
+		result = cas_nl_put_core_pool_msg(skb, portid, seq,
+				ctx->core_pool[pool_idx]);
+		if (result)
+			goto out;
+		pool_idx++;
+	}
+
 	while (cache_idx < ctx->num_caches) {
 		cache = &ctx->caches[cache_idx];
 
 		if (phase == 0) {
-			result = cas_nl_put_cache_msg(skb, portid, seq, cache);
-			if (result)
-				goto out;
+			if (ctx->filter.records & CAS_NL_RECORD_CACHE) {
+				result = cas_nl_put_cache_msg(skb, portid, seq,
+						sections, cache);
+				if (result)
+					goto out;
+			}
 			phase = 1;
 			sub_idx = 0;
 		}
@@ -776,7 +1004,7 @@ static int cas_nl_dump(struct sk_buff *skb, struct netlink_callback *cb)
 		if (phase == 1) {
 			while (sub_idx < cache->num_cores) {
 				result = cas_nl_put_core_msg(skb, portid, seq,
-						cache->id,
+						sections, cache->id,
 						&cache->cores[sub_idx]);
 				if (result)
 					goto out;
@@ -789,7 +1017,7 @@ static int cas_nl_dump(struct sk_buff *skb, struct netlink_callback *cb)
 		if (phase == 2) {
 			while (sub_idx < cache->num_io_classes) {
 				result = cas_nl_put_ioclass_msg(skb, portid,
-						seq, cache->id,
+						seq, sections, cache->id,
 						&cache->io_classes[sub_idx]);
 				if (result)
 					goto out;
@@ -807,6 +1035,7 @@ out:
 	cb->args[0] = cache_idx;
 	cb->args[1] = phase;
 	cb->args[2] = sub_idx;
+	cb->args[4] = pool_idx;
 
 	return skb->len;
 }
@@ -824,6 +1053,17 @@ static const struct nla_policy cas_nl_policy[CAS_NL_A_MAX + 1] = {
 	[CAS_NL_A_CACHE]	= { .type = NLA_NESTED },
 	[CAS_NL_A_CORE]	= { .type = NLA_NESTED },
 	[CAS_NL_A_IO_CLASS]	= { .type = NLA_NESTED },
+	[CAS_NL_A_CORE_POOL]	= { .type = NLA_NESTED },
+	[CAS_NL_A_FILTER_CACHE_ID]	= NLA_POLICY_RANGE(NLA_U16,
+			OCF_CACHE_ID_MIN, OCF_CACHE_ID_MAX),
+	[CAS_NL_A_FILTER_CORE_ID]	= NLA_POLICY_MAX(NLA_U16,
+			OCF_CORE_NUM - 1),
+	[CAS_NL_A_FILTER_IO_CLASS_ID]	= NLA_POLICY_MAX(NLA_U32,
+			OCF_USER_IO_CLASS_MAX - 1),
+	[CAS_NL_A_FILTER_RECORDS]	= NLA_POLICY_MASK(NLA_U32,
+			CAS_NL_RECORD_ALL),
+	[CAS_NL_A_FILTER_SECTIONS]	= NLA_POLICY_MASK(NLA_U32,
+			CAS_NL_SECTION_ALL),
 };
 
 static const struct genl_split_ops cas_nl_ops[] = {
@@ -832,6 +1072,8 @@ static const struct genl_split_ops cas_nl_ops[] = {
 		.start		= cas_nl_dump_start,
 		.dumpit		= cas_nl_dump,
 		.done		= cas_nl_dump_done,
+		.policy		= cas_nl_policy,
+		.maxattr	= CAS_NL_A_MAX,
 		.flags		= GENL_CMD_CAP_DUMP,
 	},
 };
@@ -22,16 +22,55 @@ enum cas_nl_cmd {
 /**
  * Top-level attributes. Each dump message contains exactly one of
  * the nested record attributes below.
+ *
+ * Dump request may contain filter attributes. Without them all records
+ * are dumped with all sections.
  */
 enum cas_nl_attr {
 	CAS_NL_A_UNSPEC,
 	CAS_NL_A_CACHE,		/* NLA_NESTED - cache record */
 	CAS_NL_A_CORE,		/* NLA_NESTED - core record */
 	CAS_NL_A_IO_CLASS,	/* NLA_NESTED - IO class record */
+	CAS_NL_A_CORE_POOL,	/* NLA_NESTED - core pool record */
+	/* Dump request filters */
+	CAS_NL_A_FILTER_CACHE_ID,	/* u16 - records of this cache only */
+	CAS_NL_A_FILTER_CORE_ID,	/* u16 - core records of this core only */
+	CAS_NL_A_FILTER_IO_CLASS_ID,	/* u32 - IO class records of this class only */
+	CAS_NL_A_FILTER_RECORDS,	/* u32 - mask of enum cas_nl_record */
+	CAS_NL_A_FILTER_SECTIONS,	/* u32 - mask of enum cas_nl_section */
 	__CAS_NL_A_MAX,
 };
 #define CAS_NL_A_MAX (__CAS_NL_A_MAX - 1)
 
+/**
+ * Record types selected by CAS_NL_A_FILTER_RECORDS. Core pool records are
+ * not dumped if CAS_NL_A_FILTER_CACHE_ID is given.
+ */
+enum cas_nl_record {
+	CAS_NL_RECORD_CACHE	= 1 << 0,
+	CAS_NL_RECORD_CORE	= 1 << 1,
+	CAS_NL_RECORD_IO_CLASS	= 1 << 2,
+	CAS_NL_RECORD_CORE_POOL	= 1 << 3,
+};
+#define CAS_NL_RECORD_ALL	((CAS_NL_RECORD_CORE_POOL << 1) - 1)
+
+/**
+ * Record sections selected by CAS_NL_A_FILTER_SECTIONS. Identification
+ * attributes (ids, path, IO class name) are always present. CONFIG covers
+ * all the other non-stats attributes, the rest are groups of the stats nest.
+ * Stats nest is omitted if no stats section is selected.
+ */
+enum cas_nl_section {
+	CAS_NL_SECTION_CONFIG	= 1 << 0,
+	CAS_NL_SECTION_USAGE	= 1 << 1,
+	CAS_NL_SECTION_REQ	= 1 << 2,
+	CAS_NL_SECTION_BLK	= 1 << 3,
+	CAS_NL_SECTION_ERR	= 1 << 4,
+};
+#define CAS_NL_SECTION_STATS	(CAS_NL_SECTION_USAGE | CAS_NL_SECTION_REQ | \
+				 CAS_NL_SECTION_BLK | CAS_NL_SECTION_ERR)
+#define CAS_NL_SECTION_ALL	(CAS_NL_SECTION_CONFIG | CAS_NL_SECTION_STATS)
+
 /**
  * Cache record attributes (inside CAS_NL_A_CACHE)
  */
@@ -153,6 +192,16 @@ enum cas_nl_ioclass_attr {
 };
 #define CAS_NL_IOCLASS_A_MAX (__CAS_NL_IOCLASS_A_MAX - 1)
 
+/**
+ * Core pool record attributes (inside CAS_NL_A_CORE_POOL)
+ */
+enum cas_nl_core_pool_attr {
+	CAS_NL_CORE_POOL_A_UNSPEC,
+	CAS_NL_CORE_POOL_A_PATH,		/* NUL-string */
+	__CAS_NL_CORE_POOL_A_MAX,
+};
+#define CAS_NL_CORE_POOL_A_MAX (__CAS_NL_CORE_POOL_A_MAX - 1)
+
 /**
  * Statistics attributes.
  *
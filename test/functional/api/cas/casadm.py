@@ -4,6 +4,7 @@
 # SPDX-License-Identifier: BSD-3-Clause
 #
 
+import base64
 from typing import List
 
 from api.cas.cache import Cache
@@ -231,6 +232,46 @@ def set_param_cleaning_acp(
     return output
 
 
+def set_params(
+    cache_id: int, params: dict, core_id: int = None, shortcut: bool = False
+) -> List[Output]:
+    """
+    Set parameters of multiple namespaces ({namespace: {param: value}}, e.g.
+    {"cleaning": {"policy": CleaningPolicy.alru}, "cleaning-alru": {"wake_up": 20}})
+    in a single casadm --batch process. Enum values are passed by name and Size values
+    in KiB. All namespaces and params are checked before anything is sent and failure
+    of one namespace doesn't stop the others. If any failed, raises CmdException
+    naming failed and applied namespaces.
+    """
+    def param_value(value) -> str:
+        if isinstance(value, Size):
+            return str(int(value.get_value(Unit.KibiByte)))
+        if hasattr(value, "name"):
+            return value.name
+        return str(value)
+
+    _params = {
+        name: {param: param_value(value) for param, value in values.items()}
+        for name, values in params.items()
+    }
+    _core_id = str(core_id) if core_id is not None else None
+    outputs = run_batch(
+        set_params_cmds(
+            cache_id=str(cache_id), params=_params, core_id=_core_id, shortcut=shortcut
+        )
+    )
+    failed = [(name, output) for name, output in zip(params, outputs) if output.exit_code != 0]
+    if failed:
+        failed_names = [name for name, _ in failed]
+        applied = [name for name in params if name not in failed_names]
+        raise CmdException(
+            f"Error while setting {', '.join(failed_names)} parameters, "
+            f"applied: {', '.join(applied) or 'none'}.",
+            failed[0][1],
+        )
+    return outputs
+
+
 def set_param_promotion(cache_id: int, policy: PromotionPolicy, shortcut: bool = False) -> Output:
     output = TestRun.executor.run(
         set_param_promotion_cmd(
@@ -436,6 +477,39 @@ def list_caches(
     return output
 
 
+def run_batch(commands: List[str]) -> List[Output]:
+    """
+    Run casadm commands (as built by api.cas.cli) in a single casadm --batch process.
+    Returns output of each command; failures of single commands are not raised.
+    """
+    output = TestRun.executor.run(batch_cmd(commands))
+    if output.exit_code != 0:
+        raise CmdException("Failed to execute casadm batch.", output)
+
+    try:
+        results = _parse_batch_output(base64.b64decode(output.stdout, validate=True))
+    except ValueError:
+        raise CmdException("Invalid casadm batch output.", output)
+    if len(results) != len(commands):
+        raise CmdException("Unexpected number of casadm batch results.", output)
+    return results
+
+
+def _parse_batch_output(data: bytes) -> List[Output]:
+    results = []
+    pos = len(b"ready\n") if data.startswith(b"ready\n") else 0
+    while pos < len(data):
+        header_end = data.index(b"\n", pos)
+        _, exit_code, out_len, err_len = data[pos:header_end].split()
+        out_start = header_end + 1
+        err_start = out_start + int(out_len)
+        pos = err_start + int(err_len)
+        results.append(
+            Output(data[out_start:err_start], data[err_start:pos], int(exit_code))
+        )
+    return results
+
+
 def print_statistics(
     cache_id: int,
     core_id: int = None,
@@ -161,6 +161,64 @@ def set_param_cleaning_acp_cmd(
     return casadm_bin + command
 
 
+# Parameters accepted by --set-param in each namespace
+set_param_names = {
+    "cleaning": ["policy"],
+    "cleaning-alru": [
+        "wake-up",
+        "staleness-time",
+        "flush-max-buffers",
+        "activity-threshold",
+        "dirty-ratio-threshold",
+        "dirty-ratio-inertia",
+    ],
+    "cleaning-acp": ["wake-up", "flush-max-buffers"],
+    "promotion": ["policy"],
+    "promotion-nhit": ["threshold", "trigger"],
+    "prefetch": ["policy"],
+    "prefetch-readahead": ["threshold"],
+    "seq-cutoff": ["threshold", "policy"],
+    "seq-detect": ["promotion-count", "promotion-threshold"],
+}
+core_param_namespaces = ("seq-cutoff", "seq-detect")
+
+
+def set_params_cmds(
+    cache_id: str, params: dict, core_id: str = None, shortcut: bool = False
+) -> list:
+    """
+    One set-param command per namespace of params ({namespace: {param: value}}),
+    values are expected as strings. core_id applies to core namespaces only
+    (seq-cutoff, seq-detect), without it params of all cores are set. All
+    namespaces and params are checked first, ValueError lists all problems found.
+    """
+    errors = []
+    commands = []
+    for name, values in params.items():
+        names = set_param_names.get(name)
+        if names is None:
+            errors.append(f"unknown parameter namespace {name}")
+            continue
+        if not values:
+            errors.append(f"no parameters given for {name}")
+            continue
+
+        command = _set_param_cmd(name=name, cache_id=cache_id, shortcut=shortcut)
+        if core_id is not None and name in core_param_namespaces:
+            command += (" -j " if shortcut else " --core-id ") + core_id
+        for param, value in values.items():
+            param = param.replace("_", "-")
+            if param not in names:
+                errors.append(f"unknown parameter {param} in {name}")
+                continue
+            command += f" --{param} {value}"
+        commands.append(casadm_bin + command)
+
+    if errors:
+        raise ValueError(f"Invalid cache {cache_id} parameters: {', '.join(errors)}")
+    return commands
+
+
 def _get_param_cmd(
     name: str,
     cache_id: str,
@@ -414,6 +472,19 @@ def zero_metadata_cmd(cache_dev: str, force: bool = False, shortcut: bool = Fals
     return casadm_bin + command
 
 
+def batch_cmd(commands: list) -> str:
+    lines = [
+        command[len(casadm_bin):].strip() if command.startswith(casadm_bin + " ") else command
+        for command in commands
+    ]
+    # Output is base64 encoded, as results are delimited by lengths in bytes,
+    # which don't survive decoding and stripping of output by executor
+    return (
+        "set -o pipefail; " + casadm_bin + " --batch << 'CAS_BATCH_EOF' | base64 -w 0\n"
+        + "\n".join(lines) + "\nCAS_BATCH_EOF"
+    )
+
+
 # casctl command
 
 
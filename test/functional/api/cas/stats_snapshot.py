@@ -0,0 +1,304 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+import json
+import shlex
+
+import numpy as np
+
+from api.cas.statistics import (
+    BlockStats,
+    ErrorStats,
+    IoClassUsageStats,
+    OperationType,
+    RequestStats,
+    UnitType,
+    UsageStats,
+)
+from core.test_run import TestRun
+from connection.utils.output import CmdException
+
+# Fields of struct cas_nl_stats, in order of libopencas dump
+STATS_FIELDS = [
+    "usage_occupancy", "usage_free", "usage_clean", "usage_dirty",
+    "req_rd_hits", "req_rd_deferred", "req_rd_partial_misses", "req_rd_full_misses",
+    "req_rd_total", "req_wr_hits", "req_wr_deferred", "req_wr_partial_misses",
+    "req_wr_full_misses", "req_wr_total", "req_rd_pt", "req_wr_pt", "req_serviced",
+    "req_prefetch_readahead", "req_cleaner", "req_total",
+    "blocks_core_rd", "blocks_core_wr", "blocks_core_total",
+    "blocks_cache_rd", "blocks_cache_wr", "blocks_cache_total",
+    "blocks_volume_rd", "blocks_volume_wr", "blocks_volume_total",
+    "blocks_pt_rd", "blocks_pt_wr", "blocks_pt_total",
+    "blocks_prefetch_core_rd_readahead", "blocks_prefetch_cache_wr_readahead",
+    "blocks_cleaner_cache_rd", "blocks_cleaner_core_wr",
+    "errors_core_rd", "errors_core_wr", "errors_core_total",
+    "errors_cache_rd", "errors_cache_wr", "errors_cache_total", "errors_total",
+]  # fmt: skip
+
+# Current values rather than counters, deltas keep values of newer snapshot
+GAUGE_FIELDS = ["usage_occupancy", "usage_free", "usage_clean", "usage_dirty"]
+
+NO_ID = -1
+
+_DUMP_SCRIPT = """
+import json, sys, time
+sys.path.insert(0, "/usr/lib/opencas")
+import opencas
+dump = opencas.cas_netlink.dump()
+fields = opencas.cas_netlink.stats_fields
+def row(cache_id, core_id, io_class_id, stats):
+    return [cache_id, core_id, io_class_id] + [getattr(stats, f) for f in fields]
+rows = [row(c.id, -1, -1, c.stats) for c in dump.caches]
+rows += [row(c.cache_id, c.id, -1, c.stats) for c in dump.cores]
+rows += [row(c.cache_id, -1, c.id, c.stats) for c in dump.ioclasses]
+print(json.dumps({"time": time.time(), "fields": fields, "rows": rows}))
+"""
+
+_USAGE_KEYS = {
+    "Occupancy": "usage_occupancy",
+    "Free": "usage_free",
+    "Clean": "usage_clean",
+    "Dirty": "usage_dirty",
+}
+
+_REQUEST_KEYS = {
+    **{
+        f"{operation} {name}": f"req_{prefix}_{field}"
+        for operation, prefix in [(OperationType.read, "rd"), (OperationType.write, "wr")]
+        for name, field in [
+            ("hits", "hits"),
+            ("deferred", "deferred"),
+            ("partial misses", "partial_misses"),
+            ("full misses", "full_misses"),
+            ("total", "total"),
+        ]
+    },
+    "Pass-Through reads": "req_rd_pt",
+    "Pass-Through writes": "req_wr_pt",
+    "Serviced requests": "req_serviced",
+    "Prefetch: readahead": "req_prefetch_readahead",
+    "Cleaner": "req_cleaner",
+    "Total requests": "req_total",
+}
+
+_BLOCK_KEYS = {
+    **{
+        f"{name} {device}": f"blocks_{prefix}_{field}"
+        for device, prefix in [("core", "core"), ("cache", "cache"), ("exported object", "volume")]
+        for name, field in [("Reads from", "rd"), ("Writes to", "wr"), ("Total to/from", "total")]
+    },
+    "Prefetch core reads: readahead": "blocks_prefetch_core_rd_readahead",
+    "Prefetch cache writes: readahead": "blocks_prefetch_cache_wr_readahead",
+    "Cleaner cache reads": "blocks_cleaner_cache_rd",
+    "Cleaner core writes": "blocks_cleaner_core_wr",
+}
+
+_ERROR_KEYS = {
+    **{
+        f"{device} {name} errors": f"errors_{device.lower()}_{field}"
+        for device in ["Cache", "Core"]
+        for name, field in [("read", "rd"), ("write", "wr"), ("total", "total")]
+    },
+    "Total errors": "errors_total",
+}
+
+
+class StatsSnapshot:
+    """
+    Statistics of all caches, cores and IO classes as one 2-D int64 array,
+    rows being devices (identified by cache_ids, core_ids and io_class_ids,
+    NO_ID where not applicable) and columns being cas_nl_stats fields.
+    Arithmetic on statistics of any number of devices is a single NumPy
+    operation, so comparing snapshots of thousands of devices is cheap.
+    """
+
+    def __init__(
+        self,
+        cache_ids: np.ndarray,
+        core_ids: np.ndarray,
+        io_class_ids: np.ndarray,
+        values: np.ndarray,
+        fields: list = None,
+        timestamp: float = None,
+        elapsed: float = None,
+    ):
+        self.cache_ids = np.asarray(cache_ids, dtype=np.int64)
+        self.core_ids = np.asarray(core_ids, dtype=np.int64)
+        self.io_class_ids = np.asarray(io_class_ids, dtype=np.int64)
+        self.fields = list(fields) if fields is not None else list(STATS_FIELDS)
+        self.values = np.asarray(values, dtype=np.int64).reshape(-1, len(self.fields))
+        self.timestamp = timestamp
+        # Seconds between snapshots, set on deltas only
+        self.elapsed = elapsed
+
+    def __len__(self):
+        return len(self.values)
+
+    @classmethod
+    def capture(cls):
+        """Take snapshot of DUT with single libopencas netlink dump"""
+        output = TestRun.executor.run(f"python3 -c {shlex.quote(_DUMP_SCRIPT)}")
+        if output.exit_code != 0:
+            raise CmdException("Dumping statistics failed.", output)
+        return cls.from_json(output.stdout)
+
+    @classmethod
+    def from_json(cls, text: str):
+        data = json.loads(text)
+        rows = np.array(data["rows"], dtype=np.int64).reshape(-1, 3 + len(data["fields"]))
+        return cls(
+            rows[:, 0], rows[:, 1], rows[:, 2], rows[:, 3:], data["fields"], data["time"]
+        )
+
+    @classmethod
+    def from_dump(cls, dump, timestamp: float = None):
+        """Snapshot of opencas.cas_netlink.dump() result"""
+        devices = (
+            [(c.id, NO_ID, NO_ID, c.stats) for c in dump.caches]
+            + [(c.cache_id, c.id, NO_ID, c.stats) for c in dump.cores]
+            + [(c.cache_id, NO_ID, c.id, c.stats) for c in dump.ioclasses]
+        )
+        values = [[getattr(stats, field) for field in STATS_FIELDS] for *_, stats in devices]
+        return cls(
+            [d[0] for d in devices],
+            [d[1] for d in devices],
+            [d[2] for d in devices],
+            values,
+            timestamp=timestamp,
+        )
+
+    def _keys(self):
+        # Unique row key, ids are at most 16 bit and NO_ID is -1
+        return (
+            (self.cache_ids << 34) + ((self.core_ids + 1) << 17) + self.io_class_ids + 1
+        )
+
+    def _subset(self, rows, values=None):
+        return StatsSnapshot(
+            self.cache_ids[rows],
+            self.core_ids[rows],
+            self.io_class_ids[rows],
+            self.values[rows] if values is None else values,
+            self.fields,
+            self.timestamp,
+            self.elapsed,
+        )
+
+    def column(self, field: str) -> np.ndarray:
+        return self.values[:, self.fields.index(field)]
+
+    def caches(self):
+        return self._subset((self.core_ids == NO_ID) & (self.io_class_ids == NO_ID))
+
+    def cores(self, cache_id: int = None):
+        rows = self.core_ids != NO_ID
+        if cache_id is not None:
+            rows &= self.cache_ids == cache_id
+        return self._subset(rows)
+
+    def io_classes(self, cache_id: int = None):
+        rows = self.io_class_ids != NO_ID
+        if cache_id is not None:
+            rows &= self.cache_ids == cache_id
+        return self._subset(rows)
+
+    def find(self, cache_id: int, core_id: int = NO_ID, io_class_id: int = NO_ID) -> int:
+        """Row of device, None if it's not in snapshot"""
+        rows = np.flatnonzero(
+            (self.cache_ids == cache_id)
+            & (self.core_ids == core_id)
+            & (self.io_class_ids == io_class_id)
+        )
+        return int(rows[0]) if len(rows) else None
+
+    def __sub__(self, other):
+        """
+        Counter deltas of devices present in both snapshots. Counters which
+        went down (statistics were reset) count from zero. Rows are sorted
+        by device key (cache id, then core id, then IO class id) rather than
+        kept in order of either snapshot, so use find() to look devices up.
+        """
+        if self.fields != other.fields:
+            raise ValueError("Snapshots have different statistics fields")
+
+        _, rows, other_rows = np.intersect1d(
+            self._keys(), other._keys(), assume_unique=True, return_indices=True
+        )
+        values = self.values[rows]
+        deltas = values - other.values[other_rows]
+        counters = np.array([field not in GAUGE_FIELDS for field in self.fields])
+        reset = (deltas < 0) | ~counters
+        deltas[reset] = values[reset]
+
+        delta = self._subset(rows, deltas)
+        if self.timestamp is not None and other.timestamp is not None:
+            delta.elapsed = self.timestamp - other.timestamp
+        return delta
+
+    def rates(self) -> np.ndarray:
+        """Counters per second of delta snapshot"""
+        if not self.elapsed or self.elapsed <= 0:
+            raise ValueError("Rates need delta of two snapshots taken at different times")
+        return self.values / self.elapsed
+
+    def _ratio(self, numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(denominator > 0, numerator / denominator, np.nan)
+
+    def hit_ratio(self) -> np.ndarray:
+        """Fraction of read and write requests which were hits, NaN if none"""
+        hits = self.column("req_rd_hits") + self.column("req_wr_hits")
+        requests = hits + sum(
+            self.column(f"req_{op}_{kind}_misses")
+            for op in ["rd", "wr"]
+            for kind in ["partial", "full"]
+        )
+        return self._ratio(hits, requests)
+
+    def pass_through_ratio(self) -> np.ndarray:
+        """Fraction of all requests which were passed through, NaN if none"""
+        pass_through = self.column("req_rd_pt") + self.column("req_wr_pt")
+        return self._ratio(pass_through, self.column("req_total"))
+
+    def per_cache(self):
+        """Sums of rows of each cache, e.g. snapshot.cores().per_cache()"""
+        cache_ids, rows = np.unique(self.cache_ids, return_inverse=True)
+        sums = np.zeros((len(cache_ids), len(self.fields)), dtype=np.int64)
+        np.add.at(sums, rows, self.values)
+        no_id = np.full(len(cache_ids), NO_ID)
+        return StatsSnapshot(
+            cache_ids, no_id, no_id, sums, self.fields, self.timestamp, self.elapsed
+        )
+
+    def _stats_dict(self, row: int, keys: dict, unit: UnitType):
+        stats_dict = {}
+        for key, field in keys.items():
+            stats_dict[f"{key} {unit}"] = str(self.values[row, self.fields.index(field)])
+            # Sections remove keys of both units, percentages aren't dumped
+            stats_dict[f"{key} {UnitType.percentage}"] = "0"
+        return stats_dict
+
+    def get_request_stats(self, row: int) -> RequestStats:
+        stats_dict = self._stats_dict(row, _REQUEST_KEYS, UnitType.requests)
+        # Not dumped separately, whatever is neither prefetch nor cleaner
+        user = self.values[row, self.fields.index("req_total")] - sum(
+            self.values[row, self.fields.index(field)]
+            for field in ["req_prefetch_readahead", "req_cleaner"]
+        )
+        stats_dict[f"User requests {UnitType.requests}"] = str(user)
+        stats_dict[f"User requests {UnitType.percentage}"] = "0"
+        return RequestStats(stats_dict)
+
+    def get_block_stats(self, row: int) -> BlockStats:
+        return BlockStats(self._stats_dict(row, _BLOCK_KEYS, UnitType.block_4k))
+
+    def get_error_stats(self, row: int) -> ErrorStats:
+        return ErrorStats(self._stats_dict(row, _ERROR_KEYS, UnitType.requests))
+
+    def get_usage_stats(self, row: int) -> UsageStats | IoClassUsageStats:
+        if self.io_class_ids[row] != NO_ID:
+            keys = {key: field for key, field in _USAGE_KEYS.items() if key != "Free"}
+            return IoClassUsageStats(self._stats_dict(row, keys, UnitType.block_4k), False)
+        return UsageStats(self._stats_dict(row, _USAGE_KEYS, UnitType.block_4k), False)
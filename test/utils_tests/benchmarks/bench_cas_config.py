@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+"""
+Benchmark of opencas.conf parsing with large synthetic configurations.
+
+Scenarios:
+  caches - config with --caches caches (16384 by default) and no cores
+  cores  - config with --core-caches caches, each with --cores-per-cache
+           cores (4096 by default)
+
+Parsing is done with allow_incomplete=True, so the synthetic device paths
+don't need to exist.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), "../../../utils"))
+
+import opencas
+
+
+def write_config(path, caches, cores_per_cache):
+    with open(path, "w") as conf:
+        conf.write("version=19.3.0\n")
+        conf.write("[caches]\n")
+        for cache_id in range(1, caches + 1):
+            conf.write(f"{cache_id}\t/dev/disk/by-id/bench-cache-{cache_id}\tWT\n")
+
+        conf.write("[cores]\n")
+        for cache_id in range(1, caches + 1):
+            for core_id in range(cores_per_cache):
+                conf.write(
+                    f"{cache_id}\t{core_id}\t/dev/disk/by-id/bench-core-{cache_id}-{core_id}\n"
+                )
+
+
+def run_scenario(name, caches, cores_per_cache, repeat):
+    fd, path = tempfile.mkstemp(prefix="opencas-bench-", suffix=".conf")
+    os.close(fd)
+
+    try:
+        write_config(path, caches, cores_per_cache)
+
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            config = opencas.cas_config.from_file(path, allow_incomplete=True)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        assert len(config.caches) == caches
+        assert len(config.cores) == caches * cores_per_cache
+    finally:
+        os.unlink(path)
+
+    lines = caches * (cores_per_cache + 1)
+    print(f"{name:8} {caches:8} {caches * cores_per_cache:10} {best:10.3f} "
+          f"{lines / best:12.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="opencas.conf parsing benchmark")
+    parser.add_argument("--caches", type=int, default=16384,
+                        help="number of caches in 'caches' scenario")
+    parser.add_argument("--core-caches", type=int, default=16,
+                        help="number of caches in 'cores' scenario")
+    parser.add_argument("--cores-per-cache", type=int, default=4096,
+                        help="number of cores per cache in 'cores' scenario")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="number of runs, best time is reported")
+    args = parser.parse_args()
+
+    print(f"{'scenario':8} {'caches':>8} {'cores':>10} {'time [s]':>10} {'lines/s':>12}")
+    run_scenario("caches", args.caches, 0, args.repeat)
+    run_scenario("cores", args.core_caches, args.cores_per_cache, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@
 # SPDX-License-Identifier: BSD-3-Clause
 #
 
+import importlib.machinery
+import importlib.util
 import unittest.mock as mock
 import re
 import os
@@ -24,6 +26,14 @@ def find_repo_root():
     )
 
 
+def load_casctl():
+    path = find_repo_root() + "/utils/casctl"
+    loader = importlib.machinery.SourceFileLoader("casctl", path)
+    module = importlib.util.module_from_spec(importlib.util.spec_from_loader("casctl", loader))
+    loader.exec_module(module)
+    return module
+
+
 def get_process_mock(return_value, stdout, stderr):
     process_mock = mock.Mock()
     attrs = {
@@ -121,3 +131,60 @@ class CopyableMock(mock.Mock):
         copy = mock.Mock(spec=self)
         self.copies += [copy]
         return copy
+
+
+def get_caches_list_entry(dev_type, dev_id, disk, status="Running", write_policy="-",
+                          device="-"):
+    """Device as listed by opencas.get_caches_list()"""
+    return {
+        "type": dev_type, "id": str(dev_id), "disk": disk, "status": status,
+        "write policy": write_policy, "device": device,
+    }
+
+
+def get_devices_state(caches=(), cores=()):
+    """
+    opencas.get_devices_state() result with running caches given as
+    (cache_id, device, mode) and active cores given as (cache_id, core_id, device)
+    """
+    return {
+        "core_pool": {},
+        "caches": {
+            cache_id: {"device": device, "status": "Running", "mode": mode}
+            for cache_id, device, mode in caches
+        },
+        "cores": {
+            (cache_id, core_id): {"device": device, "status": "Active", "cache_id": cache_id}
+            for cache_id, core_id, device in cores
+        },
+    }
+
+
+def get_stats_mock(**counters):
+    """Statistics of netlink dump record, counters which are not given are 0"""
+    # utils directory is added to sys.path by conftest after this module is imported
+    import opencas
+
+    values = {field: 0 for field in opencas.cas_netlink.stats_fields}
+    values.update(counters)
+    return mock.Mock(**values)
+
+
+def get_record_mock(stats=None, **attrs):
+    """
+    Netlink dump record of cache, core or IO class with given attributes.
+    Nested attributes may be given as in Mock.configure_mock(), e.g.
+    **{"state_name.return_value": "Running"}.
+    """
+    record = mock.Mock(stats=stats if stats is not None else get_stats_mock())
+    record.configure_mock(**attrs)
+    return record
+
+
+def get_dump_mock(caches=(), cores=(), ioclasses=()):
+    """Netlink dump made of records created with get_record_mock()"""
+    import opencas
+
+    return opencas.cas_netlink.dump_result(
+        caches=list(caches), cores=list(cores), ioclasses=list(ioclasses)
+    )
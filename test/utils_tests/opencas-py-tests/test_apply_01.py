@@ -0,0 +1,94 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+import pytest
+from unittest.mock import patch, Mock
+
+import opencas
+from helpers import get_process_mock, get_devices_state
+
+
+@patch("opencas.casadm.get_params")
+def test_apply_plan_01(mock_params):
+    """
+    Check if only differing cores, modes and policies are changed and caches are not stopped
+    """
+    config = opencas.cas_config(
+        caches={
+            1: opencas.cas_config.cache_config(1, "/dev/nvme0n1", "wt"),
+            2: opencas.cas_config.cache_config(
+                2, "/dev/nvme1n1", "wt", cleaning_policy="acp", promotion_policy="always"
+            ),
+            3: opencas.cas_config.cache_config(3, "/dev/nvme2n1", "wb"),
+        },
+        cores=[
+            opencas.cas_config.core_config(1, 1, "/dev/sdb"),
+            opencas.cas_config.core_config(1, 2, "/dev/sdc"),
+            opencas.cas_config.core_config(2, 1, "/dev/sdd"),
+            opencas.cas_config.core_config(3, 1, "/dev/sde"),
+        ],
+    )
+    state = get_devices_state(
+        caches=[(1, "/dev/nvme0n1", "wt"), (2, "/dev/nvme1n1", "wb"), (4, "/dev/nvme3n1", "wt")],
+        cores=[(1, 1, "/dev/sdb"), (1, 3, "/dev/sdf"), (2, 1, "/dev/sdx")],
+    )
+    mock_params.side_effect = lambda namespace, cache_id: get_process_mock(
+        0, "Parameter name,Value\n{} policy type,{}\n".format(
+            namespace.capitalize(), "acp" if namespace == "cleaning" else "nhit"
+        ), ""
+    )
+
+    operations, warnings = opencas.get_apply_plan(config, state)
+
+    assert [str(operation) for operation in operations] == [
+        "remove core 3 (/dev/sdf) from cache 1",
+        "remove core 1 (/dev/sdx) from cache 2",
+        "change cache mode of cache 2 from wb to wt",
+        "set promotion policy of cache 2 to always",
+        "start cache 3 (/dev/nvme2n1)",
+        "add core 2 (/dev/sdc) to cache 1",
+        "add core 1 (/dev/sdd) to cache 2",
+        "add core 1 (/dev/sde) to cache 3",
+    ]
+    assert operations[2].flush
+    assert warnings == ["Cache 4 (/dev/nvme3n1) is not configured, leaving it running"]
+
+
+def test_apply_plan_02():
+    """
+    Check if caches running on different device are reported instead of being reconfigured
+    """
+    config = opencas.cas_config(
+        caches={1: opencas.cas_config.cache_config(1, "/dev/nvme0n1", "wb")},
+        cores=[opencas.cas_config.core_config(1, 1, "/dev/sdb")],
+    )
+    state = get_devices_state(caches=[(1, "/dev/nvme1n1", "wt")], cores=[(1, 2, "/dev/sdc")])
+
+    operations, warnings = opencas.get_apply_plan(config, state)
+
+    assert operations == []
+    assert len(warnings) == 1
+
+
+@patch("opencas.casadm.remove_core")
+@patch("opencas.casadm.set_cache_mode")
+def test_apply_01(mock_mode, mock_remove):
+    """
+    Check if failed operation is reported and doesn't stop remaining ones
+    """
+    config = opencas.cas_config(
+        caches={1: opencas.cas_config.cache_config(1, "/dev/nvme0n1", "wt")},
+    )
+    state = get_devices_state(caches=[(1, "/dev/nvme0n1", "wb")], cores=[(1, 1, "/dev/sdb")])
+    mock_remove.side_effect = opencas.casadm.CasadmError(Mock(stderr="busy"))
+    report = Mock()
+
+    operations, _ = opencas.get_apply_plan(config, state)
+    with pytest.raises(opencas.CompoundException) as e:
+        opencas.apply(operations, report)
+
+    assert "Unable to remove core 1 (/dev/sdb) from cache 1. Reason:\nbusy" in str(e.value)
+    mock_mode.assert_called_once_with(1, "wt", flush=True)
+    assert report.call_count == 2
@@ -0,0 +1,213 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import cache_sim  # noqa: E402
+from cache_sim import KiB, MiB  # noqa: E402
+
+
+def _trace(requests):
+    """requests - (device, offset, length, write) with sizes in KiB"""
+    return cache_sim.trace.from_requests(
+        (device, offset * KiB, length * KiB, write)
+        for device, offset, length, write in requests
+    )
+
+
+def test_trace_blkparse_01():
+    """
+    Check if queued reads and writes are taken from both blkparse formats
+    """
+    lines = [
+        "  8,0    3        1     0.000000000   697  Q   W 2048 + 8 [kjournald]\n",
+        "  8,0    3        2     0.000000100   697  G   W 2048 + 8 [kjournald]\n",
+        "  8,16   1        1     0.000001000   700  Q  RA 0 + 16 [fio]\n",
+        "  8,0    3        3     0.000002000   697  Q  DS 0 + 8 [fstrim]\n",
+        "  8,0    3        4     0.000003000   697  Q  FN 0 + 0 [sync]\n",
+        "8,16 Q R 16 8\n",
+        "CPU0 (8,0):\n",
+    ]
+
+    requests = cache_sim.trace.from_blkparse(lines)
+
+    assert requests.devices == ["8,0", "8,16"]
+    assert requests.device.tolist() == [0, 1, 1]
+    assert requests.offset.tolist() == [1 * MiB, 0, 8 * KiB]
+    assert requests.length.tolist() == [4 * KiB, 8 * KiB, 4 * KiB]
+    assert requests.write.tolist() == [True, False, False]
+
+
+def test_trace_iolog_01(tmpdir):
+    """
+    Check if fio iolog version is detected and only reads and writes are taken
+    """
+    path = tmpdir.join("fio.iolog")
+    path.write(
+        "fio version 3 iolog\n"
+        "0 /dev/sdb add\n"
+        "0 /dev/sdb open\n"
+        "10 /dev/sdb write 4096 8192\n"
+        "20 /dev/sdb read 0 4096\n"
+        "30 /dev/sdb sync 0 0\n"
+        "40 /dev/sdb close\n"
+    )
+
+    requests = cache_sim.trace.load(str(path))
+
+    assert requests.devices == ["/dev/sdb"]
+    assert requests.offset.tolist() == [4096, 0]
+    assert requests.length.tolist() == [8192, 4096]
+    assert requests.write.tolist() == [True, False]
+
+    with pytest.raises(ValueError):
+        cache_sim.trace.from_iolog(["fio version 1 iolog\n"])
+
+
+def test_stream_bytes_01():
+    """
+    Check if interleaved sequential streams are tracked per device and direction
+    """
+    requests = _trace([
+        (0, 0, 4, False),
+        (0, 100, 8, False),
+        (0, 4, 4, False),  # continues first stream
+        (1, 8, 4, False),  # other device
+        (0, 8, 4, True),  # other direction
+        (0, 108, 8, False),  # continues second stream
+        (0, 8, 4, False),  # continues first stream
+        (0, 4, 4, False),  # starts where first request ended
+    ])
+
+    assert requests.get_stream_bytes().tolist() == [
+        0, 0, 4 * KiB, 0, 0, 8 * KiB, 8 * KiB, 4 * KiB
+    ]
+
+
+def test_line_accesses_01():
+    """
+    Check if requests are split into lines with bytes of each line accessed
+    """
+    requests = _trace([
+        (0, 6, 12, False),
+        (1, 0, 4, True),
+        (0, 16, 2, False),
+    ])
+
+    accesses = cache_sim.line_accesses(requests, 8 * KiB)
+
+    assert accesses.bounds.tolist() == [0, 3, 4, 5]
+    assert accesses.bytes.tolist() == [2 * KiB, 8 * KiB, 2 * KiB, 4 * KiB, 2 * KiB]
+    # Same line of the same device gets the same id, other device - other id
+    line = accesses.line.tolist()
+    assert line[2] == line[4]
+    assert len(set(line)) == 4
+    assert accesses.line_count == 4
+
+
+def test_simulate_lru_01():
+    """
+    Check if least recently used line is evicted when cache is full
+    """
+    requests = _trace([
+        (0, 0, 4, False),
+        (0, 4, 4, False),
+        (0, 0, 4, False),  # hit, line 4k becomes LRU
+        (0, 8, 4, False),  # evicts 4k
+        (0, 0, 4, False),  # hit
+        (0, 4, 4, False),  # miss
+    ])
+    config = cache_sim.sim_config(4 * KiB, seq_cutoff_policy="never")
+
+    result = cache_sim.simulate(cache_sim.line_accesses(requests, 4 * KiB), config, 8 * KiB)
+
+    assert result.accesses == 6
+    assert result.hits == 2
+    assert result.insertions == 4
+    assert result.evictions == 2
+    assert result.cache_write_bytes == 16 * KiB
+    assert result.core_read_bytes == 16 * KiB
+    assert result.core_write_bytes == 0
+
+
+def test_simulate_nhit_01():
+    """
+    Check if with nhit line is inserted only after threshold misses
+    """
+    requests = _trace([(0, 0, 4, False)] * 4)
+    accesses = cache_sim.line_accesses(requests, 4 * KiB)
+
+    always = cache_sim.simulate(
+        accesses, cache_sim.sim_config(4 * KiB, seq_cutoff_policy="never"), MiB
+    )
+    nhit = cache_sim.simulate(
+        accesses,
+        cache_sim.sim_config(4 * KiB, "nhit", nhit_threshold=3, nhit_trigger=0,
+                             seq_cutoff_policy="never"),
+        MiB,
+    )
+
+    assert always.hits == 3
+    assert nhit.hits == 1
+    assert nhit.insertions == 1
+    assert nhit.core_read_bytes == 12 * KiB
+
+
+def test_simulate_seq_cutoff_01():
+    """
+    Check if sequential stream bypasses cache after threshold and writes
+    invalidate cached lines
+    """
+    requests = _trace([
+        (0, 12, 4, False),  # miss, inserted clean
+        (0, 0, 4, True),
+        (0, 4, 4, True),  # 4 KiB of stream before it
+        (0, 8, 4, True),  # 8 KiB of stream before it - pass-through
+        (0, 12, 4, True),  # pass-through, invalidates clean line
+        (0, 12, 4, False),  # miss
+    ])
+    config = cache_sim.sim_config(4 * KiB, seq_cutoff_policy="always",
+                                  seq_cutoff_threshold=8 * KiB)
+
+    result = cache_sim.simulate(
+        cache_sim.line_accesses(requests, 4 * KiB), config, MiB, "wb"
+    )
+
+    assert result.bypassed == 2
+    assert result.hits == 0
+    assert result.insertions == 4
+    assert result.core_write_bytes == 8 * KiB
+    assert result.core_read_bytes == 8 * KiB
+    assert result.dirty_bytes == 8 * KiB
+
+
+def test_run_recommend_01():
+    """
+    Check if nhit wins on trace with hot line among one-time accesses, and if
+    recommended params are accepted by config parser
+    """
+    requests = _trace([
+        (0, offset, 4, False)
+        for i in range(30) for offset in [0, 1024 + 128 * i, 1088 + 128 * i]
+    ])
+    configs = cache_sim.get_config_grid(nhit_thresholds=(2,))
+
+    results = cache_sim.run(requests, configs, 64 * KiB)
+    best = cache_sim.recommend(results)
+
+    assert len(results) == 5 * 2 * 3
+    assert best.hit_ratio == max(result.hit_ratio for result in results)
+    assert best.config.promotion_policy == "nhit"
+    assert best.cache_write_bytes < min(
+        result.cache_write_bytes for result in results
+        if result.config.promotion_policy == "always"
+    )
+
+    params = best.config.get_config_params()
+    assert list(params) == ["cache_line_size", "promotion_policy"]
+    assert params["promotion_policy"] == "nhit"
+    assert best.config.get_set_params()["promotion-nhit"] == {"threshold": 2, "trigger": 80}
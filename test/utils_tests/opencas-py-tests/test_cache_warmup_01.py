@@ -0,0 +1,131 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+import errno
+import os
+import pytest
+from unittest.mock import patch
+
+import cache_warmup
+
+
+def test_warmup_profile_01(tmpdir):
+    """
+    Check if hottest chunks are selected, merged into ranges and survive save/load
+    """
+    profile = cache_warmup.warmup_profile(granularity=4096)
+    profile.add_core(1, 1, "/dev/sdb")
+    for _ in range(3):
+        profile.add_access(1, 1, 0, 8192)
+    profile.add_access(1, 1, 4096 * 10, 512)
+    profile.add_access(1, 1, 4096 * 5, 1)
+    profile.add_access(1, 1, 4096 * 5, 1)
+
+    assert profile.get_ranges(1, 1) == [(0, 8192), (4096 * 5, 4096), (4096 * 10, 4096)]
+    assert profile.get_ranges(1, 1, max_bytes=3 * 4096) == [(0, 8192), (4096 * 5, 4096)]
+
+    path = str(tmpdir.join("warmup.json"))
+    profile.save(path)
+    loaded = cache_warmup.warmup_profile.load(path)
+
+    assert loaded.granularity == 4096
+    assert loaded.cores[(1, 1)]["core_device"] == "/dev/sdb"
+    assert loaded.get_ranges(1, 1) == profile.get_ranges(1, 1)
+
+
+def test_parse_blkparse_line_01():
+    """
+    Check if only queued reads and writes of traced devices are taken
+    """
+    devices = {"252,0": (1, 1)}
+
+    parse = cache_warmup.parse_blkparse_line
+
+    assert parse("252,0   Q R 2048 8\n", devices) == ((1, 1), 1048576, 4096)
+    assert parse("252,0   Q WS 0 16\n", devices) == ((1, 1), 0, 8192)
+    assert parse("252,0   C R 2048 8\n", devices) is None
+    assert cache_warmup.parse_blkparse_line("252,0   Q FWS 0 0\n", devices) is None
+    assert cache_warmup.parse_blkparse_line("252,0   Q D 0 8\n", devices) is None
+    assert cache_warmup.parse_blkparse_line("8,0   Q R 0 8\n", devices) is None
+    assert cache_warmup.parse_blkparse_line("CPU0 (252,0):\n", devices) is None
+
+
+def test_replay_warmup_01(tmpdir):
+    """
+    Check if hot ranges are read through exported objects of matching cores only
+    """
+    exp_obj = tmpdir.join("cas1-1")
+    exp_obj.write(b"x" * 4096 * 16, mode="wb")
+
+    profile = cache_warmup.warmup_profile(granularity=4096)
+    profile.add_core(1, 1, "/dev/sdb")
+    profile.add_access(1, 1, 0, 4096 * 3)
+    profile.add_access(1, 1, 4096 * 8, 4096)
+    profile.add_core(1, 2, "/dev/sdc")
+    profile.add_access(1, 2, 0, 4096)
+    profile.add_core(2, 1, "/dev/sdd")
+    profile.add_access(2, 1, 0, 4096)
+
+    cores = {(1, 1): "/dev/sdb", (1, 2): "/dev/sde"}
+
+    with patch("cache_warmup._exp_obj_path", return_value=str(exp_obj)), \
+            patch("os.preadv", wraps=os.preadv) as mock_preadv, \
+            patch("os.open", wraps=os.open) as mock_open:
+        read_bytes, warnings = cache_warmup.replay_warmup(
+            profile, workers=1, io_size=8192, cores=cores
+        )
+
+    assert read_bytes == {(1, 1): 4096 * 4}
+    assert [(len(call[0][1][0]), call[0][2]) for call in mock_preadv.call_args_list] == [
+        (8192, 0), (4096, 8192), (4096, 4096 * 8)
+    ]
+    assert mock_open.call_args[0][1] & os.O_DIRECT
+    assert len(warnings) == 2
+    assert "profile was recorded for /dev/sdc" in warnings[0]
+    assert "Core 1 of cache 2 is not active" in warnings[1]
+
+
+def test_replay_warmup_02(tmpdir):
+    """
+    Check if reads are aligned and if page cache is dropped before each read
+    when O_DIRECT is not supported
+    """
+    exp_obj = tmpdir.join("cas1-1")
+    exp_obj.write(b"x" * 4096 * 4, mode="wb")
+
+    profile = cache_warmup.warmup_profile(granularity=1024)
+    profile.add_core(1, 1, "/dev/sdb")
+    profile.add_access(1, 1, 1024, 1024)
+
+    def no_direct(path, flags):
+        if flags & os.O_DIRECT:
+            raise OSError(errno.EINVAL, "Invalid argument")
+        return os_open(path, flags)
+
+    os_open = os.open
+    with patch("cache_warmup._exp_obj_path", return_value=str(exp_obj)), \
+            patch("os.open", side_effect=no_direct), \
+            patch("os.posix_fadvise") as mock_fadvise:
+        read_bytes, _ = cache_warmup.replay_warmup(
+            profile, workers=1, io_size=1000, cores={(1, 1): "/dev/sdb"}
+        )
+
+    assert read_bytes == {(1, 1): 4096}
+    assert [call[0][1:] for call in mock_fadvise.call_args_list] == [
+        (0, 0, os.POSIX_FADV_RANDOM), (0, 4096, os.POSIX_FADV_DONTNEED)
+    ]
+
+
+def test_rate_limiter_01():
+    """
+    Check if limiter sleeps once burst is used up
+    """
+    limiter = cache_warmup.rate_limiter(1000)
+
+    with patch("time.sleep") as mock_sleep:
+        limiter.acquire(1000)
+        mock_sleep.assert_not_called()
+        limiter.acquire(500)
+        assert mock_sleep.call_args[0][0] == pytest.approx(0.5, abs=0.01)
@@ -4,6 +4,7 @@
 # SPDX-License-Identifier: BSD-3-Clause
 #
 
+import json
 import pytest
 from unittest.mock import patch, mock_open
 from textwrap import dedent
@@ -273,6 +274,65 @@ def test_cas_config_add_same_core_symlinked_02(mock_realpath):
         config.insert_core(core_symlinked)
 
 
+@patch("os.path.realpath")
+def test_cas_config_add_cache_configured_as_core(mock_realpath):
+    mock_realpath.side_effect = (
+        lambda x: "/dev/dummy1" if x == "/dev/dummy_link" else x
+    )
+
+    config = opencas.cas_config()
+    config.insert_cache(
+        opencas.cas_config.cache_config(1, "/dev/dummy_cache", "WB")
+    )
+    config.insert_core(opencas.cas_config.core_config(1, 1, "/dev/dummy1"))
+
+    with pytest.raises(ConflictingConfigException):
+        config.insert_cache(opencas.cas_config.cache_config(2, "/dev/dummy_link", "WT"))
+
+
+@patch("os.path.realpath")
+def test_cas_config_add_core_configured_as_cache(mock_realpath):
+    mock_realpath.side_effect = (
+        lambda x: "/dev/dummy1" if x == "/dev/dummy_link" else x
+    )
+
+    config = opencas.cas_config()
+    config.insert_cache(opencas.cas_config.cache_config(1, "/dev/dummy1", "WB"))
+    config.insert_cache(opencas.cas_config.cache_config(2, "/dev/dummy2", "WB"))
+
+    with pytest.raises(ConflictingConfigException):
+        config.insert_core(opencas.cas_config.core_config(2, 1, "/dev/dummy_link"))
+
+
+def test_cas_config_add_core_other_device_same_id():
+    config = opencas.cas_config()
+    config.insert_cache(opencas.cas_config.cache_config(1, "/dev/dummy_cache", "WB"))
+    config.insert_core(opencas.cas_config.core_config(1, 1, "/dev/dummy1"))
+
+    with pytest.raises(ConflictingConfigException):
+        config.insert_core(opencas.cas_config.core_config(1, 1, "/dev/dummy2"))
+
+
+@patch("os.path.realpath")
+def test_cas_config_insert_resolves_path_once(mock_realpath):
+    """
+    Check if each inserted device path is resolved once regardless of config size
+    """
+    mock_realpath.side_effect = lambda x: x
+
+    config = opencas.cas_config()
+    for cache_id in range(1, 65):
+        config.insert_cache(
+            opencas.cas_config.cache_config(cache_id, f"/dev/dummy_cache{cache_id}", "WB")
+        )
+        for core_id in range(4):
+            config.insert_core(
+                opencas.cas_config.core_config(cache_id, core_id, f"/dev/dummy{cache_id}-{core_id}")
+            )
+
+    assert mock_realpath.call_count == 64 + 64 * 4
+
+
 @patch("os.path.realpath")
 @patch("os.listdir")
 def test_cas_config_get_by_id_path_not_found(mock_listdir, mock_realpath):
@@ -477,3 +537,52 @@ def test_cas_config_from_file_insert_cache_insert_core_to_file(
     assert set(contents_hashed[cores_index + 1 :]) - set(cores_hashed) == set(
         ["51/dev/mango_core"]
     )
+
+
+@patch("opencas.cas_config.from_file")
+def test_cas_config_compile_lookup_table_01(mock_from_file, tmp_path):
+    """
+    Check if lookup table is stored next to config and tied to its mtime and size
+    """
+    config_file = tmp_path / "opencas.conf"
+    config_file.write_text("version=19.3.0\n")
+    config = opencas.cas_config(
+        caches={1: opencas.cas_config.cache_config(1, "/dev/nvme0n1", "WB", ioclass_file="/a")},
+        cores=[opencas.cas_config.core_config(1, 2, "/dev/sdc", lazy_startup="true")],
+    )
+    mock_from_file.return_value = config
+
+    table = opencas.cas_config.compile_lookup_table(str(config_file))
+
+    with open(opencas.cas_config.lookup_table_location(str(config_file))) as f:
+        assert json.load(f) == table
+
+    assert table["mtime_ns"] == config_file.stat().st_mtime_ns
+    assert table["size"] == config_file.stat().st_size
+    assert table["realpaths"] == {"/dev/nvme0n1": "/dev/nvme0n1", "/dev/sdc": "/dev/sdc"}
+
+    cache = opencas.cas_config.from_lookup_entry(table["devices"]["/dev/nvme0n1"])
+    assert type(cache) is opencas.cas_config.cache_config
+    assert (cache.cache_id, cache.device, cache.cache_mode) == (1, "/dev/nvme0n1", "wb")
+    assert cache.params == {"ioclass_file": "/a"}
+
+    core = opencas.cas_config.from_lookup_entry(table["devices"]["/dev/sdc"])
+    assert type(core) is opencas.cas_config.core_config
+    assert (core.cache_id, core.core_id, core.device) == (1, 2, "/dev/sdc")
+    assert core.is_lazy()
+
+
+@patch("opencas.cas_config.from_file")
+def test_cas_config_compile_lookup_table_02(mock_from_file, tmp_path):
+    """
+    Check if failure to store lookup table is not an error
+    """
+    config_file = tmp_path / "opencas.conf"
+    config_file.write_text("version=19.3.0\n")
+    mock_from_file.return_value = opencas.cas_config()
+
+    with patch("os.replace", side_effect=PermissionError):
+        table = opencas.cas_config.compile_lookup_table(str(config_file))
+
+    assert table["devices"] == {}
+    assert [path.name for path in tmp_path.iterdir()] == ["opencas.conf"]
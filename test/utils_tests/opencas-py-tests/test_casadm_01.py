@@ -3,11 +3,12 @@
 # SPDX-License-Identifier: BSD-3-Clause
 #
 
+import io
 import pytest
 import subprocess
 import unittest.mock as mock
 
-from opencas import casadm
+from opencas import casadm, tracer
 from helpers import get_process_mock
 
 
@@ -34,6 +35,29 @@ def test_run_cmd_02(mock_run):
         casadm.run_cmd(["casadm", "-L"])
 
 
+@mock.patch.object(tracer, "_events", [])
+@mock.patch.object(tracer, "enabled", True)
+@mock.patch("subprocess.run")
+def test_run_cmd_trace_01(mock_run):
+    """
+    Check if casadm invocations are recorded with device and cache/core ids
+    """
+    mock_run.return_value = get_process_mock(0, "", "")
+    casadm.add_core("/dev/sdb", 1, core_id=2)
+    mock_run.return_value = get_process_mock(4, "", "errors")
+    with pytest.raises(casadm.CasadmError):
+        casadm.check_cache_device("/dev/nvme0n1")
+
+    events = tracer.get_events()
+    assert [event["name"] for event in events] == ["--add-core", "--check-cache-device"]
+    assert all(event["cat"] == "casadm" and event["ph"] == "X" for event in events)
+    assert events[0]["args"]["device"] == "/dev/sdb"
+    assert events[0]["args"]["cache_id"] == "1"
+    assert events[0]["args"]["core_id"] == "2"
+    assert events[0]["args"]["batch"] is False
+    assert events[1]["args"]["exit_code"] == 4
+
+
 @mock.patch("subprocess.run")
 def test_get_version_01(mock_run):
     mock_run.return_value = get_process_mock(0, "0.0.1", "errors")
@@ -55,3 +79,201 @@ def test_get_version_02(mock_run):
     mock_run.return_value = get_process_mock(4, "successes", "errors")
     with pytest.raises(casadm.CasadmError):
         casadm.get_version()
+
+
+def get_batch_process_mock(output, ready=True):
+    process_mock = mock.Mock()
+    process_mock.stdin = io.BytesIO()
+    process_mock.stdout = io.BytesIO((b"ready\n" if ready else b"") + output)
+
+    return process_mock
+
+
+@mock.patch("subprocess.run")
+@mock.patch("subprocess.Popen")
+def test_batch_mode_01(mock_popen, mock_run):
+    """
+    Check if commands in batch mode are sent to single co-process and results are unframed
+    """
+    process = get_batch_process_mock(
+        b"result 0 5 0\nfirstresult 3 6 7\nsecondsecond\n"
+    )
+    mock_popen.return_value = process
+
+    with casadm.batch_mode():
+        first = casadm.run_cmd([casadm.casadm_path, "-L", "-o", "csv"])
+        with pytest.raises(casadm.CasadmError) as e:
+            casadm.run_cmd([casadm.casadm_path, "-A", "-d", "/dev/disk/by-id/a b"])
+        sent = process.stdin.getvalue()
+
+    mock_popen.assert_called_once()
+    mock_run.assert_not_called()
+    assert sent == b"-L -o csv\n-A -d '/dev/disk/by-id/a b'\n"
+    assert first.stdout == "first"
+    assert e.value.result.exit_code == 3
+    assert e.value.result.stdout == "second"
+    assert e.value.result.stderr == "second\n"
+
+
+@mock.patch("subprocess.run")
+@mock.patch("subprocess.Popen")
+def test_batch_mode_02(mock_popen, mock_run):
+    """
+    Check if commands fall back to separate processes when casadm doesn't support batch mode
+    """
+    mock_popen.return_value = get_batch_process_mock(b"", ready=False)
+    mock_run.return_value = get_process_mock(0, "successes", "errors")
+
+    with casadm.batch_mode():
+        first = casadm.run_cmd(["casadm", "-L"])
+        second = casadm.run_cmd(["casadm", "-L"])
+
+    mock_popen.assert_called_once()
+    assert mock_run.call_count == 2
+    assert first.stdout == second.stdout == "successes"
+
+
+@mock.patch("subprocess.run")
+@mock.patch("subprocess.Popen")
+def test_batch_mode_03(mock_popen, mock_run):
+    """
+    Check if command isn't repeated when co-process dies after it was sent
+    """
+    process = get_batch_process_mock(b"result 0 4")
+    # Keep sent commands readable after co-process is closed
+    process.stdin.close = mock.Mock()
+    mock_popen.return_value = process
+    mock_run.return_value = get_process_mock(0, "successes", "errors")
+
+    with casadm.batch_mode():
+        with pytest.raises(casadm.CasadmError) as e:
+            casadm.run_cmd([casadm.casadm_path, "-S", "-d", "/dev/sdb"])
+        second = casadm.run_cmd([casadm.casadm_path, "-L"])
+
+    mock_popen.assert_called_once()
+    assert process.stdin.getvalue() == b"-S -d /dev/sdb\n"
+    assert e.value.result.exit_code is None
+    assert "outcome unknown" in e.value.result.stderr
+    mock_run.assert_called_once()
+    assert mock_run.call_args[0][0] == [casadm.casadm_path, "-L"]
+    assert second.stdout == "successes"
+
+
+@mock.patch("subprocess.run")
+@mock.patch("subprocess.Popen")
+def test_batch_mode_04(mock_popen, mock_run):
+    """
+    Check if closed co-process is replaced by new one for next command
+    """
+    first = get_batch_process_mock(b"result 0 0 0\n")
+    second = get_batch_process_mock(b"result 0 0 0\n")
+    mock_popen.side_effect = [first, second]
+
+    with casadm.batch_mode():
+        casadm.run_cmd([casadm.casadm_path, "-L"])
+        casadm.close_batch()
+        assert first.stdin.closed
+        casadm.run_cmd([casadm.casadm_path, "-L"])
+        assert not second.stdin.closed
+
+    assert mock_popen.call_count == 2
+    mock_run.assert_not_called()
+
+
+@mock.patch("subprocess.run")
+@mock.patch("subprocess.Popen")
+def test_set_params_01(mock_popen, mock_run):
+    """
+    Check if params of all namespaces are set with single casadm process
+    """
+    process = get_batch_process_mock(b"result 0 0 0\nresult 0 0 0\n")
+    # Keep sent commands readable after co-process is closed
+    process.stdin.close = mock.Mock()
+    mock_popen.return_value = process
+
+    results = casadm.set_params(1, {
+        "cleaning": {"policy": "alru"},
+        "cleaning-alru": {"wake_up": 20, "staleness-time": 120},
+    })
+
+    mock_popen.assert_called_once()
+    mock_run.assert_not_called()
+    assert len(results) == 2
+    assert process.stdin.getvalue() == (
+        b"--set-param --name cleaning --cache-id 1 --policy alru\n"
+        b"--set-param --name cleaning-alru --cache-id 1 --wake-up 20 --staleness-time 120\n"
+    )
+
+
+@mock.patch("subprocess.run")
+@mock.patch("subprocess.Popen")
+def test_set_params_02(mock_popen, mock_run):
+    """
+    Check if all invalid params are reported before anything is set
+    """
+    with pytest.raises(ValueError) as e:
+        casadm.set_params(1, {
+            "cleaning": {"policy": "alru"},
+            "cleaning-alru": {"wake_up": 20, "sleep_time": 1},
+            "eviction": {"policy": "lru"},
+            "seq-cutoff": {"policy": "never"},
+        })
+
+    assert "unknown parameter sleep-time in cleaning-alru" in str(e.value)
+    assert "unknown parameter namespace eviction" in str(e.value)
+    assert "seq-cutoff" not in str(e.value)
+    mock_popen.assert_not_called()
+    mock_run.assert_not_called()
+
+
+def test_set_params_03():
+    """
+    Check if core id is passed only for core namespaces and is optional for them
+    """
+    params = {"seq-cutoff": {"policy": "never"}, "cleaning": {"policy": "nop"}}
+
+    with_core = casadm.get_set_params_cmds(1, params, core_id=2)
+    all_cores = casadm.get_set_params_cmds(1, params)
+
+    assert with_core == [
+        [casadm.casadm_path, "--set-param", "--name", "seq-cutoff",
+         "--cache-id", "1", "--core-id", "2", "--policy", "never"],
+        [casadm.casadm_path, "--set-param", "--name", "cleaning",
+         "--cache-id", "1", "--policy", "nop"],
+    ]
+    assert all_cores == [
+        [casadm.casadm_path, "--set-param", "--name", "seq-cutoff",
+         "--cache-id", "1", "--policy", "never"],
+        [casadm.casadm_path, "--set-param", "--name", "cleaning",
+         "--cache-id", "1", "--policy", "nop"],
+    ]
+
+
+@mock.patch("subprocess.run")
+@mock.patch("subprocess.Popen")
+def test_set_params_04(mock_popen, mock_run):
+    """
+    Check if failed namespace doesn't stop the others and error tells which were applied
+    """
+    process = get_batch_process_mock(
+        b"result 0 0 0\nresult 5 0 8\ninvalid\nresult 0 0 0\n"
+    )
+    # Keep sent commands readable after co-process is closed
+    process.stdin.close = mock.Mock()
+    mock_popen.return_value = process
+
+    with pytest.raises(casadm.SetParamsError) as e:
+        casadm.set_params(1, {
+            "cleaning": {"policy": "alru"},
+            "promotion-nhit": {"threshold": 0},
+            "cleaning-alru": {"wake_up": 20},
+        })
+
+    mock_run.assert_not_called()
+    assert process.stdin.getvalue().count(b"--set-param") == 3
+    assert e.value.applied == ["cleaning", "cleaning-alru"]
+    assert list(e.value.failed) == ["promotion-nhit"]
+    assert e.value.result.exit_code == 5
+    assert "promotion-nhit (invalid)" in str(e.value)
+    assert "applied: cleaning, cleaning-alru" in str(e.value)
+    assert isinstance(e.value, casadm.CasadmError)
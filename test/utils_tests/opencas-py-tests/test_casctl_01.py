@@ -0,0 +1,43 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+import pytest
+from unittest.mock import patch
+
+from helpers import load_casctl
+
+casctl = load_casctl()
+
+
+@pytest.mark.parametrize(
+    "argv,waits",
+    [
+        (["init"], True),
+        (["start"], True),
+        (["settle"], True),
+        (["stop"], True),
+        (["apply"], True),
+        (["flush"], True),
+        (["warmup", "replay"], True),
+        (["plan", "stop"], True),
+        (["ioclass", "advise"], True),
+        (["upgrade"], False),
+        (["simulate", "trace.jsonl", "--cache-size", "1024"], False),
+        (["ioclass", "evaluate", "trace.jsonl"], False),
+        (["ioclass", "optimize", "trace.jsonl"], False),
+    ],
+)
+def test_wait_for_cas_ctrl_01(argv, waits):
+    """
+    Check if only commands working on trace files don't wait for CAS control device
+    """
+    command = "command_" + argv[0]
+    with patch("sys.argv", ["casctl"] + argv), \
+            patch("opencas.wait_for_cas_ctrl") as mock_wait, \
+            patch.object(casctl.cas, command) as mock_command:
+        casctl.cas()
+
+    mock_command.assert_called_once()
+    assert mock_wait.called == waits
@@ -0,0 +1,122 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+import json
+import pytest
+from unittest.mock import patch
+
+from cleaning_tuner import cleaning_tuner
+from helpers import get_stats_mock, get_record_mock, get_dump_mock
+
+
+def _dump(dirty, written=0, cleaned=0, policy=1, **cleaning):
+    """Dump of running cache 1 of 1000 lines, cleaning params not given are defaults"""
+    params = dict(alru_wake_up=20, alru_stale_time=120, alru_flush_max_buffers=100,
+                  alru_activity_threshold=10000, alru_dirty_ratio_threshold=100,
+                  acp_flush_max_buffers=128, policy=policy)
+    params.update(cleaning)
+    cache = get_record_mock(
+        id=1, dirty=dirty, size=1000, line_size=4096,
+        stats=get_stats_mock(blocks_volume_wr=written, blocks_cleaner_core_wr=cleaned),
+        **{"cleaning." + name: value for name, value in params.items()},
+        **{"state_name.return_value": "Running", "is_device_detached.return_value": False},
+    )
+    return get_dump_mock(caches=[cache])
+
+
+def test_cleaning_tuner_config_01(tmpdir):
+    """
+    Check if config is merged with defaults and invalid settings are all reported
+    """
+    path = tmpdir.join("cleaning-tuner.json")
+
+    assert cleaning_tuner.load_config(str(path)) == cleaning_tuner.default_config
+
+    path.write(json.dumps({"dirty_high": 50, "bounds": {"alru_wake_up": [0, 5]}}))
+    config = cleaning_tuner.load_config(str(path))
+    assert config["dirty_high"] == 50
+    assert config["bounds"]["alru_wake_up"] == [0, 5]
+    assert config["bounds"]["acp_flush_max_buffers"] == [128, 2000]
+
+    path.write(json.dumps({
+        "dirty_low": 70, "step": 2, "colour": "red",
+        "bounds": {"alru_stale_time": [0, 10], "acp_wake_up": [1, 2]},
+    }))
+    with pytest.raises(ValueError) as e:
+        cleaning_tuner.load_config(str(path))
+    for problem in ["unknown option colour", "step has to be at most 1", "dirty_low",
+                    "bounds of alru_stale_time", "unknown parameter acp_wake_up"]:
+        assert problem in str(e.value)
+
+
+@patch("opencas.casadm.set_params")
+@patch("opencas.get_policy")
+def test_cleaning_tuner_01(mock_policy, mock_set, tmpdir):
+    """
+    Check if level goes up on dirty pressure at once, goes down only after
+    hold time and if changes are written to audit log
+    """
+    mock_policy.return_value = "alru"
+    audit_log = tmpdir.join("audit.log")
+    tuner = cleaning_tuner({"step": 0.5, "hold": 60}, str(audit_log))
+
+    # Default parameters are gentle end of default bounds
+    assert tuner.tune(_dump(100), 0) == []
+    assert tuner.caches[1].level == 0
+
+    # Dirty data grows 40 lines/s, cleaner lags behind, 10 % left to high
+    # watermark takes 2.5 s
+    assert tuner.tune(_dump(500, 1000, 10), 10) == [1]
+    assert tuner.caches[1].level == 0.5
+    assert mock_set.call_args[0] == (1, {"cleaning-alru": {
+        "wake-up": 10, "staleness-time": 65, "flush-max-buffers": 1050,
+        "activity-threshold": 5500, "dirty-ratio-threshold": 75,
+    }})
+
+    current = dict(alru_wake_up=10, alru_stale_time=65, alru_flush_max_buffers=1050,
+                   alru_activity_threshold=5500, alru_dirty_ratio_threshold=75)
+    assert tuner.tune(_dump(700, 1500, 20, **current), 20) == [1]
+    assert tuner.caches[1].level == 1.0
+
+    # Hysteresis - no change between watermarks, down only after hold
+    mock_set.reset_mock()
+    assert tuner.tune(_dump(300, 1500, 500), 30) == []
+    assert tuner.tune(_dump(100, 1500, 700), 40) == []
+    assert tuner.tune(_dump(100, 1500, 700), 80) == [1]
+    assert tuner.caches[1].level == 0.5
+    mock_set.assert_called_once()
+
+    entries = [json.loads(line) for line in audit_log.read().splitlines()]
+    assert [entry["reason"] for entry in entries] == [
+        "dirty projected to reach high watermark",
+        "dirty above high watermark",
+        "dirty below low watermark",
+    ]
+    assert entries[0]["measurements"]["write_rate"] == 1000 * 4096 / 10
+    assert entries[0]["old"]["alru_wake_up"] == 20
+    assert entries[0]["new"]["alru_wake_up"] == 10
+
+
+@patch("opencas.casadm.set_params")
+@patch("opencas.get_policy")
+def test_cleaning_tuner_02(mock_policy, mock_set):
+    """
+    Check if parameters out of bounds are fixed on start and caches with nop
+    policy are left alone
+    """
+    mock_policy.return_value = "acp"
+    tuner = cleaning_tuner(audit_log=None)
+
+    assert tuner.tune(_dump(0, policy=2, acp_flush_max_buffers=9000), 0) \
+        == [1]
+    assert mock_set.call_args[0] == (1, {"cleaning-acp": {"flush-max-buffers": 2000}})
+    assert tuner.caches[1].level == 1.0
+
+    mock_set.reset_mock()
+    mock_policy.return_value = "nop"
+    assert tuner.tune(_dump(900, policy=0), 10) == []
+    assert tuner.tune(_dump(900, policy=0), 20) == []
+    mock_set.assert_not_called()
+    mock_policy.assert_called_with("cleaning", 1)
@@ -0,0 +1,115 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+from unittest.mock import patch, Mock
+
+import opencas
+from helpers import get_caches_list_entry
+
+
+def _get_device_loader(config):
+    with patch("os.stat"), patch("opencas.cas_config.from_file") as mock_config:
+        mock_config.return_value = config
+        return opencas.device_loader("/dummy/file.conf")
+
+
+def test_device_loader_match_01():
+    """
+    Check if configured devices are matched by device node and by symlinks from uevents
+    """
+    config = opencas.cas_config(
+        caches={1: opencas.cas_config.cache_config(1, "/dev/nvme0n1", "wt")},
+        cores=[
+            opencas.cas_config.core_config(1, 1, "/dev/disk/by-id/wwn-sdb"),
+            opencas.cas_config.core_config(1, 2, "/dev/disk/by-id/wwn-sdc"),
+        ],
+    )
+    loader = _get_device_loader(config)
+
+    devices = loader.match([
+        {"DEVNAME": "/dev/sdc", "DEVLINKS": "/dev/disk/by-path/x /dev/disk/by-id/wwn-sdc"},
+        {"DEVNAME": "/dev/sdx", "DEVLINKS": "/dev/disk/by-id/wwn-sdx"},
+        {"DEVNAME": "/dev/nvme0n1"},
+        {"DEVNAME": "/dev/sdc", "DEVLINKS": "/dev/disk/by-id/wwn-sdc"},
+    ])
+
+    assert devices == [config.cores[1], config.caches[1]]
+
+
+@patch("opencas.add_core")
+@patch("opencas.start_cache")
+def test_device_loader_load_01(mock_start, mock_add):
+    """
+    Check if caches are loaded before cores and cores are added grouped by cache
+    """
+    config = opencas.cas_config(
+        caches={2: opencas.cas_config.cache_config(2, "/dev/nvme1n1", "wt")},
+        cores=[
+            opencas.cas_config.core_config(2, 2, "/dev/sdd"),
+            opencas.cas_config.core_config(1, 1, "/dev/sdb"),
+            opencas.cas_config.core_config(2, 1, "/dev/sdc"),
+        ],
+    )
+    loader = _get_device_loader(config)
+    order = []
+    mock_start.side_effect = lambda cache, **kwargs: order.append(cache.device)
+    mock_add.side_effect = lambda core, attach: order.append(core.device)
+
+    failed = loader.load(config.cores + list(config.caches.values()), Mock())
+
+    assert failed == 0
+    assert order == ["/dev/nvme1n1", "/dev/sdb", "/dev/sdc", "/dev/sdd"]
+
+
+@patch("opencas.add_core")
+@patch("opencas.start_cache")
+def test_device_loader_load_02(mock_start, mock_add):
+    """
+    Check if failure to set up one device is logged and others are still set up
+    """
+    config = opencas.cas_config(
+        caches={1: opencas.cas_config.cache_config(1, "/dev/nvme0n1", "wt")},
+        cores=[
+            opencas.cas_config.core_config(1, 1, "/dev/sdb"),
+            opencas.cas_config.core_config(1, 2, "/dev/sdc"),
+        ],
+    )
+    loader = _get_device_loader(config)
+    mock_add.side_effect = [opencas.casadm.CasadmError(Mock(stderr="busy")), None]
+    log = Mock()
+
+    failed = loader.load(config.cores, log)
+
+    assert failed == 1
+    assert mock_add.call_count == 2
+    assert "Unable to attach core /dev/sdb from cache 1" in log.call_args[0][1]
+
+
+@patch("opencas.get_caches_list")
+def test_device_loader_pending_01(mock_list):
+    """
+    Check if devices already set up are filtered out using single state snapshot
+    """
+    config = opencas.cas_config(
+        caches={
+            1: opencas.cas_config.cache_config(1, "/dev/nvme0n1", "wt"),
+            2: opencas.cas_config.cache_config(2, "/dev/nvme1n1", "wt"),
+        },
+        cores=[
+            opencas.cas_config.core_config(1, 1, "/dev/sdb"),
+            opencas.cas_config.core_config(1, 2, "/dev/sdc"),
+        ],
+    )
+    loader = _get_device_loader(config)
+    mock_list.return_value = [
+        get_caches_list_entry("cache", 1, "/dev/nvme0n1"),
+        get_caches_list_entry("core", 1, "/dev/sdb", "Active"),
+        get_caches_list_entry("core", 2, "/dev/sdc", "Inactive"),
+    ]
+
+    pending = loader.pending(config.cores + list(config.caches.values()))
+
+    mock_list.assert_called_once()
+    assert pending == [config.cores[1], config.caches[2]]
@@ -0,0 +1,101 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+import threading
+import pytest
+from unittest.mock import patch, Mock
+
+import opencas
+from helpers import get_caches_list_entry, get_record_mock, get_dump_mock
+
+
+def test_flush_plan_01():
+    """
+    Check if caches stacked on exported objects are flushed before lower ones
+    """
+    dev_list = [
+        get_caches_list_entry("cache", 1, "/dev/nvme0n1"),
+        get_caches_list_entry("core", 1, "/dev/sdb", "Active"),
+        get_caches_list_entry("cache", 2, "/dev/nvme1n1"),
+        get_caches_list_entry("core", 1, "/dev/cas1-1", "Active"),
+        get_caches_list_entry("cache", 3, "/dev/nvme2n1", "Standby"),
+    ]
+
+    caches, dependencies = opencas.get_flush_plan(dev_list)
+    assert list(caches) == [("cache", 1), ("cache", 2)]
+    assert dependencies == {("cache", 1): [("cache", 2)], ("cache", 2): []}
+
+    caches, dependencies = opencas.get_flush_plan(dev_list, [1])
+    assert list(caches) == [("cache", 1)]
+
+    with pytest.raises(Exception, match="Cache 3 is not running"):
+        opencas.get_flush_plan(dev_list, [1, 3])
+
+
+@patch("opencas.flush_estimator.save_history")
+@patch("opencas.cas_netlink.dump")
+@patch("opencas.cas_netlink.is_available")
+@patch("opencas.casadm.flush_cache")
+@patch("opencas.get_caches_list")
+def test_flush_01(mock_list, mock_flush, mock_available, mock_dump, mock_history):
+    """
+    Check if caches are flushed concurrently, progress is reported and failures collected
+    """
+    mock_list.return_value = [
+        get_caches_list_entry("cache", 1, "/dev/nvme0n1"),
+        get_caches_list_entry("core", 1, "/dev/sdb", "Active"),
+        get_caches_list_entry("cache", 2, "/dev/nvme1n1"),
+        get_caches_list_entry("core", 1, "/dev/sdc", "Active"),
+    ]
+    mock_available.return_value = True
+    mock_dump.return_value = get_dump_mock(
+        caches=[
+            get_record_mock(id=1, path="/dev/nvme0n1", line_size=4096, dirty=256, flushed=0),
+            get_record_mock(id=2, path="/dev/nvme1n1", line_size=4096, dirty=512, flushed=0),
+        ],
+    )
+
+    both_running = threading.Barrier(2, timeout=5)
+
+    def flush_cache(cache_id):
+        both_running.wait()
+        if cache_id == 2:
+            raise opencas.casadm.CasadmError(Mock(stderr="Device busy"))
+
+    mock_flush.side_effect = flush_cache
+    reports = []
+
+    with pytest.raises(opencas.CompoundException) as e:
+        opencas.flush(report=lambda progress: reports.append(progress), interval=60)
+
+    assert "Unable to flush cache 2 (/dev/nvme1n1). Reason:\nDevice busy" in str(e.value)
+
+    progress = reports[-1]
+    assert [item.cache_id for item in progress] == [1, 2]
+    assert progress[0].flushed == progress[0].total == 256 * 4096
+    assert progress[0].error is None
+    assert progress[1].flushed == 0
+    assert progress[1].error == "Device busy"
+    assert all(item.done for item in progress)
+    saved = mock_history.call_args[0][0]
+    assert list(saved) == ["/dev/nvme0n1"]
+
+
+def test_flush_progress_01():
+    """
+    Check if flush progress follows netlink counters and includes newly dirtied data
+    """
+    item = opencas.flush_progress(1, "/dev/nvme0n1", total=100 * 4096)
+    cache = get_record_mock(line_size=4096, flushed=30, dirty=70)
+
+    item.update(cache)
+    assert item.flushed == 0
+
+    item.start_time = 10
+    cache.flushed, cache.dirty = 50, 60
+    item.update(cache)
+    assert item.flushed == 50 * 4096
+    assert item.total == 110 * 4096
+    assert item.throughput(now=12) == 25 * 4096
@@ -0,0 +1,140 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+from unittest.mock import patch, Mock
+
+import opencas
+from helpers import get_caches_list_entry, get_record_mock, get_dump_mock
+
+
+@patch("opencas.get_caches_list")
+def test_flush_estimates_stop_01(mock_list):
+    """
+    Check if cores of a cache add up and independent caches are flushed concurrently
+    """
+    mock_list.return_value = [
+        get_caches_list_entry("cache", 1, "/dev/nvme0n1"),
+        get_caches_list_entry("core", 1, "/dev/sdb", "Active"),
+        get_caches_list_entry("core", 2, "/dev/sdc", "Active"),
+        get_caches_list_entry("cache", 2, "/dev/nvme1n1"),
+        get_caches_list_entry("core", 1, "/dev/sdd", "Active"),
+    ]
+    dump = get_dump_mock(
+        caches=[
+            get_record_mock(id=1, path="/dev/nvme0n1", line_size=4096, dirty=300, flushed=0),
+            get_record_mock(id=2, path="/dev/nvme1n1", line_size=4096, dirty=256, flushed=0),
+        ],
+        cores=[
+            get_record_mock(cache_id=1, id=1, dirty=100, flushed=0),
+            get_record_mock(cache_id=1, id=2, dirty=200, flushed=0),
+            get_record_mock(cache_id=2, id=1, dirty=256, flushed=0),
+        ],
+    )
+    estimator = opencas.flush_estimator(dump, observed={1: 4096 * 100}, throughput=None,
+                                        history={"/dev/nvme1n1": {"throughput": 4096 * 64}})
+
+    operations, dependencies = opencas.get_stop_plan(flush=True)
+    estimates, total = opencas.get_flush_estimates(operations, estimator, dependencies)
+
+    assert [(str(op), dirty, seconds) for op, dirty, seconds in estimates] == [
+        ("detach core 1 (/dev/sdb) from cache 1", 4096 * 100, 1),
+        ("detach core 2 (/dev/sdc) from cache 1", 4096 * 200, 2),
+        ("stop cache 1 (/dev/nvme0n1)", 0, 0),
+        ("detach core 1 (/dev/sdd) from cache 2", 4096 * 256, 4),
+        ("stop cache 2 (/dev/nvme1n1)", 0, 0),
+    ]
+    assert total == 4
+
+
+def test_flush_estimates_apply_01():
+    """
+    Check if sequential operations add up and unknown throughput makes total unknown
+    """
+    dump = get_dump_mock(
+        caches=[
+            get_record_mock(id=1, path="/dev/nvme0n1", line_size=4096, dirty=300, flushed=0),
+            get_record_mock(id=2, path="/dev/nvme1n1", line_size=4096, dirty=10, flushed=0),
+        ],
+        cores=[
+            get_record_mock(cache_id=1, id=1, dirty=100, flushed=0),
+        ],
+    )
+    operations = [
+        opencas.config_operation("remove core", Mock(), 1, 1, flush=True),
+        opencas.config_operation("change cache mode", Mock(), 1, flush=True),
+        opencas.config_operation("set cleaning policy", Mock(), 1),
+    ]
+
+    estimator = opencas.flush_estimator(dump, throughput=4096 * 100)
+    estimates, total = opencas.get_flush_estimates(operations, estimator)
+    assert [seconds for _, _, seconds in estimates] == [1, 3, 0]
+    assert total == 4
+
+    operations.append(opencas.config_operation("change cache mode", Mock(), 2, flush=True))
+    estimator = opencas.flush_estimator(dump)
+    estimates, total = opencas.get_flush_estimates(operations[3:], estimator)
+    assert estimates[0][2] is None
+    assert total is None
+
+
+def test_flush_estimator_observed_01():
+    """
+    Check if throughput is observed from whole cache and single core flush progress
+    """
+    first = get_dump_mock(
+        caches=[
+            get_record_mock(id=1, path="/dev/nvme0n1", line_size=4096, dirty=1000, flushed=100),
+            get_record_mock(id=2, path="/dev/nvme1n1", line_size=4096, dirty=1000, flushed=0),
+            get_record_mock(id=3, path="/dev/nvme2n1", line_size=4096, dirty=0, flushed=0),
+        ],
+        cores=[
+            get_record_mock(cache_id=2, id=1, dirty=500, flushed=10),
+        ],
+    )
+    second = get_dump_mock(
+        caches=[
+            get_record_mock(id=1, path="/dev/nvme0n1", line_size=4096, dirty=800, flushed=300),
+            get_record_mock(id=2, path="/dev/nvme1n1", line_size=4096, dirty=900, flushed=0),
+            get_record_mock(id=3, path="/dev/nvme2n1", line_size=4096, dirty=0, flushed=0),
+        ],
+        cores=[
+            get_record_mock(cache_id=2, id=1, dirty=400, flushed=110),
+        ],
+    )
+
+    assert opencas.flush_estimator.get_observed(first, second, 2) == {
+        1: 100 * 4096, 2: 50 * 4096,
+    }
+
+
+def test_flush_estimator_history_01(tmpdir):
+    """
+    Check if throughput of flushes done by stop is recorded and reused
+    """
+    history_file = str(tmpdir.join("flush-throughput.json"))
+    dump = get_dump_mock(
+        caches=[
+            get_record_mock(id=1, path="/dev/nvme0n1", line_size=4096, dirty=300, flushed=0),
+            get_record_mock(id=2, path="/dev/nvme1n1", line_size=4096, dirty=0, flushed=0),
+        ],
+        cores=[
+            get_record_mock(cache_id=1, id=1, dirty=100, flushed=0),
+            get_record_mock(cache_id=1, id=2, dirty=200, flushed=0),
+            get_record_mock(cache_id=2, id=1, dirty=0, flushed=0),
+        ],
+    )
+
+    opencas.flush_estimator.record_history(
+        dump, {(1, 1): 1.0, (1, 2): 2.0, (2, 1): 0.1}, history_file
+    )
+
+    history = opencas.flush_estimator.load_history(history_file)
+    assert list(history) == ["/dev/nvme0n1"]
+    assert history["/dev/nvme0n1"]["throughput"] == 100 * 4096
+
+    estimator = opencas.flush_estimator(dump, history=history)
+    assert estimator.estimate(1) == 3
+    assert estimator.estimate(1, 2) == 2
+    assert estimator.estimate(2) == 0
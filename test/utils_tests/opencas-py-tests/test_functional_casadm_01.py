@@ -0,0 +1,71 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from helpers import find_repo_root
+
+# Functional test API is imported along with test-framework submodule, no DUT is needed
+functional_dir = os.path.join(find_repo_root(), "test", "functional")
+sys.path += [functional_dir, os.path.join(functional_dir, "test-framework")]
+casadm = pytest.importorskip("api.cas.casadm")
+
+from api.cas import cli  # noqa: E402
+
+
+def _run(command):
+    """Local run of command, output decoded and stripped like by test-framework executor"""
+    p = subprocess.run(command, shell=True, executable="/bin/bash", capture_output=True)
+    return SimpleNamespace(
+        stdout=p.stdout.decode(errors="ignore").rstrip(),
+        stderr=p.stderr.decode(errors="ignore").rstrip(),
+        exit_code=p.returncode,
+    )
+
+
+def test_run_batch_01(tmpdir):
+    """
+    Check if outputs of batch commands are split by lengths in raw bytes,
+    also if they aren't valid UTF-8 or end with whitespace
+    """
+    fake_casadm = tmpdir.join("casadm")
+    fake_casadm.write(
+        "#!/bin/sh\n"
+        "cat > /dev/null\n"
+        "printf 'ready\\nresult 0 6 5\\ncaf\\351 \\nerr\\n\\n'\n"
+        "printf 'result 1 0 3\\nx\\n\\n'\n"
+    )
+    fake_casadm.chmod(0o755)
+
+    with patch.object(cli, "casadm_bin", str(fake_casadm)), \
+            patch.object(casadm.TestRun, "executor", SimpleNamespace(run=_run)), \
+            patch.object(casadm, "Output", lambda *args: args):
+        results = casadm.run_batch(["casadm -L", "casadm -P -i 1"])
+
+    assert results == [
+        (b"caf\xe9 \n", b"err\n\n", 0),
+        (b"", b"x\n\n", 1),
+    ]
+
+
+def test_run_batch_02(tmpdir):
+    """
+    Check if exit code of casadm is kept although its output is encoded
+    """
+    fake_casadm = tmpdir.join("casadm")
+    fake_casadm.write("#!/bin/sh\nprintf 'ready\\n'\nexit 1\n")
+    fake_casadm.chmod(0o755)
+
+    with patch.object(cli, "casadm_bin", str(fake_casadm)), \
+            patch.object(casadm.TestRun, "executor", SimpleNamespace(run=_run)), \
+            patch.object(casadm, "CmdException", Exception):
+        with pytest.raises(Exception, match="Failed to execute casadm batch"):
+            casadm.run_batch(["casadm -L"])
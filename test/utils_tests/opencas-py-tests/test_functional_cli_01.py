@@ -0,0 +1,47 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+import os
+import sys
+
+import pytest
+
+from helpers import find_repo_root
+
+# Command builders of functional test API don't need test-framework
+sys.path.append(os.path.join(find_repo_root(), "test", "functional"))
+
+from api.cas import cli  # noqa: E402
+
+
+def test_set_params_cmds_01():
+    """
+    Check if core id is passed only for core namespaces
+    """
+    commands = cli.set_params_cmds(
+        "1", {"seq-cutoff": {"policy": "never"}, "cleaning-alru": {"wake_up": "20"}}, core_id="2"
+    )
+
+    assert commands == [
+        "casadm --set-param --name seq-cutoff --cache-id 1 --core-id 2 --policy never",
+        "casadm --set-param --name cleaning-alru --cache-id 1 --wake-up 20",
+    ]
+
+
+def test_set_params_cmds_02():
+    """
+    Check if all invalid namespaces and params are reported
+    """
+    with pytest.raises(ValueError) as e:
+        cli.set_params_cmds("1", {
+            "cleaning": {"policy": "alru"},
+            "cleaning-alru": {"wake_up": "20", "sleep_time": "1"},
+            "eviction": {"policy": "lru"},
+            "promotion": {},
+        })
+
+    assert "unknown parameter sleep-time in cleaning-alru" in str(e.value)
+    assert "unknown parameter namespace eviction" in str(e.value)
+    assert "no parameters given for promotion" in str(e.value)
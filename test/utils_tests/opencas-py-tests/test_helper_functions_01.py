@@ -6,6 +6,8 @@
 
 import pytest
 from unittest.mock import patch, Mock
+import socket
+import struct
 import time
 
 import opencas
@@ -967,6 +969,95 @@ def test_last_resort_add_06(mock_start, mock_add, mock_exists, mock_run, mock_li
     mock_run.assert_called_with(["udevadm", "settle"])
 
 
+def _uevent_wait_mock(timeout):
+    time.sleep(min(timeout, 0.1))
+    return [{"ACTION": "add", "SUBSYSTEM": "block"}]
+
+
+@patch("opencas.uevent_monitor")
+@patch("opencas.cas_config.from_file")
+@patch("opencas.get_caches_list")
+@patch("subprocess.run")
+@patch("os.path.exists")
+@patch("opencas.add_core")
+@patch("opencas.start_cache")
+def test_last_resort_add_uevent_01(
+    mock_start, mock_add, mock_exists, mock_run, mock_list, mock_config, mock_monitor
+):
+    """
+    Check if adding cores/starting caches is attempted as soon as paths to devices show up
+    when waiting for uevents, without waiting for the polling interval to expire.
+    """
+    config = Mock(
+        spec_set=opencas.cas_config(),
+        caches={1: opencas.cas_config.cache_config(1, "/dev/lizards", "wt")},
+        cores=[opencas.cas_config.core_config(1, 1, "/dev/sandshrew")],
+    )
+
+    mock_config.return_value = config
+    mock_monitor.return_value.wait.side_effect = _uevent_wait_mock
+
+    begin = time.time()
+    mock_exists.side_effect = _exists_mock(begin + 0.5)
+    started = []
+    mock_add.side_effect = lambda *args, **kwargs: started.append(time.time())
+
+    opencas.wait_for_startup(timeout=3, interval=10, uevents=True)
+
+    assert started, "add core was not attempted"
+    assert started[0] - begin < 1.5, "add core was not attempted on device event"
+    mock_start.assert_any_call(config.caches[1], load=True)
+    mock_monitor.return_value.close.assert_called_once()
+    mock_run.assert_called_with(["udevadm", "settle"])
+
+
+@patch("opencas.uevent_monitor")
+@patch("opencas.cas_config.from_file")
+@patch("opencas.get_caches_list")
+@patch("subprocess.run")
+@patch("os.path.exists")
+@patch("opencas.add_core")
+@patch("opencas.start_cache")
+def test_last_resort_add_uevent_02(
+    mock_start, mock_add, mock_exists, mock_run, mock_list, mock_config, mock_monitor
+):
+    """
+    Check if polling is used when listening for uevents is not possible.
+    """
+    config = Mock(
+        spec_set=opencas.cas_config(),
+        caches={1: opencas.cas_config.cache_config(1, "/dev/lizards", "wt")},
+        cores=[opencas.cas_config.core_config(1, 1, "/dev/sandshrew")],
+    )
+
+    mock_config.return_value = config
+    mock_monitor.side_effect = PermissionError
+
+    mock_exists.side_effect = _exists_mock(time.time() + 0.5)
+
+    opencas.wait_for_startup(timeout=1, interval=0.1, uevents=True)
+
+    mock_start.assert_any_call(config.caches[1], load=True)
+    mock_add.assert_any_call(config.cores[0], attach=True)
+
+
+def test_uevent_parse_01():
+    """
+    Check if udev monitor messages are parsed and kernel ones are ignored
+    """
+    properties = b"ACTION=add\0SUBSYSTEM=block\0DEVNAME=/dev/sdb\0"
+    header = struct.pack(
+        "=8sIIIIIIII", b"libudev", socket.htonl(0xfeedcafe), 40, 40, len(properties), 0, 0, 0, 0
+    )
+
+    assert opencas.uevent_monitor.parse(header + properties) == {
+        "ACTION": "add",
+        "SUBSYSTEM": "block",
+        "DEVNAME": "/dev/sdb",
+    }
+    assert opencas.uevent_monitor.parse(b"add@/devices/virtual/block/loop0\0ACTION=add\0") is None
+
+
 def assert_option_value(call, option, value):
     try:
         index = call.index(option)
@@ -0,0 +1,134 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+
+import inflight_upgrade
+import opencas
+from helpers import load_casctl
+
+casctl = load_casctl()
+
+
+def _insert_module(sys_module, version):
+    sys_module.ensure("cas_bd", dir=True)
+    sys_module.ensure("cas_cache", "srcversion").write(version)
+
+
+@pytest.fixture
+def system(tmpdir):
+    """Mocked Open CAS modules with single running cache"""
+    sys_module = tmpdir.mkdir("module")
+    _insert_module(sys_module, "old")
+    caches = {1: {"device": "/dev/disk/by-id/wwn-0x1", "status": "Running", "mode": "wb"}}
+
+    def stop(flush):
+        caches.clear()
+
+    def load(cache, load):
+        caches[cache.cache_id] = {"device": cache.device, "status": "Running", "mode": "wb"}
+
+    mocks = Mock()
+    mocks.stop.side_effect = stop
+    mocks.start_cache.side_effect = load
+    mocks.remove_module.side_effect = lambda name: sys_module.join(name).remove()
+    mocks.insert_module.side_effect = lambda name: _insert_module(sys_module, "new")
+
+    with patch.object(inflight_upgrade, "sys_module", str(sys_module)), \
+            patch.object(inflight_upgrade, "config_location", str(tmpdir.join("caches.json"))), \
+            patch.object(inflight_upgrade, "remove_module", mocks.remove_module), \
+            patch.object(inflight_upgrade, "insert_module", mocks.insert_module), \
+            patch("opencas.get_devices_state", lambda: {"caches": dict(caches)}), \
+            patch("opencas.stop", mocks.stop), \
+            patch("opencas.start_cache", mocks.start_cache), \
+            patch("opencas.wait_for_cas_ctrl"):
+        yield mocks, caches
+
+
+def _casctl_upgrade(journal):
+    with patch("sys.argv", ["casctl", "upgrade", "--journal", journal]), \
+            pytest.raises(SystemExit) as e:
+        casctl.cas()
+    return e.value.code
+
+
+def test_upgrade_resume_01(tmpdir, system):
+    """
+    Check if upgrade interrupted after caches were stopped is resumed without
+    listing and stopping caches again
+    """
+    mocks, caches = system
+    journal = str(tmpdir.join("journal.json"))
+    insert_module = mocks.insert_module.side_effect
+    mocks.insert_module.side_effect = KeyboardInterrupt
+
+    assert _casctl_upgrade(journal) == 1
+
+    assert caches == {}
+    with open(journal) as f:
+        assert list(json.load(f)["states"]) == ["SaveCaches", "StopCaches"]
+
+    mocks.insert_module.side_effect = insert_module
+
+    assert _casctl_upgrade(journal) == 0
+
+    mocks.stop.assert_called_once()
+    assert [call[0][0] for call in mocks.remove_module.call_args_list] == ["cas_cache", "cas_bd"]
+    assert mocks.insert_module.call_count == 2
+    cache = mocks.start_cache.call_args[0][0]
+    assert (cache.cache_id, cache.device) == (1, "/dev/disk/by-id/wwn-0x1")
+    assert list(caches) == [1]
+    assert not tmpdir.join("journal.json").exists()
+    assert not tmpdir.join("caches.json").exists()
+
+
+def test_upgrade_resume_02(tmpdir, system):
+    """
+    Check if caches started on the old module after interrupted upgrade are
+    stopped again on resume
+    """
+    mocks, caches = system
+    journal = str(tmpdir.join("journal.json"))
+    remove_module = mocks.remove_module.side_effect
+    mocks.remove_module.side_effect = KeyboardInterrupt
+
+    assert _casctl_upgrade(journal) == 1
+
+    caches[1] = {"device": "/dev/disk/by-id/wwn-0x1", "status": "Running", "mode": "wb"}
+    mocks.remove_module.side_effect = remove_module
+
+    assert _casctl_upgrade(journal) == 0
+
+    assert mocks.stop.call_count == 2
+    mocks.start_cache.assert_called_once()
+    assert list(caches) == [1]
+
+
+def test_upgrade_resume_03(tmpdir, system):
+    """
+    Check if only caches which weren't loaded by failed upgrade are loaded on resume
+    """
+    mocks, caches = system
+    journal = str(tmpdir.join("journal.json"))
+    caches[2] = {"device": "/dev/disk/by-id/wwn-0x2", "status": "Running", "mode": "wt"}
+    load_cache = mocks.start_cache.side_effect
+
+    def load_or_fail(cache, load):
+        if cache.cache_id == 2 and mocks.start_cache.call_count == 2:
+            raise opencas.casadm.CasadmError(Mock(stderr="no device\n"))
+        load_cache(cache, load)
+
+    mocks.start_cache.side_effect = load_or_fail
+
+    assert _casctl_upgrade(journal) == 1
+    assert list(caches) == [1]
+
+    assert _casctl_upgrade(journal) == 0
+
+    assert [call[0][0].cache_id for call in mocks.start_cache.call_args_list] == [1, 2, 2]
+    assert sorted(caches) == [1, 2]
@@ -0,0 +1,123 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+import pytest
+from unittest.mock import patch
+
+import ioclass_advisor
+from helpers import get_stats_mock, get_record_mock, get_dump_mock
+
+
+def _requests(requests, hits):
+    return get_stats_mock(req_rd_hits=hits, req_rd_full_misses=requests - hits)
+
+
+def _dump(classes, cache_requests=0, cache_hits=0):
+    """
+    Dump of cache 1 with IO classes given as (id, priority, max_size,
+    curr_size, requests, hits)
+    """
+    return get_dump_mock(
+        caches=[get_record_mock(id=1, stats=_requests(cache_requests, cache_hits))],
+        ioclasses=[
+            get_record_mock(cache_id=1, id=class_id, name="class{}".format(class_id),
+                            priority=priority, max_size=max_size, curr_size=curr_size,
+                            stats=_requests(requests, hits))
+            for class_id, priority, max_size, curr_size, requests, hits in classes
+        ],
+    )
+
+
+def test_ioclass_usage_01():
+    """
+    Check if hit ratio curve is fitted when occupancy varies and default is
+    kept otherwise
+    """
+    entry = ioclass_advisor.ioclass_usage(_dump([(1, 1, 100, 0, 0, 0)]).ioclasses[0])
+    entry.intervals = [(100, 1000, 100), (400, 1000, 200), (1600, 1000, 400)]
+    entry.requests, entry.hits = 3000, 700
+
+    assert entry.fit() == pytest.approx(0.5)
+
+    flat = ioclass_advisor.ioclass_usage(_dump([(1, 1, 100, 0, 0, 0)]).ioclasses[0])
+    flat.intervals = [(100, 1000, 100), (105, 1000, 200), (100, 1000, 400)]
+    flat.requests, flat.hits = 3000, 700
+
+    assert flat.fit() == ioclass_advisor.ioclass_usage.default_alpha
+    assert flat.predict_hits(10 ** 6) == flat.requests
+    assert flat.marginal_gain(100, 10) > flat.marginal_gain(1000, 10) > 0
+
+
+def test_propose_ioclass_allocation_01():
+    """
+    Check if cache is split by marginal gain, priorities follow hits per block
+    and pinned, bypassed, idle and missing classes keep their settings
+    """
+    samples = [
+        _dump([
+            (0, 1, 100, 100, 0, 0),
+            (1, 22, 100, 100, 0, 0),
+            (2, 2, 0, 0, 0, 0),
+            (3, -1, 100, 50, 0, 0),
+            (4, 3, 50, 10, 0, 0),
+            (5, 4, 100, 0, 0, 0),
+        ]),
+        _dump([
+            (0, 1, 100, 100, 1000, 100),
+            (1, 22, 100, 100, 1000, 900),
+            (2, 2, 0, 0, 500, 0),
+            (3, -1, 100, 50, 100, 50),
+            (4, 3, 50, 10, 10, 0),
+            (5, 4, 100, 0, 0, 0),
+        ]),
+    ]
+
+    usage = ioclass_advisor.get_ioclass_usage(samples, 1)
+    proposal = ioclass_advisor.propose_ioclass_allocation(usage, 1000)
+
+    # Hot class saturates at 12.3 %, pinned one at 20 %, rest is best
+    # used by class with lowest hit ratio
+    assert proposal == {
+        0: (22, 67),
+        1: (1, 13),
+        2: (2, 0),
+        3: (-1, 20),
+        4: (3, 50),
+        5: (4, 100),
+    }
+
+    rows = [
+        ["0", "unclassified", "1", "1.00"],
+        ["1", "file_size:le:4096", "22", "1.00"],
+        ["3", "metadata", "", "1.00"],
+        ["7", "direct", "5", "0.50"],
+    ]
+    assert ioclass_advisor.apply_ioclass_proposal(rows, proposal) == [
+        ["0", "unclassified", "22", "0.67"],
+        ["1", "file_size:le:4096", "1", "0.13"],
+        ["3", "metadata", "", "0.20"],
+        ["7", "direct", "5", "0.50"],
+    ]
+
+
+@patch("ioclass_advisor.sample_dumps")
+@patch("opencas.casadm.io_class_load_config")
+def test_trial_ioclass_config_01(mock_load, mock_sample):
+    """
+    Check if tried config is rolled back when hit ratio drops or there is no IO
+    """
+    mock_sample.return_value = [_dump([], 100, 50), _dump([], 200, 145)]
+
+    assert ioclass_advisor.trial_ioclass_config(1, "new.csv", "old.csv", 0.9, 10) == (True, 0.95)
+    assert [c[0] for c in mock_load.call_args_list] == [(1, "new.csv")]
+
+    mock_load.reset_mock()
+    assert ioclass_advisor.trial_ioclass_config(1, "new.csv", "old.csv", 0.97, 10) == (False, 0.95)
+    assert [c[0] for c in mock_load.call_args_list] == [(1, "new.csv"), (1, "old.csv")]
+
+    mock_load.reset_mock()
+    mock_sample.return_value = [_dump([], 100, 50)] * 2
+    assert ioclass_advisor.trial_ioclass_config(1, "new.csv", "old.csv", 0.5, 10) == (False, None)
+    assert mock_load.call_args_list[-1][0] == (1, "old.csv")
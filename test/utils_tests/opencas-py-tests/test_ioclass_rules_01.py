@@ -0,0 +1,233 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+import io
+import pytest
+
+import ioclass_rules
+from ioclass_rules import condition, rule
+
+
+def _config(tmpdir, rows):
+    path = tmpdir.join("ioclass-config.csv")
+    path.write(
+        "IO class id,IO class name,Eviction priority,Allocation\n"
+        + "".join("{},{},{},1\n".format(class_id, name, prio) for class_id, name, prio in rows)
+    )
+    return ioclass_rules.load_config(str(path))
+
+
+def _ios(records):
+    return [ioclass_rules.get_trace_io(record) for record in records]
+
+
+@pytest.mark.parametrize(
+    "text,expected",
+    [
+        ("metadata", [("metadata", None, "|")]),
+        ("file_size:le:4096&done", [("file_size", "le:4096", "|"), ("done", None, "&")]),
+        (
+            "lba:gt:10|extension:txt&io_direction:write",
+            [("lba", "gt:10", "|"), ("extension", "txt", "|"), ("io_direction", "write", "&")],
+        ),
+        ("pid:100", [("pid", "100", "|")]),
+    ],
+)
+def test_rule_parse_01(text, expected):
+    """
+    Check if rule is split into conditions with preceding logical operators
+    """
+    conditions = rule.parse(text)
+
+    assert [(c.token, c.operand, c.l_op) for c in conditions] == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "metadata&",
+        "unknown",
+        "file_size:lq:10",
+        "file_size:le:-1",
+        "file_size",
+        "extension:",
+        "io_direction:sideways",
+        "core_id:4096",
+        "process_name:" + "x" * 256,
+    ],
+)
+def test_rule_parse_02(text):
+    """
+    Check if invalid rules are rejected as by kernel
+    """
+    with pytest.raises(ValueError):
+        rule(text)
+
+
+def test_rule_evaluate_01():
+    """
+    Check if rule is false as soon as it is false before '&' and if '|'
+    alternatives are all evaluated
+    """
+    r = rule("file_size:le:10&extension:txt|extension:log&done")
+    small_txt = _ios([{"file_size": 5, "path": "/a/b.txt"}])[0]
+    big_txt = _ios([{"file_size": 50, "path": "/a/b.txt"}])[0]
+    small_bin = _ios([{"file_size": 5, "path": "/a/b.bin"}])[0]
+
+    assert r.evaluate(small_txt, 0) == (True, True, 4)
+    assert r.evaluate(big_txt, 0) == (False, False, 1)
+    assert r.evaluate(small_bin, 0) == (False, False, 3)
+
+
+def test_condition_test_01():
+    """
+    Check if conditions test page kind and path like kernel classifier
+    """
+    reg, anon, slab = _ios([
+        {"path": "/data/db/table.ibd", "file_size": 4096, "io_direction": "write"},
+        {"page": "anon", "request_size": 4096},
+        {"page": "slab"},
+    ])
+
+    assert condition("metadata", None, "|").test(slab, 0) == (True, False)
+    assert condition("metadata", None, "|").test(reg, 0) == (False, False)
+    assert condition("direct", None, "|").test(anon, 0) == (True, False)
+    assert condition("directory", "/data", "|").test(reg, 0) == (True, False)
+    assert condition("directory", "/dat", "|").test(reg, 0) == (False, False)
+    assert condition("extension", "ibd", "|").test(reg, 0) == (True, False)
+    assert condition("file_name_prefix", "tab", "|").test(reg, 0) == (True, False)
+    assert condition("io_direction", "write", "|").test(reg, 0) == (True, False)
+    assert condition("file_size", "lt:8192", "|").test(anon, 0) == (False, False)
+    assert condition("request_size", "4096", "|").test(anon, 0) == (True, False)
+    assert condition("io_class", "ge:3", "|").test(anon, 5) == (True, False)
+
+
+def test_rule_disjoint_01():
+    """
+    Check if rules which can't match the same IO are recognized
+    """
+    assert rule("metadata&done").is_disjoint(rule("direct&done"))
+    assert rule("metadata&done").is_disjoint(rule("file_size:le:4096&done"))
+    assert rule("file_size:le:4096&done").is_disjoint(rule("file_size:gt:4096&done"))
+    assert rule("extension:txt&done").is_disjoint(rule("extension:log|extension:gz&done"))
+    assert rule("lba:lt:10|lba:gt:100").is_disjoint(rule("lba:ge:10&lba:le:100"))
+
+    assert not rule("file_size:le:4096&done").is_disjoint(rule("file_size:le:8192&done"))
+    assert not rule("extension:txt").is_disjoint(rule("extension:log|lba:1"))
+    assert not rule("directory:/a&done").is_disjoint(rule("directory:/b&done"))
+    # Conditions past done are never evaluated
+    assert not rule("done&extension:txt").is_disjoint(rule("extension:log"))
+
+
+def test_classify_01(tmpdir):
+    """
+    Check if last matching rule classifies IO unless earlier rule stops
+    """
+    classes = _config(tmpdir, [
+        (0, "unclassified", 22),
+        (1, "request_size:le:4096", 1),
+        (2, "io_direction:write", 2),
+        (3, "metadata&done", 3),
+        (4, "io_class:2&extension:log&done", 4),
+        (33, "prefetch", 21),
+    ])
+
+    ios = _ios([
+        {"page": "anon", "request_size": 4096, "io_direction": "read"},
+        {"page": "anon", "request_size": 4096, "io_direction": "write"},
+        {"page": "slab", "request_size": 4096, "io_direction": "write"},
+        {"path": "/var/log/a.log", "request_size": 65536, "io_direction": "write"},
+        {"path": "/var/log/a.log", "request_size": 4096, "io_direction": "read"},
+    ])
+
+    stats, results = ioclass_rules.evaluate(classes, ios)
+
+    assert results == [1, 2, 3, 4, 1]
+    assert [entry.evaluated for entry in stats.rules] == [5, 5, 5, 4]
+    assert [entry.stopped for entry in stats.rules] == [0, 0, 1, 1]
+    assert stats.conditions == 5 + 5 + 6 + 7
+
+
+def test_load_config_01(tmpdir):
+    """
+    Check if special classes are validated and classes are sorted by id
+    """
+    classes = _config(tmpdir, [(2, "direct", 1), (0, "unclassified", 22), (33, "prefetch", 21)])
+
+    assert [cls.class_id for cls in classes] == [0, 2, 33]
+    assert [cls.rule is None for cls in classes] == [True, False, True]
+
+    with pytest.raises(ValueError):
+        _config(tmpdir, [(0, "metadata", 22)])
+    with pytest.raises(ValueError):
+        _config(tmpdir, [(5, "prefetch", 22)])
+    with pytest.raises(ValueError):
+        _config(tmpdir, [(1, "direct", 1), (1, "metadata", 1)])
+
+
+def test_optimize_01(tmpdir):
+    """
+    Check if frequently stopping rules are moved before disjoint rules and if
+    overlapping rules keep their order
+    """
+    classes = _config(tmpdir, [
+        (0, "unclassified", 22),
+        (1, "metadata&done", 0),
+        (11, "file_size:le:4096&done", 9),
+        (12, "file_size:le:16384&done", 10),
+        (13, "file_size:gt:16384&done", 11),
+        (22, "direct&done", 20),
+        (33, "prefetch", 21),
+    ])
+    ios = _ios(
+        [{"page": "anon"}] * 6
+        + [{"file_size": 20000, "path": "/a"}] * 3
+        + [{"file_size": 10000, "path": "/b"}]
+        + [{"page": "slab"}]
+    )
+
+    reordered, mapping = ioclass_rules.optimize(classes, ios)
+    before, results = ioclass_rules.evaluate(classes, ios)
+    after, new_results = ioclass_rules.evaluate(reordered, ios)
+
+    assert mapping == {22: 1, 13: 11, 1: 12, 11: 13, 12: 22}
+    assert [(cls.class_id, cls.name, cls.priority) for cls in reordered] == [
+        (0, "unclassified", "22"),
+        (1, "direct&done", "20"),
+        (11, "file_size:gt:16384&done", "11"),
+        (12, "metadata&done", "0"),
+        (13, "file_size:le:4096&done", "9"),
+        (22, "file_size:le:16384&done", "10"),
+        (33, "prefetch", "21"),
+    ]
+    assert [mapping.get(part_id, part_id) for part_id in results] == new_results
+    assert after.conditions < before.conditions
+
+    output = io.StringIO()
+    ioclass_rules.save_config(reordered, output)
+    assert output.getvalue().splitlines()[:3] == [
+        "IO class id,IO class name,Eviction priority,Allocation",
+        "0,unclassified,22,1",
+        "1,direct&done,20,1",
+    ]
+
+
+def test_optimize_02(tmpdir):
+    """
+    Check if rules before rule with io_class condition keep their places
+    """
+    classes = _config(tmpdir, [
+        (0, "unclassified", 22),
+        (1, "metadata", 0),
+        (2, "direct", 1),
+        (3, "io_class:1&done", 2),
+        (4, "extension:log&done", 3),
+    ])
+    ios = _ios([{"page": "anon"}] * 5 + [{"path": "/a.log"}] * 5)
+
+    reordered, mapping = ioclass_rules.optimize(classes, ios)
+
+    assert reordered is classes
+    assert mapping == {}
@@ -0,0 +1,226 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+import opencas
+from opencas import cas_netlink
+from helpers import get_process_mock
+
+
+def _c_type(field):
+    cas_netlink._define_structures()
+    return dict(cas_netlink._c_compact_dump._fields_)[field]._type_
+
+
+def _strings(path):
+    """String table with path at offset 1, as in dump with one string"""
+    return b"\0" + path.encode() + b"\0"
+
+
+def make_cache(cache_id, path, state=1, mode=0, dirty=0, flushed=0, standby_detached=False):
+    struct = _c_type("caches")(
+        id=cache_id, path=1, state=state, mode=mode, dirty=dirty,
+        flushed=flushed, standby_detached=standby_detached
+    )
+    return cas_netlink.cache(struct, _strings(path))
+
+
+def make_core(cache_id, core_id, path, state=0, exp_obj_exists=True, dirty=0, flushed=0):
+    struct = _c_type("cores")(
+        cache_id=cache_id, id=core_id, path=1, state=state,
+        exp_obj_exists=exp_obj_exists, dirty=dirty, flushed=flushed
+    )
+    return cas_netlink.core(struct, _strings(path))
+
+
+def make_pool_core(path):
+    return cas_netlink.pool_core(_c_type("core_pool")(path=1), _strings(path))
+
+
+def test_record_copy_01():
+    """
+    Check if records are copied to python objects including nested structures
+    """
+    cache = make_cache(3, "/dev/nvme0n1", mode=1)
+
+    assert cache.id == 3
+    assert cache.path == "/dev/nvme0n1"
+    assert cache.mode_name() == "wb"
+    assert cache.state_name() == "Running"
+    assert cache.stats.req_rd_hits == 0
+    assert cache.cleaning.policy == 0
+
+
+def test_get_filter_01():
+    """
+    Check if dump filter selects everything by default and names are turned into masks
+    """
+    cas_netlink._define_structures()
+
+    default = cas_netlink.get_filter()
+    assert (default.cache_id, default.core_id, default.ioclass_id) == (-1, -1, -1)
+    assert default.records == 0b1111
+    assert default.sections == 0b11111
+
+    narrow = cas_netlink.get_filter(cache_id=2, core_id=0, records=["core"],
+                                    sections=["usage", "req"])
+    assert (narrow.cache_id, narrow.core_id, narrow.ioclass_id) == (2, 0, -1)
+    assert narrow.records == 0b10
+    assert narrow.sections == 0b110
+
+    with pytest.raises(ValueError):
+        cas_netlink.get_filter(sections=["stats"])
+
+
+@patch("opencas.cas_netlink._c_dump", None)
+@patch("opencas.cas_netlink.get_lib")
+def test_dump_filtered_01(mock_lib):
+    """
+    Check if filter is passed only when given and if dump storage is reused
+    """
+    cas_netlink._define_structures()
+    lib = MagicMock()
+    lib.cas_nl_compact_dump.return_value = 0
+    mock_lib.return_value = lib
+
+    cas_netlink.dump()
+    assert lib.cas_nl_compact_dump.call_args[0][0] is None
+
+    result = cas_netlink.dump(cache_id=3, records=["cache"])
+    c_filter = lib.cas_nl_compact_dump.call_args[0][0]._obj
+    assert (c_filter.cache_id, c_filter.records, c_filter.sections) == (3, 0b1, 0b11111)
+    assert result.caches == []
+
+    first, second = [call[0][1]._obj for call in lib.cas_nl_compact_dump.call_args_list]
+    assert first is second
+
+    lib.cas_nl_compact_dump.return_value = -22
+    with pytest.raises(cas_netlink.NetlinkError):
+        cas_netlink.dump(cache_id=3)
+
+
+def test_record_strings_01():
+    """
+    Check if paths and names are taken from string table shared by records
+    """
+    strings = b"\0/dev/sdb\0unclassified\0"
+    ioclass = cas_netlink.ioclass(_c_type("ioclasses")(id=0, name=10), strings)
+    cache = cas_netlink.cache(_c_type("caches")(id=1, path=1), strings)
+    detached = cas_netlink.cache(_c_type("caches")(id=2, path=0), strings)
+
+    assert ioclass.name == "unclassified"
+    assert cache.path == "/dev/sdb"
+    assert detached.path == ""
+
+
+def test_to_caches_list_01():
+    """
+    Check if dump is rendered the same way as casadm list output
+    """
+    result = cas_netlink.dump_result(
+        caches=[make_cache(1, "/dev/sdb"), make_cache(2, "/dev/sdc", mode=3)],
+        cores=[
+            make_core(1, 1, "/dev/sdd"),
+            make_core(2, 7, "/dev/sde", state=1, exp_obj_exists=False),
+            make_core(1, 2, "/dev/sdf"),
+        ],
+    )
+
+    assert result.to_caches_list() == [
+        {"type": "cache", "id": "1", "disk": "/dev/sdb", "status": "Running",
+         "write policy": "wt", "device": "-"},
+        {"type": "core", "id": "1", "disk": "/dev/sdd", "status": "Active",
+         "write policy": "-", "device": "/dev/cas1-1"},
+        {"type": "core", "id": "2", "disk": "/dev/sdf", "status": "Active",
+         "write policy": "-", "device": "/dev/cas1-2"},
+        {"type": "cache", "id": "2", "disk": "/dev/sdc", "status": "Running",
+         "write policy": "pt", "device": "-"},
+        {"type": "core", "id": "7", "disk": "/dev/sde", "status": "Inactive",
+         "write policy": "-", "device": "-"},
+    ]
+
+
+def test_to_caches_list_02():
+    """
+    Check if core pool, standby and flushing states are rendered as in casadm list output
+    """
+    result = cas_netlink.dump_result(
+        caches=[
+            make_cache(1, "/dev/sdb", state=1 << 4),
+            make_cache(2, "/dev/sdc", mode=1, dirty=75, flushed=25),
+        ],
+        cores=[make_core(2, 1, "/dev/sdd")],
+        core_pool=[make_pool_core("/dev/sdx")],
+    )
+
+    assert result.to_caches_list() == [
+        {"type": "core pool", "id": "-", "disk": "-", "status": "-",
+         "write policy": "-", "device": "-"},
+        {"type": "core", "id": "-", "disk": "/dev/sdx", "status": "Detached",
+         "write policy": "-", "device": "-"},
+        {"type": "cache", "id": "1", "disk": "-", "status": "Standby",
+         "write policy": "-", "device": "/dev/cas-cache-1"},
+        {"type": "cache", "id": "2", "disk": "/dev/sdc", "status": "Flushing (25.0 %)",
+         "write policy": "wb->wb", "device": "-"},
+        {"type": "core", "id": "1", "disk": "/dev/sdd", "status": "Flushing (100.0 %)",
+         "write policy": "-", "device": "/dev/cas2-1"},
+    ]
+
+
+@patch("opencas.cas_netlink.dump")
+@patch("opencas.cas_netlink.is_available")
+def test_get_caches_list_netlink_01(mock_available, mock_dump):
+    """
+    Check if netlink dump is used when libopencas is available
+    """
+    mock_available.return_value = True
+    mock_dump.return_value = cas_netlink.dump_result(caches=[make_cache(1, "/dev/sdb")])
+
+    with patch("subprocess.run") as mock_run:
+        result = opencas.get_caches_list()
+        mock_run.assert_not_called()
+
+    assert result[0]["id"] == "1"
+    assert result[0]["disk"] == "/dev/sdb"
+
+
+@patch("subprocess.run")
+@patch("opencas.cas_netlink.dump")
+@patch("opencas.cas_netlink.is_available")
+def test_get_caches_list_netlink_02(mock_available, mock_dump, mock_run):
+    """
+    Check if casadm is used when netlink dump fails
+    """
+    mock_available.return_value = True
+    mock_dump.side_effect = cas_netlink.NetlinkError(2)
+    mock_run.return_value = get_process_mock(
+        0,
+        "type,id,disk,status,write policy,device\n"
+        "cache,1,/dev/sdb,Running,wt,-\n",
+        "",
+    )
+
+    result = opencas.get_caches_list()
+
+    mock_run.assert_called_once()
+    assert result == [
+        {"type": "cache", "id": "1", "disk": "/dev/sdb", "status": "Running",
+         "write policy": "wt", "device": "-"}
+    ]
+
+
+@patch("subprocess.run")
+@patch("opencas.cas_netlink.is_available")
+def test_get_caches_list_netlink_03(mock_available, mock_run):
+    """
+    Check if casadm is used when libopencas is not available
+    """
+    mock_available.return_value = False
+    mock_run.return_value = get_process_mock(0, "", "")
+
+    assert opencas.get_caches_list() == []
+    mock_run.assert_called_once()
@@ -0,0 +1,119 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+import threading
+import time
+import pytest
+from unittest.mock import Mock
+
+import opencas
+
+
+def test_run_with_dependencies_order():
+    """
+    Check if tasks are run only after their dependencies completed
+    """
+    finished = []
+    lock = threading.Lock()
+
+    def task(key, duration):
+        time.sleep(duration)
+        with lock:
+            finished.append(key)
+
+    tasks = {
+        "a": lambda: task("a", 0.2),
+        "b": lambda: task("b", 0),
+        "c": lambda: task("c", 0),
+        "d": lambda: task("d", 0),
+    }
+    dependencies = {"b": ["a"], "c": ["b", "missing"], "d": []}
+
+    futures, blocked = opencas.run_with_dependencies(tasks, dependencies, workers=4)
+
+    assert blocked == []
+    assert set(futures) == set(tasks)
+    assert finished.index("a") < finished.index("b") < finished.index("c")
+    assert finished[0] == "d", "independent task should not wait for other tasks"
+
+
+def test_run_with_dependencies_concurrent():
+    """
+    Check if independent tasks are run concurrently
+    """
+    barrier = threading.Barrier(3, timeout=5)
+
+    tasks = {i: barrier.wait for i in range(3)}
+
+    futures, blocked = opencas.run_with_dependencies(tasks, {}, workers=3)
+
+    assert blocked == []
+    for future in futures.values():
+        future.result()
+
+
+def test_run_with_dependencies_failed_dependency():
+    """
+    Check if dependent task is run even if its dependency failed
+    """
+    def fail():
+        raise opencas.casadm.CasadmError(Mock(stderr="error"))
+
+    tasks = {"a": fail, "b": lambda: 42}
+
+    futures, blocked = opencas.run_with_dependencies(tasks, {"b": ["a"]}, workers=2)
+
+    with pytest.raises(opencas.casadm.CasadmError):
+        futures["a"].result()
+    assert futures["b"].result() == 42
+
+
+def test_run_with_dependencies_cycle():
+    """
+    Check if tasks with circular dependencies are reported and not run
+    """
+    tasks = {"a": Mock(), "b": Mock(), "c": Mock(), "d": Mock()}
+    dependencies = {"a": ["b"], "b": ["a"], "c": ["b"], "d": []}
+
+    futures, blocked = opencas.run_with_dependencies(tasks, dependencies, workers=2)
+
+    assert blocked == ["a", "b", "c"]
+    assert list(futures) == ["d"]
+    tasks["a"].assert_not_called()
+    tasks["c"].assert_not_called()
+    tasks["d"].assert_called_once()
+
+
+def test_get_dependencies_01():
+    """
+    Check if devices stacked on exported objects depend on the respective device
+    """
+    config = opencas.cas_config(
+        caches={
+            1: opencas.cas_config.cache_config(1, "/dev/nvme0n1", "wt"),
+            2: opencas.cas_config.cache_config(2, "/dev/cas1-1", "wt"),
+            3: opencas.cas_config.cache_config(3, "/dev/nvme1n1", "wt"),
+        },
+        cores=[
+            opencas.cas_config.core_config(1, 1, "/dev/sda"),
+            opencas.cas_config.core_config(2, 1, "/dev/sdb"),
+            opencas.cas_config.core_config(3, 1, "/dev/cas2-1"),
+        ],
+    )
+
+    assert config.get_dependencies() == {
+        ("cache", 1): [],
+        ("cache", 2): [("core", 1, 1)],
+        ("cache", 3): [],
+        ("core", 1, 1): [("cache", 1)],
+        ("core", 2, 1): [("cache", 2)],
+        ("core", 3, 1): [("cache", 3), ("core", 2, 1)],
+    }
+
+    assert config.get_dependencies(with_cores=False) == {
+        ("cache", 1): [],
+        ("cache", 2): [("cache", 1)],
+        ("cache", 3): [],
+    }
@@ -0,0 +1,66 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import stats_history  # noqa: E402
+from stats_recorder import stats_ring  # noqa: E402
+
+
+def _ring(tmpdir, name, fields, capacity, records):
+    ring = stats_ring(str(tmpdir.join(name + ".ring")), fields, capacity)
+    for timestamp, values in records:
+        ring.append(timestamp, values)
+    return ring
+
+
+def test_read_01(tmpdir):
+    """
+    Check if window is taken in chronological order from wrapped ring, less
+    the oldest slot which is reused by the next record
+    """
+    _ring(tmpdir, "cache1", ["req_total", "usage_dirty"], 4,
+          [(float(t), [10 * t, t]) for t in range(6)]).close()
+
+    history = stats_history.read("cache1", directory=str(tmpdir))
+
+    assert history.timestamps.tolist() == [3.0, 4.0, 5.0]
+    assert history.column("req_total").tolist() == [30, 40, 50]
+
+    window = stats_history.read("cache1", 2.5, 4.0, directory=str(tmpdir))
+    assert window.timestamps.tolist() == [3.0, 4.0]
+    assert stats_history.list_devices(str(tmpdir)) == ["cache1"]
+
+
+def test_rates_01(tmpdir):
+    """
+    Check if counter resets count from zero and gauges are plain differences
+    """
+    history = stats_history.series(
+        ["req_total", "usage_dirty"],
+        np.array([0.0, 2.0, 4.0, 5.0]),
+        np.array([[100, 10], [140, 30], [20, 5], [30, 5]], dtype=np.uint64),
+    )
+
+    assert history.deltas().tolist() == [[40, 20], [20, -25], [10, 0]]
+    assert history.rates().tolist() == [[20.0, 10.0], [10.0, -12.5], [10.0, 0.0]]
+
+
+def test_read_concurrent_01(tmpdir):
+    """
+    Check if records overwritten while window is copied are dropped
+    """
+    ring = _ring(tmpdir, "cache1", ["req_total"], 4, [(float(t), [t]) for t in range(4)])
+    reader = stats_history.ring_reader(str(tmpdir.join("cache1.ring")))
+    heads = iter([4, 6])
+    reader.get_head = lambda: next(heads)
+
+    history = reader.read()
+
+    # Records 0 and 1 were replaced, slot of record 2 may be being written
+    assert history.timestamps.tolist() == [3.0]
+    ring.close()
@@ -0,0 +1,56 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+import pytest
+
+from stats_monitor import stats_monitor
+from helpers import get_stats_mock, get_record_mock, get_dump_mock
+
+
+def _dump(cores, cache_dirty=0):
+    """
+    Dump of cache 1 with cores given as (id, reads, writes, hits, misses,
+    pass-through, cleaned blocks), cache statistics are sums of them
+    """
+    def stats(reads, writes, hits, misses, pt, cleaned):
+        return get_stats_mock(req_rd_total=reads, req_wr_total=writes, req_rd_hits=hits,
+                              req_rd_full_misses=misses, req_rd_pt=pt,
+                              blocks_cleaner_core_wr=cleaned)
+
+    total = [sum(column) for column in zip(*[core[1:] for core in cores])] or [0] * 6
+    return get_dump_mock(
+        caches=[get_record_mock(id=1, path="/dev/nvme0n1", size=1000, dirty=cache_dirty,
+                                stats=stats(*total))],
+        cores=[get_record_mock(cache_id=1, id=core_id, path=f"/dev/sd{core_id}", dirty=0,
+                               stats=stats(*values)) for core_id, *values in cores],
+    )
+
+
+def test_stats_monitor_01():
+    """
+    Check if rates are computed between dumps, reused rows are updated in
+    place and devices which are gone are dropped
+    """
+    monitor = stats_monitor()
+    monitor.update(_dump([(1, 0, 0, 0, 0, 0, 0), (2, 0, 0, 0, 0, 0, 0)]), 0.0)
+    core_row = monitor.rows[(1, 1)]
+    values = core_row.values
+
+    assert all(value != value for value in values[:3])
+
+    monitor.update(_dump([(1, 100, 50, 60, 20, 10, 256), (2, 10, 0, 5, 5, 0, 0)], 500),
+                   2.0)
+
+    assert monitor.rows[(1, 1)] is core_row and core_row.values is values
+    assert values == [55.0, 25.0, 75.0, 0.0, 256 * 4096 / 2, 10 / 160 * 100]
+    assert monitor.rows[(1, None)].values[:4] == pytest.approx([60.0, 25.0, 65.0 / 90 * 100, 50.0])
+
+    order = monitor.get_order("rd_iops")
+    assert [(row.cache_id, row.core_id) for row in order] == [(1, None), (1, 2), (1, 1)]
+    assert [row.core_id for row in monitor.get_order("rd_iops", reverse=True)] == [None, 1, 2]
+
+    monitor.update(_dump([(1, 100, 50, 60, 20, 10, 256)]), 3.0)
+    assert list(monitor.rows) == [(1, None), (1, 1)]
+    assert values[:2] == [0.0, 0.0]
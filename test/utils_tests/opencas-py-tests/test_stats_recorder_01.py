@@ -0,0 +1,64 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+import os
+import struct
+import pytest
+
+import opencas
+from stats_recorder import stats_recorder, stats_ring
+from helpers import get_stats_mock, get_record_mock, get_dump_mock
+
+
+def test_stats_ring_01(tmpdir):
+    """
+    Check if records wrap around and ring is recreated when layout changes
+    """
+    path = str(tmpdir.join("cache1.ring"))
+    ring = stats_ring(path, ["a", "b"], 3)
+    for i in range(5):
+        ring.append(100.0 + i, [i, 2 * i])
+    ring.close()
+
+    with open(path, "rb") as f:
+        data = f.read()
+    assert stats_ring.parse_header(data) == (["a", "b"], 3, 5)
+    record = struct.Struct("<d2Q")
+    slots = [record.unpack_from(data, stats_ring.data_offset + i * record.size)
+             for i in range(3)]
+    assert slots == [(103.0, 3, 6), (104.0, 4, 8), (102.0, 2, 4)]
+
+    # Reopened ring continues, one with other fields starts over
+    assert stats_ring(path, ["a", "b"], 3).head == 5
+    assert stats_ring(path, ["a", "b", "c"], 3).head == 0
+    with pytest.raises(ValueError):
+        stats_ring.parse_header(b"\0" * 4096)
+
+
+def test_stats_recorder_01(tmpdir):
+    """
+    Check if every cache, core and IO class gets its own ring and rings of
+    removed devices are closed
+    """
+    def stats(value):
+        return get_stats_mock(**dict.fromkeys(opencas.cas_netlink.stats_fields, value))
+
+    dump = get_dump_mock(
+        caches=[get_record_mock(id=1, stats=stats(1))],
+        cores=[get_record_mock(cache_id=1, id=2, stats=stats(2))],
+        ioclasses=[get_record_mock(cache_id=1, id=0, stats=stats(3))],
+    )
+    recorder = stats_recorder(str(tmpdir), 10)
+
+    recorder.record(dump, 1.0)
+    dump.cores = []
+    recorder.record(dump, 2.0)
+
+    assert sorted(os.listdir(str(tmpdir))) == [
+        "cache1-core2.ring", "cache1-ioclass0.ring", "cache1.ring"
+    ]
+    assert sorted(recorder.rings) == ["cache1", "cache1-ioclass0"]
+    assert recorder.rings["cache1"].head == 2
+    recorder.close()
@@ -0,0 +1,286 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+import json
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import opencas  # noqa: E402
+from helpers import (  # noqa: E402
+    find_repo_root,
+    get_dump_mock,
+    get_record_mock,
+    get_stats_mock,
+)
+
+# Functional test API is imported along with test-framework submodule, no DUT is needed
+functional_dir = os.path.join(find_repo_root(), "test", "functional")
+sys.path += [functional_dir, os.path.join(functional_dir, "test-framework")]
+# casadm goes first as in functional tests conftest, statistics and casadm import each other
+pytest.importorskip("api.cas.casadm")
+stats_snapshot = pytest.importorskip("api.cas.stats_snapshot")
+
+from api.cas.statistics import IoClassUsageStats, UsageStats  # noqa: E402
+from type_def.size import Size, Unit  # noqa: E402
+
+StatsSnapshot = stats_snapshot.StatsSnapshot
+NO_ID = stats_snapshot.NO_ID
+FIELDS = stats_snapshot.STATS_FIELDS
+
+
+def _json(rows, timestamp=100.0, fields=FIELDS):
+    """Output of capture dump script, rows given as (cache_id, core_id, io_class_id, counters)"""
+    return json.dumps({
+        "time": timestamp,
+        "fields": fields,
+        "rows": [
+            [cache_id, core_id, io_class_id] + [counters.get(field, 0) for field in fields]
+            for cache_id, core_id, io_class_id, counters in rows
+        ],
+    })
+
+
+def test_from_json_01():
+    """
+    Check if devices and counters are taken from dump script output
+    """
+    snapshot = StatsSnapshot.from_json(_json([
+        (1, NO_ID, NO_ID, {"req_total": 10}),
+        (1, 2, NO_ID, {"req_total": 7}),
+        (1, NO_ID, 0, {"req_total": 3}),
+    ], timestamp=12.5))
+
+    assert len(snapshot) == 3
+    assert snapshot.timestamp == 12.5
+    assert snapshot.elapsed is None
+    assert snapshot.column("req_total").tolist() == [10, 7, 3]
+    assert snapshot.caches().cache_ids.tolist() == [1]
+    assert snapshot.cores(1).core_ids.tolist() == [2]
+    assert snapshot.cores(2).core_ids.tolist() == []
+    assert snapshot.io_classes().io_class_ids.tolist() == [0]
+    assert snapshot.find(1, core_id=2) == 1
+    assert snapshot.find(1, io_class_id=0) == 2
+    assert snapshot.find(2) is None
+
+
+def test_from_json_02():
+    """
+    Check if snapshot of dump without devices is empty
+    """
+    snapshot = StatsSnapshot.from_json(_json([]))
+
+    assert len(snapshot) == 0
+    assert snapshot.values.shape == (0, len(FIELDS))
+
+
+def test_from_dump_01():
+    """
+    Check if caches, cores and IO classes of netlink dump become rows
+    """
+    dump = get_dump_mock(
+        caches=[get_record_mock(get_stats_mock(req_total=10, usage_dirty=4), id=1)],
+        cores=[get_record_mock(get_stats_mock(req_total=6), id=3, cache_id=1)],
+        ioclasses=[get_record_mock(get_stats_mock(errors_total=2), id=5, cache_id=1)],
+    )
+
+    snapshot = StatsSnapshot.from_dump(dump, timestamp=1.0)
+
+    assert snapshot.fields == FIELDS
+    assert snapshot.cache_ids.tolist() == [1, 1, 1]
+    assert snapshot.core_ids.tolist() == [NO_ID, 3, NO_ID]
+    assert snapshot.io_class_ids.tolist() == [NO_ID, NO_ID, 5]
+    assert snapshot.column("req_total").tolist() == [10, 6, 0]
+    assert snapshot.column("usage_dirty").tolist() == [4, 0, 0]
+    assert snapshot.column("errors_total").tolist() == [0, 0, 2]
+    assert snapshot.timestamp == 1.0
+
+
+def test_fields_01():
+    """
+    Check if fields match statistics dumped by libopencas on DUT
+    """
+    assert FIELDS == opencas.cas_netlink.stats_fields
+
+
+def test_keys_01():
+    """
+    Check if row keys are unique for any ids and sort by cache, core and IO class
+    """
+    devices = [
+        (1, NO_ID, NO_ID),
+        (1, NO_ID, 0),
+        (1, NO_ID, 32),
+        (1, 0, NO_ID),
+        (1, 1, NO_ID),
+        (1, 4095, NO_ID),
+        (2, NO_ID, NO_ID),
+        (2, 0, NO_ID),
+        (16384, NO_ID, NO_ID),
+        (16384, 4095, NO_ID),
+    ]
+    snapshot = StatsSnapshot(*zip(*devices), np.zeros((len(devices), len(FIELDS))))
+
+    keys = snapshot._keys()
+
+    assert len(np.unique(keys)) == len(devices)
+    assert keys.tolist() == sorted(keys.tolist())
+
+
+def test_sub_01():
+    """
+    Check if devices are matched by ids regardless of row order and only
+    devices present in both snapshots are kept, sorted by device key
+    """
+    older = StatsSnapshot.from_json(_json([
+        (2, NO_ID, NO_ID, {"req_total": 100}),
+        (1, 1, NO_ID, {"req_total": 10}),
+        (1, NO_ID, NO_ID, {"req_total": 20}),
+        (1, NO_ID, 0, {"req_total": 5}),
+    ], timestamp=10.0))
+    newer = StatsSnapshot.from_json(_json([
+        (1, NO_ID, 0, {"req_total": 8}),
+        (1, NO_ID, NO_ID, {"req_total": 35}),
+        (1, 1, NO_ID, {"req_total": 14}),
+        (3, NO_ID, NO_ID, {"req_total": 50}),
+    ], timestamp=12.0))
+
+    delta = newer - older
+
+    assert list(zip(delta.cache_ids.tolist(), delta.core_ids.tolist(),
+                    delta.io_class_ids.tolist())) == [
+        (1, NO_ID, NO_ID),
+        (1, NO_ID, 0),
+        (1, 1, NO_ID),
+    ]
+    assert delta.column("req_total").tolist() == [15, 3, 4]
+    assert delta.elapsed == 2.0
+    assert delta.rates()[:, FIELDS.index("req_total")].tolist() == [7.5, 1.5, 2.0]
+    assert delta.find(1, core_id=1) == 2
+
+
+def test_sub_02():
+    """
+    Check if reset counters count from zero and gauges keep newer values
+    """
+    older = StatsSnapshot.from_json(_json([
+        (1, NO_ID, NO_ID, {"req_total": 20, "req_rd_hits": 5,
+                           "usage_occupancy": 100, "usage_dirty": 30}),
+    ]))
+    newer = StatsSnapshot.from_json(_json([
+        (1, NO_ID, NO_ID, {"req_total": 4, "req_rd_hits": 9,
+                           "usage_occupancy": 120, "usage_dirty": 10}),
+    ]))
+
+    delta = newer - older
+
+    assert delta.column("req_total").tolist() == [4]
+    assert delta.column("req_rd_hits").tolist() == [4]
+    assert delta.column("usage_occupancy").tolist() == [120]
+    assert delta.column("usage_dirty").tolist() == [10]
+
+
+def test_sub_03():
+    """
+    Check if snapshots of different statistics fields can't be subtracted
+    and rates need elapsed time
+    """
+    snapshot = StatsSnapshot.from_json(_json([(1, NO_ID, NO_ID, {})]))
+    other = StatsSnapshot.from_json(_json([(1, NO_ID, NO_ID, {})], fields=FIELDS[:-1]))
+
+    with pytest.raises(ValueError):
+        snapshot - other
+    with pytest.raises(ValueError):
+        snapshot.rates()
+    with pytest.raises(ValueError):
+        (snapshot - snapshot).rates()
+
+
+def test_per_cache_01():
+    """
+    Check if rows are summed per cache
+    """
+    snapshot = StatsSnapshot.from_json(_json([
+        (2, 1, NO_ID, {"req_total": 1, "errors_total": 1}),
+        (1, 1, NO_ID, {"req_total": 10}),
+        (1, 2, NO_ID, {"req_total": 20}),
+        (1, NO_ID, NO_ID, {"req_total": 1000}),
+        (2, 2, NO_ID, {"req_total": 2}),
+    ]))
+
+    per_cache = snapshot.cores().per_cache()
+
+    assert per_cache.cache_ids.tolist() == [1, 2]
+    assert per_cache.core_ids.tolist() == [NO_ID, NO_ID]
+    assert per_cache.io_class_ids.tolist() == [NO_ID, NO_ID]
+    assert per_cache.column("req_total").tolist() == [30, 3]
+    assert per_cache.column("errors_total").tolist() == [0, 1]
+
+
+def test_ratios_01():
+    """
+    Check if ratios are NaN for devices without requests
+    """
+    snapshot = StatsSnapshot.from_json(_json([
+        (1, NO_ID, NO_ID, {"req_rd_hits": 3, "req_wr_hits": 1, "req_rd_full_misses": 2,
+                           "req_wr_partial_misses": 2, "req_rd_pt": 2, "req_total": 10}),
+        (2, NO_ID, NO_ID, {}),
+        (3, NO_ID, NO_ID, {"req_wr_pt": 5, "req_total": 5}),
+    ]))
+
+    hit_ratio = snapshot.hit_ratio()
+    pass_through_ratio = snapshot.pass_through_ratio()
+
+    assert hit_ratio[0] == 0.5
+    assert np.isnan(hit_ratio[1])
+    assert np.isnan(hit_ratio[2])
+    assert pass_through_ratio[0] == 0.2
+    assert np.isnan(pass_through_ratio[1])
+    assert pass_through_ratio[2] == 1.0
+
+
+def test_get_stats_01():
+    """
+    Check if row is converted to statistics of casadm sections
+    """
+    counters = {field: index + 1 for index, field in enumerate(FIELDS)}
+    snapshot = StatsSnapshot.from_json(_json([(1, NO_ID, NO_ID, counters)]))
+
+    requests = snapshot.get_request_stats(0)
+    blocks = snapshot.get_block_stats(0)
+    errors = snapshot.get_error_stats(0)
+    usage = snapshot.get_usage_stats(0)
+
+    assert requests.read.hits == counters["req_rd_hits"]
+    assert requests.write.full_misses == counters["req_wr_full_misses"]
+    assert requests.pass_through_writes == counters["req_wr_pt"]
+    assert requests.requests_total == counters["req_total"]
+    assert requests.requests_user == (
+        counters["req_total"] - counters["req_prefetch_readahead"] - counters["req_cleaner"]
+    )
+    assert blocks.exp_obj.writes == Size(counters["blocks_volume_wr"], Unit.Blocks4096)
+    assert blocks.cleaner_core_writes == Size(counters["blocks_cleaner_core_wr"],
+                                              Unit.Blocks4096)
+    assert errors.cache.reads == counters["errors_cache_rd"]
+    assert errors.core.total == counters["errors_core_total"]
+    assert errors.total_errors == counters["errors_total"]
+    assert isinstance(usage, UsageStats)
+    assert usage.free == Size(counters["usage_free"], Unit.Blocks4096)
+    assert usage.dirty == Size(counters["usage_dirty"], Unit.Blocks4096)
+
+
+def test_get_stats_02():
+    """
+    Check if usage of IO class is converted without free space
+    """
+    snapshot = StatsSnapshot.from_json(_json([(1, NO_ID, 3, {"usage_occupancy": 8})]))
+
+    usage = snapshot.get_usage_stats(0)
+
+    assert isinstance(usage, IoClassUsageStats)
+    assert usage.occupancy == Size(8, Unit.Blocks4096)
@@ -0,0 +1,90 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+import threading
+import pytest
+from unittest.mock import patch, Mock
+
+import opencas
+from helpers import get_caches_list_entry
+
+
+@patch("opencas.casadm.stop_cache")
+@patch("opencas.casadm.remove_core")
+@patch("opencas.get_caches_list")
+def test_stop_stacked_01(mock_list, mock_remove, mock_stop):
+    """
+    Check if devices are listed once and torn down starting from the top of the stack
+    """
+    mock_list.return_value = [
+        get_caches_list_entry("cache", 1, "/dev/nvme0n1"),
+        get_caches_list_entry("core", 1, "/dev/sdb", "Active"),
+        get_caches_list_entry("core", 2, "/dev/sdc", "Inactive"),
+        get_caches_list_entry("cache", 2, "/dev/nvme1n1"),
+        get_caches_list_entry("core", 1, "/dev/cas1-1", "Active"),
+        get_caches_list_entry("cache", 3, "/dev/cas2-1"),
+        get_caches_list_entry("core", 1, "/dev/sdd", "Active"),
+    ]
+    order = []
+    mock_remove.side_effect = lambda cache_id, core_id, **kwargs: order.append(
+        ("core", cache_id, core_id))
+    mock_stop.side_effect = lambda cache_id, **kwargs: order.append(("cache", cache_id))
+
+    opencas.stop(flush=True)
+
+    mock_list.assert_called_once()
+    mock_remove.assert_any_call(1, 1, detach=True, force=False)
+    mock_stop.assert_any_call(1, no_flush=True)
+    assert len(order) == 6
+    assert ("core", 1, 2) not in order
+    assert order.index(("core", 3, 1)) < order.index(("cache", 3))
+    assert order.index(("cache", 3)) < order.index(("core", 2, 1))
+    assert order.index(("core", 2, 1)) < order.index(("core", 1, 1))
+    assert order.index(("core", 1, 1)) < order.index(("cache", 1))
+
+
+@patch("opencas.casadm.stop_cache")
+@patch("opencas.casadm.remove_core")
+@patch("opencas.get_caches_list")
+def test_stop_concurrent_01(mock_list, mock_remove, mock_stop):
+    """
+    Check if cores of independent caches are detached concurrently
+    """
+    mock_list.return_value = [
+        get_caches_list_entry("cache", 1, "/dev/nvme0n1"),
+        get_caches_list_entry("core", 1, "/dev/sdb", "Active"),
+        get_caches_list_entry("cache", 2, "/dev/nvme1n1"),
+        get_caches_list_entry("core", 1, "/dev/sdc", "Active"),
+    ]
+    barrier = threading.Barrier(2, timeout=5)
+    mock_remove.side_effect = lambda *args, **kwargs: barrier.wait()
+
+    opencas.stop(flush=False, workers=2)
+
+    mock_remove.assert_any_call(2, 1, detach=True, force=True)
+    assert mock_stop.call_count == 2
+
+
+@patch("opencas.casadm.stop_cache")
+@patch("opencas.casadm.remove_core")
+@patch("opencas.get_caches_list")
+def test_stop_error_01(mock_list, mock_remove, mock_stop):
+    """
+    Check if failure to detach a core doesn't prevent tearing down other devices
+    """
+    mock_list.return_value = [
+        get_caches_list_entry("cache", 1, "/dev/nvme0n1"),
+        get_caches_list_entry("core", 1, "/dev/sdb", "Active"),
+        get_caches_list_entry("cache", 2, "/dev/nvme1n1"),
+        get_caches_list_entry("core", 1, "/dev/sdc", "Active"),
+    ]
+    result = Mock(stderr="Device busy")
+    mock_remove.side_effect = [None, opencas.casadm.CasadmError(result)]
+
+    with pytest.raises(opencas.CompoundException) as e:
+        opencas.stop(flush=False, workers=1)
+
+    assert "Unable to detach core 1 (/dev/sdc) from cache 2. Reason:\nDevice busy" in str(e.value)
+    assert mock_stop.call_count == 2
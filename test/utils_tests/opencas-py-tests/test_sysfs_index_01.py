@@ -0,0 +1,101 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+from unittest.mock import patch
+
+import opencas
+
+
+def test_sysfs_index_01(tmpdir):
+    """
+    Check if devices, partitions and by-id links are mapped to sysfs directories
+    """
+    devices = tmpdir.mkdir("devices")
+    sda = devices.mkdir("sda")
+    sda.mkdir("holders")
+    sda1 = sda.mkdir("sda1")
+    sda1.join("partition").write("1")
+    sda1.mkdir("holders").join("dm-0").write("")
+    devices.mkdir("dm-0").mkdir("holders")
+
+    class_block = tmpdir.mkdir("class_block")
+    class_block.join("sda").mksymlinkto("../devices/sda")
+    class_block.join("sda1").mksymlinkto("../devices/sda/sda1")
+    class_block.join("dm-0").mksymlinkto("../devices/dm-0")
+
+    by_id = tmpdir.mkdir("by-id")
+    by_id.join("wwn-0x1234").mksymlinkto("/dev/sda")
+    by_id.join("wwn-0x1234-part1").mksymlinkto("/dev/sda1")
+
+    with patch.object(opencas.sysfs_index, "sys_class_block", str(class_block)), \
+            patch.object(opencas.sysfs_index, "by_id_dir", str(by_id)):
+        index = opencas.sysfs_index()
+
+    part_link = str(by_id.join("wwn-0x1234-part1"))
+    assert index.get_sysfs_path("/dev/sda1") == str(sda1)
+    assert index.get_disk_sysfs_path("/dev/sda1") == "/sys/block/sda"
+    assert index.get_disk_sysfs_path(part_link) == "/sys/block/sda"
+    assert index.get_disk_sysfs_path("sda") == "/sys/block/sda"
+    assert index.get_holders(part_link) == ["dm-0"]
+    assert index.lookup("/dev/sda1").is_partition()
+    assert not index.lookup("/dev/sda").is_partition()
+    assert index.lookup("/dev/sda").by_id_links == [str(by_id.join("wwn-0x1234"))]
+    assert index.lookup("/dev/sdb") is None
+
+    with patch("os.path.realpath", return_value="/dev/dm-0"):
+        assert index.lookup("/dev/mapper/vg-lv") is None
+        assert index.lookup("/dev/mapper/vg-lv", resolve=True).name == "dm-0"
+
+
+def test_sysfs_index_shared_01():
+    """
+    Check if shared index is built once and rebuilt after block device events
+    """
+    with patch.object(opencas.sysfs_index, "_shared", None), \
+            patch.object(opencas.sysfs_index, "__init__", return_value=None) as mock_init:
+        first = opencas.sysfs_index.get_shared()
+        assert opencas.sysfs_index.get_shared() is first
+        opencas.sysfs_index.invalidate_on([])
+        assert opencas.sysfs_index.get_shared() is first
+        opencas.sysfs_index.invalidate_on([{"ACTION": "add", "SUBSYSTEM": "block"}])
+        assert opencas.sysfs_index.get_shared() is not first
+        assert mock_init.call_count == 2
+
+
+def test_sysfs_index_lookup_current_01(tmpdir):
+    """
+    Check if shared index is rebuilt when device is missing from it or its entry is stale
+    """
+    devices = tmpdir.mkdir("devices")
+    devices.mkdir("sda")
+    class_block = tmpdir.mkdir("class_block")
+    class_block.join("sda").mksymlinkto("../devices/sda")
+    by_id = tmpdir.mkdir("by-id")
+    by_id.join("wwn-0x1234").mksymlinkto("/dev/sda")
+    link = str(by_id.join("wwn-0x1234"))
+
+    with patch.object(opencas.sysfs_index, "_shared", None), \
+            patch.object(opencas.sysfs_index, "sys_class_block", str(class_block)), \
+            patch.object(opencas.sysfs_index, "by_id_dir", str(by_id)):
+        shared = opencas.sysfs_index.get_shared()
+        assert opencas.sysfs_index.lookup_current(link).name == "sda"
+        assert opencas.sysfs_index.get_shared() is shared
+
+        # Device appeared after index was built
+        devices.mkdir("sdb")
+        class_block.join("sdb").mksymlinkto("../devices/sdb")
+        assert opencas.sysfs_index.lookup_current("/dev/sdb").name == "sdb"
+        shared = opencas.sysfs_index.get_shared()
+
+        # by-id link moved to other device
+        by_id.join("wwn-0x1234").remove()
+        by_id.join("wwn-0x1234").mksymlinkto("/dev/sdb")
+        assert opencas.sysfs_index.lookup_current(link).name == "sdb"
+        assert opencas.sysfs_index.get_shared() is not shared
+
+        # Device is gone
+        class_block.join("sda").remove()
+        devices.join("sda").remove()
+        assert opencas.sysfs_index.lookup_current("/dev/sda") is None
@@ -0,0 +1,62 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+import json
+from unittest.mock import patch
+
+import opencas
+
+
+def _span(name, category, duration, **args):
+    return {"name": name, "cat": category, "ph": "X", "ts": 0,
+            "dur": int(duration * 1000000), "pid": 1, "tid": 1, "args": args}
+
+
+def test_tracer_summary_01():
+    """
+    Check if summary sums up phases, settle time, casadm modes and slowest devices
+    """
+    events = [
+        _span("parse config", "config", 0.01, path="/etc/opencas/opencas.conf"),
+        _span("udevadm settle", "settle", 2),
+        _span("poll", "sleep", 5, seconds=5),
+        _span("--load", "casadm", 0.5, device="/dev/nvme0n1", batch=False),
+        _span("--add-core", "casadm", 0.25, device="/dev/sdb", cache_id="1", batch=True),
+        _span("--add-core", "casadm", 0.75, device="/dev/sdb", cache_id="1", batch=True),
+        _span("--remove-core", "casadm", 0.125, cache_id="2", core_id="1", batch=True),
+    ]
+
+    summary = opencas.tracer.summary(events, limit=2)
+
+    assert "Time blocked in settle and polling: 7.000 s" in summary
+    assert "casadm in separate processes: 1 calls, 500.0 ms per call" in summary
+    assert "casadm in batch co-process: 3 calls, 375.0 ms per call" in summary
+    casadm_line = next(line for line in summary if line.startswith("casadm "))
+    assert casadm_line.split() == ["casadm", "4", "1.625", "0.750"]
+    slowest = summary[summary.index("Slowest devices (time in casadm):") + 1:]
+    assert [line.split()[0] for line in slowest] == ["/dev/sdb", "/dev/nvme0n1"]
+
+
+@patch.object(opencas.tracer, "path", None)
+@patch.object(opencas.tracer, "_events", [])
+@patch.object(opencas.tracer, "enabled", True)
+def test_tracer_save_01(tmpdir):
+    """
+    Check if spans are saved in Chrome trace event format
+    """
+    with patch("time.sleep") as mock_sleep:
+        opencas.tracer.sleep(5)
+    mock_sleep.assert_called_once_with(5)
+
+    with patch.object(opencas.tracer, "log_dir", str(tmpdir)):
+        path = opencas.tracer.save()
+
+    assert path.startswith(str(tmpdir))
+    with open(path) as f:
+        trace = json.load(f)
+    assert [(event["name"], event["cat"]) for event in trace["traceEvents"]] == [
+        ("poll", "sleep")
+    ]
+    assert trace["traceEvents"][0]["args"] == {"seconds": 5}
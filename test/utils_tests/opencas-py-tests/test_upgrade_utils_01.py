@@ -0,0 +1,157 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+import json
+import pytest
+from unittest.mock import Mock, patch
+
+import upgrade_utils
+from upgrade_utils import StateMachine, UpgradeState, Success, Failure
+
+
+def _machine(work, dirty):
+    """Three state machine with work mocks, the second state depends on dirty"""
+
+    class Prepare(UpgradeState):
+        log = "Prepare"
+        checkpoint = True
+
+        def do_work(self):
+            return work["prepare"]()
+
+    class Flush(UpgradeState):
+        log = "Flush"
+        checkpoint = True
+
+        def do_work(self):
+            return work["flush"]()
+
+        def preconditions(self):
+            return {"dirty": dirty()}
+
+    class Install(UpgradeState):
+        log = "Install"
+
+        def do_work(self):
+            return work["install"]()
+
+    class Machine(StateMachine):
+        transition_map = {
+            Prepare: {Success: Flush},
+            Flush: {Success: Install},
+            Install: {Success: None},
+            "default": None,
+        }
+
+    return Machine, Prepare
+
+
+@pytest.fixture
+def work():
+    return {name: Mock(return_value=Success()) for name in ["prepare", "flush", "install"]}
+
+
+def test_journal_resume_01(tmpdir, work):
+    """
+    Check if re-run skips completed checkpoint states and journal is removed on success
+    """
+    journal = str(tmpdir.join("journal"))
+    Machine, Prepare = _machine(work, lambda: 0)
+    work["install"].return_value = Failure("module insertion failed")
+
+    result = Machine(Prepare, journal_file=journal, version="22.12").run()
+
+    assert isinstance(result, Failure)
+    with open(journal) as f:
+        assert list(json.load(f)["states"]) == ["Prepare", "Flush"]
+
+    work["install"].return_value = Success()
+    result = Machine(Prepare, journal_file=journal, version="22.12").run()
+
+    assert isinstance(result, Success)
+    assert work["prepare"].call_count == 1
+    assert work["flush"].call_count == 1
+    assert work["install"].call_count == 2
+    assert not tmpdir.join("journal").exists()
+
+
+def test_journal_resume_02(tmpdir, work):
+    """
+    Check if state is rerun when its preconditions changed or parameters differ
+    """
+    journal = str(tmpdir.join("journal"))
+    dirty = Mock(return_value=0)
+    Machine, Prepare = _machine(work, dirty)
+    work["install"].return_value = Failure()
+
+    Machine(Prepare, journal_file=journal, version="22.12").run()
+
+    dirty.return_value = 1024
+    Machine(Prepare, journal_file=journal, version="22.12").run()
+    assert work["prepare"].call_count == 1
+    assert work["flush"].call_count == 2
+
+    Machine(Prepare, journal_file=journal, version="24.09").run()
+    assert work["prepare"].call_count == 2
+    assert work["flush"].call_count == 3
+
+
+def test_journal_resume_03(tmpdir, work):
+    """
+    Check if result of a state is dropped from journal when its rerun fails
+    """
+    journal = str(tmpdir.join("journal"))
+    dirty = Mock(return_value=0)
+    Machine, Prepare = _machine(work, dirty)
+    work["install"].return_value = Failure()
+
+    Machine(Prepare, journal_file=journal).run()
+
+    dirty.return_value = 1024
+    work["flush"].side_effect = Exception("flush failed")
+    result = Machine(Prepare, journal_file=journal).run()
+
+    assert isinstance(result, upgrade_utils.Except)
+    with open(journal) as f:
+        assert list(json.load(f)["states"]) == ["Prepare"]
+
+
+def test_no_journal_01(work):
+    """
+    Check if machine without journal runs all states every time
+    """
+    Machine, Prepare = _machine(work, lambda: 0)
+
+    for _ in range(2):
+        assert isinstance(Machine(Prepare).run(), Success)
+
+    assert all(mock.call_count == 2 for mock in work.values())
+
+
+def test_sysfs_index_invalidate_01(work):
+    """
+    Check if shared sysfs index is rebuilt after every state, also a failed one
+    """
+    Machine, Prepare = _machine(work, lambda: 0)
+    work["flush"].side_effect = Exception("flush failed")
+
+    with patch.object(upgrade_utils.opencas.sysfs_index, "invalidate") as mock_invalidate:
+        Machine(Prepare).run()
+
+    assert mock_invalidate.call_count == 2
+
+
+def test_get_device_sysfs_path_01():
+    """
+    Check if device sysfs path is looked up with rebuild of stale index
+    """
+    device = upgrade_utils.opencas.sysfs_index.device("sda1", "/sys/devices/sda/sda1", "sda", [])
+
+    with patch.object(upgrade_utils.opencas.sysfs_index, "lookup_current",
+                      side_effect=[device, None]) as mock_lookup:
+        assert upgrade_utils.get_device_sysfs_path("/dev/sda1") == "/sys/block/sda"
+        assert upgrade_utils.get_device_sysfs_path("/dev/sdb") == ""
+
+    mock_lookup.assert_called_with("/dev/sdb")
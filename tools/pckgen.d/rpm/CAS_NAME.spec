@@ -94,6 +94,7 @@ systemctl -q enable open-cas
 if [ $1 -eq 0 ]; then
     systemctl -q disable open-cas-shutdown
     systemctl -q disable open-cas
+    systemctl -q disable open-cas-loader
 
     rm -rf /usr/lib/opencas/{__pycache__,*.py[co]} &>/dev/null
 fi
@@ -158,20 +159,40 @@ fi
 /etc/dracut.conf.d/opencas.conf
 /var/lib/opencas/cas_version
 /usr/lib/opencas/casctl
+/usr/lib/opencas/casstat
+/usr/lib/opencas/libopencas.so
 /usr/lib/opencas/open-cas-loader.py
+/usr/lib/opencas/open-cas-loaderd
+/usr/lib/opencas/open-cas-cleaning-tuner
+/usr/lib/opencas/open-cas-stats-recorder
 /usr/lib/opencas/opencas.py
+/usr/lib/opencas/cache_sim.py
+/usr/lib/opencas/ioclass_rules.py
+/usr/lib/opencas/stats_history.py
+/usr/lib/opencas/cache_warmup.py
+/usr/lib/opencas/ioclass_advisor.py
+/usr/lib/opencas/cleaning_tuner.py
+/usr/lib/opencas/stats_recorder.py
+/usr/lib/opencas/stats_monitor.py
+/usr/lib/opencas/upgrade_utils.py
+/usr/lib/opencas/inflight_upgrade.py
 /usr/lib/udev/rules.d/60-persistent-storage-cas-load.rules
 /usr/lib/udev/rules.d/60-persistent-storage-cas.rules
 /usr/sbin/casadm
 /usr/sbin/casctl
+/usr/sbin/casstat
 /usr/bin/opencas_exporter
 /usr/lib/systemd/system-shutdown/open-cas.shutdown
 /usr/lib/systemd/system/open-cas-shutdown.service
 /usr/lib/systemd/system/open-cas.service
+/usr/lib/systemd/system/open-cas-loader.service
+/usr/lib/systemd/system/open-cas-cleaning-tuner.service
+/usr/lib/systemd/system/open-cas-stats-recorder.service
 /usr/lib/systemd/system/opencas_exporter.service
 /usr/share/man/man5/opencas.conf.5.gz
 /usr/share/man/man8/casadm.8.gz
 /usr/share/man/man8/casctl.8.gz
+/usr/share/man/man8/casstat.8.gz
 %ghost /var/log/opencas.log
 %ghost /usr/lib/opencas/opencas.pyc
 %ghost /usr/lib/opencas/opencas.pyo
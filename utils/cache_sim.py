@@ -0,0 +1,407 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+"""
+Offline cache simulator - replays block IO traces through a model of Open CAS
+cache line mapping, LRU eviction, nhit promotion and sequential cutoff, to
+compare cache configurations before deploying them.
+
+Everything that doesn't depend on cache state (parsing, splitting requests
+into cache lines, sequential stream detection) is done on NumPy arrays, once
+per trace and line size. Only the eviction/promotion state machine walks the
+line accesses one by one.
+"""
+
+import collections
+import itertools
+
+import numpy as np
+
+import opencas
+
+SECTOR_SIZE = 512
+
+KiB = 1024
+MiB = 1024 * KiB
+
+
+# Traces
+
+
+class trace(object):
+    """Block IO requests as arrays, devices indexed in order of appearance"""
+
+    def __init__(self, devices, device, offset, length, write):
+        self.devices = devices
+        self.device = np.asarray(device, dtype=np.int64)
+        self.offset = np.asarray(offset, dtype=np.int64)
+        self.length = np.asarray(length, dtype=np.int64)
+        self.write = np.asarray(write, dtype=bool)
+
+    def __len__(self):
+        return len(self.offset)
+
+    @classmethod
+    def from_requests(cls, requests):
+        """requests - iterable of (device, offset, length, write)"""
+        devices = collections.OrderedDict()
+        columns = ([], [], [], [])
+        for device, offset, length, write in requests:
+            if length <= 0:
+                continue
+            columns[0].append(devices.setdefault(device, len(devices)))
+            columns[1].append(offset)
+            columns[2].append(length)
+            columns[3].append(write)
+
+        return cls(list(devices), *columns)
+
+    @staticmethod
+    def parse_blkparse_line(line):
+        """
+        Request queued to device in blkparse output, either in default format
+        or formatted with "%D %a %d %S %n" (as used by casctl warmup record).
+        Returns (device, offset, length, write) or None for other lines.
+        """
+        fields = line.split()
+        if len(fields) >= 10 and fields[8] == '+':
+            devno, action, rwbs, sector, sectors = (
+                fields[0], fields[5], fields[6], fields[7], fields[9])
+        elif len(fields) == 5:
+            devno, action, rwbs, sector, sectors = fields
+        else:
+            return None
+
+        if action != 'Q' or 'D' in rwbs or not ('R' in rwbs or 'W' in rwbs):
+            return None
+
+        try:
+            return devno, int(sector) * SECTOR_SIZE, int(sectors) * SECTOR_SIZE, 'W' in rwbs
+        except ValueError:
+            return None
+
+    @staticmethod
+    def parse_iolog_line(line, version):
+        """Read or write in fio iolog version 2 or 3"""
+        fields = line.split()
+        if version == 3:
+            fields = fields[1:]
+        if len(fields) != 4 or fields[1] not in ['read', 'write']:
+            return None
+
+        filename, action, offset, length = fields
+        return filename, int(offset), int(length), action == 'write'
+
+    @classmethod
+    def from_blkparse(cls, lines):
+        return cls.from_requests(
+            request for request in map(cls.parse_blkparse_line, lines) if request
+        )
+
+    @classmethod
+    def from_iolog(cls, lines):
+        lines = iter(lines)
+        header = next(lines, '').split()
+        if header[:2] != ['fio', 'version'] or header[2:] not in [['2', 'iolog'], ['3', 'iolog']]:
+            raise ValueError('Unsupported fio iolog version')
+
+        version = int(header[2])
+        return cls.from_requests(
+            request for request in (cls.parse_iolog_line(line, version) for line in lines)
+            if request
+        )
+
+    @classmethod
+    def load(cls, path, trace_format=None):
+        """Load blkparse output or fio iolog, detected by header if no format is given"""
+        with open(path, 'r') as f:
+            if trace_format is None:
+                trace_format = 'fio' if f.readline().startswith('fio version') else 'blktrace'
+                f.seek(0)
+
+            if trace_format == 'fio':
+                return cls.from_iolog(f)
+            elif trace_format == 'blktrace':
+                return cls.from_blkparse(f)
+
+        raise ValueError(f'Unknown trace format {trace_format}')
+
+    def get_stream_bytes(self):
+        """
+        Bytes of sequential stream preceding each request. Request continues
+        a stream if it starts where earlier request of the same direction
+        ended on the same device; the latest such request is its predecessor.
+        """
+        count = len(self)
+        if count == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        index = np.arange(count)
+        stream = self.device * 2 + self.write
+
+        # Match request starts against earlier request ends: sort both by
+        # position, then by request index with start preceding end of the same
+        # request, and carry index of last end seen over each position group
+        stream_all = np.concatenate([stream, stream])
+        pos_all = np.concatenate([self.offset + self.length, self.offset])
+        index_all = np.concatenate([index, index])
+        is_end = np.concatenate([np.ones(count, dtype=bool), np.zeros(count, dtype=bool)])
+        order = np.lexsort((is_end, index_all, pos_all, stream_all))
+
+        stream_all, pos_all = stream_all[order], pos_all[order]
+        index_all, is_end = index_all[order], is_end[order]
+        group = np.cumsum(np.concatenate([
+            [0], (stream_all[1:] != stream_all[:-1]) | (pos_all[1:] != pos_all[:-1])
+        ]))
+        base = group * (count + 1)
+        last_end = np.maximum.accumulate(np.where(is_end, base + index_all, base - 1)) - base
+
+        predecessor = np.full(count, -1)
+        predecessor[index_all[~is_end]] = last_end[~is_end]
+
+        # Sum lengths along predecessor chains by pointer jumping
+        stream_bytes = np.where(predecessor >= 0, self.length[predecessor], 0)
+        while (predecessor >= 0).any():
+            stream_bytes = stream_bytes + np.where(
+                predecessor >= 0, stream_bytes[predecessor], 0)
+            predecessor = np.where(predecessor >= 0, predecessor[predecessor], -1)
+
+        return stream_bytes
+
+
+class line_accesses(object):
+    """
+    Trace requests split into cache line accesses. Lines of all devices get
+    dense ids, so that simulation state can be kept in flat arrays.
+    """
+
+    def __init__(self, requests, line_size):
+        self.line_size = line_size
+
+        first = requests.offset // line_size
+        last = (requests.offset + requests.length - 1) // line_size
+        counts = last - first + 1
+
+        self.bounds = np.concatenate([[0], np.cumsum(counts)])
+        request = np.repeat(np.arange(len(requests)), counts)
+        line = first[request] + np.arange(self.bounds[-1]) - self.bounds[request]
+
+        start = np.maximum(requests.offset[request], line * line_size)
+        end = np.minimum((requests.offset + requests.length)[request], (line + 1) * line_size)
+        self.bytes = end - start
+
+        key = requests.device[request] * (int(last.max(initial=0)) + 1) + line
+        keys, self.line = np.unique(key, return_inverse=True)
+        self.line_count = len(keys)
+
+        self.write = requests.write
+        self.stream_bytes = requests.get_stream_bytes()
+
+
+# Simulation
+
+
+class sim_config(object):
+    """Cache parameters under evaluation, sizes in bytes"""
+
+    def __init__(self, line_size, promotion_policy='always', nhit_threshold=3,
+                 nhit_trigger=80, seq_cutoff_policy='full', seq_cutoff_threshold=MiB):
+        self.line_size = line_size
+        self.promotion_policy = promotion_policy
+        self.nhit_threshold = nhit_threshold
+        self.nhit_trigger = nhit_trigger
+        self.seq_cutoff_policy = seq_cutoff_policy
+        self.seq_cutoff_threshold = seq_cutoff_threshold
+
+    def __str__(self):
+        ret = f'line {self.line_size // KiB}k, {self.promotion_policy}'
+        if self.promotion_policy == 'nhit':
+            ret += f' {self.nhit_threshold}@{self.nhit_trigger}%'
+        ret += f', seq-cutoff {self.seq_cutoff_policy}'
+        if self.seq_cutoff_policy != 'never':
+            ret += f' {self.seq_cutoff_threshold // KiB}k'
+
+        return ret
+
+    def get_config_params(self):
+        """Cache params for opencas.conf, checked the same way as config file"""
+        params = collections.OrderedDict([
+            ('cache_line_size', str(self.line_size // KiB)),
+            ('promotion_policy', self.promotion_policy),
+        ])
+
+        cache = opencas.cas_config.cache_config(1, '', 'wt', **params)
+        for name, value in params.items():
+            cache.validate_parameter(name, value)
+
+        return params
+
+    def get_set_params(self):
+        """Runtime params which opencas.conf doesn't cover, for casadm --set-param"""
+        params = collections.OrderedDict()
+        if self.promotion_policy == 'nhit':
+            params['promotion-nhit'] = {
+                'threshold': self.nhit_threshold,
+                'trigger': self.nhit_trigger,
+            }
+        params['seq-cutoff'] = {'policy': self.seq_cutoff_policy}
+        if self.seq_cutoff_policy != 'never':
+            params['seq-cutoff']['threshold'] = self.seq_cutoff_threshold // KiB
+
+        return params
+
+
+class sim_result(object):
+    def __init__(self, config, cache_mode, cache_size):
+        self.config = config
+        self.cache_mode = cache_mode
+        self.cache_size = cache_size
+        self.accesses = 0
+        self.hits = 0
+        self.bypassed = 0
+        self.insertions = 0
+        self.evictions = 0
+        self.cache_write_bytes = 0
+        self.core_read_bytes = 0
+        self.core_write_bytes = 0
+        self.dirty_bytes = 0
+
+    @property
+    def hit_ratio(self):
+        return self.hits / self.accesses if self.accesses else 0.0
+
+    @property
+    def core_io_bytes(self):
+        return self.core_read_bytes + self.core_write_bytes
+
+
+def simulate(accesses, config, cache_size, cache_mode='wt'):
+    """
+    Replay line accesses through cache of given size. Each access is a hit,
+    a miss or bypasses the cache due to sequential cutoff. Cache writes count
+    bytes written to cache device (insertions and write hits), core IO counts
+    reads of missed data, writes passed to core and evictions of dirty data.
+    Dirty data left in cache at the end of trace is reported separately.
+    """
+    if accesses.line_size != config.line_size:
+        raise ValueError('Line accesses were split with different line size')
+    if cache_mode not in ['wt', 'wb']:
+        raise ValueError(f'Cache mode {cache_mode} is not supported by simulator')
+
+    result = sim_result(config, cache_mode, cache_size)
+    capacity = cache_size // config.line_size
+    if capacity <= 0:
+        raise ValueError('Cache is smaller than single cache line')
+
+    nhit = config.promotion_policy == 'nhit'
+    trigger = capacity * config.nhit_trigger // 100
+    cutoff = np.zeros(len(accesses.write), dtype=bool)
+    if config.seq_cutoff_policy != 'never':
+        cutoff = accesses.stream_bytes >= config.seq_cutoff_threshold
+    cutoff_when_full = config.seq_cutoff_policy == 'full'
+
+    # Cached line -> dirty bytes, in LRU order
+    lru = collections.OrderedDict()
+    hit_counts = np.zeros(accesses.line_count, dtype=np.int64) if nhit else None
+
+    bounds = accesses.bounds.tolist()
+    lines = accesses.line.tolist()
+    sizes = accesses.bytes.tolist()
+    for request, (write, bypass) in enumerate(zip(accesses.write.tolist(), cutoff.tolist())):
+        bypass = bypass and (not cutoff_when_full or len(lru) >= capacity)
+        for line, size in zip(lines[bounds[request]:bounds[request + 1]],
+                              sizes[bounds[request]:bounds[request + 1]]):
+            result.accesses += 1
+
+            if bypass:
+                result.bypassed += 1
+                if write:
+                    # Pass-through write invalidates cached copy
+                    result.core_write_bytes += size
+                    result.dirty_bytes -= lru.pop(line, 0)
+                else:
+                    result.core_read_bytes += size
+                continue
+
+            if line in lru:
+                result.hits += 1
+                lru.move_to_end(line)
+                if write:
+                    result.cache_write_bytes += size
+                    if cache_mode == 'wb':
+                        dirty = min(lru[line] + size, config.line_size)
+                        result.dirty_bytes += dirty - lru[line]
+                        lru[line] = dirty
+                    else:
+                        result.core_write_bytes += size
+                continue
+
+            promote = True
+            if nhit and len(lru) >= trigger:
+                hit_counts[line] += 1
+                promote = hit_counts[line] >= config.nhit_threshold
+
+            if not write:
+                result.core_read_bytes += size
+            elif cache_mode == 'wt' or not promote:
+                result.core_write_bytes += size
+
+            if not promote:
+                continue
+
+            if len(lru) >= capacity:
+                _, dirty = lru.popitem(last=False)
+                result.evictions += 1
+                result.core_write_bytes += dirty
+                result.dirty_bytes -= dirty
+
+            dirty = size if write and cache_mode == 'wb' else 0
+            lru[line] = dirty
+            result.dirty_bytes += dirty
+            result.insertions += 1
+            result.cache_write_bytes += size
+            if nhit:
+                hit_counts[line] = 0
+
+    return result
+
+
+def get_config_grid(line_sizes=(4, 8, 16, 32, 64), nhit_thresholds=(2, 3, 5),
+                    nhit_trigger=80, seq_cutoff_thresholds=(1024,)):
+    """Configurations to evaluate, line sizes and thresholds in KiB"""
+    promotions = [('always', None)] + [('nhit', threshold) for threshold in nhit_thresholds]
+    cutoffs = [('never', None)] + [
+        (policy, threshold)
+        for policy in ['full', 'always'] for threshold in seq_cutoff_thresholds
+    ]
+
+    return [
+        sim_config(line_size * KiB, promotion, nhit_threshold or 3, nhit_trigger,
+                   cutoff, (cutoff_threshold or 1024) * KiB)
+        for line_size, (promotion, nhit_threshold), (cutoff, cutoff_threshold)
+        in itertools.product(line_sizes, promotions, cutoffs)
+    ]
+
+
+def run(requests, configs, cache_size, cache_mode='wt'):
+    """Simulate all configs, splitting trace into lines once per line size"""
+    results = []
+    for line_size, group in itertools.groupby(
+            sorted(configs, key=lambda config: config.line_size),
+            key=lambda config: config.line_size):
+        accesses = line_accesses(requests, line_size)
+        results += [simulate(accesses, config, cache_size, cache_mode) for config in group]
+
+    return results
+
+
+def recommend(results):
+    """
+    Best result: highest hit ratio (to 0.1%), then least core IO, then least
+    cache writes to spare cache device endurance
+    """
+    return max(results, key=lambda result: (
+        round(result.hit_ratio, 3), -result.core_io_bytes, -result.cache_write_bytes
+    ))
@@ -0,0 +1,312 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+"""
+Cache warm-up: records hot chunks of exported objects with blktrace into
+a profile and replays it by reading them back through exported objects,
+so that they are promoted into cache (casctl warmup).
+"""
+
+import collections
+import concurrent.futures
+import errno
+import json
+import mmap
+import os
+import subprocess
+import threading
+import time
+
+import opencas
+
+
+class warmup_profile(object):
+    """
+    Hot working set of cores, recorded as access counts of fixed size chunks
+    of exported objects. Saved as JSON, listing only chunks that were
+    accessed, so that it stays small regardless of core size.
+    """
+
+    default_location = '/var/lib/opencas/warmup.json'
+    version = 1
+    default_granularity = 1024 * 1024
+    sector_size = 512
+
+    def __init__(self, granularity=default_granularity):
+        self.granularity = granularity
+        # (cache_id, core_id) -> {'core_device': path, 'chunks': Counter}
+        self.cores = collections.OrderedDict()
+
+    def add_core(self, cache_id, core_id, core_device):
+        return self.cores.setdefault((cache_id, core_id), {
+            'core_device': core_device,
+            'chunks': collections.Counter(),
+        })
+
+    def add_access(self, cache_id, core_id, offset, length):
+        chunks = self.cores[(cache_id, core_id)]['chunks']
+        first = offset // self.granularity
+        last = (offset + max(length, 1) - 1) // self.granularity
+        for chunk in range(first, last + 1):
+            chunks[chunk] += 1
+
+    def get_ranges(self, cache_id, core_id, max_bytes=None):
+        """
+        Byte ranges (offset, length) of the hottest chunks of the core, up
+        to max_bytes in total, merged and sorted by offset so that they can
+        be read sequentially.
+        """
+        chunks = self.cores[(cache_id, core_id)]['chunks']
+        hottest = sorted(chunks, key=lambda chunk: (-chunks[chunk], chunk))
+        if max_bytes is not None:
+            hottest = hottest[:max_bytes // self.granularity]
+
+        ranges = []
+        for chunk in sorted(hottest):
+            offset = chunk * self.granularity
+            if ranges and ranges[-1][0] + ranges[-1][1] == offset:
+                ranges[-1][1] += self.granularity
+            else:
+                ranges.append([offset, self.granularity])
+
+        return [tuple(r) for r in ranges]
+
+    def save(self, path=default_location):
+        data = {
+            'version': self.version,
+            'created': int(time.time()),
+            'granularity': self.granularity,
+            'cores': [
+                {
+                    'cache_id': cache_id,
+                    'core_id': core_id,
+                    'core_device': core['core_device'],
+                    'chunks': sorted(core['chunks'].items()),
+                }
+                for (cache_id, core_id), core in self.cores.items()
+            ],
+        }
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=default_location):
+        with open(path, 'r') as f:
+            data = json.load(f)
+
+        if data.get('version') != cls.version:
+            raise ValueError(f'Unsupported warm-up profile version in {path}')
+
+        profile = cls(data['granularity'])
+        for core in data['cores']:
+            entry = profile.add_core(core['cache_id'], core['core_id'], core['core_device'])
+            entry['chunks'].update({chunk: count for chunk, count in core['chunks']})
+
+        return profile
+
+
+def get_active_cores():
+    """(cache_id, core_id) of active cores mapped to their core device paths"""
+    state = opencas.get_devices_state()
+    return collections.OrderedDict(
+        (key, core['device']) for key, core in state['cores'].items()
+        if core['status'] == 'Active'
+    )
+
+
+def _exp_obj_path(cache_id, core_id):
+    return f'/dev/cas{cache_id}-{core_id}'
+
+
+def parse_blkparse_line(line, devices):
+    """
+    Parse line of blkparse output formatted with "%D %a %d %S %n". devices
+    maps "major,minor" to keys of traced cores. Returns (key, offset,
+    length) for queued reads and writes, None for other events.
+    """
+    fields = line.split()
+    if len(fields) != 5 or fields[1] != 'Q':
+        return None
+
+    devno, _, rwbs, sector, sectors = fields
+    key = devices.get(devno)
+    if key is None or not ('R' in rwbs or 'W' in rwbs) or 'D' in rwbs or 'F' in rwbs:
+        return None
+
+    try:
+        offset = int(sector) * warmup_profile.sector_size
+        length = int(sectors) * warmup_profile.sector_size
+    except ValueError:
+        return None
+
+    return key, offset, length
+
+
+def record_warmup(duration, granularity=warmup_profile.default_granularity, cores=None):
+    """
+    Trace IO submitted to exported objects of active cores for duration
+    seconds with blktrace and return warmup_profile of accessed chunks.
+    """
+    if cores is None:
+        cores = get_active_cores()
+    if not cores:
+        raise Exception('No active cores to record')
+
+    profile = warmup_profile(granularity)
+    devices = dict()
+    for (cache_id, core_id), core_device in cores.items():
+        exp_obj = _exp_obj_path(cache_id, core_id)
+        rdev = os.stat(exp_obj).st_rdev
+        devices[f'{os.major(rdev)},{os.minor(rdev)}'] = (cache_id, core_id)
+        profile.add_core(cache_id, core_id, core_device)
+
+    blktrace_cmd = ['blktrace', '-a', 'queue', '-w', str(int(duration)), '-o', '-']
+    for cache_id, core_id in cores:
+        blktrace_cmd += ['-d', _exp_obj_path(cache_id, core_id)]
+
+    with opencas.tracer.span('record warm-up profile', 'warmup', seconds=duration):
+        blktrace = subprocess.Popen(blktrace_cmd, stdout=subprocess.PIPE,
+                                    stderr=subprocess.DEVNULL)
+        blkparse = subprocess.Popen(
+            ['blkparse', '-q', '-i', '-', '-f', '%D %a %d %S %n\\n'],
+            stdin=blktrace.stdout, stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, universal_newlines=True,
+        )
+        blktrace.stdout.close()
+
+        for line in blkparse.stdout:
+            access = parse_blkparse_line(line, devices)
+            if access is not None:
+                profile.add_access(*access)
+
+        blkparse.wait()
+        if blktrace.wait() != 0:
+            raise Exception('Unable to trace exported objects with blktrace')
+
+    return profile
+
+
+class rate_limiter(object):
+    """Token bucket limiting throughput of multiple threads to rate B/s"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst if burst is not None else rate
+        self.tokens = self.burst
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, amount):
+        if not self.rate:
+            return
+
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            self.tokens -= amount
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+
+        if wait:
+            time.sleep(wait)
+
+
+# Reads bypassing page cache are aligned to this size
+direct_io_alignment = 4096
+
+
+def _open_uncached(path):
+    """
+    Open path for reads which reach the device: with O_DIRECT, or if it's not
+    supported, buffered with readahead disabled. Returns (fd, direct).
+    """
+    flags = os.O_RDONLY | os.O_CLOEXEC
+    try:
+        return os.open(path, flags | os.O_DIRECT), True
+    except OSError as e:
+        if e.errno != errno.EINVAL:
+            raise
+
+    fd = os.open(path, flags)
+    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_RANDOM)
+    return fd, False
+
+
+def replay_warmup(profile, rate=None, workers=4, io_size=1024 * 1024, max_bytes=None,
+                  cores=None):
+    """
+    Promote hot chunks of profile into cache by reading them through exported
+    objects of active cores. Reads of io_size are issued by up to workers
+    threads in offset order, total throughput is limited to rate B/s. Reads
+    bypass page cache (O_DIRECT), so that every one of them reaches the
+    cache and no readahead is added. Cores whose device doesn't match the
+    one recorded in the profile are skipped.
+
+    Returns tuple of dict mapping (cache_id, core_id) to number of bytes read
+    and list of warnings.
+    """
+    if cores is None:
+        cores = get_active_cores()
+
+    align = direct_io_alignment
+    io_size = -(-io_size // align) * align
+    limiter = rate_limiter(rate)
+    warnings = []
+    requests = []
+    files = dict()
+    buffers = threading.local()
+    read_bytes = collections.Counter()
+    read_lock = threading.Lock()
+
+    for key, recorded in profile.cores.items():
+        core_device = cores.get(key)
+        if core_device is None:
+            warnings.append(f'Core {key[1]} of cache {key[0]} is not active, skipping')
+            continue
+        if os.path.realpath(core_device) != os.path.realpath(recorded['core_device']):
+            warnings.append(
+                f'Core {key[1]} of cache {key[0]} is {core_device}, profile was recorded '
+                f'for {recorded["core_device"]}, skipping'
+            )
+            continue
+
+        for offset, length in profile.get_ranges(*key, max_bytes=max_bytes):
+            end = -(-(offset + length) // align) * align
+            offset -= offset % align
+            for pos in range(offset, end, io_size):
+                requests.append((key, pos, min(io_size, end - pos)))
+
+    def read(key, offset, length):
+        limiter.acquire(length)
+        fd, direct = files[key]
+        if not direct:
+            os.posix_fadvise(fd, offset, length, os.POSIX_FADV_DONTNEED)
+
+        # Anonymous mapping is page aligned, as required by O_DIRECT
+        buf = getattr(buffers, 'buf', None)
+        if buf is None:
+            buf = buffers.buf = mmap.mmap(-1, io_size)
+
+        size = os.preadv(fd, [memoryview(buf)[:length]], offset)
+        with read_lock:
+            read_bytes[key] += size
+
+    try:
+        for key in set(key for key, _, _ in requests):
+            files[key] = _open_uncached(_exp_obj_path(*key))
+
+        with opencas.tracer.span('replay warm-up profile', 'warmup'):
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                for future in [executor.submit(read, *request) for request in requests]:
+                    future.result()
+    finally:
+        for fd, _ in files.values():
+            os.close(fd)
+
+    return dict(read_bytes), warnings
@@ -0,0 +1,332 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+"""
+Cleaning policy tuner run by open-cas-cleaning-tuner, adjusting ALRU/ACP
+cleaning parameters of running caches to dirty data pressure.
+"""
+
+import collections
+import json
+import os
+import syslog
+import time
+
+import opencas
+
+
+class cleaning_tuner:
+    """
+    Control loop adjusting ALRU/ACP cleaning parameters of running caches to
+    dirty data pressure. Each cache has a level between 0 (gentle end of
+    administrator's bounds of every parameter) and 1 (aggressive end), which
+    goes up by step when dirty occupancy crosses high watermark or is
+    projected to cross it within horizon, and down when it falls below low
+    watermark. Level goes down no sooner than hold seconds after last change,
+    so short lulls in a burst don't flip parameters back and forth.
+
+    Every change of parameters is appended to audit log as JSON line together
+    with measurements it was based on.
+    """
+
+    config_location = '/etc/opencas/cleaning-tuner.json'
+    audit_log_location = '/var/log/opencas/cleaning-tuner.log'
+    # Unit of block counters in statistics
+    block_size = 4096
+
+    # Parameter in netlink dump: (policy, casadm namespace, casadm parameter,
+    # accepted range, True if higher value cleans more aggressively)
+    params = collections.OrderedDict([
+        ('alru_wake_up', ('alru', 'cleaning-alru', 'wake-up', (0, 3600), False)),
+        ('alru_stale_time', ('alru', 'cleaning-alru', 'staleness-time', (1, 3600), False)),
+        ('alru_flush_max_buffers',
+            ('alru', 'cleaning-alru', 'flush-max-buffers', (1, 10000), True)),
+        ('alru_activity_threshold',
+            ('alru', 'cleaning-alru', 'activity-threshold', (0, 1000000), False)),
+        ('alru_dirty_ratio_threshold',
+            ('alru', 'cleaning-alru', 'dirty-ratio-threshold', (0, 100), False)),
+        ('acp_flush_max_buffers', ('acp', 'cleaning-acp', 'flush-max-buffers', (1, 10000), True)),
+    ])
+
+    default_config = {
+        'interval': 10,
+        'dirty_low': 20,
+        'dirty_high': 60,
+        'step': 0.25,
+        'hold': 60,
+        'horizon': 300,
+        'caches': None,
+        'bounds': {
+            'alru_wake_up': [1, 20],
+            'alru_stale_time': [10, 120],
+            'alru_flush_max_buffers': [100, 2000],
+            'alru_activity_threshold': [1000, 10000],
+            'alru_dirty_ratio_threshold': [50, 100],
+            'acp_flush_max_buffers': [128, 2000],
+        },
+    }
+
+    class cache_state:
+        def __init__(self, level, policy, sample):
+            self.level = level
+            self.policy = policy
+            self.sample = sample
+            self.last_change = sample[0]
+
+    def __init__(self, config=None, audit_log=audit_log_location):
+        self.config = self.check_config(config if config else dict())
+        self.audit_log = audit_log
+        self.caches = dict()
+
+    @classmethod
+    def check_config(cls, config):
+        """Config merged with defaults, ValueError lists all problems found"""
+        errors = []
+        result = dict(cls.default_config, **config)
+        result['bounds'] = dict(cls.default_config['bounds'], **config.get('bounds', {}))
+
+        for name in config:
+            if name not in cls.default_config:
+                errors.append(f'unknown option {name}')
+
+        for name in ['interval', 'step', 'hold', 'horizon']:
+            if not isinstance(result[name], (int, float)) or result[name] <= 0:
+                errors.append(f'{name} has to be a positive number')
+        if isinstance(result['step'], (int, float)) and result['step'] > 1:
+            errors.append('step has to be at most 1')
+
+        low, high = result['dirty_low'], result['dirty_high']
+        if not all(isinstance(value, (int, float)) for value in [low, high]) \
+                or not 0 <= low < high <= 100:
+            errors.append('dirty_low and dirty_high have to be percentages, low below high')
+
+        caches = result['caches']
+        if caches is not None and (not isinstance(caches, list)
+                                   or not all(isinstance(c, int) for c in caches)):
+            errors.append('caches has to be a list of cache ids')
+
+        for name, bounds in result['bounds'].items():
+            if name not in cls.params:
+                errors.append(f'unknown parameter {name}')
+                continue
+            lowest, highest = cls.params[name][3]
+            if not isinstance(bounds, list) or len(bounds) != 2 \
+                    or not all(isinstance(value, int) for value in bounds) \
+                    or not lowest <= bounds[0] <= bounds[1] <= highest:
+                errors.append(f'bounds of {name} have to be [min, max] within '
+                              f'<{lowest}-{highest}>')
+
+        if errors:
+            raise ValueError(f'Invalid cleaning tuner config: {", ".join(errors)}')
+
+        return result
+
+    @classmethod
+    def load_config(cls, path=config_location):
+        """Config from JSON file, defaults if it doesn't exist"""
+        try:
+            with open(path, 'r') as f:
+                config = json.load(f)
+        except FileNotFoundError:
+            return cls.check_config(dict())
+
+        if not isinstance(config, dict):
+            raise ValueError(f'Invalid cleaning tuner config: {path} is not a JSON object')
+
+        return cls.check_config(config)
+
+    def get_values(self, policy, level):
+        """Parameters of policy at given level, interpolated between bounds"""
+        values = collections.OrderedDict()
+        for name, (param_policy, _, _, _, aggressive_high) in self.params.items():
+            if param_policy != policy:
+                continue
+            low, high = self.config['bounds'][name]
+            gentle, aggressive = (low, high) if aggressive_high else (high, low)
+            values[name] = int(round(gentle + (aggressive - gentle) * level))
+
+        return values
+
+    def get_level(self, cache, policy):
+        """Level closest to current parameters of cache, rounded to step"""
+        positions = []
+        for name, value in self.get_values(policy, 1).items():
+            gentle = self.get_values(policy, 0)[name]
+            current = getattr(cache.cleaning, name)
+            if value == gentle:
+                continue
+            positions.append(min(max((current - gentle) / (value - gentle), 0), 1))
+
+        if not positions:
+            return 0.0
+
+        step = self.config['step']
+        level = sum(positions) / len(positions)
+        return min(round(level / step) * step, 1.0)
+
+    def in_bounds(self, cache, policy):
+        for name in self.get_values(policy, 0):
+            low, high = self.config['bounds'][name]
+            if not low <= getattr(cache.cleaning, name) <= high:
+                return False
+        return True
+
+    @classmethod
+    def get_sample(cls, cache, now):
+        return (now, cache.dirty, cache.stats.blocks_volume_wr,
+                cache.stats.blocks_cleaner_core_wr)
+
+    def measure(self, cache, previous, current):
+        """Dirty occupancy [%] and rates [B/s] between two samples"""
+        elapsed = current[0] - previous[0]
+        line_size = cache.line_size
+        size = cache.size * line_size
+
+        def rate(index, unit):
+            delta = current[index] - previous[index]
+            # Counters are reset when statistics are reset
+            return max(delta, 0) * unit / elapsed if elapsed > 0 else 0.0
+
+        return {
+            'dirty': 100 * current[1] * line_size / size if size else 0.0,
+            'dirty_rate': (current[1] - previous[1]) * line_size / elapsed if elapsed > 0 else 0.0,
+            'write_rate': rate(2, self.block_size),
+            'cleaner_rate': rate(3, self.block_size),
+            'size': size,
+        }
+
+    def decide(self, state, measurements, now):
+        """New level of cache and reason for change, (level, None) if unchanged"""
+        config = self.config
+        dirty = measurements['dirty']
+        level = state.level
+
+        if dirty >= config['dirty_high']:
+            reason = 'dirty above high watermark'
+            level += config['step']
+        elif dirty > config['dirty_low'] and measurements['dirty_rate'] > 0 \
+                and measurements['write_rate'] > measurements['cleaner_rate']:
+            left = (config['dirty_high'] - dirty) / 100 * measurements['size']
+            if left / measurements['dirty_rate'] > config['horizon']:
+                return state.level, None
+            reason = 'dirty projected to reach high watermark'
+            level += config['step']
+        elif dirty <= config['dirty_low'] and now - state.last_change >= config['hold']:
+            reason = 'dirty below low watermark'
+            level -= config['step']
+        else:
+            return state.level, None
+
+        level = min(max(level, 0.0), 1.0)
+        if level == state.level:
+            return state.level, None
+
+        return level, reason
+
+    def apply(self, cache, policy, level, reason, measurements):
+        old = {name: getattr(cache.cleaning, name) for name in self.get_values(policy, 0)}
+        new = self.get_values(policy, level)
+
+        params = collections.OrderedDict()
+        for name, value in new.items():
+            if value != old[name]:
+                _, namespace, param, _, _ = self.params[name]
+                params.setdefault(namespace, collections.OrderedDict())[param] = value
+        if params:
+            opencas.casadm.set_params(cache.id, params)
+
+        self.audit({
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'cache_id': cache.id,
+            'policy': policy,
+            'level': level,
+            'reason': reason,
+            'measurements': {name: round(value, 2) for name, value in measurements.items()
+                             if name != 'size'},
+            'old': old,
+            'new': dict(new),
+        })
+
+    def audit(self, entry):
+        if self.audit_log is None:
+            return
+
+        os.makedirs(os.path.dirname(self.audit_log), exist_ok=True)
+        with open(self.audit_log, 'a') as f:
+            f.write(json.dumps(entry, sort_keys=True) + '\n')
+
+    def tune(self, dump, now, log=lambda priority, message: None):
+        """
+        Run one iteration of the loop on netlink dump taken at now (monotonic
+        time). Returns ids of caches which parameters were changed.
+        """
+        changed = []
+        running = set()
+
+        for cache in dump.caches:
+            if self.config['caches'] is not None and cache.id not in self.config['caches']:
+                continue
+            if cache.state_name() != 'Running' or cache.is_device_detached():
+                continue
+            running.add(cache.id)
+
+            try:
+                if self.tune_cache(cache, now):
+                    changed.append(cache.id)
+            except opencas.casadm.CasadmError as e:
+                log(syslog.LOG_ERR, f'Unable to set cleaning parameters of cache {cache.id}. '
+                    f'Reason:\n{e.result.stderr}')
+            except Exception as e:
+                log(syslog.LOG_ERR, f'Unable to tune cleaning of cache {cache.id}. '
+                    f'Reason: {str(e)}')
+
+        for cache_id in set(self.caches) - running:
+            del self.caches[cache_id]
+
+        return changed
+
+    def tune_cache(self, cache, now):
+        sample = self.get_sample(cache, now)
+        state = self.caches.get(cache.id)
+
+        if state is None or state.policy[0] != cache.cleaning.policy:
+            policy = opencas.get_policy('cleaning', cache.id)
+            state = self.cache_state(None, (cache.cleaning.policy, policy), sample)
+            self.caches[cache.id] = state
+            if policy not in ['alru', 'acp']:
+                return False
+
+            state.level = self.get_level(cache, policy)
+            if not self.in_bounds(cache, policy):
+                self.apply(cache, policy, state.level, 'parameters out of bounds',
+                           self.measure(cache, sample, sample))
+                return True
+            return False
+
+        policy = state.policy[1]
+        if policy not in ['alru', 'acp']:
+            return False
+
+        measurements = self.measure(cache, state.sample, sample)
+        state.sample = sample
+        level, reason = self.decide(state, measurements, now)
+        if reason is None:
+            return False
+
+        self.apply(cache, policy, level, reason, measurements)
+        state.level = level
+        state.last_change = now
+        return True
+
+    def run(self, log=lambda priority, message: None):
+        while True:
+            try:
+                dump = opencas.cas_netlink.dump(records=['cache'])
+            except Exception as e:
+                log(syslog.LOG_ERR, f'Unable to read cache statistics. Reason: {str(e)}')
+            else:
+                self.tune(dump, time.monotonic(), log)
+
+            opencas.tracer.sleep(self.config['interval'], 'cleaning tuner interval')
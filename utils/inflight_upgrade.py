@@ -0,0 +1,173 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+"""
+In-flight upgrade: replaces running cas_cache module with the installed one
+(e.g. after new version of Open CAS was installed) while keeping caches
+(casctl upgrade). Caches are flushed and stopped, module is reloaded and
+caches are loaded back from their metadata. Progress is recorded in
+a journal, so that an interrupted upgrade is resumed by running it again.
+"""
+
+import json
+import os
+
+import opencas
+from upgrade_utils import (
+    Failure,
+    StateMachine,
+    Success,
+    UpgradeState,
+    insert_module,
+    remove_module,
+)
+
+journal_location = '/var/lib/opencas/upgrade-journal.json'
+config_location = '/var/lib/opencas/upgrade-caches.json'
+sys_module = '/sys/module'
+# cas_cache uses block devices of cas_bd, so it's removed first
+modules = ['cas_cache', 'cas_bd']
+
+
+def get_module_version():
+    """srcversion of loaded cas_cache module, None if it isn't loaded"""
+    try:
+        with open(os.path.join(sys_module, modules[0], 'srcversion'), 'r') as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def get_running_caches():
+    """Ids of running caches, empty list if cas_cache isn't loaded"""
+    if get_module_version() is None:
+        return []
+
+    return sorted(opencas.get_devices_state()["caches"])
+
+
+def load_saved_caches(config_file):
+    with open(config_file, "r") as f:
+        return json.load(f)
+
+
+class SaveCaches(UpgradeState):
+    log = "Saving configuration of running caches"
+    # Once caches are stopped they can't be listed again
+    checkpoint = True
+
+    def do_work(self):
+        version = get_module_version()
+        if version is None:
+            return Failure(f"{modules[0]} module is not loaded")
+
+        caches = opencas.get_devices_state()["caches"]
+        standby = [cache_id for cache_id, cache in caches.items()
+                   if cache["status"].lower().startswith("standby")]
+        if standby:
+            return Failure(f"caches in standby mode can't be upgraded: {standby}")
+
+        config_file = self.state_machine.params["config_file"]
+        os.makedirs(os.path.dirname(config_file), exist_ok=True)
+        with open(config_file, "w") as f:
+            json.dump({
+                "module_version": version,
+                "caches": [
+                    {"cache_id": cache_id, "device": cache["device"], "mode": cache["mode"]}
+                    for cache_id, cache in sorted(caches.items())
+                ],
+            }, f, indent=2)
+
+        return Success(f"{len(caches)} caches")
+
+    def preconditions(self):
+        return {"saved": os.path.exists(self.state_machine.params["config_file"])}
+
+
+class StopCaches(UpgradeState):
+    log = "Flushing and stopping caches"
+    checkpoint = True
+
+    def do_work(self):
+        opencas.stop(flush=True)
+
+        return Success()
+
+    def preconditions(self):
+        # Caches started on the old module since then have to be stopped
+        # again, those loaded on the new one by previous run don't
+        saved = load_saved_caches(self.state_machine.params["config_file"])
+        if get_module_version() != saved["module_version"]:
+            return {"running": []}
+
+        return {"running": get_running_caches()}
+
+
+class ReloadModule(UpgradeState):
+    log = f"Reloading {modules[0]} module"
+    checkpoint = True
+
+    def do_work(self):
+        # Co-processes of casadm batch mode keep the module in use
+        opencas.casadm.close_batch()
+
+        for name in modules:
+            if os.path.isdir(os.path.join(sys_module, name)):
+                remove_module(name)
+        insert_module(modules[0])
+        opencas.wait_for_cas_ctrl()
+
+        return Success()
+
+    def preconditions(self):
+        return {"module_version": get_module_version()}
+
+
+class LoadCaches(UpgradeState):
+    log = "Loading caches"
+
+    def do_work(self):
+        config_file = self.state_machine.params["config_file"]
+        caches = load_saved_caches(config_file)["caches"]
+
+        # Caches loaded before failure of previous run are kept
+        running = get_running_caches()
+        failed = []
+        for entry in caches:
+            if entry["cache_id"] in running:
+                continue
+            cache = opencas.cas_config.cache_config(
+                entry["cache_id"], entry["device"], entry["mode"]
+            )
+            try:
+                opencas.start_cache(cache, load=True)
+            except opencas.casadm.CasadmError as e:
+                failed.append(f"{cache.cache_id} ({e.result.stderr.strip()})")
+
+        if failed:
+            return Failure(f"unable to load caches {', '.join(failed)}")
+
+        os.unlink(config_file)
+
+        return Success(f"{len(caches)} caches")
+
+
+class InflightUpgrade(StateMachine):
+    transition_map = {
+        SaveCaches: {Success: StopCaches},
+        StopCaches: {Success: ReloadModule},
+        ReloadModule: {Success: LoadCaches},
+        LoadCaches: {Success: None},
+        "default": None,
+    }
+
+
+def upgrade(journal_file=None, config_file=None):
+    """Run or resume in-flight upgrade, returns result of the last failed or final state"""
+    journal_file = journal_file or journal_location
+    config_file = config_file or config_location
+    os.makedirs(os.path.dirname(journal_file), exist_ok=True)
+
+    return InflightUpgrade(SaveCaches, journal_file=journal_file, config_file=config_file).run()
@@ -0,0 +1,253 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+"""
+IO class allocation advisor: fits hit ratio of each IO class to its
+occupancy from sampled netlink dumps and proposes eviction priorities and
+allocations (casctl ioclass advise).
+"""
+
+import collections
+import csv
+import functools
+import math
+import time
+
+import opencas
+
+
+ioclass_backup_location = '/var/lib/opencas/ioclass-backup-{}.csv'
+ioclass_proposal_location = '/var/lib/opencas/ioclass-proposal-{}.csv'
+
+
+class ioclass_usage(object):
+    """
+    Requests and occupancy of IO class over sampling period. Hit ratio is
+    modelled as power function of occupancy, hit_ratio * (size / occupancy) **
+    alpha, with alpha fitted to samples if occupancy varied enough between
+    them, default_alpha (square root rule) otherwise.
+    """
+
+    default_alpha = 0.5
+    min_spread = 1.1
+
+    def __init__(self, ioclass):
+        self.id = ioclass.id
+        self.name = ioclass.name
+        self.priority = ioclass.priority
+        self.max_size = ioclass.max_size
+        self.requests = 0
+        self.hits = 0
+        # (occupancy, requests, hits) of each sampling interval
+        self.intervals = []
+        self.alpha = self.default_alpha
+
+    @staticmethod
+    def get_requests(stats):
+        hits = stats.req_rd_hits + stats.req_wr_hits
+        return hits + stats.req_rd_partial_misses + stats.req_rd_full_misses \
+            + stats.req_wr_partial_misses + stats.req_wr_full_misses, hits
+
+    def add_interval(self, first, second):
+        requests, hits = self.get_requests(second.stats)
+        prev_requests, prev_hits = self.get_requests(first.stats)
+        requests, hits = requests - prev_requests, hits - prev_hits
+        # Stats are reset when config is reloaded
+        if requests < 0 or hits < 0:
+            return
+
+        self.intervals.append(((first.curr_size + second.curr_size) / 2, requests, hits))
+        self.requests += requests
+        self.hits += hits
+
+    @property
+    def occupancy(self):
+        if not self.requests:
+            return 0.0
+        return sum(occupancy * requests for occupancy, requests, _ in self.intervals) \
+            / self.requests
+
+    @property
+    def hit_ratio(self):
+        return self.hits / self.requests if self.requests else 0.0
+
+    @property
+    def estimable(self):
+        """Allocation 0 is taken as deliberate, classes without hits have no curve"""
+        return self.max_size > 0 and self.hits > 0 and self.occupancy > 0
+
+    def fit(self):
+        points = [
+            (math.log(occupancy), math.log(hits / requests))
+            for occupancy, requests, hits in self.intervals
+            if occupancy > 0 and hits > 0
+        ]
+        if len(points) < 3:
+            return self.alpha
+
+        sizes = [x for x, _ in points]
+        if max(sizes) - min(sizes) < math.log(self.min_spread):
+            return self.alpha
+
+        mean_x = sum(sizes) / len(points)
+        mean_y = sum(y for _, y in points) / len(points)
+        slope = sum((x - mean_x) * (y - mean_y) for x, y in points) \
+            / sum((x - mean_x) ** 2 for x in sizes)
+
+        # Hit ratio has to grow with size and can't grow faster than it
+        self.alpha = min(max(slope, 0.05), 1.0)
+        return self.alpha
+
+    def predict_hits(self, size):
+        ratio = min(self.hit_ratio * (size / self.occupancy) ** self.alpha, 1.0)
+        return self.requests * ratio
+
+    def marginal_gain(self, size, step):
+        """Hits gained per block by growing class from size by step blocks"""
+        return (self.predict_hits(size + step) - self.predict_hits(size)) / step
+
+
+def get_ioclass_usage(samples, cache_id):
+    """ioclass_usage of classes of cache from consecutive netlink dumps"""
+    usage = collections.OrderedDict()
+    for first, second in zip(samples, samples[1:]):
+        previous = {c.id: c for c in first.ioclasses if c.cache_id == cache_id}
+        for ioclass in second.ioclasses:
+            if ioclass.cache_id != cache_id or ioclass.id not in previous:
+                continue
+            usage.setdefault(ioclass.id, ioclass_usage(ioclass)).add_interval(
+                previous[ioclass.id], ioclass)
+
+    for entry in usage.values():
+        entry.fit()
+
+    return usage
+
+
+def sample_dumps(duration, interval, cache_id=None):
+    """Cache and IO class records of cache (all caches if None) every interval"""
+    dump = functools.partial(opencas.cas_netlink.dump, cache_id=cache_id,
+                             records=['cache', 'ioclass'])
+    samples = [dump()]
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        opencas.tracer.sleep(min(interval, max(deadline - time.monotonic(), 0)), 'sample stats')
+        samples.append(dump())
+
+    return samples
+
+
+def get_cache_hit_ratio(first, second, cache_id):
+    """Hit ratio of cache between two dumps, None if there were no requests"""
+    stats = [next((c.stats for c in dump.caches if c.id == cache_id), None)
+             for dump in [first, second]]
+    if None in stats:
+        raise Exception(f'Cache {cache_id} is not running')
+
+    requests, hits = ioclass_usage.get_requests(stats[1])
+    prev_requests, prev_hits = ioclass_usage.get_requests(stats[0])
+    if requests <= prev_requests:
+        return None
+
+    return (hits - prev_hits) / (requests - prev_requests)
+
+
+def propose_ioclass_allocation(usage, cache_size, min_allocation=1):
+    """
+    Split cache between IO classes in steps of 1 % (granularity of
+    Allocation), each step going to class with highest marginal hit gain per
+    block, which is optimal for concave hit curves. Eviction priorities in use
+    are reassigned so that classes with most hits per occupied block are
+    evicted last. Idle classes, classes with Allocation 0, pinned classes
+    (priorities only) and classes with no hits keep their settings, the
+    latter get at least min_allocation.
+
+    Returns {class id: (priority, allocation in %)} for classes of usage.
+    """
+    proposal = {
+        entry.id: (entry.priority, entry.max_size) for entry in usage.values()
+    }
+    tuned = [entry for entry in usage.values() if entry.estimable]
+    for entry in usage.values():
+        if entry.requests and entry.max_size > 0 and not entry.estimable:
+            proposal[entry.id] = (entry.priority, max(entry.max_size, min_allocation))
+    if not tuned:
+        return proposal
+
+    step = cache_size / 100
+    allocation = {entry.id: min_allocation for entry in tuned}
+    budget = 100 - min_allocation * len(tuned)
+    for _ in range(max(budget, 0)):
+        best = max(tuned, key=lambda entry: entry.marginal_gain(
+            allocation[entry.id] * step, step))
+        if best.marginal_gain(allocation[best.id] * step, step) <= 0:
+            break
+        allocation[best.id] += 1
+        budget -= 1
+
+    # Space that no class would use better goes to the busiest one
+    if budget > 0:
+        allocation[max(tuned, key=lambda entry: entry.requests).id] += budget
+
+    ranked = [entry for entry in tuned if entry.priority >= 0]
+    priorities = sorted(entry.priority for entry in ranked)
+    ranked.sort(key=lambda entry: entry.hits / entry.occupancy, reverse=True)
+    new_priorities = {entry.id: priority for entry, priority in zip(ranked, priorities)}
+
+    for entry in tuned:
+        proposal[entry.id] = (new_priorities.get(entry.id, entry.priority),
+                              allocation[entry.id])
+
+    return proposal
+
+
+def get_ioclass_config(cache_id):
+    """Rows [id, name, priority, allocation] of IO class config loaded to cache"""
+    lines = opencas.casadm.io_class_list(cache_id).stdout.splitlines()
+    return [row for row in csv.reader(lines[1:]) if row]
+
+
+def save_ioclass_config(rows, f):
+    writer = csv.writer(f, lineterminator='\n')
+    writer.writerow(['IO class id', 'IO class name', 'Eviction priority', 'Allocation'])
+    writer.writerows(rows)
+
+
+def apply_ioclass_proposal(rows, proposal):
+    """Config rows with priority and allocation of proposal"""
+    result = []
+    for class_id, name, priority, allocation in rows:
+        if int(class_id) in proposal:
+            new_priority, max_size = proposal[int(class_id)]
+            priority = '' if new_priority < 0 else str(new_priority)
+            allocation = f'{max_size / 100:.2f}'
+        result.append([class_id, name, priority, allocation])
+
+    return result
+
+
+def trial_ioclass_config(cache_id, path, backup_path, baseline, duration, interval=1.0,
+                         tolerance=0.01):
+    """
+    Load IO class config from path and watch cache hit ratio for duration
+    seconds. Config from backup_path is loaded back if hit ratio drops below
+    baseline by more than tolerance or if there was no IO to compare.
+
+    Returns tuple (kept, hit ratio during trial).
+    """
+    opencas.casadm.io_class_load_config(cache_id, path)
+
+    try:
+        samples = sample_dumps(duration, interval, cache_id)
+        hit_ratio = get_cache_hit_ratio(samples[0], samples[-1], cache_id)
+    except Exception:
+        opencas.casadm.io_class_load_config(cache_id, backup_path)
+        raise
+
+    if hit_ratio is None or hit_ratio < baseline - tolerance:
+        opencas.casadm.io_class_load_config(cache_id, backup_path)
+        return False, hit_ratio
+
+    return True, hit_ratio
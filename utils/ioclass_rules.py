@@ -0,0 +1,584 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+"""
+Offline model of IO classifier (modules/cas_cache/classifier.c) - parses IO
+class config the way kernel does, replays recorded IO through its rules and
+reorders them to reduce number of conditions evaluated per IO.
+
+Kernel keeps rules sorted by IO class id and evaluates them for every IO
+until one of them stops classification (with done condition), so order of
+rules is order of class ids. Rule conditions are evaluated left to right
+with no operator precedence; since evaluation of a rule ends as soon as it
+is false before '&', rule is conjunction of clauses separated by '&', each of
+them being alternative of conditions separated by '|'.
+"""
+
+import csv
+import json
+import os
+
+UNCLASSIFIED_ID = 0
+UNCLASSIFIED_NAME = 'unclassified'
+PREFETCH_ID = 33
+PREFETCH_NAME = 'prefetch'
+IO_CLASS_NAME_MAX = 1024
+STRING_SPECIFIER_MAX = 256
+U64_MAX = 2 ** 64 - 1
+SECTOR_SIZE = 512
+
+CSV_HEADER = ['IO class id', 'IO class name', 'Eviction priority', 'Allocation']
+
+# Kind of page targeted by IO, as seen by classifier: no data, anonymous page
+# (direct IO), slab page, page without mapping, or page cache of inode of
+# given type (block device, directory, regular file or other)
+PAGE_KINDS = frozenset(['none', 'anon', 'slab', 'nomapping', 'blk', 'dir', 'reg', 'other'])
+METADATA_PAGES = frozenset(['slab', 'nomapping', 'blk', 'dir'])
+INODE_PAGES = frozenset(['blk', 'dir', 'reg', 'other'])
+
+
+# Conditions
+
+
+class condition(object):
+    AND = '&'
+    OR = '|'
+
+    generic_tokens = ['done', 'metadata', 'direct']
+    numeric_tokens = ['io_class', 'file_size', 'core_id', 'lba', 'pid', 'file_offset',
+                      'request_size', 'wlth']
+    string_tokens = ['extension', 'file_name_prefix', 'process_name']
+    numeric_operators = ['eq', 'ne', 'lt', 'gt', 'le', 'ge']
+
+    # Fields of traced IO tested by numeric conditions
+    numeric_fields = {
+        'file_size': 'file_size',
+        'core_id': 'core_id',
+        'lba': 'lba',
+        'pid': 'pid',
+        'file_offset': 'file_offset',
+        'request_size': 'request_size',
+        'io_direction': 'io_direction',
+        'wlth': 'wlth',
+    }
+
+    def __init__(self, token, operand, l_op):
+        self.token = token
+        self.operand = operand
+        self.l_op = l_op
+        self.operator = None
+        self.value = None
+
+        if token in self.generic_tokens:
+            pass
+        elif token in self.numeric_tokens:
+            self._parse_numeric(operand)
+        elif token in self.string_tokens:
+            if not operand:
+                raise ValueError(f'Missing string specifier of {token}')
+            if len(operand) >= STRING_SPECIFIER_MAX:
+                raise ValueError(f'String specifier of {token} is too long')
+            self.value = operand
+        elif token == 'directory':
+            if not operand:
+                raise ValueError('Missing directory specifier')
+            self.value = os.path.normpath(operand)
+        elif token == 'io_direction':
+            if operand not in ['read', 'write']:
+                raise ValueError(f"Invalid IO direction specifier '{operand}'")
+            self.operator = 'eq'
+            self.value = 0 if operand == 'read' else 1
+        else:
+            raise ValueError(f'Unknown condition {token}')
+
+    def _parse_numeric(self, operand):
+        if not operand:
+            raise ValueError(f'Missing numeric operand of {self.token}')
+
+        operator, separator, value = operand.partition(':')
+        if not separator:
+            operator, value = 'eq', operator
+        if operator not in self.numeric_operators:
+            raise ValueError(f'Invalid numeric operator {operator}')
+        if not value.lstrip('+').isdigit() or int(value) > U64_MAX:
+            raise ValueError(f'Invalid numeric operand {value}')
+
+        self.operator = operator
+        self.value = int(value)
+        if self.token == 'core_id' and self.value > 4095:
+            raise ValueError('Core id have to be within <0-4095> range')
+
+    def __str__(self):
+        return self.token if self.operand is None else f'{self.token}:{self.operand}'
+
+    def test_numeric(self, value):
+        if value is None:
+            return False
+
+        return {
+            'eq': value == self.value,
+            'ne': value != self.value,
+            'lt': value < self.value,
+            'gt': value > self.value,
+            'le': value <= self.value,
+            'ge': value >= self.value,
+        }[self.operator]
+
+    def test(self, io, part_id):
+        """Result of condition for traced IO (dict), as (yes, stop)"""
+        page = io['page']
+        token = self.token
+
+        if token == 'done':
+            return True, True
+        elif token == 'metadata':
+            return page in METADATA_PAGES, False
+        elif token == 'direct':
+            return page == 'anon', False
+        elif token == 'io_class':
+            return self.test_numeric(part_id), False
+        elif token == 'file_size':
+            return page == 'reg' and self.test_numeric(io.get('file_size')), False
+        elif token in self.numeric_fields:
+            if token == 'file_offset' and page not in INODE_PAGES:
+                return False, False
+            return self.test_numeric(io.get(self.numeric_fields[token])), False
+        elif token == 'process_name':
+            return io.get('process_name') == self.value, False
+
+        # Remaining conditions test file name or path of inode
+        path = io.get('path')
+        if page not in INODE_PAGES or not path:
+            return False, False
+
+        name = os.path.basename(path)
+        if token == 'extension':
+            return '.' in name and name.rsplit('.', 1)[1] == self.value, False
+        elif token == 'file_name_prefix':
+            return name.startswith(self.value), False
+
+        directory = self.value.rstrip('/') + '/'
+        return path.startswith(directory) or path == self.value, False
+
+    def get_domain(self):
+        """
+        IOs the condition may accept, as {feature: allowed values}. Numeric
+        features allow tuple of closed intervals, others - frozenset.
+        Conditions which can't be described this way (e.g. directory) only
+        constrain kind of page they accept.
+        """
+        token = self.token
+        if token in ['done', 'io_class']:
+            return {}
+        elif token == 'metadata':
+            return {'page': METADATA_PAGES}
+        elif token == 'direct':
+            return {'page': frozenset(['anon'])}
+
+        domain = {}
+        if token == 'file_size':
+            domain['page'] = frozenset(['reg'])
+        elif token in ['directory', 'extension', 'file_name_prefix', 'file_offset']:
+            domain['page'] = INODE_PAGES
+
+        if token in self.numeric_fields:
+            domain[token] = _get_intervals(self.operator, self.value)
+        elif token in ['extension', 'process_name']:
+            domain[token] = frozenset([self.value])
+
+        return domain
+
+
+def _get_intervals(operator, value):
+    return tuple((lo, hi) for lo, hi in {
+        'eq': [(value, value)],
+        'ne': [(0, value - 1), (value + 1, U64_MAX)],
+        'lt': [(0, value - 1)],
+        'gt': [(value + 1, U64_MAX)],
+        'le': [(0, value)],
+        'ge': [(value, U64_MAX)],
+    }[operator] if lo <= hi)
+
+
+def _union(first, second):
+    if isinstance(first, frozenset):
+        return first | second
+
+    merged = []
+    for lo, hi in sorted(first + second):
+        if merged and lo <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(hi, merged[-1][1]))
+        else:
+            merged.append((lo, hi))
+
+    return tuple(merged)
+
+
+def _intersection(first, second):
+    if isinstance(first, frozenset):
+        return first & second
+
+    return tuple(
+        (max(lo1, lo2), min(hi1, hi2))
+        for lo1, hi1 in first for lo2, hi2 in second
+        if max(lo1, lo2) <= min(hi1, hi2)
+    )
+
+
+# Rules
+
+
+class rule(object):
+    def __init__(self, text):
+        self.text = text
+        self.conditions = self.parse(text)
+
+    @staticmethod
+    def parse(text):
+        """Split rule into conditions the same way as _cas_cls_parse_condition()"""
+        conditions = []
+        l_op = condition.OR
+        rest = text
+
+        while rest:
+            split = min((rest.find(c) for c in ':&|' if c in rest), default=-1)
+            op = None
+            if split < 0:
+                token, operand, rest = rest, None, ''
+            else:
+                token = rest[:split]
+                operand = None
+                if rest[split] == ':':
+                    rest = rest[split + 1:]
+                    split = min((rest.find(c) for c in '&|' if c in rest), default=-1)
+                    operand = rest if split < 0 else rest[:split]
+                if split >= 0:
+                    op = rest[split]
+                    rest = rest[split + 1:]
+                    if not rest:
+                        raise ValueError(f"Missing condition after '{op}' operator")
+                else:
+                    rest = ''
+
+            conditions.append(condition(token, operand, l_op))
+            l_op = condition.OR if op == '|' else condition.AND
+
+        return conditions
+
+    def evaluate(self, io, part_id):
+        """Mirrors cas_cls_process_rule(), returns (yes, stop, conditions evaluated)"""
+        yes = stop = False
+        evaluated = 0
+
+        for c in self.conditions:
+            if not yes and c.l_op == condition.AND:
+                break
+
+            result, stop = c.test(io, part_id)
+            evaluated += 1
+            yes = (result and yes) if c.l_op == condition.AND else (result or yes)
+            if stop:
+                break
+
+        return yes, stop, evaluated
+
+    @property
+    def depends_on_order(self):
+        """io_class conditions test classification result of preceding rules"""
+        return any(c.token == 'io_class' for c in self.conditions)
+
+    def get_domain(self):
+        """
+        {feature: allowed values} for IOs the rule may accept. Conditions past
+        the first done are never evaluated, so they are left out.
+        """
+        clauses = []
+        for c in self.conditions:
+            if c.l_op == condition.AND or not clauses:
+                clauses.append([])
+            clauses[-1].append(c)
+            if c.token == 'done':
+                break
+
+        domain = {}
+        for clause in clauses:
+            domains = [c.get_domain() for c in clause]
+            for feature in set.intersection(*(set(d) for d in domains)):
+                allowed = domains[0][feature]
+                for d in domains[1:]:
+                    allowed = _union(allowed, d[feature])
+                domain[feature] = (_intersection(domain[feature], allowed)
+                                   if feature in domain else allowed)
+
+        return domain
+
+    def is_disjoint(self, other):
+        """True if no IO can be accepted by both rules"""
+        domain, other_domain = self.get_domain(), other.get_domain()
+        return any(
+            not _intersection(allowed, other_domain[feature])
+            for feature, allowed in domain.items() if feature in other_domain
+        )
+
+
+class io_class(object):
+    def __init__(self, class_id, name, priority, allocation):
+        self.class_id = class_id
+        self.name = name
+        self.priority = priority
+        self.allocation = allocation
+        self.rule = None
+
+        if class_id == UNCLASSIFIED_ID:
+            if name != UNCLASSIFIED_NAME:
+                raise ValueError(f"IO class {class_id}:'{name}', expected "
+                                 f"{UNCLASSIFIED_ID}:'{UNCLASSIFIED_NAME}'")
+        elif name == PREFETCH_NAME:
+            if class_id != PREFETCH_ID:
+                raise ValueError(f"IO class {class_id}:'{name}', expected "
+                                 f"{PREFETCH_ID}:'{PREFETCH_NAME}'")
+        else:
+            try:
+                self.rule = rule(name)
+            except ValueError as e:
+                raise ValueError(f"Invalid rule of IO class {class_id}:'{name}'. Reason: {e}")
+
+    def to_row(self):
+        return [str(self.class_id), self.name, self.priority, self.allocation]
+
+
+def load_config(path):
+    """IO classes from ioclass config CSV, in order of evaluation"""
+    with open(path, 'r', newline='') as f:
+        rows = list(csv.reader(f))
+
+    if not rows or [column.strip() for column in rows[0]] != CSV_HEADER:
+        raise ValueError(f'Invalid IO class config header in {path}')
+
+    classes = {}
+    for number, row in enumerate(rows[1:], 2):
+        if not row:
+            continue
+        if len(row) != len(CSV_HEADER):
+            raise ValueError(f'Invalid number of columns in line {number} of {path}')
+
+        try:
+            class_id = int(row[0])
+        except ValueError:
+            raise ValueError(f'Invalid IO class id in line {number} of {path}')
+        if class_id in classes:
+            raise ValueError(f'Duplicated IO class id {class_id} in {path}')
+        name = row[1].strip()
+        if not name or len(name) >= IO_CLASS_NAME_MAX:
+            raise ValueError(f'Empty or too long IO class name in line {number} of {path}')
+
+        classes[class_id] = io_class(class_id, name, row[2].strip(), row[3].strip())
+
+    return [classes[class_id] for class_id in sorted(classes)]
+
+
+def save_config(classes, f):
+    writer = csv.writer(f, lineterminator='\n')
+    writer.writerow(CSV_HEADER)
+    for cls in sorted(classes, key=lambda cls: cls.class_id):
+        writer.writerow(cls.to_row())
+
+
+# Traces
+
+
+def get_trace_io(record):
+    """
+    IO as seen by classifier from trace record. Missing fields make
+    conditions testing them fail, as when kernel can't get them from bio.
+    """
+    io = dict(record)
+    if 'page' not in io:
+        io['page'] = 'reg' if 'path' in io or 'file_size' in io else 'none'
+    elif io['page'] not in PAGE_KINDS:
+        raise ValueError(f"Invalid page kind {io['page']}")
+
+    direction = io.get('io_direction')
+    if direction is not None and direction not in [0, 1]:
+        io['io_direction'] = {'read': 0, 'write': 1}[direction]
+
+    return io
+
+
+def parse_blkparse_line(line):
+    """IO queued to device in default blkparse output, None for other lines"""
+    fields = line.split()
+    if len(fields) < 10 or fields[5] != 'Q' or fields[8] != '+':
+        return None
+
+    rwbs = fields[6]
+    if 'D' in rwbs or not ('R' in rwbs or 'W' in rwbs):
+        return None
+
+    io = {
+        'lba': int(fields[7]),
+        'request_size': int(fields[9]) * SECTOR_SIZE,
+        'io_direction': 'write' if 'W' in rwbs else 'read',
+        'pid': int(fields[4]),
+    }
+    if len(fields) > 10 and fields[10].startswith('['):
+        io['process_name'] = ' '.join(fields[10:]).strip('[]')
+
+    return io
+
+
+def load_trace(path):
+    """
+    IOs from JSON lines (one object per IO, with fields tested by conditions
+    and 'page' and 'path' of IO target) or from default blkparse output,
+    which provides only lba, request size, direction and process.
+    """
+    with open(path, 'r') as f:
+        lines = [line for line in f if line.strip()]
+
+    if lines and lines[0].lstrip().startswith('{'):
+        records = [json.loads(line) for line in lines]
+    else:
+        records = [io for io in map(parse_blkparse_line, lines) if io]
+
+    return [get_trace_io(record) for record in records]
+
+
+# Evaluation
+
+
+class rule_stats(object):
+    def __init__(self, cls):
+        self.cls = cls
+        self.evaluated = 0
+        self.matched = 0
+        self.stopped = 0
+        self.conditions = 0
+
+    @property
+    def avg_conditions(self):
+        return self.conditions / self.evaluated if self.evaluated else 0.0
+
+
+class trace_stats(object):
+    def __init__(self, classes):
+        self.rules = [rule_stats(cls) for cls in classes if cls.rule]
+        self.ios = 0
+        self.conditions = 0
+        self.classified = {}
+
+    @property
+    def avg_conditions(self):
+        return self.conditions / self.ios if self.ios else 0.0
+
+
+def classify(classes, io, stats=None):
+    """Mirrors cas_cls_classify(), returns class id assigned to IO"""
+    part_id = UNCLASSIFIED_ID
+    for number, cls in enumerate(c for c in classes if c.rule):
+        yes, stop, evaluated = cls.rule.evaluate(io, part_id)
+        if stats is not None:
+            entry = stats.rules[number]
+            entry.evaluated += 1
+            entry.conditions += evaluated
+            entry.matched += yes
+            entry.stopped += stop
+            stats.conditions += evaluated
+
+        if yes:
+            part_id = cls.class_id
+        if stop:
+            break
+
+    return part_id
+
+
+def evaluate(classes, ios):
+    """Replay IOs through rules, returns (trace_stats, class id of each IO)"""
+    stats = trace_stats(classes)
+    results = []
+    for io in ios:
+        part_id = classify(classes, io, stats)
+        stats.ios += 1
+        stats.classified[part_id] = stats.classified.get(part_id, 0) + 1
+        results.append(part_id)
+
+    return stats, results
+
+
+# Reordering
+
+
+def get_order_constraints(classes):
+    """
+    Pairs (i, j) of indexes of rules, which have to be evaluated in given
+    order. Rules which may accept the same IO keep their order, so that IO is
+    classified by the same rule regardless of order of the others. Rules with
+    io_class conditions and all rules before them keep their places.
+    """
+    rules = [cls.rule for cls in classes if cls.rule]
+    fixed = max((i for i, r in enumerate(rules) if r.depends_on_order), default=-1)
+
+    return set(
+        (i, j) for i in range(len(rules)) for j in range(i + 1, len(rules))
+        if i <= fixed or not rules[i].is_disjoint(rules[j])
+    )
+
+
+def optimize(classes, ios):
+    """
+    Reorder rules to reduce conditions evaluated for IOs, keeping
+    classification of any IO the same. Rules which stop classification of
+    many IOs at low cost go first (ratio of IOs stopped to conditions
+    evaluated, as in optimal ordering of sequential tests), as far as order
+    constraints allow. Class ids in use are reassigned to rules in new order,
+    with name, eviction priority and allocation of each class unchanged.
+
+    Returns (reordered classes, {old id: new id}) or (classes, {}) if no
+    better order was found.
+    """
+    rules = [cls for cls in classes if cls.rule]
+    constraints = get_order_constraints(classes)
+
+    # Cost of rule and number of IOs it stops don't depend on its position,
+    # except for io_class conditions, but those rules never move
+    stopped = [0] * len(rules)
+    cost = [0] * len(rules)
+    for io in ios:
+        for number, cls in enumerate(rules):
+            yes, stop, evaluated = cls.rule.evaluate(io, UNCLASSIFIED_ID)
+            stopped[number] += stop
+            cost[number] += evaluated
+
+    order = []
+    remaining = list(range(len(rules)))
+    while remaining:
+        ready = [i for i in remaining
+                 if not any((j, i) in constraints for j in remaining if j != i)]
+        best = max(ready, key=lambda i: (stopped[i] / max(cost[i], 1), -i))
+        order.append(best)
+        remaining.remove(best)
+
+    if order == sorted(order):
+        return classes, {}
+
+    ids = [cls.class_id for cls in rules]
+    mapping = {rules[i].class_id: ids[position] for position, i in enumerate(order)}
+    reordered = [
+        io_class(mapping.get(cls.class_id, cls.class_id), cls.name, cls.priority,
+                 cls.allocation)
+        for cls in classes
+    ]
+    reordered.sort(key=lambda cls: cls.class_id)
+
+    before, results = evaluate(classes, ios)
+    after, new_results = evaluate(reordered, ios)
+    reverse = {new: old for old, new in mapping.items()}
+    if any(reverse.get(new, new) != old for old, new in zip(results, new_results)):
+        raise Exception('Reordered rules classify IO differently')
+    if after.conditions >= before.conditions:
+        return classes, {}
+
+    return reordered, {old: new for old, new in mapping.items() if old != new}
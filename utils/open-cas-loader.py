@@ -5,44 +5,120 @@
 # SPDX-License-Identifier: BSD-3-Clause
 #
 
+import contextlib
 import subprocess
-import opencas
+import json
 import sys
 import os
 import syslog as sl
 
+# Loader runs for every block device event, so the common case (device not
+# present in config) is served from lookup table compiled from the config by
+# opencas.cas_config.compile_lookup_table, without importing opencas.
+CONFIG_FILE = '/etc/opencas/opencas.conf'
+LOOKUP_TABLE_FILE = f'{CONFIG_FILE}.compiled'
+LOOKUP_TABLE_VERSION = 1
+
+# Tracing (see opencas.tracer) is the only reason to import opencas upfront
+TRACE = os.environ.get('OPENCAS_TRACE', '0') not in ['', '0']
+if TRACE:
+    import opencas
+
+    opencas.tracer.enable_from_env()
+
+
+@contextlib.contextmanager
+def span(name, category, **args):
+    if not TRACE:
+        yield
+        return
+
+    with opencas.tracer.span(name, category, **args):
+        yield
+
+
+def load_lookup_table():
+    try:
+        config_stat = os.stat(CONFIG_FILE)
+        with open(LOOKUP_TABLE_FILE, 'r') as f:
+            table = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if (
+        table.get('version') != LOOKUP_TABLE_VERSION
+        or table.get('mtime_ns') != config_stat.st_mtime_ns
+        or table.get('size') != config_stat.st_size
+    ):
+        return None
+
+    return table
+
+
+def find_device(table, device):
+    devices = table['devices']
+
+    # udev passes symlinks of the device (by-id paths used in config among
+    # them) in DEVLINKS
+    for path in [device] + os.environ.get('DEVLINKS', '').split():
+        if path in devices and os.path.realpath(path) == device:
+            return devices[path]
+
+    path = table['realpaths'].get(device)
+    if path is not None and os.path.realpath(path) == device:
+        return devices[path]
+
+    if 'DEVLINKS' not in os.environ:
+        for path, entry in devices.items():
+            if os.path.realpath(path) == device:
+                return entry
+
+    return None
+
+
+with span('load lookup table', 'config', device=sys.argv[1]):
+    table = load_lookup_table()
+if table is None:
+    import opencas
+
+    try:
+        table = opencas.cas_config.compile_lookup_table(CONFIG_FILE, allow_incomplete=True)
+    except Exception as e:
+        sl.syslog(sl.LOG_ERR, f'Unable to load opencas config. Reason: {str(e)}')
+        exit(1)
+
+entry = find_device(table, sys.argv[1])
+if entry is None:
+    exit(0)
+
 try:
-    subprocess.call(['/sbin/modprobe', 'cas_cache'])
+    with span('modprobe cas_cache', 'modprobe', device=sys.argv[1]):
+        subprocess.call(['/sbin/modprobe', 'cas_cache'])
 except Exception:
     sl.syslog(sl.LOG_ERR, 'Unable to probe cas_cache module')
     exit(1)
 
-try:
-    config = opencas.cas_config.from_file('/etc/opencas/opencas.conf',
-                                          allow_incomplete=True)
-except Exception as e:
-    sl.syslog(sl.LOG_ERR, f'Unable to load opencas config. Reason: {str(e)}')
-    exit(1)
+import opencas
+
+device = opencas.cas_config.from_lookup_entry(entry)
+
+if entry['type'] == 'cache':
+    try:
+        opencas.wait_for_cas_ctrl()
+        opencas.start_cache(device, True)
+    except opencas.casadm.CasadmError as e:
+        sl.syslog(sl.LOG_WARNING,
+                  f'Unable to load cache {device.cache_id} ({device.device}). '
+                  f'Reason: {e.result.stderr}')
+        exit(e.result.exit_code)
+else:
+    try:
+        opencas.wait_for_cas_ctrl()
+        opencas.add_core(device, True)
+    except opencas.casadm.CasadmError as e:
+        sl.syslog(sl.LOG_WARNING,
+                  f'Unable to attach core {device.device} from cache {device.cache_id}. '
+                  f'Reason: {e.result.stderr}')
+        exit(e.result.exit_code)
 
-for cache in config.caches.values():
-    if sys.argv[1] == os.path.realpath(cache.device):
-        try:
-            opencas.wait_for_cas_ctrl()
-            opencas.start_cache(cache, True)
-        except opencas.casadm.CasadmError as e:
-            sl.syslog(sl.LOG_WARNING,
-                      f'Unable to load cache {cache.cache_id} ({cache.device}). '
-                      f'Reason: {e.result.stderr}')
-            exit(e.result.exit_code)
-        exit(0)
-    for core in cache.cores.values():
-        if sys.argv[1] == os.path.realpath(core.device):
-            try:
-                opencas.wait_for_cas_ctrl()
-                opencas.add_core(core, True)
-            except opencas.casadm.CasadmError as e:
-                sl.syslog(sl.LOG_WARNING,
-                          f'Unable to attach core {core.device} from cache {cache.cache_id}. '
-                          f'Reason: {e.result.stderr}')
-                exit(e.result.exit_code)
-            exit(0)
+exit(0)
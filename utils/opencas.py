@@ -5,11 +5,195 @@
 # SPDX-License-Identifier: BSD-3-Clause
 #
 import subprocess
+import concurrent.futures
+import collections
+import contextlib
+import ctypes
+import errno
+import functools
+import json
 import csv
 import re
+import shlex
+import select
+import socket
+import struct
+import syslog
+import sys
 import os
 import stat
+import threading
 import time
+import atexit
+
+# Tracing
+
+
+class tracer:
+    """
+    Records spans of casadm invocations, config parsing, udev settle and
+    polling sleeps as Chrome trace events (viewable in chrome://tracing or
+    Perfetto). Trace is written to log_dir when the process exits.
+
+    Tracing is enabled with enable() or by setting OPENCAS_TRACE environment
+    variable to 1 or to path of the trace file.
+    """
+
+    env_variable = 'OPENCAS_TRACE'
+    log_dir = '/var/log/opencas'
+    max_events = 1000000
+
+    enabled = False
+    path = None
+    dropped = 0
+    _events = []
+    _lock = threading.Lock()
+
+    @classmethod
+    def enable(cls, path=None):
+        if not cls.enabled:
+            atexit.register(cls._save_at_exit)
+        cls.enabled = True
+        cls.path = path
+
+    @classmethod
+    def enable_from_env(cls):
+        value = os.environ.get(cls.env_variable)
+        if value and value != '0':
+            cls.enable(None if value == '1' else value)
+
+    @classmethod
+    def add(cls, name, category, start, duration, args):
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': int(start * 1000000),
+            'dur': int(duration * 1000000),
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': args,
+        }
+        with cls._lock:
+            if len(cls._events) < cls.max_events:
+                cls._events.append(event)
+            else:
+                cls.dropped += 1
+
+    @classmethod
+    @contextlib.contextmanager
+    def span(cls, name, category, **args):
+        """Record duration of the context. Yields args so that tags can be added."""
+        if not cls.enabled:
+            yield args
+            return
+
+        # Wall clock timestamps let traces of separate processes (e.g. loader
+        # instances run by udev) be merged on a common timeline
+        start = time.time()
+        try:
+            yield args
+        finally:
+            cls.add(name, category, start, time.time() - start, args)
+
+    @classmethod
+    def sleep(cls, seconds, name='poll'):
+        with cls.span(name, 'sleep', seconds=seconds):
+            time.sleep(seconds)
+
+    @classmethod
+    def get_events(cls):
+        with cls._lock:
+            return list(cls._events)
+
+    @classmethod
+    def save(cls, path=None):
+        if path is None:
+            path = cls.path
+        if path is None:
+            program = os.path.basename(sys.argv[0]) if sys.argv[0] else 'python'
+            path = os.path.join(
+                cls.log_dir,
+                f"{program}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.json"
+            )
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': cls.get_events(), 'displayTimeUnit': 'ms'}, f)
+
+        # Saving again at exit overwrites the same file with complete trace
+        cls.path = path
+        return path
+
+    @classmethod
+    def _save_at_exit(cls):
+        try:
+            cls.save()
+        except OSError as e:
+            syslog.syslog(syslog.LOG_WARNING, f'Unable to save opencas trace. Reason: {str(e)}')
+
+    @staticmethod
+    def device_label(args):
+        if 'device' in args:
+            return args['device']
+        if 'core_id' in args:
+            return f"core {args.get('cache_id', '?')}-{args['core_id']}"
+        if 'cache_id' in args:
+            return f"cache {args['cache_id']}"
+        return None
+
+    @classmethod
+    def summary(cls, events=None, limit=5):
+        """Human readable summary of recorded spans as list of lines"""
+        if events is None:
+            events = cls.get_events()
+
+        categories = collections.OrderedDict()
+        devices = collections.Counter()
+        casadm_modes = {True: [0, 0], False: [0, 0]}
+        settle_time = 0
+
+        for event in events:
+            duration = event['dur'] / 1000000
+            stats = categories.setdefault(event['cat'], [0, 0, 0])
+            stats[0] += 1
+            stats[1] += duration
+            stats[2] = max(stats[2], duration)
+
+            if event['cat'] == 'casadm':
+                label = cls.device_label(event['args'])
+                if label is not None:
+                    devices[label] += duration
+                mode = casadm_modes[event['args'].get('batch', False)]
+                mode[0] += 1
+                mode[1] += duration
+            elif event['cat'] in ['settle', 'sleep']:
+                settle_time += duration
+
+        lines = ['{:<12} {:>8} {:>12} {:>12}'.format('Phase', 'Count', 'Total [s]', 'Max [s]')]
+        for category, (count, total, longest) in categories.items():
+            lines.append(f'{category:<12} {count:>8} {total:>12.3f} {longest:>12.3f}')
+
+        lines.append('')
+        lines.append(f'Time blocked in settle and polling: {settle_time:.3f} s')
+
+        for batch, name in [(False, 'separate processes'), (True, 'batch co-process')]:
+            count, total = casadm_modes[batch]
+            if count:
+                lines.append(f'casadm in {name}: {count} calls, '
+                             f'{1000 * total / count:.1f} ms per call')
+
+        if devices:
+            lines.append('')
+            lines.append('Slowest devices (time in casadm):')
+            for label, total in devices.most_common(limit):
+                lines.append(f'  {label:<40} {total:>10.3f} s')
+
+        if cls.dropped:
+            lines.append(f'{cls.dropped} spans dropped')
+
+        return lines
+
 
 # Casadm functionality
 
@@ -17,22 +201,214 @@ import time
 class casadm:
     casadm_path = '/sbin/casadm'
 
+    _batch_depth = 0
+    _batch_failed = False
+    _batch_processes = []
+    _batch_lock = threading.Lock()
+    _batch_local = threading.local()
+
     class result:
-        def __init__(self, cmd):
+        def __init__(self, cmd, batch=None):
+            if batch is not None:
+                self.exit_code, self.stdout, self.stderr = batch.run(cmd)
+                return
+
             p = subprocess.run(cmd, universal_newlines=True, stdout=subprocess.PIPE,
                                stderr=subprocess.PIPE)
             self.exit_code = p.returncode
             self.stdout = p.stdout
             self.stderr = p.stderr
 
+    class lost_result:
+        """Result of command sent to casadm co-process which failed to report it"""
+        exit_code = None
+        stdout = ''
+
+        def __init__(self, error):
+            self.stderr = 'outcome unknown, {}'.format(error)
+
     class CasadmError(Exception):
         def __init__(self, result):
             super(casadm.CasadmError, self).__init__('casadm error: {}'.format(result.stderr))
             self.result = result
 
+    class SetParamsError(CasadmError):
+        """
+        Some namespaces of set_params() failed. The others were applied,
+        applied lists them and failed maps namespaces to their results.
+        """
+        def __init__(self, cache_id, applied, failed):
+            super(casadm.SetParamsError, self).__init__(next(iter(failed.values())))
+            self.applied = applied
+            self.failed = failed
+            self.args = ('cache {} parameters not set: {}; applied: {}'.format(
+                cache_id,
+                ', '.join('{} ({})'.format(namespace, result.stderr.strip())
+                          for namespace, result in failed.items()),
+                ', '.join(applied) or 'none'),)
+
+    class BatchError(Exception):
+        """Command couldn't be sent to casadm co-process"""
+        pass
+
+    class BatchResultError(Exception):
+        """Command was sent to casadm co-process but its result wasn't received"""
+        pass
+
+    class batch:
+        """
+        casadm co-process started with --batch, executing commands one at
+        a time without spawning new process for each of them.
+        """
+        def __init__(self, casadm_path):
+            self.closed = False
+            self.process = subprocess.Popen(
+                [casadm_path, '--batch'], stdin=subprocess.PIPE, stdout=subprocess.PIPE
+            )
+
+            # casadm without batch support exits without printing ready line
+            if self.process.stdout.readline() != b'ready\n':
+                self.close()
+                raise casadm.BatchError('casadm batch mode not supported')
+
+        def _read(self, size):
+            data = self.process.stdout.read(size)
+            if len(data) != size:
+                raise casadm.BatchResultError('casadm batch process terminated')
+            return data
+
+        def run(self, cmd):
+            line = ' '.join(shlex.quote(arg) for arg in cmd[1:])
+            if '\n' in line:
+                raise ValueError('Newline is not allowed in casadm batch command')
+
+            try:
+                self.process.stdin.write(line.encode() + b'\n')
+                self.process.stdin.flush()
+            except OSError:
+                raise casadm.BatchError('casadm batch process terminated')
+
+            header = self.process.stdout.readline().split()
+            if len(header) != 4 or header[0] != b'result':
+                raise casadm.BatchResultError('invalid casadm batch result')
+
+            exit_code, out_len, err_len = (int(field) for field in header[1:])
+            stdout = self._read(out_len).decode(errors='replace')
+            stderr = self._read(err_len).decode(errors='replace')
+
+            return exit_code, stdout, stderr
+
+        def close(self):
+            if self.closed:
+                return
+            self.closed = True
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass
+            self.process.wait()
+            self.process.stdout.close()
+
+    @classmethod
+    @contextlib.contextmanager
+    def batch_mode(cls):
+        """
+        Execute casadm commands issued within the context in batch
+        co-processes, one per calling thread. Commands fall back to separate
+        casadm processes if co-process can't be used.
+        """
+        with cls._batch_lock:
+            cls._batch_depth += 1
+
+        try:
+            yield
+        finally:
+            with cls._batch_lock:
+                cls._batch_depth -= 1
+                if cls._batch_depth == 0:
+                    processes, cls._batch_processes = cls._batch_processes, []
+                    cls._batch_failed = False
+                else:
+                    processes = []
+
+            for process in processes:
+                process.close()
+
+    @classmethod
+    def close_batch(cls):
+        """
+        Close co-processes of batch mode, as they keep control device open
+        (e.g. before cas_cache module is removed). Commands issued later
+        within the context start new ones.
+        """
+        with cls._batch_lock:
+            processes, cls._batch_processes = cls._batch_processes, []
+
+        for process in processes:
+            process.close()
+
+    @classmethod
+    def _get_batch(cls):
+        if not cls._batch_depth or cls._batch_failed:
+            return None
+
+        process = getattr(cls._batch_local, 'process', None)
+        if process is None or process.closed:
+            try:
+                with tracer.span('start batch co-process', 'spawn'):
+                    process = cls.batch(cls.casadm_path)
+            except OSError:
+                return None
+            except cls.BatchError:
+                cls._batch_failed = True
+                return None
+
+            with cls._batch_lock:
+                cls._batch_processes.append(process)
+            cls._batch_local.process = process
+
+        return process
+
+    _trace_options = {
+        '--cache-id': 'cache_id',
+        '--core-id': 'core_id',
+        '--cache-device': 'device',
+        '--core-device': 'device',
+    }
+
+    @classmethod
+    def _trace_args(cls, cmd):
+        args = {'command': ' '.join(cmd[1:])}
+        for option, value in zip(cmd, cmd[1:]):
+            name = cls._trace_options.get(option)
+            if name is not None:
+                args[name] = value
+        return args
+
     @classmethod
     def run_cmd(cls, cmd):
-        result = cls.result(cmd)
+        name = next((arg for arg in cmd[1:] if arg != '--script'), 'casadm')
+        with tracer.span(name, 'casadm', **cls._trace_args(cmd)) as tags:
+            batch = cls._get_batch()
+            try:
+                result = cls.result(cmd, batch)
+            except cls.BatchError:
+                # Co-process died before command was sent - stop using batch
+                # mode until the context is left
+                cls._batch_failed = True
+                batch.close()
+                batch = None
+                result = cls.result(cmd)
+            except cls.BatchResultError as e:
+                # Command may have been executed already, so it can't be
+                # repeated in separate process
+                cls._batch_failed = True
+                batch.close()
+                result = cls.lost_result(e)
+
+            tags['batch'] = batch is not None
+            tags['exit_code'] = result.exit_code
+
         if result.exit_code != 0:
             raise cls.CasadmError(result)
         return result
@@ -141,6 +517,89 @@ class casadm:
 
         return cls.run_cmd(cmd)
 
+    # Parameters accepted by --set-param in each namespace, core namespaces
+    # require core id
+    set_param_names = {
+        'cleaning': ['policy'],
+        'cleaning-alru': ['wake-up', 'staleness-time', 'flush-max-buffers',
+                          'activity-threshold', 'dirty-ratio-threshold',
+                          'dirty-ratio-inertia'],
+        'cleaning-acp': ['wake-up', 'flush-max-buffers'],
+        'promotion': ['policy'],
+        'promotion-nhit': ['threshold', 'trigger'],
+        'prefetch': ['policy'],
+        'prefetch-readahead': ['threshold'],
+        'seq-cutoff': ['threshold', 'policy'],
+        'seq-detect': ['promotion-count', 'promotion-threshold'],
+    }
+    core_param_namespaces = ['seq-cutoff', 'seq-detect']
+
+    @classmethod
+    def get_set_params_cmds(cls, cache_id, params, core_id=None):
+        """
+        casadm commands setting params ({namespace: {param: value}}), one per
+        namespace. All namespaces and params are checked before any command
+        is built, ValueError lists all problems found.
+        """
+        errors = []
+        cmds = []
+
+        for namespace, values in params.items():
+            names = cls.set_param_names.get(namespace)
+            if names is None:
+                errors.append(f'unknown parameter namespace {namespace}')
+                continue
+            if not values:
+                errors.append(f'no parameters given for {namespace}')
+                continue
+
+            cmd = [cls.casadm_path,
+                   '--set-param', '--name', namespace,
+                   '--cache-id', str(cache_id)]
+            # Without core id casadm sets core params of all cores in cache
+            if namespace in cls.core_param_namespaces and core_id is not None:
+                cmd += ['--core-id', str(core_id)]
+
+            for param, value in values.items():
+                param = param.replace('_', '-')
+                if param not in names:
+                    errors.append(f'unknown parameter {param} in {namespace}')
+                    continue
+                cmd += ['--' + param, str(value)]
+
+            cmds.append(cmd)
+
+        if errors:
+            raise ValueError(f'Invalid cache {cache_id} parameters: {", ".join(errors)}')
+
+        return cmds
+
+    @classmethod
+    def set_params(cls, cache_id, params, core_id=None):
+        """
+        Set params of multiple namespaces ({namespace: {param: value}}) with
+        a single casadm process. All namespaces and params are checked
+        before anything is set. Failure of one namespace doesn't stop the
+        others, SetParamsError tells which were applied and which failed.
+        """
+        cmds = cls.get_set_params_cmds(cache_id, params, core_id)
+
+        results = []
+        applied = []
+        failed = collections.OrderedDict()
+        with cls.batch_mode():
+            for namespace, cmd in zip(params, cmds):
+                try:
+                    results.append(cls.run_cmd(cmd))
+                    applied.append(namespace)
+                except cls.CasadmError as e:
+                    failed[namespace] = e.result
+
+        if failed:
+            raise cls.SetParamsError(cache_id, applied, failed)
+
+        return results
+
     @classmethod
     def get_params(cls, namespace, cache_id, **kwargs):
         cmd = [cls.casadm_path,
@@ -154,6 +613,13 @@ class casadm:
 
         return cls.run_cmd(cmd)
 
+    @classmethod
+    def flush_cache(cls, cache_id):
+        cmd = [cls.casadm_path,
+               '--flush-cache',
+               '--cache-id', str(cache_id)]
+        return cls.run_cmd(cmd)
+
     @classmethod
     def flush_parameters(cls, cache_id, policy_type):
         cmd = [cls.casadm_path,
@@ -162,6 +628,25 @@ class casadm:
                '--cleaning-policy-type', policy_type]
         return cls.run_cmd(cmd)
 
+    @classmethod
+    def set_cache_mode(cls, cache_id, cache_mode, flush=None):
+        cmd = [cls.casadm_path,
+               '--set-cache-mode',
+               '--cache-mode', cache_mode,
+               '--cache-id', str(cache_id)]
+        if flush is not None:
+            cmd += ['--flush-cache', 'yes' if flush else 'no']
+        return cls.run_cmd(cmd)
+
+    @classmethod
+    def io_class_list(cls, cache_id):
+        cmd = [cls.casadm_path,
+               '--io-class',
+               '--list',
+               '--cache-id', str(cache_id),
+               '--output-format', 'csv']
+        return cls.run_cmd(cmd)
+
     @classmethod
     def io_class_load_config(cls, cache_id, ioclass_file):
         cmd = [cls.casadm_path,
@@ -172,11 +657,644 @@ class casadm:
         return cls.run_cmd(cmd)
 
 
+# Netlink functionality (libopencas binding)
+
+
+class cas_netlink:
+    lib_path = '/usr/lib/opencas/libopencas.so'
+
+    cache_states = ['Running', 'Stopping', 'Detached', 'Incomplete', 'Standby']
+    cache_state_standby = 4
+    cache_state_detached = 2
+    cache_modes = ['wt', 'wb', 'wa', 'pt', 'wi', 'wo']
+    core_states = ['Active', 'Inactive']
+
+    # Dump filter masks, bit i stands for i-th name (enum cas_nl_record and
+    # enum cas_nl_section in cas_netlink.h)
+    dump_records = ['cache', 'core', 'ioclass', 'core_pool']
+    dump_sections = ['config', 'usage', 'req', 'blk', 'err']
+    dump_any = -1
+
+    stats_fields = [
+        'usage_occupancy', 'usage_free', 'usage_clean', 'usage_dirty',
+        'req_rd_hits', 'req_rd_deferred', 'req_rd_partial_misses', 'req_rd_full_misses',
+        'req_rd_total', 'req_wr_hits', 'req_wr_deferred', 'req_wr_partial_misses',
+        'req_wr_full_misses', 'req_wr_total', 'req_rd_pt', 'req_wr_pt', 'req_serviced',
+        'req_prefetch_readahead', 'req_cleaner', 'req_total',
+        'blocks_core_rd', 'blocks_core_wr', 'blocks_core_total',
+        'blocks_cache_rd', 'blocks_cache_wr', 'blocks_cache_total',
+        'blocks_volume_rd', 'blocks_volume_wr', 'blocks_volume_total',
+        'blocks_pt_rd', 'blocks_pt_wr', 'blocks_pt_total',
+        'blocks_prefetch_core_rd_readahead', 'blocks_prefetch_cache_wr_readahead',
+        'blocks_cleaner_cache_rd', 'blocks_cleaner_core_wr',
+        'errors_core_rd', 'errors_core_wr', 'errors_core_total',
+        'errors_cache_rd', 'errors_cache_wr', 'errors_cache_total', 'errors_total',
+    ]
+
+    _lib = None
+    _lib_loaded = False
+    # Compact dump storage is reused by all dumps
+    _c_dump = None
+    _dump_lock = threading.Lock()
+
+    class NetlinkError(Exception):
+        def __init__(self, error):
+            super(cas_netlink.NetlinkError, self).__init__(
+                'netlink error: {}'.format(os.strerror(error)))
+            self.errno = error
+
+    class record(object):
+        """
+        Python copy of a libopencas compact record, nested structures included.
+        Fields in string_fields are offsets into strings - string table of dump.
+        """
+        string_fields = []
+
+        def __init__(self, struct, strings=b''):
+            for name, _ in struct._fields_:
+                value = getattr(struct, name)
+                if isinstance(value, ctypes.Structure):
+                    value = cas_netlink.record(value)
+                elif name in self.string_fields:
+                    value = strings[value:strings.find(b'\0', value)].decode(errors='replace')
+                setattr(self, name, value)
+
+    class cache(record):
+        string_fields = ['path']
+
+        def is_device_detached(self):
+            return bool(self.state & ((1 << cas_netlink.cache_state_standby)
+                                      | (1 << cas_netlink.cache_state_detached)))
+
+        def is_standby(self):
+            return bool(self.state & (1 << cas_netlink.cache_state_standby))
+
+        def state_name(self):
+            if self.standby_detached:
+                return 'Standby detached'
+
+            # Combined states like "running&stopping" are reported as the latter
+            for i in reversed(range(len(cas_netlink.cache_states))):
+                if self.state & (1 << i):
+                    return cas_netlink.cache_states[i]
+
+            return 'Not running'
+
+        def mode_name(self):
+            if self.mode < len(cas_netlink.cache_modes):
+                return cas_netlink.cache_modes[self.mode]
+            return 'unknown'
+
+    class core(record):
+        string_fields = ['path']
+
+        def state_name(self):
+            if self.state < len(cas_netlink.core_states):
+                return cas_netlink.core_states[self.state]
+            return 'Invalid'
+
+        def exp_obj(self):
+            return f'/dev/cas{self.cache_id}-{self.id}'
+
+    class ioclass(record):
+        string_fields = ['name']
+
+    class pool_core(record):
+        string_fields = ['path']
+
+    class dump_result(object):
+        def __init__(self, caches=None, cores=None, ioclasses=None, core_pool=None):
+            self.caches = caches if caches else list()
+            self.cores = cores if cores else list()
+            self.ioclasses = ioclasses if ioclasses else list()
+            self.core_pool = core_pool if core_pool else list()
+
+        def cores_of(self, cache_id):
+            return [core for core in self.cores if core.cache_id == cache_id]
+
+        def to_caches_list(self):
+            """Render the dump the same way as 'casadm --list-caches --by-id-path'"""
+            devices = []
+
+            def flush_progress(dirty, flushed):
+                if not flushed:
+                    return 0
+                return 100.0 * flushed / (dirty + flushed)
+
+            def device(type, id, disk, status, write_policy, exp_obj):
+                return {
+                    'type': type,
+                    'id': id,
+                    'disk': disk,
+                    'status': status,
+                    'write policy': write_policy,
+                    'device': exp_obj,
+                }
+
+            if self.core_pool:
+                devices.append(device('core pool', '-', '-', '-', '-', '-'))
+                for core in self.core_pool:
+                    devices.append(device('core', '-', core.path, 'Detached', '-', '-'))
+
+            cores = dict()
+            for core in self.cores:
+                cores.setdefault(core.cache_id, []).append(core)
+
+            for cache in self.caches:
+                cache_progress = flush_progress(cache.dirty, cache.flushed)
+                exp_obj = '-'
+                if cache_progress:
+                    status = f'Flushing ({cache_progress:3.1f} %)'
+                    write_policy = f'wb->{cache.mode_name()}'
+                elif cache.is_standby():
+                    status = cache.state_name()
+                    write_policy = '-'
+                    if not cache.standby_detached:
+                        exp_obj = f'/dev/cas-cache-{cache.id}'
+                else:
+                    status = cache.state_name()
+                    write_policy = cache.mode_name()
+
+                devices.append(device(
+                    'cache', str(cache.id),
+                    '-' if cache.is_device_detached() else cache.path,
+                    status, write_policy, exp_obj))
+
+                for core in cores.get(cache.id, []):
+                    core_progress = flush_progress(core.dirty, core.flushed)
+                    if not core_progress and cache_progress:
+                        core_progress = 0 if core.dirty else 100
+
+                    if core_progress or cache_progress:
+                        status = f'Flushing ({core_progress:3.1f} %)'
+                    else:
+                        status = core.state_name()
+
+                    devices.append(device(
+                        'core', str(core.id), core.path, status, '-',
+                        core.exp_obj() if core.exp_obj_exists else '-'))
+
+            return devices
+
+    @classmethod
+    def _define_structures(cls):
+        class stats(ctypes.Structure):
+            _fields_ = [(name, ctypes.c_uint64) for name in cls.stats_fields]
+
+        class cleaning_params(ctypes.Structure):
+            _fields_ = [(name, ctypes.c_uint32) for name in [
+                'policy', 'alru_wake_up', 'alru_stale_time', 'alru_flush_max_buffers',
+                'alru_activity_threshold', 'alru_dirty_ratio_threshold',
+                'alru_dirty_ratio_inertia', 'acp_wake_up', 'acp_flush_max_buffers']]
+
+        class promotion_params(ctypes.Structure):
+            _fields_ = [(name, ctypes.c_uint32) for name in [
+                'policy', 'nhit_insertion_threshold', 'nhit_trigger_threshold']]
+
+        class cache(ctypes.Structure):
+            _fields_ = [
+                ('id', ctypes.c_uint16),
+                ('path', ctypes.c_uint32),
+                ('state', ctypes.c_uint8),
+                ('mode', ctypes.c_uint8),
+                ('line_size', ctypes.c_uint32),
+                ('attached', ctypes.c_bool),
+                ('standby_detached', ctypes.c_bool),
+                ('size', ctypes.c_uint32),
+                ('occupancy', ctypes.c_uint32),
+                ('dirty', ctypes.c_uint32),
+                ('dirty_for', ctypes.c_uint64),
+                ('dirty_initial', ctypes.c_uint32),
+                ('flushed', ctypes.c_uint32),
+                ('core_count', ctypes.c_uint32),
+                ('metadata_footprint', ctypes.c_uint64),
+                ('metadata_end_offset', ctypes.c_uint32),
+                ('fallback_pt_errors', ctypes.c_uint32),
+                ('fallback_pt_status', ctypes.c_uint8),
+                ('inactive_occupancy', ctypes.c_uint64),
+                ('inactive_clean', ctypes.c_uint64),
+                ('inactive_dirty', ctypes.c_uint64),
+                ('cleaning', cleaning_params),
+                ('promotion', promotion_params),
+                ('stats', stats),
+            ]
+
+        class core(ctypes.Structure):
+            _fields_ = [
+                ('cache_id', ctypes.c_uint16),
+                ('id', ctypes.c_uint16),
+                ('path', ctypes.c_uint32),
+                ('state', ctypes.c_uint8),
+                ('exp_obj_exists', ctypes.c_bool),
+                ('size', ctypes.c_uint64),
+                ('size_bytes', ctypes.c_uint64),
+                ('dirty', ctypes.c_uint32),
+                ('dirty_for', ctypes.c_uint64),
+                ('flushed', ctypes.c_uint32),
+                ('seq_cutoff_threshold', ctypes.c_uint32),
+                ('seq_cutoff_policy', ctypes.c_uint8),
+                ('seq_cutoff_promo_count', ctypes.c_uint32),
+                ('stats', stats),
+            ]
+
+        class ioclass(ctypes.Structure):
+            _fields_ = [
+                ('cache_id', ctypes.c_uint16),
+                ('id', ctypes.c_uint32),
+                ('name', ctypes.c_uint32),
+                ('cache_mode', ctypes.c_uint8),
+                ('priority', ctypes.c_int16),
+                ('curr_size', ctypes.c_uint32),
+                ('min_size', ctypes.c_uint32),
+                ('max_size', ctypes.c_uint32),
+                ('cleaning_policy', ctypes.c_uint8),
+                ('stats', stats),
+            ]
+
+        class pool_core(ctypes.Structure):
+            _fields_ = [('path', ctypes.c_uint32)]
+
+        class compact_dump(ctypes.Structure):
+            _fields_ = [
+                ('caches', ctypes.POINTER(cache)),
+                ('num_caches', ctypes.c_int),
+                ('cores', ctypes.POINTER(core)),
+                ('num_cores', ctypes.c_int),
+                ('ioclasses', ctypes.POINTER(ioclass)),
+                ('num_ioclasses', ctypes.c_int),
+                ('core_pool', ctypes.POINTER(pool_core)),
+                ('num_core_pool', ctypes.c_int),
+                ('strings', ctypes.POINTER(ctypes.c_char)),
+                ('strings_size', ctypes.c_uint32),
+                ('priv', ctypes.c_void_p),
+            ]
+
+        class dump_filter(ctypes.Structure):
+            _fields_ = [
+                ('cache_id', ctypes.c_int),
+                ('core_id', ctypes.c_int),
+                ('ioclass_id', ctypes.c_int),
+                ('records', ctypes.c_uint32),
+                ('sections', ctypes.c_uint32),
+            ]
+
+        cls._c_compact_dump = compact_dump
+        cls._c_dump_filter = dump_filter
+
+    @classmethod
+    def get_lib(cls):
+        if not cls._lib_loaded:
+            cls._lib_loaded = True
+            try:
+                lib = ctypes.CDLL(cls.lib_path)
+            except OSError:
+                return None
+
+            cls._define_structures()
+            lib.cas_nl_compact_dump.argtypes = [
+                ctypes.POINTER(cls._c_dump_filter), ctypes.POINTER(cls._c_compact_dump)
+            ]
+            lib.cas_nl_compact_dump.restype = ctypes.c_int
+            cls._lib = lib
+
+        return cls._lib
+
+    @classmethod
+    def is_available(cls):
+        return cls.get_lib() is not None
+
+    @staticmethod
+    def get_mask(names, all_names):
+        mask = 0
+        for name in names:
+            if name not in all_names:
+                raise ValueError(f'Invalid dump filter name {name}')
+            mask |= 1 << all_names.index(name)
+        return mask
+
+    @classmethod
+    def get_filter(cls, cache_id=None, core_id=None, ioclass_id=None, records=None,
+                   sections=None):
+        """
+        C filter of dump, None selects everything. records and sections are
+        names from dump_records and dump_sections.
+        """
+        def get_id(value):
+            return cls.dump_any if value is None else int(value)
+
+        if records is None:
+            records = cls.dump_records
+        if sections is None:
+            sections = cls.dump_sections
+
+        return cls._c_dump_filter(
+            cache_id=get_id(cache_id),
+            core_id=get_id(core_id),
+            ioclass_id=get_id(ioclass_id),
+            records=cls.get_mask(records, cls.dump_records),
+            sections=cls.get_mask(sections, cls.dump_sections),
+        )
+
+    @classmethod
+    def dump(cls, cache_id=None, core_id=None, ioclass_id=None, records=None, sections=None):
+        """
+        Dump CAS state. Arguments narrow down the dump to records of given
+        cache, core and IO class, of given types (dump_records) and with
+        given sections (dump_sections) - attributes of other sections are
+        zero. Filtering is done in kernel, so polling a single device is cheap.
+        """
+        lib = cls.get_lib()
+        if lib is None:
+            raise cls.NetlinkError(errno.ENOENT)
+
+        c_filter = None
+        if (cache_id, core_id, ioclass_id, records, sections) != (None,) * 5:
+            c_filter = ctypes.byref(
+                cls.get_filter(cache_id, core_id, ioclass_id, records, sections))
+
+        with cls._dump_lock:
+            if cls._c_dump is None:
+                cls._c_dump = cls._c_compact_dump()
+            c_dump = cls._c_dump
+
+            ret = lib.cas_nl_compact_dump(c_filter, ctypes.byref(c_dump))
+            if ret != 0:
+                raise cls.NetlinkError(-ret)
+
+            strings = ctypes.string_at(c_dump.strings, c_dump.strings_size)
+            return cls.dump_result(
+                caches=[cls.cache(c_dump.caches[i], strings)
+                        for i in range(c_dump.num_caches)],
+                cores=[cls.core(c_dump.cores[i], strings)
+                       for i in range(c_dump.num_cores)],
+                ioclasses=[cls.ioclass(c_dump.ioclasses[i], strings)
+                           for i in range(c_dump.num_ioclasses)],
+                core_pool=[cls.pool_core(c_dump.core_pool[i], strings)
+                           for i in range(c_dump.num_core_pool)],
+            )
+
+
+# Block device uevents
+
+
+class uevent_monitor:
+    """
+    Listener for block device events broadcast by udev on NETLINK_KOBJECT_UEVENT
+    socket. The udev group is used instead of the kernel one, as udev sends
+    the event only after rules (including open-cas-loader) were executed and
+    device symlinks were created. Events are treated only as a hint to check
+    device paths again, so the sender is not verified.
+    """
+
+    NETLINK_KOBJECT_UEVENT = 15
+    GROUP_UDEV = 2
+    UDEV_PREFIX = b'libudev\0'
+    UDEV_MAGIC = 0xfeedcafe
+    RCVBUF_SIZE = 1024 * 1024
+    actions = ['add', 'change']
+
+    def __init__(self):
+        self.sock = socket.socket(
+            socket.AF_NETLINK,
+            socket.SOCK_DGRAM | socket.SOCK_CLOEXEC | socket.SOCK_NONBLOCK,
+            self.NETLINK_KOBJECT_UEVENT,
+        )
+        try:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.RCVBUF_SIZE)
+            self.sock.bind((0, self.GROUP_UDEV))
+        except OSError:
+            self.sock.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.sock.close()
+
+    @classmethod
+    def parse(cls, msg):
+        if not msg.startswith(cls.UDEV_PREFIX) or len(msg) < 24:
+            return None
+
+        magic, = struct.unpack_from('>I', msg, 8)
+        if magic != cls.UDEV_MAGIC:
+            return None
+
+        properties_off, properties_len = struct.unpack_from('=II', msg, 16)
+        properties = msg[properties_off:properties_off + properties_len]
+
+        event = {}
+        for entry in properties.split(b'\0'):
+            key, sep, value = entry.decode(errors='replace').partition('=')
+            if sep:
+                event[key] = value
+
+        return event
+
+    def _is_block_event(self, event):
+        return (
+            event is not None
+            and event.get('SUBSYSTEM') == 'block'
+            and event.get('ACTION') in self.actions
+        )
+
+    def wait(self, timeout):
+        """
+        Wait up to timeout seconds (indefinitely if None) for block device
+        events. Returns list of received events (dicts of uevent properties),
+        empty on timeout.
+        """
+        if timeout is not None:
+            timeout = max(timeout, 0)
+
+        ready, _, _ = select.select([self.sock], [], [], timeout)
+        if not ready:
+            return []
+
+        events = []
+        while True:
+            try:
+                msg = self.sock.recv(self.RCVBUF_SIZE)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                # Receive queue overrun - some events were lost, report
+                # synthetic one so that caller rescans devices anyway
+                if e.errno != errno.ENOBUFS:
+                    raise
+                events.append({'ACTION': 'add', 'SUBSYSTEM': 'block'})
+                continue
+
+            event = self.parse(msg)
+            if self._is_block_event(event):
+                events.append(event)
+
+        return events
+
+
+# Block device index
+
+
+class sysfs_index:
+    """
+    Block devices known to sysfs, collected with a single walk of
+    /sys/class/block (whole disks and partitions) and /dev/disk/by-id.
+    Maps device names, nodes and by-id links to sysfs directories of
+    the device and of its whole disk, and to its holders.
+
+    Shared index returned by get_shared() is built on first use and rebuilt
+    after invalidate() - on demand or when block device uevents arrive.
+    lookup_current() also rebuilds it when the device is missing or stale.
+    """
+
+    sys_block = '/sys/block'
+    sys_class_block = '/sys/class/block'
+    by_id_dir = '/dev/disk/by-id'
+
+    _shared = None
+    _lock = threading.Lock()
+
+    class device(object):
+        def __init__(self, name, sysfs_path, disk, holders):
+            self.name = name
+            self.sysfs_path = sysfs_path
+            self.disk = disk
+            self.holders = holders
+            self.by_id_links = []
+
+        def is_partition(self):
+            return self.disk != self.name
+
+    def __init__(self):
+        self.devices = dict()
+        self.by_id = dict()
+
+        # Symlinks are resolved with readlink rather than realpath, as all of
+        # them point directly to the target
+        for name in self._listdir(self.sys_class_block):
+            link = os.path.join(self.sys_class_block, name)
+            path = self._resolve(link)
+            if path is None:
+                continue
+
+            if os.path.exists(os.path.join(path, 'partition')):
+                disk = os.path.basename(os.path.dirname(path))
+            else:
+                disk = name
+
+            holders = sorted(self._listdir(os.path.join(path, 'holders')))
+            self.devices[name] = self.device(name, path, disk, holders)
+
+        for link in sorted(self._listdir(self.by_id_dir)):
+            path = os.path.join(self.by_id_dir, link)
+            target = self._resolve(path)
+            if target is None:
+                continue
+
+            name = self._node_name(target)
+            if name in self.devices:
+                self.by_id[path] = name
+                self.devices[name].by_id_links.append(path)
+
+    @staticmethod
+    def _listdir(path):
+        try:
+            return os.listdir(path)
+        except OSError:
+            return []
+
+    @staticmethod
+    def _resolve(link):
+        try:
+            target = os.readlink(link)
+        except OSError:
+            return None
+        return os.path.normpath(os.path.join(os.path.dirname(link), target))
+
+    @staticmethod
+    def _node_name(path):
+        # Nodes in /dev subdirectories have '/' replaced with '!' in sysfs
+        # (e.g. /dev/cciss/c0d0 is cciss!c0d0)
+        if not path.startswith('/dev/'):
+            return None
+        return path[len('/dev/'):].replace('/', '!')
+
+    @classmethod
+    def get_shared(cls):
+        with cls._lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @classmethod
+    def invalidate(cls):
+        with cls._lock:
+            cls._shared = None
+
+    @classmethod
+    def invalidate_on(cls, events):
+        """Invalidate shared index if any of uevent_monitor events arrived"""
+        if events:
+            cls.invalidate()
+
+    @classmethod
+    def lookup_current(cls, path, resolve=True):
+        """
+        Device from shared index, which is rebuilt first if the device isn't
+        there or its entry is stale - sysfs directory is gone or by-id link
+        points elsewhere - so devices changed without uevent are still seen.
+        """
+        device = cls.get_shared().lookup(path, resolve)
+        if device is None or not cls._is_current(path, device):
+            cls.invalidate()
+            device = cls.get_shared().lookup(path, resolve)
+        return device
+
+    @classmethod
+    def _is_current(cls, path, device):
+        if not os.path.isdir(device.sysfs_path):
+            return False
+        if path in device.by_id_links:
+            return cls._node_name(cls._resolve(path) or '') == device.name
+        return True
+
+    def lookup(self, path, resolve=False):
+        """
+        Device by its node, by-id link or name, None if it's unknown. Other
+        symlinks (e.g. /dev/mapper) are followed only if resolve is set.
+        """
+        name = self.by_id.get(path)
+        if name is None:
+            name = self._node_name(path) if path.startswith('/') else path
+        if name not in self.devices and resolve and path.startswith('/'):
+            name = self._node_name(os.path.realpath(path))
+
+        return self.devices.get(name)
+
+    def get_sysfs_path(self, path, resolve=True):
+        device = self.lookup(path, resolve)
+        return device.sysfs_path if device else None
+
+    def get_disk_sysfs_path(self, path, resolve=True):
+        """/sys/block directory of the device or of disk its partition is on"""
+        device = self.lookup(path, resolve)
+        return os.path.join(self.sys_block, device.disk) if device else None
+
+    def get_holders(self, path, resolve=True):
+        device = self.lookup(path, resolve)
+        return list(device.holders) if device else []
+
+
 # Configuration file parser
 
 
 class cas_config(object):
     default_location = '/etc/opencas/opencas.conf'
+    lookup_table_version = 1
     _by_id_dir = '/dev/disk/by-id'
 
     class ConflictingConfigException(ValueError):
@@ -189,6 +1307,11 @@ class cas_config(object):
     def get_by_id_path(path):
         path = os.path.abspath(path)
 
+        # Device nodes and by-id links are found in the index without
+        # touching the filesystem, other paths are checked directly
+        if sysfs_index.get_shared().lookup(path) is not None:
+            return path
+
         if os.path.exists(path) or cas_config._is_exp_obj_path(path):
             return path
         else:
@@ -434,8 +1557,22 @@ class cas_config(object):
 
         self.version_tag = version_tag
 
+        # Configured devices indexed by realpath, resolved once per entry, so
+        # that conflict checks don't have to walk (and resolve) the whole config
+        self._cache_devices = dict()
+        self._core_devices = dict()
+        for cache in self.caches.values():
+            self._cache_devices[os.path.realpath(cache.device)] = cache
+            for core in cache.cores.values():
+                self._core_devices[os.path.realpath(core.device)] = core
+
     @classmethod
     def from_file(cls, config_file, allow_incomplete=False):
+        with tracer.span('parse config', 'config', path=config_file):
+            return cls._from_file(config_file, allow_incomplete)
+
+    @classmethod
+    def _from_file(cls, config_file, allow_incomplete):
         section_caches = False
         section_cores = False
 
@@ -477,27 +1614,24 @@ class cas_config(object):
         return config
 
     def insert_cache(self, new_cache_config):
+        device_path = os.path.realpath(new_cache_config.device)
+
         if new_cache_config.cache_id in self.caches:
-            if (os.path.realpath(self.caches[new_cache_config.cache_id].device)
-                    != os.path.realpath(new_cache_config.device)):
+            if (self._cache_devices.get(device_path)
+                    is not self.caches[new_cache_config.cache_id]):
                 raise cas_config.ConflictingConfigException(
                         'Other cache device configured under this id')
             else:
                 raise cas_config.AlreadyConfiguredException(
                                 'Cache already configured')
 
-        for cache_id, cache in self.caches.items():
-            if cache_id != new_cache_config.cache_id:
-                if (os.path.realpath(new_cache_config.device)
-                        == os.path.realpath(cache.device)):
-                    raise cas_config.ConflictingConfigException(
-                            'This cache device is already configured as a cache')
+        if device_path in self._cache_devices:
+            raise cas_config.ConflictingConfigException(
+                    'This cache device is already configured as a cache')
 
-            for _, core in cache.cores.items():
-                if (os.path.realpath(core.device)
-                        == os.path.realpath(new_cache_config.device)):
-                    raise cas_config.ConflictingConfigException(
-                            'This cache device is already configured as a core')
+        if device_path in self._core_devices:
+            raise cas_config.ConflictingConfigException(
+                    'This cache device is already configured as a core')
 
         try:
             new_cache_config.device = cas_config.get_by_id_path(new_cache_config.device)
@@ -505,35 +1639,30 @@ class cas_config(object):
             pass
 
         self.caches[new_cache_config.cache_id] = new_cache_config
+        self._cache_devices[device_path] = new_cache_config
 
     def insert_core(self, new_core_config):
         if new_core_config.cache_id not in self.caches:
             raise KeyError(f'Cache id {new_core_config.cache_id} doesn\'t exist')
 
-        try:
-            for cache_id, cache in self.caches.items():
-                if (os.path.realpath(cache.device)
-                        == os.path.realpath(new_core_config.device)):
-                    raise cas_config.ConflictingConfigException(
-                            'Core device already configured as a cache')
-
-                for core_id, core in cache.cores.items():
-                    if (cache_id == new_core_config.cache_id
-                            and core_id == new_core_config.core_id):
-                        if (os.path.realpath(core.device)
-                                == os.path.realpath(new_core_config.device)):
-                            raise cas_config.AlreadyConfiguredException(
-                                    'Core already configured')
-                        else:
-                            raise cas_config.ConflictingConfigException(
-                                    'Other core device configured under this id')
-                    else:
-                        if (os.path.realpath(core.device)
-                                == os.path.realpath(new_core_config.device)):
-                            raise cas_config.ConflictingConfigException(
-                                    'This core device is already configured as a core')
-        except KeyError:
-            pass
+        device_path = os.path.realpath(new_core_config.device)
+
+        if device_path in self._cache_devices:
+            raise cas_config.ConflictingConfigException(
+                    'Core device already configured as a cache')
+
+        core = self.caches[new_core_config.cache_id].cores.get(new_core_config.core_id)
+        if core is not None:
+            if self._core_devices.get(device_path) is core:
+                raise cas_config.AlreadyConfiguredException(
+                        'Core already configured')
+            else:
+                raise cas_config.ConflictingConfigException(
+                        'Other core device configured under this id')
+
+        if device_path in self._core_devices:
+            raise cas_config.ConflictingConfigException(
+                    'This core device is already configured as a core')
 
         try:
             new_core_config.device = cas_config.get_by_id_path(new_core_config.device)
@@ -542,6 +1671,44 @@ class cas_config(object):
 
         self.caches[new_core_config.cache_id].cores[new_core_config.core_id] = new_core_config
         self.cores += [new_core_config]
+        self._core_devices[device_path] = new_core_config
+
+    @staticmethod
+    def get_exp_obj_ids(path):
+        match = re.match(r"/dev/cas(\d{1,5})-(\d{1,4})", path)
+        if not match:
+            return None
+
+        return tuple(int(i) for i in match.groups())
+
+    def get_dependencies(self, with_cores=True):
+        """
+        Dependency graph of configured devices, used for ordered bring-up.
+
+        Maps ('cache', cache_id) keys and, if with_cores is set, also
+        ('core', cache_id, core_id) keys to lists of keys of devices which
+        have to be set up first. Without cores, a device stacked on exported
+        object casX-Y depends on cache X.
+        """
+        def exp_obj_key(path):
+            ids = cas_config.get_exp_obj_ids(path)
+            if ids is None:
+                return None
+            return ('core',) + ids if with_cores else ('cache', ids[0])
+
+        dependencies = collections.OrderedDict()
+
+        for cache in self.caches.values():
+            key = exp_obj_key(cache.device)
+            dependencies[('cache', cache.cache_id)] = [key] if key else []
+
+        if with_cores:
+            for core in self.cores:
+                key = exp_obj_key(core.device)
+                dependencies[('core', core.cache_id, core.core_id)] = (
+                    [('cache', core.cache_id)] + ([key] if key else []))
+
+        return dependencies
 
     def is_empty(self):
         if len(self.caches) > 0 or len(self.cores) > 0:
@@ -565,6 +1732,82 @@ class cas_config(object):
         except Exception:
             raise Exception('Couldn\'t write config file')
 
+    @staticmethod
+    def lookup_table_location(config_file):
+        return f'{config_file}.compiled'
+
+    def get_lookup_table(self, config_stat):
+        """
+        Lookup table for the per-device udev loader, tied to the config file
+        by its mtime and size. 'devices' maps configured device paths to
+        actions (cache to load or core to add), 'realpaths' maps device nodes
+        the paths resolved to at the time of compilation to configured paths.
+        """
+        devices = dict()
+
+        for cache in self.caches.values():
+            devices[cache.device] = {
+                'type': 'cache',
+                'cache_id': cache.cache_id,
+                'device': cache.device,
+                'cache_mode': cache.cache_mode,
+                'params': cache.params,
+            }
+
+        for core in self.cores:
+            devices[core.device] = {
+                'type': 'core',
+                'cache_id': core.cache_id,
+                'core_id': core.core_id,
+                'device': core.device,
+                'params': core.params,
+            }
+
+        return {
+            'version': cas_config.lookup_table_version,
+            'mtime_ns': config_stat.st_mtime_ns,
+            'size': config_stat.st_size,
+            'devices': devices,
+            'realpaths': {os.path.realpath(path): path for path in devices},
+        }
+
+    @classmethod
+    def compile_lookup_table(cls, config_file=default_location, allow_incomplete=True):
+        """
+        Parse config file and store its lookup table next to it. Failure to
+        store the table (e.g. read-only /etc) is not an error. Returns the table.
+        """
+        # Stat before parsing, so that config modified in the meantime
+        # invalidates the table
+        config_stat = os.stat(config_file)
+        config = cls.from_file(config_file, allow_incomplete)
+        table = config.get_lookup_table(config_stat)
+
+        table_file = cls.lookup_table_location(config_file)
+        tmp_file = f'{table_file}.{os.getpid()}'
+        try:
+            with open(tmp_file, 'w') as f:
+                json.dump(table, f)
+            os.replace(tmp_file, table_file)
+        except OSError:
+            try:
+                os.unlink(tmp_file)
+            except OSError:
+                pass
+
+        return table
+
+    @staticmethod
+    def from_lookup_entry(entry):
+        if entry['type'] == 'cache':
+            return cas_config.cache_config(
+                entry['cache_id'], entry['device'], entry['cache_mode'], **entry['params']
+            )
+
+        return cas_config.core_config(
+            entry['cache_id'], entry['core_id'], entry['device'], **entry['params']
+        )
+
 # Config helper functions
 
 
@@ -590,18 +1833,18 @@ def start_cache(cache, load, force=False):
 
 
 def configure_cache(cache):
-    if "cleaning_policy" in cache.params:
-        casadm.set_param(
-            "cleaning", cache_id=cache.cache_id, policy=cache.params["cleaning_policy"]
-        )
-    if "promotion_policy" in cache.params:
-        casadm.set_param(
-            "promotion", cache_id=cache.cache_id, policy=cache.params["promotion_policy"]
-        )
-    if "ioclass_file" in cache.params:
-        casadm.io_class_load_config(
-            cache_id=cache.cache_id, ioclass_file=cache.params["ioclass_file"]
-        )
+    params = collections.OrderedDict()
+    for namespace in ["cleaning", "promotion"]:
+        if f"{namespace}_policy" in cache.params:
+            params[namespace] = {"policy": cache.params[f"{namespace}_policy"]}
+
+    with casadm.batch_mode():
+        if params:
+            casadm.set_params(cache.cache_id, params)
+        if "ioclass_file" in cache.params:
+            casadm.io_class_load_config(
+                cache_id=cache.cache_id, ioclass_file=cache.params["ioclass_file"]
+            )
 
 
 def add_core(core, attach):
@@ -614,6 +1857,53 @@ def add_core(core, attach):
 # Another helper functions
 
 
+def run_with_dependencies(tasks, dependencies, workers=None):
+    """
+    Run tasks concurrently on a pool of up to workers threads.
+
+    tasks maps keys to callables, dependencies maps keys to lists of keys of
+    tasks that have to be completed first. A task is run as soon as all its
+    dependencies completed, regardless of their result; dependencies on keys
+    missing in tasks are ignored. Ready tasks are started in tasks order.
+
+    Returns tuple of dict mapping keys of tasks that were run to their done
+    futures and list of keys of tasks never run due to circular dependencies.
+    """
+    pending = {
+        key: set(dep for dep in dependencies.get(key, []) if dep in tasks) for key in tasks
+    }
+    dependents = {key: [] for key in tasks}
+    for key, deps in pending.items():
+        for dep in deps:
+            dependents[dep].append(key)
+
+    futures = collections.OrderedDict()
+    running = dict()
+    ready = collections.deque(key for key in tasks if not pending[key])
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        while ready or running:
+            while ready:
+                key = ready.popleft()
+                future = executor.submit(tasks[key])
+                futures[key] = future
+                running[future] = key
+
+            done, _ = concurrent.futures.wait(
+                running, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                key = running.pop(future)
+                for dependent in dependents[key]:
+                    pending[dependent].discard(key)
+                    if not pending[dependent]:
+                        ready.append(dependent)
+
+    blocked = [key for key in tasks if key not in futures]
+
+    return futures, blocked
+
+
 def is_cache_started(cache_config):
     dev_list = get_caches_list()
     for dev in dev_list:
@@ -639,6 +1929,13 @@ def is_core_added(core_config):
 
 
 def get_caches_list():
+    if cas_netlink.is_available():
+        try:
+            return cas_netlink.dump().to_caches_list()
+        except cas_netlink.NetlinkError:
+            # Fall back to casadm, e.g. when running against older cas_cache module
+            pass
+
     result = casadm.list_caches()
     return list(csv.DictReader(result.stdout.split('\n')))
 
@@ -691,90 +1988,780 @@ class CompoundException(Exception):
             raise self
 
 
-def detach_core_recursive(cache_id, core_id, flush):
-    # Catching exceptions is left to uppermost caller of detach_core_recursive
-    # as the immediate caller that made a recursive call depends on the callee
-    # to remove core and thus release reference to lower level cache volume.
-    l_cache_id = ''
-    for dev in get_caches_list():
+def get_teardown_plan(dev_list):
+    """
+    Teardown plan for a single snapshot of get_caches_list() output.
+
+    Returns tuple of OrderedDict mapping ('core', cache_id, core_id) keys of
+    active cores and ('cache', cache_id) keys to their entries in dev_list, and
+    dependencies mapping keys to lists of keys that have to be torn down first.
+    A core waits for devices stacked on its exported object and for previous
+    core of the same cache, so that each cache is handled by one worker at
+    a time. A cache waits for all its cores.
+    """
+    def exp_obj_ids(path):
+        ids = cas_config.get_exp_obj_ids(path)
+        if ids is None and path.startswith('/dev/disk/'):
+            ids = cas_config.get_exp_obj_ids(os.path.realpath(path))
+        return ids
+
+    devices = collections.OrderedDict()
+    users = collections.defaultdict(list)
+    cache_id = None
+
+    for dev in dev_list:
         if dev['type'] == 'cache':
-            l_cache_id = dev['id']
+            cache_id = int(dev['id'])
+            key = ('cache', cache_id)
         elif dev['type'] == 'core' and dev['status'] == 'Active':
-            if f'/dev/cas{cache_id}-{core_id}' in dev['disk']:
-                detach_core_recursive(l_cache_id, dev['id'], flush)
-        elif l_cache_id == cache_id and dev['id'] == core_id and dev['status'] != 'Active':
+            key = ('core', cache_id, int(dev['id']))
+        else:
+            continue
+
+        devices[key] = dev
+        ids = exp_obj_ids(dev['disk'])
+        if ids is not None:
+            users[ids].append(key)
+
+    dependencies = collections.OrderedDict()
+    prev_core = dict()
+
+    for key in devices:
+        if key[0] == 'core':
+            deps = list(users[key[1:]])
+            if key[1] in prev_core:
+                deps.append(prev_core[key[1]])
+            prev_core[key[1]] = key
+        else:
+            deps = []
+        dependencies[key] = deps
+
+    for key in devices:
+        if key[0] == 'core':
+            dependencies[('cache', key[1])].append(key)
+
+    return devices, dependencies
+
+
+class config_operation(object):
+    """Single step of reconciling running devices with configuration"""
+
+    def __init__(self, description, action, cache_id, core_id=None, flush=False):
+        self.description = description
+        self.action = action
+        self.cache_id = cache_id
+        self.core_id = core_id
+        self.flush = flush
+
+    def __str__(self):
+        return self.description
+
+    def run(self):
+        self.action()
+
+
+def get_stop_plan(flush, dev_list=None):
+    """
+    Operations tearing down all devices, built from a single snapshot of
+    get_caches_list() output. Cores are detached (and flushed if requested)
+    first, caches are stopped without flushing once all their cores are gone.
+
+    Returns tuple of OrderedDict mapping get_teardown_plan keys to
+    config_operation and dependencies between the keys.
+    """
+    if dev_list is None:
+        try:
+            dev_list = get_caches_list()
+        except casadm.CasadmError as e:
+            raise Exception(f'Unable to list caches. Reason:\n{e.result.stderr}')
+        except Exception:
+            raise Exception('Unable to list caches.')
+
+    devices, dependencies = get_teardown_plan(dev_list)
+
+    # List operations in order they can be run in, keeping listing order
+    # otherwise. Circular dependencies are left to run_with_dependencies.
+    ordered = []
+    visiting = set()
+
+    def visit(key):
+        if key in ordered or key in visiting:
             return
+        visiting.add(key)
+        for dep in dependencies[key]:
+            if dep in devices:
+                visit(dep)
+        ordered.append(key)
+
+    for key in devices:
+        visit(key)
+
+    operations = collections.OrderedDict()
+    for key in ordered:
+        dev = devices[key]
+        if key[0] == 'core':
+            operations[key] = config_operation(
+                f"detach core {key[2]} ({dev['disk']}) from cache {key[1]}",
+                functools.partial(
+                    casadm.remove_core, key[1], key[2], detach=True, force=not flush
+                ),
+                key[1], key[2], flush=flush,
+            )
+        else:
+            operations[key] = config_operation(
+                f"stop cache {key[1]} ({dev['disk']})",
+                functools.partial(casadm.stop_cache, key[1], no_flush=True),
+                key[1],
+            )
 
-    casadm.remove_core(cache_id, core_id, detach=True, force=not flush)
+    return operations, dependencies
 
 
-def detach_all_cores(flush):
+def stop(flush, workers=None):
     error = CompoundException()
 
+    # Devices of independent caches are torn down concurrently
+    operations, dependencies = get_stop_plan(flush)
+
+    # Dirty data at the beginning of the flush lets us record its throughput
+    # for future estimates
+    dump = None
+    if flush and cas_netlink.is_available():
+        try:
+            dump = cas_netlink.dump()
+        except cas_netlink.NetlinkError:
+            pass
+
+    durations = dict()
+
+    def timed(key, operation):
+        start = time.monotonic()
+        operation.run()
+        durations[key] = time.monotonic() - start
+
+    tasks = collections.OrderedDict(
+        (key, functools.partial(timed, key, operation))
+        for key, operation in operations.items()
+    )
+
+    futures, blocked = run_with_dependencies(tasks, dependencies, workers)
+
+    if dump is not None:
+        flush_estimator.record_history(dump, {
+            key[1:]: duration for key, duration in durations.items() if key[0] == 'core'
+        })
+
+    # In case of exception we proceed with remaining devices to gracefully
+    # shutdown as many cache instances as possible.
+    for key, operation in operations.items():
+        if key in blocked:
+            error.add_exception(Exception(
+                f"Unable to {operation}. Reason:\nRecursive configuration!"))
+            continue
+
+        try:
+            futures[key].result()
+        except casadm.CasadmError as e:
+            error.add_exception(Exception(
+                f"Unable to {operation}. Reason:\n{e.result.stderr}"))
+        except Exception:
+            error.add_exception(Exception(f"Unable to {operation}."))
+
+    error.raise_nonempty()
+
+
+def get_policy(namespace, cache_id):
+    result = casadm.get_params(namespace, cache_id)
+    for row in csv.reader(result.stdout.splitlines()[1:]):
+        if len(row) >= 2 and row[0].strip().lower().endswith('policy type'):
+            return row[1].strip().lower()
+
+    return None
+
+
+def _get_ioclass_rows(lines):
+    rows = set()
+    for row in csv.reader(lines[1:]):
+        if not row:
+            continue
+        rows.add((int(row[0]), row[1].strip(), row[2].strip().lower(), float(row[3])))
+
+    return rows
+
+
+def _ioclass_config_differs(cache_id, ioclass_file):
     try:
-        dev_list = get_caches_list()
-    except casadm.CasadmError as e:
-        raise Exception(f'Unable to list caches. Reason:\n{e.result.stderr}')
+        with open(ioclass_file, 'r') as f:
+            configured = _get_ioclass_rows(f.read().splitlines())
+        loaded = _get_ioclass_rows(casadm.io_class_list(cache_id).stdout.splitlines())
     except Exception:
-        raise Exception('Unable to list caches.')
+        return True
 
-    for dev in dev_list:
-        if dev['type'] == 'cache':
-            cache_id = dev['id']
-        elif dev['type'] == 'core' and dev['status'] == "Active":
-            # In case of exception we proceed with detaching remaining core instances
-            # to gracefully shutdown as many cache instances as possible.
-            try:
-                detach_core_recursive(cache_id, dev['id'], flush)
-            except casadm.CasadmError as e:
-                error.add_exception(Exception(
-                    f"Unable to detach core {dev['disk']}. Reason:\n{e.result.stderr}"))
-            except Exception:
-                error.add_exception(Exception(f"Unable to detach core {dev['disk']}."))
+    return configured != loaded
+
+
+def get_apply_plan(config, state=None):
+    """
+    Minimal list of operations bringing running devices in line with config.
+    Running caches present in config are never stopped - differences which
+    would require that are returned as warnings instead.
+
+    Returns tuple of list of config_operation and list of warning messages.
+    """
+    if state is None:
+        state = get_devices_state()
+
+    operations = []
+    warnings = []
+
+    def same_device(path, other_path):
+        return os.path.realpath(path) == os.path.realpath(other_path)
+
+    for cache_id, cache_state in state["caches"].items():
+        if cache_id not in config.caches:
+            warnings.append(
+                f"Cache {cache_id} ({cache_state['device']}) is not configured, leaving it running"
+            )
+
+    configured_cores = {(core.cache_id, core.core_id): core for core in config.cores}
+    running_caches = set()
+
+    for cache_id, cache in config.caches.items():
+        cache_state = state["caches"].get(cache_id)
+        if cache_state is None:
+            continue
+
+        if cache_state["status"] in ["Standby", "Detached"] or not same_device(
+            cache.device, cache_state["device"]
+        ):
+            warnings.append(
+                f"Cache {cache_id} ({cache_state['device']}) can't be reconfigured "
+                f"without stopping it, skipping"
+            )
+            continue
+
+        running_caches.add(cache_id)
+
+    # Removed cores go first, so that their ids can be reused by added ones
+    for (cache_id, core_id), core_state in state["cores"].items():
+        if cache_id not in running_caches:
+            continue
+
+        core = configured_cores.get((cache_id, core_id))
+        if core is not None and same_device(core.device, core_state["device"]):
+            continue
+
+        operations.append(config_operation(
+            f"remove core {core_id} ({core_state['device']}) from cache {cache_id}",
+            functools.partial(casadm.remove_core, cache_id, core_id),
+            cache_id, core_id, flush=True,
+        ))
+
+    for cache_id in running_caches:
+        cache = config.caches[cache_id]
+        params = cache.params
+        current_mode = state["caches"][cache_id]["mode"].split("->")[-1]
+
+        if current_mode != cache.cache_mode:
+            flush = current_mode in ["wb", "wo"]
+            operations.append(config_operation(
+                f"change cache mode of cache {cache_id} from {current_mode} to {cache.cache_mode}",
+                functools.partial(
+                    casadm.set_cache_mode, cache_id, cache.cache_mode,
+                    flush=flush if flush else None
+                ),
+                cache_id, flush=flush,
+            ))
+
+        for namespace in ["cleaning", "promotion"]:
+            policy = params.get(f"{namespace}_policy")
+            if policy is None or get_policy(namespace, cache_id) == policy:
+                continue
+
+            operations.append(config_operation(
+                f"set {namespace} policy of cache {cache_id} to {policy}",
+                functools.partial(casadm.set_param, namespace, cache_id=cache_id, policy=policy),
+                cache_id,
+            ))
+
+        ioclass_file = params.get("ioclass_file")
+        if ioclass_file is not None and _ioclass_config_differs(cache_id, ioclass_file):
+            operations.append(config_operation(
+                f"load io class config {ioclass_file} to cache {cache_id}",
+                functools.partial(
+                    casadm.io_class_load_config, cache_id=cache_id, ioclass_file=ioclass_file
+                ),
+                cache_id,
+            ))
+
+    def start_and_configure(cache):
+        start_cache(cache, load=False)
+        configure_cache(cache)
+
+    for cache_id, cache in config.caches.items():
+        if cache_id in state["caches"]:
+            continue
+
+        operations.append(config_operation(
+            f"start cache {cache_id} ({cache.device})",
+            functools.partial(start_and_configure, cache),
+            cache_id,
+        ))
+
+    for core in config.cores:
+        key = (core.cache_id, core.core_id)
+        if core.cache_id not in running_caches and core.cache_id in state["caches"]:
+            continue
+
+        core_state = state["cores"].get(key)
+        if core_state is not None and same_device(core.device, core_state["device"]):
+            continue
+
+        operations.append(config_operation(
+            f"add core {core.core_id} ({core.device}) to cache {core.cache_id}",
+            functools.partial(add_core, core, False),
+            core.cache_id, core.core_id,
+        ))
+
+    return operations, warnings
+
+
+def apply(operations, report=None):
+    """
+    Run operations from get_apply_plan in order. Failed operation doesn't
+    stop the remaining ones. report, if given, is called with each operation
+    before it's run.
+    """
+    error = CompoundException()
+
+    for operation in operations:
+        if report:
+            report(operation)
+
+        try:
+            operation.run()
+        except casadm.CasadmError as e:
+            error.add_exception(Exception(
+                f"Unable to {operation}. Reason:\n{e.result.stderr}"))
+        except Exception as e:
+            error.add_exception(Exception(f"Unable to {operation}. Reason:\n{str(e)}"))
 
     error.raise_nonempty()
 
 
-def stop_all_caches(flush):
+# Flush time estimates
+
+
+class flush_estimator(object):
+    """
+    Estimates how long flushing dirty data of caches and cores will take.
+
+    Dirty data is read from netlink dump. Throughput of a cache is taken, in
+    order of preference, from the value given explicitly, from flush progress
+    observed between two dumps (if the cache is being flushed right now) or
+    from history of previous flushes done by stop().
+    """
+
+    history_location = '/var/lib/opencas/flush-throughput.json'
+
+    def __init__(self, dump, observed=None, throughput=None, history=None):
+        self.dump = dump
+        self.observed = observed if observed else dict()
+        self.throughput = throughput
+        self.history = history if history else dict()
+
+    @classmethod
+    def load_history(cls, history_file=history_location):
+        try:
+            with open(history_file, 'r') as f:
+                history = json.load(f)
+        except (OSError, ValueError):
+            return dict()
+
+        return history if isinstance(history, dict) else dict()
+
+    @classmethod
+    def record_history(cls, dump, durations, history_file=history_location):
+        """
+        Save throughput of flushes done by detaching cores. dump is taken
+        before the flush, durations maps (cache_id, core_id) of detached cores
+        to number of seconds it took. Failures are ignored, as history is
+        only a hint for future estimates.
+        """
+        flushed = collections.defaultdict(lambda: [0, 0.0])
+        line_sizes = {cache.id: cache.line_size for cache in dump.caches}
+        paths = {cache.id: cache.path for cache in dump.caches}
+
+        for core in dump.cores:
+            duration = durations.get((core.cache_id, core.id))
+            if not duration or not core.dirty or core.cache_id not in paths:
+                continue
+            flushed[core.cache_id][0] += core.dirty * line_sizes[core.cache_id]
+            flushed[core.cache_id][1] += duration
+
+        cls.save_history({
+            paths[cache_id]: size / duration
+            for cache_id, (size, duration) in flushed.items()
+        }, history_file)
+
+    @classmethod
+    def save_history(cls, throughputs, history_file=history_location):
+        """Save throughput [B/s] of flushes, mapping cache paths to values"""
+        if not throughputs:
+            return
+
+        history = cls.load_history(history_file)
+        for path, throughput in throughputs.items():
+            history[path] = {
+                'throughput': throughput,
+                'time': int(time.time()),
+            }
+
+        try:
+            os.makedirs(os.path.dirname(history_file), exist_ok=True)
+            tmp_file = f'{history_file}.tmp'
+            with open(tmp_file, 'w') as f:
+                json.dump(history, f)
+            os.replace(tmp_file, history_file)
+        except OSError:
+            pass
+
+    @classmethod
+    def measure(cls, sample_time=1.0, throughput=None, history_file=history_location):
+        """
+        Take two netlink dumps sample_time seconds apart to observe throughput
+        of ongoing flushes. throughput [B/s] overrides all other sources.
+        """
+        first = cas_netlink.dump()
+        if sample_time <= 0:
+            return cls(first, throughput=throughput,
+                       history=cls.load_history(history_file))
+
+        start = time.monotonic()
+        time.sleep(sample_time)
+        second = cas_netlink.dump()
+        elapsed = time.monotonic() - start
+
+        return cls(second, cls.get_observed(first, second, elapsed), throughput,
+                   cls.load_history(history_file))
+
+    @staticmethod
+    def get_observed(first, second, elapsed):
+        """
+        Throughput [B/s] of caches that made flush progress between dumps.
+        Whole cache flush is reported in cache counters, flush of a single
+        core in counters of that core.
+        """
+        def flushed_lines(dump):
+            lines = {cache.id: cache.flushed for cache in dump.caches}
+            core_lines = collections.Counter()
+            for core in dump.cores:
+                core_lines[core.cache_id] += core.flushed
+            return {cache_id: max(count, core_lines[cache_id])
+                    for cache_id, count in lines.items()}
+
+        before = flushed_lines(first)
+        after = flushed_lines(second)
+        observed = dict()
+
+        for cache in second.caches:
+            delta = after[cache.id] - before.get(cache.id, 0)
+            # Counters are reset when flush is done or restarted
+            if delta > 0 and elapsed > 0:
+                observed[cache.id] = delta * cache.line_size / elapsed
+
+        return observed
+
+    def get_cache(self, cache_id):
+        for cache in self.dump.caches:
+            if cache.id == cache_id:
+                return cache
+        return None
+
+    def dirty_bytes(self, cache_id, core_id=None):
+        cache = self.get_cache(cache_id)
+        if cache is None:
+            return 0
+
+        if core_id is None:
+            return cache.dirty * cache.line_size
+
+        for core in self.dump.cores_of(cache_id):
+            if core.id == core_id:
+                return core.dirty * cache.line_size
+
+        return 0
+
+    def get_throughput(self, cache_id):
+        if self.throughput:
+            return self.throughput
+
+        if cache_id in self.observed:
+            return self.observed[cache_id]
+
+        cache = self.get_cache(cache_id)
+        if cache is not None and cache.path in self.history:
+            return self.history[cache.path].get('throughput')
+
+        return None
+
+    def estimate(self, cache_id, core_id=None):
+        """Seconds to flush cache or core, None if throughput is unknown"""
+        dirty = self.dirty_bytes(cache_id, core_id)
+        if not dirty:
+            return 0
+
+        throughput = self.get_throughput(cache_id)
+        if not throughput:
+            return None
+
+        return dirty / throughput
+
+
+def get_flush_estimates(operations, estimator, dependencies=None):
+    """
+    Estimated flush time of operations and of the whole plan.
+
+    operations is a list of config_operation run one after another or, if
+    dependencies are given, an OrderedDict of them run by run_with_dependencies
+    without workers limit. In the latter case total time is the longest chain
+    of dependent operations. Operations which don't flush take no time.
+
+    Returns tuple of list of (operation, dirty bytes, seconds) and total
+    seconds. Seconds are None where throughput is unknown.
+    """
+    if dependencies is None:
+        keys = list(range(len(operations)))
+        operations = collections.OrderedDict(zip(keys, operations))
+        dependencies = {key: keys[:key][-1:] for key in keys}
+
+    estimates = []
+    costs = dict()
+
+    for key, operation in operations.items():
+        if operation.flush:
+            dirty = estimator.dirty_bytes(operation.cache_id, operation.core_id)
+            seconds = estimator.estimate(operation.cache_id, operation.core_id)
+        else:
+            dirty, seconds = 0, 0
+        estimates.append((operation, dirty, seconds))
+        costs[key] = seconds
+
+    finish = dict()
+
+    def finish_time(key, visiting):
+        if key not in finish:
+            if key in visiting:
+                # Operations never run due to circular dependencies
+                return 0
+            visiting.add(key)
+            deps = [finish_time(dep, visiting) for dep in dependencies.get(key, [])
+                    if dep in operations]
+            visiting.discard(key)
+            if costs[key] is None or None in deps:
+                finish[key] = None
+            else:
+                finish[key] = costs[key] + max(deps, default=0)
+        return finish[key]
+
+    total = 0
+    for key in operations:
+        seconds = finish_time(key, set())
+        total = None if total is None or seconds is None else max(total, seconds)
+
+    return estimates, total
+
+
+# Flush - flush dirty data of multiple caches concurrently
+
+
+class flush_progress(object):
+    """Flush progress of a single cache, sizes in bytes"""
+
+    def __init__(self, cache_id, device, path=None, total=0):
+        self.cache_id = cache_id
+        self.device = device
+        self.path = path
+        self.total = total
+        self.flushed = 0
+        self.start_time = None
+        self.end_time = None
+        self.error = None
+
+    @property
+    def started(self):
+        return self.start_time is not None
+
+    @property
+    def done(self):
+        return self.end_time is not None
+
+    def elapsed(self, now=None):
+        if not self.started:
+            return 0
+        if self.done:
+            return self.end_time - self.start_time
+        return (now if now is not None else time.monotonic()) - self.start_time
+
+    def throughput(self, now=None):
+        elapsed = self.elapsed(now)
+        return self.flushed / elapsed if elapsed > 0 else 0
+
+    def update(self, cache):
+        """Update from netlink record of the cache while flush is running"""
+        if not self.started or self.done:
+            return
+
+        self.flushed = max(self.flushed, cache.flushed * cache.line_size)
+        # Data written in the meantime is flushed too
+        self.total = max(self.total, self.flushed + cache.dirty * cache.line_size)
+
+
+def get_flush_plan(dev_list, cache_ids=None):
+    """
+    Running caches to flush and dependencies between them for a single
+    snapshot of get_caches_list() output. Flushing a cache stacked on exported object of
+    another cache makes the lower cache dirty, so it is flushed only after
+    all caches stacked on it.
+
+    Returns tuple of OrderedDict mapping ('cache', cache_id) keys to entries
+    in dev_list and dependencies mapping keys to lists of keys to flush first.
+    """
+    devices, teardown_dependencies = get_teardown_plan(dev_list)
+
+    def is_running(dev):
+        return dev['status'] == 'Running' or dev['status'].startswith('Flushing')
+
+    caches = collections.OrderedDict(
+        (key, dev) for key, dev in devices.items()
+        if key[0] == 'cache' and is_running(dev)
+        and (cache_ids is None or key[1] in cache_ids)
+    )
+
+    if cache_ids is not None:
+        missing = [cache_id for cache_id in cache_ids if ('cache', cache_id) not in caches]
+        if missing:
+            raise Exception(
+                f"Cache {', '.join(str(cache_id) for cache_id in missing)} is not running"
+            )
+
+    dependencies = collections.OrderedDict((key, []) for key in caches)
+    for key, deps in teardown_dependencies.items():
+        if key[0] != 'core' or ('cache', key[1]) not in caches:
+            continue
+        for dep in deps:
+            user = ('cache', dep[1])
+            if user != ('cache', key[1]) and user not in dependencies[('cache', key[1])]:
+                dependencies[('cache', key[1])].append(user)
+
+    return caches, dependencies
+
+
+def _update_flush_progress(progress):
+    try:
+        dump = cas_netlink.dump(records=['cache'], sections=['config'])
+    except cas_netlink.NetlinkError:
+        return
+
+    for cache in dump.caches:
+        if cache.id in progress:
+            progress[cache.id].update(cache)
+
+
+def flush(cache_ids=None, workers=None, report=None, interval=1.0):
+    """
+    Flush caches (all running ones if cache_ids is None), up to workers caches
+    at a time. report, if given, is called with list of flush_progress every
+    interval seconds and once more when all flushes are finished. Progress
+    within a flush is read from netlink dump, if it's available.
+
+    Returns list of flush_progress.
+    """
     error = CompoundException()
 
     try:
         dev_list = get_caches_list()
     except casadm.CasadmError as e:
         raise Exception(f'Unable to list caches. Reason:\n{e.result.stderr}')
-    except Exception:
-        raise Exception('Unable to list caches.')
 
-    for dev in dev_list:
-        if dev['type'] == 'cache':
-            # In case of exception we proceed with stopping subsequent cache instances
-            # to gracefully shutdown as many cache instances as possible.
-            try:
-                casadm.stop_cache(dev['id'], not flush)
-            except casadm.CasadmError as e:
-                error.add_exception(Exception(
-                    f"Unable to stop cache {dev['disk']}. Reason:\n{e.result.stderr}"))
-            except Exception:
-                error.add_exception(Exception(f"Unable to stop cache {dev['disk']}."))
+    caches, dependencies = get_flush_plan(dev_list, cache_ids)
 
-    error.raise_nonempty()
+    progress = collections.OrderedDict(
+        (key[1], flush_progress(key[1], dev['disk'])) for key, dev in caches.items()
+    )
+
+    netlink = cas_netlink.is_available()
+    if netlink:
+        try:
+            dump = cas_netlink.dump(records=['cache'], sections=['config'])
+        except cas_netlink.NetlinkError:
+            netlink = False
+        else:
+            for cache in dump.caches:
+                if cache.id in progress:
+                    progress[cache.id].path = cache.path
+                    progress[cache.id].total = cache.dirty * cache.line_size
 
+    def flush_cache(item):
+        item.start_time = time.monotonic()
+        try:
+            casadm.flush_cache(item.cache_id)
+            item.flushed = item.total
+        finally:
+            item.end_time = time.monotonic()
 
-def stop(flush):
-    error = CompoundException()
+    tasks = collections.OrderedDict(
+        (key, functools.partial(flush_cache, progress[key[1]])) for key in caches
+    )
 
-    try:
-        detach_all_cores(flush)
-    except Exception as e:
-        error.add_exception(e)
+    finished = threading.Event()
+
+    def monitor():
+        while not finished.wait(interval):
+            if netlink:
+                _update_flush_progress(progress)
+            report(list(progress.values()))
+
+    monitor_thread = None
+    if report:
+        monitor_thread = threading.Thread(target=monitor, daemon=True)
+        monitor_thread.start()
 
     try:
-        stop_all_caches(False)
-    except Exception as e:
-        error.add_exception(e)
+        futures, blocked = run_with_dependencies(tasks, dependencies, workers)
+    finally:
+        finished.set()
+        if monitor_thread:
+            monitor_thread.join()
+
+    for key, dev in caches.items():
+        item = progress[key[1]]
+        if key in blocked:
+            item.error = "Recursive configuration!"
+        else:
+            try:
+                futures[key].result()
+            except casadm.CasadmError as e:
+                item.error = e.result.stderr
+            except Exception as e:
+                item.error = str(e)
+
+        if item.error is not None:
+            error.add_exception(Exception(
+                f"Unable to flush cache {item.cache_id} ({item.device}). Reason:\n{item.error}"))
+
+    if report:
+        report(list(progress.values()))
+
+    flush_estimator.save_history({
+        item.path: item.throughput() for item in progress.values()
+        if item.path and item.error is None and item.flushed and item.elapsed() > 0
+    })
 
     error.raise_nonempty()
 
+    return list(progress.values())
+
 
 def get_devices_state():
     device_list = get_caches_list()
@@ -797,6 +2784,7 @@ def get_devices_state():
                     int(device["id"]): {
                         "device": device["disk"],
                         "status": device["status"],
+                        "mode": device["write policy"],
                     }
                 }
             )
@@ -822,7 +2810,7 @@ def wait_for_cas_ctrl():
     for i in range(30):  # timeout 30s
         if os.path.exists('/dev/cas_ctrl'):
             return
-        time.sleep(1)
+        tracer.sleep(1, 'wait for cas_ctrl')
 
 
 def _get_uninitialized_devices(target_dev_state):
@@ -851,7 +2839,25 @@ def _get_uninitialized_devices(target_dev_state):
     return not_initialized
 
 
-def wait_for_startup(timeout=300, interval=5):
+def _wait_for_devices(monitor, devices, timeout):
+    """
+    Wait until path of any of given devices which is not present yet shows up
+    or timeout expires.
+    """
+    stop_time = time.time() + timeout
+    missing = [dev for dev in devices if not os.path.exists(dev.device)]
+
+    while stop_time > time.time():
+        with tracer.span('wait for uevent', 'sleep'):
+            events = monitor.wait(stop_time - time.time())
+        if not events:
+            continue
+
+        if any(os.path.exists(dev.device) for dev in missing):
+            return
+
+
+def wait_for_startup(timeout=300, interval=5, uevents=False):
     def start_device(dev):
         if os.path.exists(dev.device):
             if type(dev) is cas_config.core_config:
@@ -872,22 +2878,137 @@ def wait_for_startup(timeout=300, interval=5):
     if not not_initialized:
         return []
 
-    subprocess.run(["udevadm", "settle"])
-
-    for dev in not_initialized:
-        start_device(dev)
+    # Subscribe before settling udev so that no event is missed in between.
+    # Polling with given interval is still done as a safety net.
+    monitor = None
+    if uevents:
+        try:
+            monitor = uevent_monitor()
+        except OSError:
+            monitor = None
 
-    while stop_time > time.time():
-        not_initialized = _get_uninitialized_devices(config)
-        wait = False
+    try:
+        with tracer.span("udevadm settle", "settle"):
+            subprocess.run(["udevadm", "settle"])
 
         for dev in not_initialized:
-            wait = wait or not dev.is_lazy()
             start_device(dev)
 
-        if not wait:
-            break
+        while stop_time > time.time():
+            not_initialized = _get_uninitialized_devices(config)
+            wait = False
 
-        time.sleep(interval)
+            for dev in not_initialized:
+                wait = wait or not dev.is_lazy()
+                start_device(dev)
+
+            if not wait:
+                break
+
+            if monitor:
+                _wait_for_devices(
+                    monitor, not_initialized, min(interval, stop_time - time.time())
+                )
+            else:
+                tracer.sleep(interval)
+    finally:
+        if monitor:
+            monitor.close()
 
     return not_initialized
+
+
+# Resident device loader
+
+
+class device_loader(object):
+    """
+    Resident counterpart of open-cas-loader.py. Keeps parsed config in memory
+    and sets up configured devices reported by uevents in batches, checking
+    their state with a single snapshot per batch.
+    """
+
+    def __init__(self, config_file=cas_config.default_location):
+        self.config_file = config_file
+        self.config_stat = None
+        self.config = None
+        self.devices = dict()
+        self.reload_config()
+
+    def reload_config(self):
+        """Parse config file again if it changed. Returns True if it was parsed."""
+        config_stat = os.stat(self.config_file)
+        stat_key = (config_stat.st_mtime_ns, config_stat.st_size)
+        if stat_key == self.config_stat:
+            return False
+
+        config = cas_config.from_file(self.config_file, allow_incomplete=True)
+
+        devices = {cache.device: cache for cache in config.caches.values()}
+        devices.update({core.device: core for core in config.cores})
+
+        self.config, self.config_stat, self.devices = config, stat_key, devices
+        return True
+
+    def match(self, events):
+        """Configured devices which node or one of symlinks was reported by events"""
+        matched = collections.OrderedDict()
+        for event in events:
+            paths = [event.get('DEVNAME')] + event.get('DEVLINKS', '').split()
+            for path in paths:
+                if path in self.devices:
+                    matched[path] = self.devices[path]
+
+        return list(matched.values())
+
+    def existing(self):
+        """Configured devices which paths are present"""
+        return [dev for path, dev in self.devices.items() if os.path.exists(path)]
+
+    def pending(self, devices):
+        """Devices from the list not set up yet according to current state"""
+        if not devices:
+            return []
+
+        target = cas_config(
+            caches={
+                dev.cache_id: dev for dev in devices if type(dev) is cas_config.cache_config
+            },
+            cores=[dev for dev in devices if type(dev) is cas_config.core_config],
+        )
+
+        return _get_uninitialized_devices(target)
+
+    def load(self, devices, log):
+        """
+        Load caches first and then add cores grouped by cache, so that cores
+        of the same cache are attached back to back. Errors are reported with
+        log(priority, message) and don't stop processing of other devices.
+        Returns number of devices which failed to be set up.
+        """
+        caches = [dev for dev in devices if type(dev) is cas_config.cache_config]
+        cores = sorted(
+            (dev for dev in devices if type(dev) is cas_config.core_config),
+            key=lambda core: (core.cache_id, core.core_id),
+        )
+        failed = 0
+
+        for cache in caches:
+            try:
+                start_cache(cache, load=True)
+            except casadm.CasadmError as e:
+                failed += 1
+                log(syslog.LOG_WARNING,
+                    f'Unable to load cache {cache.cache_id} ({cache.device}). '
+                    f'Reason: {e.result.stderr}')
+
+        for core in cores:
+            try:
+                add_core(core, True)
+            except casadm.CasadmError as e:
+                failed += 1
+                log(syslog.LOG_WARNING,
+                    f'Unable to attach core {core.device} from cache {core.cache_id}. '
+                    f'Reason: {e.result.stderr}')
+
+        return failed
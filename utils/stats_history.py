@@ -0,0 +1,110 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+"""
+Reader of statistics history written by open-cas-stats-recorder. Rings are
+mapped straight into NumPy arrays, so any time window is taken by binary
+search on timestamps and a single copy of the records in it.
+"""
+
+import os
+
+import numpy as np
+
+from stats_recorder import stats_recorder, stats_ring
+
+# Statistics which are current values rather than counters
+GAUGE_FIELDS = ['usage_occupancy', 'usage_free', 'usage_clean', 'usage_dirty']
+
+
+class series(object):
+    """Counters of one device, values[i] sampled at timestamps[i]"""
+
+    def __init__(self, fields, timestamps, values):
+        self.fields = list(fields)
+        self.timestamps = timestamps
+        self.values = values
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def column(self, field):
+        return self.values[:, self.fields.index(field)]
+
+    def deltas(self):
+        """
+        Change of each counter between consecutive samples, as int64 array
+        of len(self) - 1 rows. Counters reset (e.g. by stats reset) count
+        from zero.
+        """
+        values = self.values.astype(np.int64)
+        deltas = np.diff(values, axis=0)
+        counters = np.array([field not in GAUGE_FIELDS for field in self.fields])
+        reset = (deltas < 0) & counters
+        deltas[reset] = values[1:][reset]
+        return deltas
+
+    def rates(self):
+        """Deltas per second, rows correspond to timestamps[1:]"""
+        elapsed = np.diff(self.timestamps)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rates = self.deltas() / elapsed[:, np.newaxis]
+        rates[elapsed <= 0] = np.nan
+        return rates
+
+
+class ring_reader(object):
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            header = f.read(stats_ring.data_offset)
+        self.fields, self.capacity, _ = stats_ring.parse_header(header)
+
+        self.dtype = np.dtype([
+            ('time', '<f8'), ('values', '<u8', (len(self.fields),))
+        ])
+        self.records = np.memmap(path, dtype=self.dtype, mode='r',
+                                 offset=stats_ring.data_offset,
+                                 shape=(self.capacity,))
+        self.header = np.memmap(path, dtype='<u8', mode='r',
+                                offset=stats_ring.head_offset, shape=(1,))
+
+    def get_head(self):
+        return int(self.header[0])
+
+    def read(self, start=None, end=None):
+        """
+        series of records with start <= timestamp <= end (seconds since
+        epoch, None for no limit). Records overwritten by recorder while
+        they were copied are dropped.
+        """
+        head = self.get_head()
+        first = max(head - self.capacity, 0)
+        slots = np.arange(first, head) % self.capacity
+
+        timestamps = self.records['time'][slots]
+        lo = 0 if start is None else np.searchsorted(timestamps, start, 'left')
+        hi = len(slots) if end is None else np.searchsorted(timestamps, end, 'right')
+        records = self.records[slots[lo:hi]]
+
+        # Slot of record head - capacity may have been written meanwhile
+        overwritten = self.get_head() - self.capacity + 1 - (first + lo)
+        records = records[max(overwritten, 0):]
+
+        return series(self.fields, records['time'], records['values'])
+
+
+def list_devices(directory=stats_recorder.location):
+    """Names of devices with recorded history"""
+    suffix = stats_recorder.suffix
+    return sorted(
+        name[:-len(suffix)] for name in os.listdir(directory) if name.endswith(suffix)
+    )
+
+
+def read(name, start=None, end=None, directory=stats_recorder.location):
+    """series of device name (e.g. cache1-core2) between start and end"""
+    return ring_reader(os.path.join(directory, name + stats_recorder.suffix)).read(
+        start, end
+    )
@@ -0,0 +1,124 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+"""
+Live statistics shown by casstat, computed as rates between consecutive
+netlink dumps.
+"""
+
+
+class stats_monitor:
+    """
+    Per cache and core rates between consecutive netlink dumps. Every device
+    has one row with fixed-size counter and value lists, updated in place on
+    each dump, so memory use depends only on number of devices, not on how
+    long the monitor runs.
+    """
+
+    columns = ['rd_iops', 'wr_iops', 'hit_ratio', 'dirty', 'cleaner', 'pt']
+    # Unit of block counters in statistics
+    block_size = 4096
+
+    class row:
+        __slots__ = ['cache_id', 'core_id', 'path', 'counters', 'values', 'generation']
+
+        def __init__(self, cache_id, core_id, path):
+            self.cache_id = cache_id
+            self.core_id = core_id
+            self.path = path
+            # reads, writes, pass-through, hits, lookups, cleaner blocks
+            self.counters = [0] * 6
+            self.values = [float('nan')] * len(stats_monitor.columns)
+            self.generation = -1
+
+    def __init__(self):
+        self.rows = dict()
+        self.order = []
+        self.generation = 0
+        self.last_update = None
+
+    def update_row(self, row, stats, dirty, cache_size, elapsed):
+        counters = row.counters
+        values = row.values
+        hits = stats.req_rd_hits + stats.req_wr_hits
+        reads = stats.req_rd_total + stats.req_rd_pt
+        writes = stats.req_wr_total + stats.req_wr_pt
+        pass_through = stats.req_rd_pt + stats.req_wr_pt
+        lookups = hits + stats.req_rd_partial_misses + stats.req_rd_full_misses \
+            + stats.req_wr_partial_misses + stats.req_wr_full_misses
+        cleaner = stats.blocks_cleaner_core_wr
+
+        values[3] = 100 * dirty / cache_size if cache_size else 0.0
+        if row.generation == self.generation - 1 and elapsed > 0 \
+                and reads >= counters[0] and writes >= counters[1]:
+            requests = reads - counters[0] + writes - counters[1]
+            looked_up = lookups - counters[4]
+            values[0] = (reads - counters[0]) / elapsed
+            values[1] = (writes - counters[1]) / elapsed
+            values[2] = 100 * (hits - counters[3]) / looked_up if looked_up > 0 else float('nan')
+            values[4] = max(cleaner - counters[5], 0) * self.block_size / elapsed
+            values[5] = 100 * (pass_through - counters[2]) / requests if requests else 0.0
+        else:
+            # New device or statistics were reset
+            for i in [0, 1, 2, 4, 5]:
+                values[i] = float('nan')
+
+        counters[0] = reads
+        counters[1] = writes
+        counters[2] = pass_through
+        counters[3] = hits
+        counters[4] = lookups
+        counters[5] = cleaner
+        row.generation = self.generation
+
+    def get_row(self, key, path):
+        row = self.rows.get(key)
+        if row is None or row.path != path:
+            row = self.rows[key] = self.row(key[0], key[1], path)
+        return row
+
+    def update(self, dump, now):
+        """Update rows from dump taken at now (monotonic time)"""
+        elapsed = now - self.last_update if self.last_update is not None else 0
+        self.generation += 1
+        sizes = dict()
+
+        for cache in dump.caches:
+            sizes[cache.id] = cache.size
+            row = self.get_row((cache.id, None), cache.path)
+            self.update_row(row, cache.stats, cache.dirty, cache.size, elapsed)
+        for core in dump.cores:
+            row = self.get_row((core.cache_id, core.id), core.path)
+            self.update_row(row, core.stats, core.dirty, sizes.get(core.cache_id, 0), elapsed)
+
+        for key in [key for key, row in self.rows.items() if row.generation != self.generation]:
+            del self.rows[key]
+
+        self.last_update = now
+
+    def get_order(self, column=None, reverse=False):
+        """
+        Rows of caches sorted by column, each followed by rows of its cores
+        sorted the same way. Devices with no value yet go last.
+        """
+        index = self.columns.index(column) if column else None
+
+        def key(row):
+            if index is None:
+                return (row.cache_id, row.core_id or 0)
+            value = row.values[index]
+            if value != value:
+                return (1, 0.0)
+            return (0, -value if reverse else value)
+
+        cache_rows = [row for row in self.rows.values() if row.core_id is None]
+        cache_rows.sort(key=key)
+        position = {row.cache_id: i for i, row in enumerate(cache_rows)}
+
+        # Sort in place to reuse list between refreshes
+        self.order[:] = self.rows.values()
+        self.order.sort(key=lambda row: (position.get(row.cache_id, len(position)),
+                                         row.core_id is not None, key(row)))
+        return self.order
@@ -0,0 +1,171 @@
+#
+# Copyright(c) 2026 Unvertical
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+"""
+Statistics recorder run by open-cas-stats-recorder, appending counters of
+every cache and core to ring files read by stats_history.
+"""
+
+import mmap
+import os
+import struct
+import syslog
+import time
+
+import opencas
+
+
+class stats_ring:
+    """
+    Fixed-size file with history of statistics counters of one device,
+    written through shared memory mapping. Header holds names of the
+    counters and number of records ever written (head), which is updated
+    after the record itself, so readers can take records without locking.
+    Record is timestamp (seconds since epoch, double) followed by counters
+    (unsigned 64-bit), all little endian. Record with index i is stored in
+    slot i % capacity. Slot of the oldest record is the one written next, so
+    readers can rely on capacity - 1 records only.
+    """
+
+    magic = b'CASSTATS'
+    version = 1
+    # magic, version, field count, capacity, head
+    header = struct.Struct('<8sIIQQ')
+    head_offset = 24
+    names_offset = header.size
+    names_size = 4096 - header.size
+    data_offset = 4096
+
+    def __init__(self, path, fields, capacity):
+        """Open ring at path, recreating it if it was created with other layout"""
+        self.fields = list(fields)
+        self.capacity = capacity
+        self.record = struct.Struct(f'<d{len(self.fields)}Q')
+        names = ','.join(self.fields).encode()
+        if len(names) > self.names_size:
+            raise ValueError('Too many statistics fields to record')
+
+        size = self.data_offset + self.record.size * capacity
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            header = os.pread(fd, self.names_offset + self.names_size, 0)
+            try:
+                fields, capacity, head = self.parse_header(header)
+            except ValueError:
+                fields, capacity, head = None, None, 0
+
+            if fields != self.fields or capacity != self.capacity:
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+                head = 0
+                os.pwrite(fd, self.header.pack(self.magic, self.version, len(self.fields),
+                                               self.capacity, 0) + names, 0)
+
+            self.map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+        self.head = head
+
+    @classmethod
+    def parse_header(cls, data):
+        """(fields, capacity, head) from the beginning of ring file"""
+        if len(data) < cls.names_offset + cls.names_size:
+            raise ValueError('Statistics ring header is truncated')
+
+        magic, version, field_count, capacity, head = cls.header.unpack_from(data)
+        if magic != cls.magic or version != cls.version:
+            raise ValueError('Not a statistics ring file or unsupported version')
+
+        names = bytes(data[cls.names_offset:cls.names_offset + cls.names_size])
+        fields = names.rstrip(b'\0').decode().split(',') if field_count else []
+        if len(fields) != field_count or not capacity:
+            raise ValueError('Statistics ring header is corrupted')
+
+        return fields, capacity, head
+
+    def append(self, timestamp, values):
+        offset = self.data_offset + (self.head % self.capacity) * self.record.size
+        self.record.pack_into(self.map, offset, timestamp, *values)
+        self.head += 1
+        struct.pack_into('<Q', self.map, self.head_offset, self.head)
+
+    def close(self):
+        self.map.close()
+
+
+class stats_recorder:
+    """
+    Records counters of caches, cores and IO classes from netlink dumps into
+    one stats_ring per device, named cache<ID>, cache<ID>-core<ID> and
+    cache<ID>-ioclass<ID>.
+    """
+
+    location = '/var/lib/opencas/stats'
+    suffix = '.ring'
+
+    def __init__(self, directory=location, capacity=6 * 3600):
+        self.directory = directory
+        self.capacity = capacity
+        self.rings = dict()
+
+    @staticmethod
+    def get_devices(dump):
+        """(name, stats) of every device in dump"""
+        devices = []
+        for cache in dump.caches:
+            devices.append((f'cache{cache.id}', cache.stats))
+        for core in dump.cores:
+            devices.append((f'cache{core.cache_id}-core{core.id}', core.stats))
+        for ioclass in dump.ioclasses:
+            devices.append((f'cache{ioclass.cache_id}-ioclass{ioclass.id}', ioclass.stats))
+
+        return devices
+
+    def get_path(self, name):
+        return os.path.join(self.directory, name + self.suffix)
+
+    def record(self, dump, timestamp):
+        """
+        Append counters of every device in dump. Rings of devices which are
+        gone are closed but left on disk for later analysis.
+        """
+        fields = opencas.cas_netlink.stats_fields
+        seen = set()
+
+        for name, stats in self.get_devices(dump):
+            ring = self.rings.get(name)
+            if ring is None:
+                ring = self.rings[name] = stats_ring(self.get_path(name), fields, self.capacity)
+            ring.append(timestamp, [getattr(stats, field) for field in fields])
+            seen.add(name)
+
+        for name in set(self.rings) - seen:
+            self.rings.pop(name).close()
+
+    def close(self):
+        for ring in self.rings.values():
+            ring.close()
+        self.rings.clear()
+
+    def run(self, interval, log=lambda priority, message: None):
+        # Keep to schedule, so that slow dumps don't stretch the interval
+        deadline = time.monotonic()
+        try:
+            while True:
+                try:
+                    self.record(opencas.cas_netlink.dump(), time.time())
+                except Exception as e:
+                    log(syslog.LOG_ERR, f'Unable to record statistics. Reason: {str(e)}')
+
+                deadline += interval
+                delay = deadline - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    deadline = time.monotonic()
+        finally:
+            self.close()
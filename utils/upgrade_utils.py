@@ -4,11 +4,14 @@
 # SPDX-License-Identifier: BSD-3-Clause
 #
 
+import json
 import logging
 import subprocess
 import os
 import re
 
+import opencas
+
 
 def user_prompt(message, choices, default):
     result = None
@@ -62,32 +65,165 @@ class Abort(Failure):
         return "[\u001b[31mA\u001b[0m]"
 
 
+result_types = {cls.__name__: cls for cls in [Success, Warn, Failure, Except, Abort]}
+
+
+class Journal:
+    """
+    Results of states of a StateMachine, saved after every state so that
+    a re-run of the machine with the same parameters can skip states that
+    have already been completed.
+    """
+
+    def __init__(self, path, machine, params):
+        self.path = path
+        self.machine = machine
+        self.params = self._normalize(params)
+        self.states = {}
+
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable journal {path}. Reason: {e}")
+            return
+
+        if data.get("machine") != machine or data.get("params") != self.params:
+            logging.info(f"Journal {path} was written for different run, ignoring it")
+            return
+
+        self.states = data.get("states", {})
+        logging.info(f"Loaded journal {path} with states {list(self.states)}")
+
+    @staticmethod
+    def _normalize(value):
+        return json.loads(json.dumps(value, default=str, sort_keys=True))
+
+    def get(self, state, preconditions):
+        """
+        Recorded result of successfully completed state, None if state has to
+        be run because it wasn't completed or its preconditions changed.
+        """
+        entry = self.states.get(state.__name__)
+        if entry is None:
+            return None
+
+        result_type = result_types.get(entry["result"])
+        if result_type not in [Success, Warn]:
+            return None
+
+        if entry["preconditions"] != self._normalize(preconditions):
+            logging.info(f"Preconditions of {state.__name__} changed, running it again")
+            return None
+
+        return result_type(entry["msg"])
+
+    def start(self, state):
+        # Result of previous run is no longer valid once the state is rerun
+        if self.states.pop(state.__name__, None) is not None:
+            self.save()
+
+    def record(self, state, result, preconditions):
+        self.states[state.__name__] = {
+            "result": type(result).__name__,
+            "msg": result.msg,
+            "preconditions": self._normalize(preconditions),
+        }
+        self.save()
+
+    def save(self):
+        data = {"machine": self.machine, "params": self.params, "states": self.states}
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            # Losing the journal only means redoing work on retry
+            logging.warning(f"Unable to save journal {self.path}. Reason: {e}")
+
+    def clear(self):
+        self.states = {}
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
 class StateMachine:
+    """
+    Runs states starting from initial_state, the next state is chosen from
+    transition_map by type of result of the current one.
+
+    If journal_file is given, results are recorded there after each state and
+    a re-run with the same parameters skips states marked with checkpoint
+    that completed successfully before, provided that their preconditions
+    still hold. Journal is removed once the machine finishes successfully.
+    """
+
     transition_map = {}
 
-    def __init__(self, initial_state, **args):
+    def __init__(self, initial_state, journal_file=None, **args):
         self.initial_state = initial_state
         self.params = args
+        self.journal = None
+        if journal_file:
+            self.journal = Journal(journal_file, type(self).__name__, args)
+
+    def next_state(self, s, result):
+        try:
+            return self.transition_map[s][type(result)]
+        except KeyError:
+            try:
+                return self.transition_map[s]["default"]
+            except KeyError:
+                return self.transition_map["default"]
+
+    def run_state(self, s):
+        state = s(self)
+        self.current_state = state
+
+        try:
+            return self._run_state(s, state)
+        finally:
+            # States load modules and start or stop caches, devices seen
+            # before them can't be trusted after
+            opencas.sysfs_index.invalidate()
+
+    def _run_state(self, s, state):
+        if self.journal is None:
+            return state.start()
+
+        if state.checkpoint:
+            result = self.journal.get(s, state.preconditions())
+            if result is not None:
+                state.resume(result)
+                return result
+
+        self.journal.start(s)
+        result = state.start()
+        if state.checkpoint and isinstance(result, (Success, Warn)):
+            self.journal.record(s, result, state.preconditions())
+
+        return result
 
     def run(self):
         s = self.initial_state
         result = Success()
         self.last_fail = None
+        finished = False
         try:
             while s is not None:
-                self.current_state = s(self)
-
-                result = self.current_state.start()
+                result = self.run_state(s)
                 if isinstance(result, Failure):
                     self.last_fail = result
 
-                try:
-                    s = self.transition_map[s][type(result)]
-                except KeyError:
-                    try:
-                        s = self.transition_map[s]["default"]
-                    except KeyError:
-                        s = self.transition_map["default"]
+                s = self.next_state(s, result)
+            finished = True
         except KeyboardInterrupt:
             self.result = self.abort()
         except Exception as e:
@@ -95,6 +231,8 @@ class StateMachine:
 
         if self.last_fail:
             result = self.last_fail
+        elif finished and self.journal is not None:
+            self.journal.clear()
 
         logging.info(f"Finishing {type(self).__name__} with result {result}")
         return result
@@ -118,6 +256,8 @@ class StateMachine:
 class UpgradeState:
     will_prompt = False
     log = ""
+    # Whether successful result may be reused when resuming from journal
+    checkpoint = False
 
     def __init__(self, sm):
         self.state_machine = sm
@@ -125,6 +265,20 @@ class UpgradeState:
     def do_work(self):
         raise NotImplementedError()
 
+    def preconditions(self):
+        """
+        JSON serializable description of system state this state's result
+        depends on (e.g. module version, dirty data of caches). It's recorded
+        after the state succeeds, the state is skipped on resume only if it
+        still matches.
+        """
+        return {}
+
+    def resume(self, result):
+        self.result = result
+        logging.info(f"Skipping state {type(self).__name__} completed before with '{result}'")
+        print(f"{self.log+'...':60}{result.result_mark()} (resumed)")
+
     def start(self):
         self.enter_state()
         try:
@@ -180,19 +334,14 @@ def remove_module(name):
 
 
 def get_device_sysfs_path(device):
-    basename = os.path.basename(device)
-
-    p1 = subprocess.Popen(["find", "-L", "/sys/block", "-maxdepth", "2"], stdout=subprocess.PIPE)
-    p2 = subprocess.Popen(["grep", f"{basename}$"], stdin=p1.stdout, stdout=subprocess.PIPE)
-    p3 = subprocess.Popen(
-        ["sed", "-r", "s/(\/sys\/block\/[^/]+).*/\\1/"], stdin=p2.stdout, stdout=subprocess.PIPE
-    )  # noqa W605
-    p1.stdout.close()
-    p2.stdout.close()
-
-    output = p3.communicate()[0]
-
-    return output.decode("ascii").rstrip("\n")
+    """
+    /sys/block directory of the device or of the disk its partition is on,
+    empty string if the device is unknown. Shared index is rebuilt if the
+    device is missing from it or its entry is stale.
+    """
+    found = opencas.sysfs_index.lookup_current(device)
+
+    return os.path.join(opencas.sysfs_index.sys_block, found.disk) if found else ""
 
 
 def get_device_schedulers(sysfs_path):